@@ -8,6 +8,7 @@ import datetime
 import openai
 import logging
 from semantic_pipeline import tag_chunk, save_annotations
+from theme_clusters import get_theme_clusters
 from flask import current_app
 
 logger = logging.getLogger(__name__)
@@ -57,13 +58,37 @@ async def get_insights(interview_id: str):
 
 @analysis_bp.route('/affinity-diagram/<project_name>', methods=['GET'])
 async def get_affinity_diagram(project_name: str):
-    """Get affinity diagram for all insights in a project"""
+    """Get affinity diagram for all insights in a project ("all" for every project)
+    
+    Served from the precomputed cross-session theme clusters (see
+    theme_clusters.py); no LLM call is made here.
+    """
     try:
-        # TODO: Implement persistence layer
-        # For now, return a mock response
+        filters = {
+            "project": None if project_name == 'all' else project_name,
+            "session_id": request.args.get('session_id')
+        }
+        max_items = request.args.get('max_items', 10, type=int)
+        if max_items < 1:
+            return jsonify({"error": "max_items must be a positive integer"}), 400
+        return jsonify(get_theme_clusters().affinity_diagram(filters, max_items=max_items)), 200
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@analysis_bp.route('/themes/recluster', methods=['POST'])
+def recluster_themes():
+    """Recluster all ingested chunks and relabel the themes that changed"""
+    try:
+        clusters = get_theme_clusters()
+        clusters.recluster()
+        clusters.save()
+        thread = clusters.refresh_labels_in_background()
         return jsonify({
-            "error": "Not implemented yet - affinity diagram storage coming soon"
-        }), 501
+            "themes": len(clusters.cluster_ids),
+            "chunks": len(clusters),
+            "relabelling": thread is not None
+        }), 200
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -1,5 +1,4 @@
 import os
-import json
 import logging
 import asyncio
 from typing import Dict, Any, List, Optional
@@ -10,6 +9,8 @@ import openai
 from flask import Blueprint, request, jsonify, current_app
 from flask_cors import CORS
 
+import serialization
+
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -48,9 +49,8 @@ class MemoryCompanionService:
     def _load_project_data(self) -> Dict[str, Any]:
         """Load project data from file or create default data if it doesn't exist"""
         try:
-            with open(self.project_data_file, 'r') as f:
-                return json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
+            return serialization.read_json(self.project_data_file)
+        except (FileNotFoundError, serialization.JSONDecodeError):
             # Create default project data
             default_data = {
                 "name": "Daria Interview Tool",
@@ -76,15 +76,13 @@ class MemoryCompanionService:
             }
             
             # Save default data
-            with open(self.project_data_file, 'w') as f:
-                json.dump(default_data, f, indent=2)
+            serialization.write_json(self.project_data_file, default_data)
                 
             return default_data
     
     def _save_project_data(self):
         """Save project data to file"""
-        with open(self.project_data_file, 'w') as f:
-            json.dump(self.project_data, f, indent=2)
+        serialization.write_json(self.project_data_file, self.project_data, atomic=True)
     
     def add_timeline_event(self, event: str) -> Dict[str, Any]:
         """Add a new event to the project timeline"""
@@ -1,7 +1,7 @@
 import eventlet
 eventlet.monkey_patch()
 
-from flask import Flask, render_template, request, jsonify, send_file, redirect, url_for, flash, session, current_app
+from flask import Flask, render_template, request, jsonify, send_file, redirect, url_for, flash, session, current_app, Response, stream_with_context
 from flask_socketio import SocketIO, emit
 from flask_cors import CORS
 from elevenlabs import stream
@@ -14,6 +14,7 @@ import wave
 import numpy as np
 import uuid
 import json
+import threading
 from langchain_openai import ChatOpenAI
 from langchain.memory import ConversationBufferMemory
 from langchain.chains import ConversationChain
@@ -34,9 +35,12 @@ import MySQLdb
 from werkzeug.utils import secure_filename
 import re
 import markdown2
-from daria_interview_tool.semantic_analysis import SemanticAnalyzer
+from daria_interview_tool.semantic_analysis import SemanticAnalyzer, SENTENCE_MODEL_NAME
+from model_registry import get_model_registry, prewarm_from_env
 from sklearn.metrics.pairwise import cosine_similarity
 from daria_interview_tool.processed_interview_store import ProcessedInterviewStore
+from daria_interview_tool.interview_search_index import FuzzyInterviewIndex, interview_search_fields
+from full_text_index import FullTextIndex
 import sys
 from daria_interview_tool.discovery_gpt import DiscoveryGPT
 from asgiref.sync import async_to_sync
@@ -198,6 +202,77 @@ app.vector_store = None
 
 # Initialize semantic analyzer
 semantic_analyzer = SemanticAnalyzer()
+# Models load on first use; DARIA_PREWARM_MODELS loads them in the background now
+prewarm_from_env()
+
+# Guards the lazy creation of the search indexes below
+search_index_lock = threading.Lock()
+
+# Fuzzy search index over interviews/raw, created on first use
+fuzzy_index = None
+FUZZY_SEARCH_LIMIT = 50
+
+def get_fuzzy_index():
+    """Get the fuzzy search index for the raw interviews."""
+    global fuzzy_index
+    if fuzzy_index is None:
+        with search_index_lock:
+            if fuzzy_index is None:
+                INTERVIEWS_DIR.mkdir(parents=True, exist_ok=True)
+                fuzzy_index = FuzzyInterviewIndex(str(INTERVIEWS_DIR), semantic_analyzer.sentence_transformer.encode,
+                                                  SENTENCE_MODEL_NAME)
+    return fuzzy_index
+
+# Full-text index over interviews/raw, created on first use
+text_index = None
+RAW_TEXT_FIELDS = ('participant', 'project', 'themes', 'insights', 'transcript')
+EXACT_SEARCH_LIMIT = 50
+# How often exact search rescans interviews/raw for files edited outside app.py
+TEXT_INDEX_SYNC_SECONDS = 2.0
+
+def get_text_index():
+    """Get the full-text index for the raw interviews."""
+    global text_index
+    if text_index is None:
+        with search_index_lock:
+            if text_index is None:
+                text_index = FullTextIndex(str(INTERVIEWS_DIR / '.text_index.db'), RAW_TEXT_FIELDS)
+    return text_index
+
+def _text_index_document(interview_id):
+    """Full-text rows and archive summary for a raw interview, or None if it can't be read."""
+    try:
+        with open(INTERVIEWS_DIR / f"{interview_id}.json", 'r') as f:
+            interview = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError) as e:
+        logger.error(f"Error reading interview {interview_id} for indexing: {str(e)}")
+        return None
+    fields = interview_search_fields(interview)
+    row = {
+        'participant': fields['participant_name'],
+        'project': fields['project_name'],
+        'themes': ' | '.join(fields['themes']),
+        'insights': ' | '.join(fields['insights']),
+        'transcript': fields['transcript']
+    }
+    return [row], _summarize_interview(interview_id, interview)
+
+def refresh_search_indexes(interview_id):
+    """Update the search indexes after a raw interview was saved or deleted."""
+    try:
+        get_fuzzy_index().refresh([interview_id])
+    except Exception as e:
+        logger.error(f"Error updating fuzzy index for {interview_id}: {str(e)}")
+    try:
+        file_path = INTERVIEWS_DIR / f"{interview_id}.json"
+        document = _text_index_document(interview_id) if file_path.exists() else None
+        if document is None:
+            get_text_index().remove(interview_id)
+        else:
+            stat = file_path.stat()
+            get_text_index().update(interview_id, document[0], (stat.st_mtime_ns, stat.st_size), document[1])
+    except Exception as e:
+        logger.error(f"Error updating full-text index for {interview_id}: {str(e)}")
 
 # Add emotion icon filter
 @app.template_filter('emotion_icon')
@@ -242,20 +317,7 @@ def list_interviews():
                     
                 # Extract interview ID from filename
                 interview_id = os.path.splitext(filename)[0]
-                
-                # Create summary dictionary using transcript_name directly
-                summary = {
-                    'id': interview_id,
-                    'title': interview.get('title', 'Untitled Interview'),
-                    'type': interview.get('interview_type', 'Interview'),
-                    'created_at': interview.get('created_at', datetime.now().isoformat()),
-                    'participant_name': interview.get('transcript_name', 'Untitled Interview'),
-                    'project_name': interview.get('project_name', 'Unassigned'),
-                    'transcript_name': interview.get('transcript_name', ''),
-                    'metadata': interview.get('metadata', {}),
-                    'has_analysis': bool(interview.get('analysis')),
-                    'content_preview': _get_content_preview(interview)
-                }
+                summary = _summarize_interview(interview_id, interview)
                 
                 interviews.append(summary)
                 logger.info(f"Added interview: {interview_id} - {summary['participant_name']}")
@@ -275,6 +337,22 @@ def list_interviews():
         logger.error(f"Error listing interviews: {str(e)}")
         return []
 
+def _summarize_interview(interview_id: str, interview: dict) -> dict:
+    """Build the archive summary of a raw interview."""
+    # Create summary dictionary using transcript_name directly
+    return {
+        'id': interview_id,
+        'title': interview.get('title', 'Untitled Interview'),
+        'type': interview.get('interview_type', 'Interview'),
+        'created_at': interview.get('created_at', datetime.now().isoformat()),
+        'participant_name': interview.get('transcript_name', 'Untitled Interview'),
+        'project_name': interview.get('project_name', 'Unassigned'),
+        'transcript_name': interview.get('transcript_name', ''),
+        'metadata': interview.get('metadata', {}),
+        'has_analysis': bool(interview.get('analysis')),
+        'content_preview': _get_content_preview(interview)
+    }
+
 def _get_content_preview(interview: dict, max_length: int = 200) -> str:
     """Get a preview of the interview content, showing only participant responses."""
     try:
@@ -366,6 +444,7 @@ def delete_interview(interview_id):
                 logger.error(f"Error removing interview from vector store: {str(e)}")
                 logger.error(traceback.format_exc())
         
+        refresh_search_indexes(interview_id)
         return True
     except Exception as e:
         logger.error(f"Error deleting interview: {str(e)}")
@@ -665,8 +744,8 @@ try:
         
         if interviews:
             logger.info(f"Adding {len(interviews)} interviews to vector store...")
+            # Unchanged interviews are skipped, and add_interviews saves if anything changed
             vector_store.add_interviews(interviews)
-            vector_store.save_vector_store()
             logger.info("Vector store initialized successfully")
         else:
             logger.warning("No interviews found to load into vector store")
@@ -1532,6 +1611,7 @@ def update_interview_data(interview_id, analysis):
         # Save updated interview
         with open(file_path, 'w') as f:
             json.dump(interview_data, f, indent=2)
+        refresh_search_indexes(interview_id)
             
         logger.info(f"Interview {interview_id} updated successfully")
         return interview_id
@@ -1850,65 +1930,32 @@ def archive():
 # Add search endpoints
 @app.route('/api/search/exact', methods=['GET'])
 def search_exact():
-    """Exact match search for interviews."""
+    """Exact match search for interviews.
+
+    Served from the full-text index over participant and project names,
+    themes, insights and transcripts. Quoted text matches as a phrase,
+    ``field:word`` (participant, project, themes, insights, transcript)
+    restricts a term to one field, the ``fields`` argument (comma separated)
+    restricts the whole query, and the last word matches as a prefix.
+    """
     try:
-        query = request.args.get('q', '').lower()
-        if not query:
+        query = request.args.get('q', '')
+        if not query.strip():
             return jsonify({'success': True, 'interviews': []})
+        fields = [field.strip() for field in request.args.get('fields', '').split(',') if field.strip()]
+        limit = request.args.get('limit', EXACT_SEARCH_LIMIT, type=int)
         
-        interviews = list_interviews()
-        results = []
+        index = get_text_index()
+        index.sync(str(INTERVIEWS_DIR), _text_index_document, max_age=TEXT_INDEX_SYNC_SECONDS)
         
-        for interview in interviews:
-            # Get the full interview data to search in transcript
-            interview_file = Path('interviews/raw') / f"{interview['id']}.json"
-            try:
-                with open(interview_file, 'r') as f:
-                    full_interview = json.load(f)
-                    transcript = full_interview.get('transcript', '')
-            except:
-                transcript = ''
-            
-            # Search in participant name
-            if query in interview.get('participant_name', '').lower():
-                results.append(interview)
-                continue
-            
-            # Search in project name
-            if query in interview.get('project_name', '').lower():
-                results.append(interview)
-                continue
-            
-            # Search in themes
-            if any(query in theme.lower() for theme in interview.get('themes', [])):
-                results.append(interview)
-                continue
-            
-            # Search in insights
-            if any(query in insight.lower() for insight in interview.get('insights', [])):
-                results.append(interview)
-                continue
-            
-            # Search in transcript preview
-            if query in interview.get('preview', '').lower():
-                results.append(interview)
-                continue
-                
-            # Search in full transcript
-            if transcript and query in transcript.lower():
-                # Generate a preview around the match
-                match_start = transcript.lower().find(query)
-                preview_start = max(0, match_start - 100)
-                preview_end = min(len(transcript), match_start + len(query) + 100)
-                preview = transcript[preview_start:preview_end]
-                if preview_start > 0:
-                    preview = '...' + preview
-                if preview_end < len(transcript):
-                    preview = preview + '...'
-                    
-                interview['preview'] = preview
-                results.append(interview)
+        results = []
+        for hit in index.search(query, fields=fields or None, limit=limit):
+            if not hit['summary']:
                 continue
+            interview = hit['summary']
+            interview['preview'] = hit['snippet']
+            interview['score'] = hit['score']
+            results.append(interview)
         
         return jsonify({'success': True, 'interviews': results})
         
@@ -1916,119 +1963,97 @@ def search_exact():
         logger.error(f"Error in exact search: {str(e)}")
         return jsonify({'success': False, 'error': str(e)})
 
+@app.route('/api/models/status', methods=['GET'])
+def models_status():
+    """Load state, load time and memory of the shared ML models."""
+    return jsonify({'success': True, 'models': get_model_registry().stats()})
+
 @app.route('/api/search/fuzzy', methods=['GET'])
 def search_fuzzy():
-    """Fuzzy match search for interviews using semantic similarity."""
+    """Fuzzy match search for interviews using semantic similarity.
+
+    Interviews are scored against the prebuilt fuzzy index. With
+    ``stream=1`` (or ``Accept: text/event-stream``) results are sent as
+    Server-Sent Events: the first event ranks the interviews already
+    indexed, and while new or edited interviews are being embedded further
+    events re-rank with them included. ``is_partial`` is true until the
+    index covers every interview; ``pending`` counts the ones left.
+    Without streaming the index is brought up to date first and a single
+    JSON response is returned.
+    """
     try:
         query = request.args.get('q', '')
         if not query:
-            return jsonify({'success': True, 'interviews': []})
-        
-        # Get semantic analyzer instance
-        analyzer = SemanticAnalyzer()
-        query_embedding = np.array(analyzer.get_embedding(query)).reshape(1, -1)  # Reshape to 2D
-        
-        interviews = list_interviews()
-        results = []
-        
-        # Process interviews in smaller batches
-        batch_size = 5
-        for i in range(0, len(interviews), batch_size):
-            batch = interviews[i:i + batch_size]
-            batch_results = []
-            
-            for interview in batch:
-                similarity_score = 0
-                preview_text = None
-                
-                # Get the full interview data
-                interview_file = Path('interviews/raw') / f"{interview['id']}.json"
-                try:
-                    with open(interview_file, 'r') as f:
-                        full_interview = json.load(f)
-                        transcript = full_interview.get('transcript', '')
-                        # Get default preview
-                        preview_text = _get_content_preview(full_interview)
-                except:
-                    transcript = ''
-                    preview_text = 'No preview available'
-                
-                # Compare with participant name and project name together
-                metadata_text = ' '.join(filter(None, [
-                    interview.get('participant_name', ''),
-                    interview.get('project_name', '')
-                ]))
-                if metadata_text:
-                    metadata_embedding = np.array(analyzer.get_embedding(metadata_text)).reshape(1, -1)
-                    similarity_score = max(similarity_score, 
-                                        cosine_similarity(query_embedding, metadata_embedding)[0][0])
-                
-                # Compare with themes and insights together
-                tags_text = ' '.join(filter(None, 
-                    interview.get('themes', []) + interview.get('insights', [])
-                ))
-                if tags_text:
-                    tags_embedding = np.array(analyzer.get_embedding(tags_text)).reshape(1, -1)
-                    similarity_score = max(similarity_score, 
-                                        cosine_similarity(query_embedding, tags_embedding)[0][0])
-                
-                # Compare with transcript content
-                if transcript:
-                    # Use larger chunks to reduce number of embeddings
-                    chunk_size = 1000
-                    for i in range(0, len(transcript), chunk_size):
-                        chunk = transcript[i:i + chunk_size]
-                        chunk_embedding = np.array(analyzer.get_embedding(chunk)).reshape(1, -1)
-                        chunk_similarity = cosine_similarity(query_embedding, chunk_embedding)[0][0]
-                        
-                        if chunk_similarity > similarity_score:
-                            similarity_score = chunk_similarity
-                            # Update preview if this is the best matching chunk
-                            preview_start = max(0, i - 100)
-                            preview_end = min(len(transcript), i + chunk_size + 100)
-                            preview_text = transcript[preview_start:preview_end]
-                            if preview_start > 0:
-                                preview_text = '...' + preview_text
-                            if preview_end < len(transcript):
-                                preview_text = preview_text + '...'
-                
-                # Add to results if similarity is above threshold
-                if similarity_score > 0.3:  # Lowered threshold to catch more matches
-                    interview['similarity_score'] = float(similarity_score)
-                    interview['preview'] = preview_text
-                    batch_results.append(interview)
-            
-            # Add batch results to main results
-            results.extend(batch_results)
-            
-            # Sort current results by similarity score
-            results.sort(key=lambda x: x['similarity_score'], reverse=True)
-            
-            # Return current batch as a response
-            response = jsonify({
-                'success': True,
-                'interviews': results,
-                'is_partial': i + batch_size < len(interviews)
-            })
-            response.headers['Content-Type'] = 'application/json'
-            return response
-        
-        # Log for debugging
-        logger.info(f"Fuzzy search for '{query}' found {len(results)} results")
-        for result in results[:3]:  # Log top 3 results
-            logger.info(f"Score: {result['similarity_score']:.3f}, Preview: {result.get('preview', '')[:100]}")
-        
-        # Return final results
-        return jsonify({
-            'success': True,
-            'interviews': results,
-            'is_partial': False
-        })
+            return jsonify({'success': True, 'interviews': [], 'is_partial': False})
+        limit = request.args.get('limit', FUZZY_SEARCH_LIMIT, type=int)
+        stream = (request.args.get('stream', '').lower() in ('1', 'true')
+                  or request.accept_mimetypes.best == 'text/event-stream')
+
+        index = get_fuzzy_index()
+        query_embedding = semantic_analyzer.get_embeddings(query)
+        if query_embedding is None:
+            return jsonify({'success': False, 'error': 'Failed to embed query'})
+
+        if not stream:
+            for _ in index.catch_up():
+                pass
+            results = _fuzzy_results(index, query_embedding, limit)
+            logger.info(f"Fuzzy search for '{query}' found {len(results)} results")
+            return jsonify({'success': True, 'interviews': results, 'is_partial': False})
+
+        def events():
+            try:
+                changed, removed = index.pending()
+                pending = len(changed)
+                yield _sse_event({
+                    'success': True,
+                    'interviews': _fuzzy_results(index, query_embedding, limit),
+                    'is_partial': pending > 0,
+                    'pending': pending
+                })
+                if not (changed or removed):
+                    return
+                for pending in index.catch_up():
+                    yield _sse_event({
+                        'success': True,
+                        'interviews': _fuzzy_results(index, query_embedding, limit),
+                        'is_partial': pending > 0,
+                        'pending': pending
+                    })
+            except Exception as e:
+                logger.error(f"Error in fuzzy search stream: {str(e)}")
+                yield _sse_event({'success': False, 'error': str(e), 'is_partial': False})
+
+        return Response(stream_with_context(events()), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
         
     except Exception as e:
         logger.error(f"Error in fuzzy search: {str(e)}")
         return jsonify({'success': False, 'error': str(e)})
 
+def _fuzzy_results(index, query_embedding, limit):
+    """Load summaries and previews for the top fuzzy index hits."""
+    results = []
+    for hit in index.search(query_embedding, limit=limit):
+        interview_file = INTERVIEWS_DIR / f"{hit['id']}.json"
+        try:
+            with open(interview_file, 'r') as f:
+                full_interview = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            # Deleted or rewritten since it was indexed
+            continue
+        interview = _summarize_interview(hit['id'], full_interview)
+        interview['similarity_score'] = hit['similarity_score']
+        interview['preview'] = (
+            FuzzyInterviewIndex.unit_preview(full_interview.get('transcript', '') or '', hit['unit'])
+            or _get_content_preview(full_interview)
+        )
+        results.append(interview)
+    return results
+
+def _sse_event(data):
+    return f"data: {json.dumps(data)}\n\n"
+
 @app.route('/transcript/<interview_id>')
 def view_transcript(interview_id):
     """View interview transcript."""
@@ -2309,27 +2334,6 @@ def search_interviews():
             'error': 'Failed to search interviews'
         }), 500
 
-def get_match_preview(text, query, window=100):
-    """Get a preview of text around the search query match."""
-    if not text or not query:
-        return ""
-    
-    text = text.lower()
-    index = text.find(query)
-    if index == -1:
-        # If exact query not found, return start of text
-        return text[:window] + "..." if len(text) > window else text
-        
-    # Calculate preview window
-    start = max(0, index - window // 2)
-    end = min(len(text), index + len(query) + window // 2)
-    
-    # Add ellipsis if necessary
-    prefix = "..." if start > 0 else ""
-    suffix = "..." if end < len(text) else ""
-    
-    return prefix + text[start:end] + suffix
-
 @app.route('/similar_interviews/<interview_id>')
 def similar_interviews(interview_id):
     """Find interviews similar to a given interview."""
@@ -3553,6 +3557,7 @@ def upload_transcript():
         transcript_path = INTERVIEWS_DIR / f"{transcript_id}.json"
         with open(transcript_path, 'w', encoding='utf-8') as f:
             json.dump(transcript_data, f, indent=2)
+        refresh_search_indexes(transcript_id)
         
         # Add to vector store
         try:
@@ -3610,6 +3615,7 @@ def advanced_search():
                 'content': result['content'],
                 'similarity': result['similarity'],
                 'timestamp': result['timestamp'],
+                'snippet': result.get('snippet'),
                 'metadata': {
                     'emotion': result['metadata'].get('emotion', 'neutral'),
                     'emotion_intensity': result['metadata'].get('emotion_intensity', 0.5),
@@ -3997,6 +4003,7 @@ def analyze_interview(interview_id):
         # Save updated interview back to the same location
         with open(interview_file, 'w') as f:
             json.dump(interview_data, f, indent=2)
+        refresh_search_indexes(interview_id)
             
         return jsonify({
             'status': 'success',
@@ -4036,9 +4043,11 @@ def update_chunk(chunk_id):
                 if 'metadata' in data:
                     chunk['metadata'].update(data['metadata'])
                 
-                # Save the updated interview
-                if not update_interview_data(interview_id, interview):
-                    return jsonify({'error': 'Failed to save changes'}), 500
+                # Save the updated interview (update_interview_data only
+                # replaces the analysis)
+                with open(INTERVIEWS_DIR / f"{interview_id}.json", 'w') as f:
+                    json.dump(interview, f, indent=2)
+                refresh_search_indexes(interview_id)
                     
                 return jsonify({
                     'status': 'success',
@@ -4099,6 +4108,7 @@ def api_advanced_search():
                     'content': result['content'],
                     'similarity': result.get('similarity', 1.0),
                     'timestamp': result['timestamp'],
+                    'snippet': result.get('snippet'),
                     'interviewee_name': result.get('interviewee_name', ''),
                     'transcript_name': result.get('transcript_name', ''),
                     'metadata': {
@@ -18,7 +18,7 @@ def login():
     form = LoginForm()
     
     if form.validate_on_submit():
-        repo = UserRepository()
+        repo = UserRepository.get_instance()
         user = repo.get_user_by_username(form.username.data)
         
         if user is None or not user.check_password(form.password.data):
@@ -57,7 +57,7 @@ def register():
     form = RegistrationForm()
     
     if form.validate_on_submit():
-        repo = UserRepository()
+        repo = UserRepository.get_instance()
         
         # Check if username or email already exists
         if repo.get_user_by_username(form.username.data):
@@ -97,7 +97,7 @@ def reset_password_request():
     form = RequestPasswordResetForm()
     
     if form.validate_on_submit():
-        repo = UserRepository()
+        repo = UserRepository.get_instance()
         user = repo.get_user_by_email(form.email.data)
         
         if user:
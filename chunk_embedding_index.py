@@ -0,0 +1,325 @@
+"""
+Precomputed, memory-mapped embedding matrices over interview chunks.
+
+Shared by the processed interview stores (semantic search) and the raw
+interview fuzzy search index.
+"""
+
+import json
+import logging
+import os
+import threading
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from embedding_service import get_embedding_service
+from quantization import RESCORE_MARGIN, RESCORE_MULTIPLIER, quantize, rescore, resolve_precision, similarity
+
+logger = logging.getLogger(__name__)
+
+SEARCH_MODEL_NAME = 'multi-qa-MiniLM-L6-cos-v1'
+CHUNK_INDEX_VERSION = 1
+MIN_SEMANTIC_SIMILARITY = 0.3
+
+
+def chunk_content(chunk: Dict) -> str:
+    return chunk.get('content') or chunk.get('text') or chunk.get('combined_text', '')
+
+
+class ChunkEmbeddingIndex:
+    """Precomputed embeddings for every processed interview chunk.
+
+    Embeddings are stored as one contiguous, L2-normalized float32 matrix
+    (``embeddings.npy``, opened memory-mapped) next to a parallel metadata
+    table (``chunks.json``) with one ``[interview_id, chunk_index, emotion,
+    themes]`` row per matrix row. Rows of one interview are contiguous, and
+    the table records the (mtime, size) of the interview file they were
+    computed from so stale interviews can be re-embedded.
+
+    With a float16 or int8 ``precision`` (default: DARIA_VECTOR_PRECISION),
+    searches scan a quantized copy of the matrix (``embeddings.<precision>.npy``,
+    plus ``embeddings.scales.npy`` for int8) instead, and the float32 matrix
+    is only read for the rows ``rescore`` re-ranks.
+    """
+
+    def __init__(self, index_dir: str, encode_fn, model_name: str = SEARCH_MODEL_NAME,
+                 precision: Optional[str] = None, rescore: bool = True):
+        self.index_dir = index_dir
+        self.encode_fn = encode_fn
+        self.model_name = model_name
+        self.precision = resolve_precision(precision)
+        self.rescore = rescore
+        self.matrix_path = os.path.join(index_dir, 'embeddings.npy')
+        self.codes_path = os.path.join(index_dir, f'embeddings.{self.precision}.npy')
+        self.scales_path = os.path.join(index_dir, 'embeddings.scales.npy')
+        self.table_path = os.path.join(index_dir, 'chunks.json')
+        self.interviews = {}
+        self.rows = []
+        self.matrix = None
+        # Quantized copy of the matrix (None at float32)
+        self.codes = None
+        self.scales = None
+        self._table_mtime = None
+        self._emotion_masks = {}
+        self._theme_masks = {}
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        self.load()
+        return len(self.rows)
+
+    @property
+    def emotions(self) -> Set[str]:
+        """Distinct (lowercased) chunk emotions in the index."""
+        return set(self.snapshot()['emotion_masks'])
+
+    def load(self) -> None:
+        """(Re)open the index if another writer replaced it since the last load."""
+        with self._lock:
+            try:
+                mtime = os.stat(self.table_path).st_mtime_ns
+            except FileNotFoundError:
+                mtime = None
+            if mtime == self._table_mtime and (mtime is None or self.matrix is not None):
+                return
+            interviews, rows, matrix, quantized = {}, [], None, None
+            if mtime is not None:
+                try:
+                    with open(self.table_path, 'r') as f:
+                        table = json.load(f)
+                    if table.get('version') == CHUNK_INDEX_VERSION and table.get('model') == self.model_name:
+                        interviews, rows = table['interviews'], table['rows']
+                        if rows:
+                            matrix = np.load(self.matrix_path, mmap_mode='r')
+                            if matrix.shape[0] != len(rows):
+                                raise ValueError(f"matrix has {matrix.shape[0]} rows, table has {len(rows)}")
+                            if self.precision != 'float32' and table.get('precision', 'float32') == self.precision:
+                                quantized = self._load_codes(len(rows))
+                except Exception as e:
+                    logger.error(f"Error loading chunk index {self.index_dir}, rebuilding: {str(e)}")
+                    interviews, rows, matrix, quantized = {}, [], None, None
+            self._set(interviews, rows, matrix, quantized)
+            self._table_mtime = mtime
+
+    def update(self, changed: Dict[str, Tuple[Optional[list], List[Dict]]], removed: Set[str] = ()) -> None:
+        """Replace the rows of changed interviews and drop removed ones.
+
+        Args:
+            changed (Dict): interview_id -> (file stat, chunks) for interviews
+                to (re-)embed
+            removed (Set[str]): Interview IDs to drop from the index
+        """
+        with self._lock:
+            self.load()
+            drop = set(changed) | set(removed)
+            blocks, rows, interviews = [], [], {}
+            for interview_id, entry in self.interviews.items():
+                if interview_id in drop:
+                    continue
+                start, count = entry['start'], entry['count']
+                if count:
+                    blocks.append(self.matrix[start:start + count])
+                interviews[interview_id] = dict(entry, start=len(rows))
+                rows.extend(self.rows[start:start + count])
+
+            texts = []
+            for interview_id, (stat, chunks) in changed.items():
+                start = len(rows)
+                for chunk_index, chunk in enumerate(chunks or []):
+                    content = chunk_content(chunk)
+                    if not content:
+                        continue
+                    metadata = chunk.get('metadata', {}) or {}
+                    themes = [theme.lower() for theme in metadata.get('themes', []) or [] if isinstance(theme, str)]
+                    rows.append([interview_id, chunk_index, (metadata.get('emotion') or '').lower(), themes])
+                    texts.append(content)
+                interviews[interview_id] = {'stat': stat, 'start': start, 'count': len(rows) - start}
+            if texts:
+                blocks.append(self._normalize(self._embed(texts)))
+
+            if blocks:
+                matrix = np.ascontiguousarray(np.concatenate(blocks), dtype=np.float32)
+            else:
+                matrix = np.zeros((0, 0), dtype=np.float32)
+            self._write(interviews, rows, matrix)
+
+    def search(self, query_vector, emotion_filter: Set[str], theme_filter: Set[str],
+               k: int, min_similarity: float = MIN_SEMANTIC_SIMILARITY,
+               snapshot: Optional[Dict] = None) -> List[Tuple[int, float]]:
+        """Top-k rows by cosine similarity.
+
+        Args:
+            query_vector: The query embedding
+            emotion_filter (Set[str]): Chunk emotions accepted by the query
+                (empty accepts all)
+            theme_filter (Set[str]): Chunk themes accepted by the query
+                (empty accepts all)
+            k (int): Number of rows to return
+            min_similarity (float): Rows at or below this score are skipped
+            snapshot (Dict, optional): Search this ``snapshot()`` instead of
+                the current index; pass the one the returned rows will be
+                looked up in
+
+        Returns:
+            List[Tuple[int, float]]: (row, similarity) pairs, best first
+        """
+        if k <= 0:
+            return []
+        snapshot = snapshot or self.snapshot()
+        scores = self.scores(query_vector, snapshot)
+        if not len(scores):
+            return []
+
+        # Same rule as before: a chunk passes if it matches either filter
+        rescoring = snapshot['codes'] is not None and self.rescore
+        mask = scores > (min_similarity - RESCORE_MARGIN if rescoring else min_similarity)
+        mask &= (self._any_mask(snapshot['emotion_masks'], emotion_filter, len(scores))
+                 | self._any_mask(snapshot['theme_masks'], theme_filter, len(scores)))
+        candidates = np.flatnonzero(mask)
+        if rescoring:
+            # Re-rank the best quantized candidates by their float32 scores
+            fetch = k * RESCORE_MULTIPLIER
+            if len(candidates) > fetch:
+                candidates = candidates[np.argpartition(-scores[candidates], fetch - 1)[:fetch]]
+            query = self.normalize_query(query_vector)
+            hits = rescore(query, candidates, snapshot['matrix'], len(candidates))
+            return [(row, score) for row, score in hits if score > min_similarity][:k]
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        candidates = candidates[np.argsort(-scores[candidates], kind='stable')]
+        return [(int(row), float(scores[row])) for row in candidates]
+
+    def snapshot(self) -> Dict:
+        """The current interviews, rows and matrices, taken together under the lock.
+
+        ``update`` replaces these objects rather than mutating them, so a
+        reader can keep using a snapshot while a writer swaps in new ones.
+
+        Returns:
+            Dict: interviews, rows, matrix, codes, scales, emotion_masks and theme_masks
+        """
+        with self._lock:
+            self.load()
+            return {'interviews': self.interviews, 'rows': self.rows, 'matrix': self.matrix,
+                    'codes': self.codes, 'scales': self.scales,
+                    'emotion_masks': self._emotion_masks, 'theme_masks': self._theme_masks}
+
+    def scores(self, query_vector, snapshot: Optional[Dict] = None) -> np.ndarray:
+        """Cosine similarity of the query to every row (approximate below float32 precision).
+
+        Args:
+            query_vector: The query embedding
+            snapshot (Dict, optional): Score this ``snapshot()`` instead of the
+                current index
+        """
+        snapshot = snapshot or self.snapshot()
+        if not snapshot['rows']:
+            return np.zeros(0, dtype=np.float32)
+        query = self.normalize_query(query_vector)
+        if snapshot['codes'] is not None:
+            return similarity(snapshot['codes'], snapshot['scales'], query)
+        return snapshot['matrix'] @ query
+
+    def normalize_query(self, query_vector) -> np.ndarray:
+        return self._normalize(np.asarray(query_vector, dtype=np.float32).reshape(1, -1))[0]
+
+    def stale(self, source_dir: str) -> Tuple[Dict[str, list], Set[str]]:
+        """Compare the index with the ``<id>.json`` files in a directory.
+
+        Args:
+            source_dir (str): Directory the indexed documents are read from
+
+        Returns:
+            Tuple[Dict, Set]: Stats of new or modified documents by ID, and
+                the IDs of indexed documents whose file is gone
+        """
+        self.load()
+        current = {}
+        for entry in os.scandir(source_dir):
+            if entry.name.endswith('.json') and entry.is_file():
+                stat = entry.stat()
+                current[entry.name[:-5]] = [stat.st_mtime_ns, stat.st_size]
+        changed = {
+            doc_id: stat for doc_id, stat in current.items()
+            if doc_id not in self.interviews or self.interviews[doc_id]['stat'] != stat
+        }
+        return changed, set(self.interviews) - set(current)
+
+    @staticmethod
+    def _any_mask(masks: Dict[str, np.ndarray], accepted: Set[str], count: int) -> np.ndarray:
+        if not accepted:
+            return np.ones(count, dtype=bool)
+        mask = np.zeros(count, dtype=bool)
+        for value in accepted:
+            if value in masks:
+                mask |= masks[value]
+        return mask
+
+    def _set(self, interviews: Dict, rows: List, matrix, quantized: Optional[Tuple] = None) -> None:
+        self.interviews, self.rows, self.matrix = interviews, rows, matrix
+        if self.precision != 'float32' and matrix is not None and quantized is None:
+            # Written at another precision: quantize in memory until the next write
+            quantized = quantize(matrix, self.precision)
+        self.codes, self.scales = quantized if quantized is not None else (None, None)
+        self._emotion_masks = self._build_masks(row[2] for row in rows)
+        self._theme_masks = self._build_masks(row[3] for row in rows)
+
+    def _build_masks(self, values) -> Dict[str, np.ndarray]:
+        positions = {}
+        for row, value in enumerate(values):
+            for item in (value if isinstance(value, list) else [value]):
+                positions.setdefault(item, []).append(row)
+        masks = {}
+        for value, rows in positions.items():
+            mask = np.zeros(len(self.rows), dtype=bool)
+            mask[rows] = True
+            masks[value] = mask
+        return masks
+
+    def _write(self, interviews: Dict, rows: List, matrix: np.ndarray) -> None:
+        os.makedirs(self.index_dir, exist_ok=True)
+        # Matrix first: a reader that sees the new table also sees the new matrix
+        tmp_matrix = os.path.join(self.index_dir, '.embeddings.npy.tmp')
+        with open(tmp_matrix, 'wb') as f:
+            np.save(f, matrix)
+        os.replace(tmp_matrix, self.matrix_path)
+        if self.precision != 'float32' and rows:
+            codes, scales = quantize(matrix, self.precision)
+            for path, array in ((self.codes_path, codes), (self.scales_path, scales)):
+                if array is not None:
+                    tmp_path = os.path.join(self.index_dir, f'.{os.path.basename(path)}.tmp')
+                    with open(tmp_path, 'wb') as f:
+                        np.save(f, array)
+                    os.replace(tmp_path, path)
+        tmp_table = os.path.join(self.index_dir, '.chunks.json.tmp')
+        with open(tmp_table, 'w') as f:
+            json.dump({'version': CHUNK_INDEX_VERSION, 'model': self.model_name,
+                       'dimension': int(matrix.shape[1]) if matrix.ndim == 2 else 0,
+                       'precision': self.precision, 'interviews': interviews, 'rows': rows}, f)
+        os.replace(tmp_table, self.table_path)
+        self._table_mtime = os.stat(self.table_path).st_mtime_ns
+        matrix = np.load(self.matrix_path, mmap_mode='r') if rows else None
+        self._set(interviews, rows, matrix, self._load_codes(len(rows)) if matrix is not None else None)
+
+    def _load_codes(self, count: int) -> Optional[Tuple]:
+        """The quantized matrix files for this precision, or None if they don't match the table."""
+        if self.precision == 'float32' or not os.path.exists(self.codes_path):
+            return None
+        if self.precision == 'int8' and not os.path.exists(self.scales_path):
+            return None
+        codes = np.load(self.codes_path, mmap_mode='r')
+        scales = np.load(self.scales_path, mmap_mode='r') if self.precision == 'int8' else None
+        if codes.shape[0] != count or (scales is not None and scales.shape[0] != count):
+            return None
+        return codes, scales
+
+    def _embed(self, texts: List[str]) -> np.ndarray:
+        vectors = get_embedding_service().embed(texts, self.model_name, self.encode_fn, batch_size=64)
+        return np.asarray(vectors, dtype=np.float32)
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return (vectors / norms).astype(np.float32)
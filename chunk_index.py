@@ -0,0 +1,268 @@
+"""
+FAISS index over interview chunks with stable 64-bit IDs.
+
+Every vector is stored under an ID derived from a string key (for example
+``"<interview_id>:<chunk>"``), so re-adding a chunk replaces its vector and
+deleting one removes exactly that vector, however the index has changed
+since. Vectors are L2-normalized and compared by inner product, so scores
+are cosine similarities (higher is better).
+
+An exact ``IndexIDMap2(IndexFlatIP)`` holds every vector and is used for
+reconstruction and deletes. Once the index reaches ``ann_threshold``
+vectors, searches go to an approximate index (HNSW or IVF) built from it.
+Adds are applied to the approximate index directly, and so are deletes for
+IVF; a delete or replace marks an HNSW index for a rebuild. By default the
+rebuild happens on the next search; with ``lazy_ann`` off, searches use the
+exact index until the owner installs a rebuilt one (``ann_snapshot``,
+``build_ann``, ``install_ann``), so the rebuild can run off the request
+path. Both indexes and the per-ID metadata are
+saved to a single file that is replaced atomically, so they can't get out of
+step on disk.
+"""
+
+import hashlib
+import io
+import logging
+import math
+import os
+import zipfile
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import faiss
+import numpy as np
+
+from serialization import dumpb, loads
+
+logger = logging.getLogger(__name__)
+
+ANN_TYPES = ("flat", "hnsw", "ivf")
+ANN_TYPE_ENV = "DARIA_ANN_INDEX"
+ANN_THRESHOLD_ENV = "DARIA_ANN_THRESHOLD"
+DEFAULT_ANN_TYPE = "hnsw"
+DEFAULT_ANN_THRESHOLD = 10000
+
+HNSW_M = 32
+HNSW_EF_CONSTRUCTION = 80
+HNSW_EF_SEARCH = 64
+IVF_NPROBE = 16
+
+_ID_MASK = (1 << 63) - 1
+
+
+def stable_id(key: str) -> int:
+    """64-bit (non-negative int64) vector ID for a string key."""
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") & _ID_MASK
+
+
+def _normalized(vectors: Any) -> np.ndarray:
+    array = np.array(vectors, dtype="float32", ndmin=2, copy=True)
+    faiss.normalize_L2(array)
+    return array
+
+
+class ChunkIndex:
+    """Cosine-similarity vector index keyed by stable IDs, with metadata per ID."""
+
+    def __init__(self, dimension: int, ann_type: Optional[str] = None, ann_threshold: Optional[int] = None):
+        """
+        Args:
+            dimension (int): Vector dimension
+            ann_type (str, optional): ``hnsw``, ``ivf`` or ``flat`` (exact
+                search only); defaults to DARIA_ANN_INDEX or ``hnsw``
+            ann_threshold (int, optional): Number of vectors from which the
+                approximate index is used; defaults to DARIA_ANN_THRESHOLD
+        """
+        ann_type = (ann_type or os.environ.get(ANN_TYPE_ENV, DEFAULT_ANN_TYPE)).lower()
+        if ann_type not in ANN_TYPES:
+            raise ValueError(f"Unknown ANN index type '{ann_type}' (expected one of {', '.join(ANN_TYPES)})")
+        if ann_threshold is None:
+            ann_threshold = int(os.environ.get(ANN_THRESHOLD_ENV, DEFAULT_ANN_THRESHOLD))
+        self.dimension = dimension
+        self.ann_type = ann_type
+        self.ann_threshold = ann_threshold
+        self.metadata: Dict[int, Dict[str, Any]] = {}
+        # Store-level data that is saved with the index
+        self.info: Dict[str, Any] = {}
+        # Build a missing or stale approximate index inside ``search``
+        self.lazy_ann = True
+        self._exact = faiss.IndexIDMap2(faiss.IndexFlatIP(dimension))
+        self._ann = None
+        self._ann_stale = False
+        # Bumped by every write, so a rebuild from older vectors isn't installed
+        self._version = 0
+
+    def __len__(self) -> int:
+        return self._exact.ntotal
+
+    def __contains__(self, vector_id: int) -> bool:
+        return vector_id in self.metadata
+
+    @property
+    def uses_ann(self) -> bool:
+        return self.ann_type != "flat" and len(self) >= self.ann_threshold
+
+    @property
+    def needs_ann_build(self) -> bool:
+        """Whether searches would use an approximate index that is missing or stale."""
+        return self.uses_ann and (self._ann is None or self._ann_stale)
+
+    def upsert(self, ids: Sequence[int], vectors: Any, metadatas: Optional[Sequence[Dict[str, Any]]] = None) -> None:
+        """Add vectors, replacing any already stored under the same IDs."""
+        ids = np.array(ids, dtype="int64")
+        if len(ids) == 0:
+            return
+        vectors = _normalized(vectors)
+        if vectors.shape != (len(ids), self.dimension):
+            raise ValueError(f"Expected {len(ids)} vectors of dimension {self.dimension}, got {vectors.shape}")
+        if len(set(ids.tolist())) != len(ids):
+            raise ValueError("Duplicate IDs in one upsert")
+
+        replaced = [int(vector_id) for vector_id in ids if int(vector_id) in self.metadata]
+        if replaced:
+            self._exact.remove_ids(np.array(replaced, dtype="int64"))
+        self._exact.add_with_ids(vectors, ids)
+        for i, vector_id in enumerate(ids.tolist()):
+            self.metadata[vector_id] = dict(metadatas[i]) if metadatas is not None else {}
+        self._version += 1
+
+        if self._ann is not None and not self._ann_stale:
+            if replaced and not self._ann_removes_in_place():
+                self._ann_stale = True
+            else:
+                if replaced:
+                    self._ann.remove_ids(np.array(replaced, dtype="int64"))
+                self._ann.add_with_ids(vectors, ids)
+
+    def remove(self, ids: Iterable[int]) -> int:
+        """Delete vectors by ID; unknown IDs are ignored.
+
+        Returns:
+            int: Number of vectors removed
+        """
+        known = [int(vector_id) for vector_id in ids if int(vector_id) in self.metadata]
+        if not known:
+            return 0
+        removed = self._exact.remove_ids(np.array(known, dtype="int64"))
+        for vector_id in known:
+            self.metadata.pop(vector_id, None)
+        self._version += 1
+        if self._ann is not None and not self._ann_stale:
+            if self._ann_removes_in_place():
+                self._ann.remove_ids(np.array(known, dtype="int64"))
+            else:
+                self._ann_stale = True
+        return int(removed)
+
+    def reconstruct(self, vector_id: int) -> np.ndarray:
+        """The stored (normalized) vector for an ID."""
+        return self._exact.reconstruct(int(vector_id))
+
+    def search(self, queries: Any, k: int) -> List[List[Tuple[int, float]]]:
+        """Nearest stored vectors to each query.
+
+        Returns:
+            List[List[Tuple[int, float]]]: Per query, (ID, cosine similarity)
+                pairs, best first
+        """
+        queries = _normalized(queries)
+        k = min(k, len(self))
+        if k <= 0:
+            return [[] for _ in range(len(queries))]
+        index = self._search_index(k)
+        scores, ids = index.search(queries, k)
+        return [
+            [(int(vector_id), float(score)) for vector_id, score in zip(row_ids, row_scores) if vector_id != -1]
+            for row_ids, row_scores in zip(ids, scores)
+        ]
+
+    def ann_snapshot(self) -> Tuple[np.ndarray, np.ndarray, int]:
+        """Copies of the stored vectors and IDs for ``build_ann``, and the version they belong to."""
+        vectors = self._exact.index.reconstruct_n(0, len(self))
+        ids = faiss.vector_to_array(self._exact.id_map).astype("int64")
+        return vectors, ids, self._version
+
+    def build_ann(self, vectors: np.ndarray, ids: np.ndarray):
+        """Build an approximate index over ``vectors``; doesn't touch this index's state."""
+        count = len(vectors)
+        if self.ann_type == "hnsw":
+            base = faiss.IndexHNSWFlat(self.dimension, HNSW_M, faiss.METRIC_INNER_PRODUCT)
+            base.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+            index = faiss.IndexIDMap(base)
+        else:
+            nlist = max(1, int(4 * math.sqrt(count)))
+            quantizer = faiss.IndexFlatIP(self.dimension)
+            # IVF takes IDs itself, which lets deletes be applied in place
+            index = faiss.IndexIVFFlat(quantizer, self.dimension, nlist, faiss.METRIC_INNER_PRODUCT)
+            index.train(vectors)
+            index.nprobe = min(IVF_NPROBE, nlist)
+        index.add_with_ids(vectors, ids)
+        logger.info(f"Built {self.ann_type} index over {count} vectors")
+        return index
+
+    def install_ann(self, index, version: int) -> bool:
+        """Use an index from ``build_ann``, unless the vectors changed since its ``ann_snapshot``."""
+        if version != self._version:
+            return False
+        self._ann = index
+        self._ann_stale = False
+        return True
+
+    def _ann_removes_in_place(self) -> bool:
+        return isinstance(self._ann, faiss.IndexIVF)
+
+    def _search_index(self, k: int):
+        if not self.uses_ann:
+            return self._exact
+        if self.needs_ann_build:
+            if not self.lazy_ann:
+                return self._exact
+            vectors, ids, version = self.ann_snapshot()
+            self.install_ann(self.build_ann(vectors, ids), version)
+        if self.ann_type == "hnsw":
+            faiss.downcast_index(self._ann.index).hnsw.efSearch = max(HNSW_EF_SEARCH, 2 * k)
+        return self._ann
+
+    def save(self, path: str) -> None:
+        """Write the indexes and metadata to one file, replacing it atomically."""
+        payload = {
+            "flat": faiss.serialize_index(self._exact),
+            "meta": np.frombuffer(dumpb({
+                "dimension": self.dimension,
+                "ann_type": self.ann_type,
+                "ann_threshold": self.ann_threshold,
+                "metadata": [[vector_id, metadata] for vector_id, metadata in self.metadata.items()],
+                "info": self.info
+            }), dtype="uint8")
+        }
+        if self._ann is not None and not self._ann_stale:
+            payload["ann"] = faiss.serialize_index(self._ann)
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, **payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "ChunkIndex":
+        """Read an index written by ``save``."""
+        with open(path, "rb") as f:
+            data = f.read()
+        with np.load(io.BytesIO(data), allow_pickle=False) as bundle:
+            meta = loads(bundle["meta"].tobytes())
+            index = cls(meta["dimension"], ann_type=meta["ann_type"], ann_threshold=meta["ann_threshold"])
+            index._exact = faiss.deserialize_index(bundle["flat"])
+            if "ann" in bundle.files:
+                index._ann = faiss.deserialize_index(bundle["ann"])
+        index.metadata = {int(vector_id): metadata for vector_id, metadata in meta["metadata"]}
+        index.info = meta.get("info", {})
+        return index
+
+    @staticmethod
+    def is_index_file(path: str) -> bool:
+        """Whether ``path`` was written by ``save`` (rather than ``faiss.write_index``)."""
+        return os.path.exists(path) and zipfile.is_zipfile(path)
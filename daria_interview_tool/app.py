@@ -1706,8 +1706,8 @@ def search_fuzzy():
         if not query:
             return jsonify({'success': True, 'interviews': []})
         
-        # Get semantic analyzer instance
-        analyzer = SemanticAnalyzer()
+        # Reuse the module-level analyzer and its shared models
+        analyzer = semantic_analyzer
         query_embedding = np.array(analyzer.get_embedding(query)).reshape(1, -1)  # Reshape to 2D
         
         interviews = list_interviews()
@@ -0,0 +1,187 @@
+import json
+import logging
+import os
+import threading
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from chunk_embedding_index import ChunkEmbeddingIndex
+from quantization import RESCORE_MARGIN, RESCORE_MULTIPLIER
+
+logger = logging.getLogger(__name__)
+
+FUZZY_INDEX_DIR = '.fuzzy_index'
+TRANSCRIPT_SLICE_SIZE = 1000
+MIN_FUZZY_SIMILARITY = 0.3
+
+# Fixed unit positions; transcript slices follow from TRANSCRIPT_UNIT on
+METADATA_UNIT = 0
+TAGS_UNIT = 1
+TRANSCRIPT_UNIT = 2
+
+
+def interview_search_fields(interview: Dict) -> Dict[str, object]:
+    """Collect the searchable fields of a raw interview.
+
+    Themes and insights come from the chunk metadata, the same place the
+    archive page reads them from.
+
+    Args:
+        interview (Dict): The raw interview document
+
+    Returns:
+        Dict: participant_name, project_name, themes, insights and transcript
+    """
+    themes, insights = [], []
+    for chunk in interview.get('chunks') or []:
+        metadata = chunk.get('metadata') or {}
+        for theme in metadata.get('themes') or []:
+            if isinstance(theme, str) and theme not in themes:
+                themes.append(theme)
+        for insight in metadata.get('insight_tags') or []:
+            if isinstance(insight, str) and insight not in insights:
+                insights.append(insight)
+    return {
+        'participant_name': interview.get('transcript_name', '') or '',
+        'project_name': interview.get('project_name', '') or '',
+        'themes': themes,
+        'insights': insights,
+        'transcript': interview.get('transcript', '') or ''
+    }
+
+
+class FuzzyInterviewIndex:
+    """Per-unit embedding index over the raw interviews for fuzzy search.
+
+    Each interview contributes one row for its participant and project
+    names, one for its themes and insights, and one per 1000-character
+    transcript slice, all kept in a ChunkEmbeddingIndex under
+    ``<raw_dir>/.fuzzy_index``. An interview scores the best similarity of
+    any of its rows. Rows are embedded when an interview is saved
+    (``refresh``); files changed by other writers are found by comparing
+    file stats and embedded in small batches by ``catch_up``.
+    """
+
+    def __init__(self, raw_dir: str, encode_fn: Callable, model_name: str):
+        self.raw_dir = raw_dir
+        self.index = ChunkEmbeddingIndex(os.path.join(raw_dir, FUZZY_INDEX_DIR), encode_fn, model_name)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def units(interview: Dict) -> List[Dict]:
+        """Split an interview into the text units that get embedded."""
+        fields = interview_search_fields(interview)
+        units = [
+            {'content': ' '.join(filter(None, [fields['participant_name'], fields['project_name']]))},
+            {'content': ' '.join(fields['themes'] + fields['insights'])}
+        ]
+        transcript = fields['transcript']
+        for start in range(0, len(transcript), TRANSCRIPT_SLICE_SIZE):
+            units.append({'content': transcript[start:start + TRANSCRIPT_SLICE_SIZE]})
+        return units
+
+    def pending(self) -> Tuple[List[str], List[str]]:
+        """IDs of interviews that are new or modified, and of indexed interviews that were deleted."""
+        changed, removed = self.index.stale(self.raw_dir)
+        return list(changed), list(removed)
+
+    def refresh(self, interview_ids: List[str]) -> None:
+        """Re-embed (or drop, if their file is gone) the given interviews."""
+        with self._lock:
+            changed, removed = {}, set()
+            for interview_id in interview_ids:
+                file_path = os.path.join(self.raw_dir, f"{interview_id}.json")
+                try:
+                    stat = os.stat(file_path)
+                    with open(file_path, 'r') as f:
+                        interview = json.load(f)
+                except FileNotFoundError:
+                    removed.add(interview_id)
+                    continue
+                except json.JSONDecodeError as e:
+                    logger.error(f"Error decoding JSON from {file_path}: {str(e)}")
+                    interview = {}
+                changed[interview_id] = ([stat.st_mtime_ns, stat.st_size], self.units(interview))
+            if changed or removed:
+                self.index.update(changed, removed)
+
+    def catch_up(self, batch_size: int = 20) -> Iterator[int]:
+        """Bring the index up to date with the raw directory in batches.
+
+        Yields:
+            int: Number of interviews still pending after each batch
+        """
+        changed, removed = self.pending()
+        if removed:
+            self.refresh(removed)
+        for start in range(0, len(changed), batch_size):
+            self.refresh(changed[start:start + batch_size])
+            yield max(0, len(changed) - start - batch_size)
+
+    def search(self, query_vector, min_similarity: float = MIN_FUZZY_SIMILARITY,
+               limit: Optional[int] = None) -> List[Dict]:
+        """Rank indexed interviews by their best matching unit.
+
+        Args:
+            query_vector: The query embedding
+            min_similarity (float): Interviews at or below this score are skipped
+            limit (int, optional): Maximum number of interviews to return
+
+        Returns:
+            List[Dict]: ``{'id', 'similarity_score', 'unit'}`` best first;
+                ``unit`` is the index of the best matching unit
+        """
+        snapshot = self.index.snapshot()
+        scores = self.index.scores(query_vector, snapshot)
+        if not len(scores):
+            return []
+        # Rows of one interview are contiguous, so a segmented max gives
+        # every interview's best score in one pass
+        entries = [(doc_id, entry) for doc_id, entry in snapshot['interviews'].items() if entry['count']]
+        starts = np.array([entry['start'] for _, entry in entries])
+        best = np.maximum.reduceat(scores, starts)
+        rescoring = snapshot['codes'] is not None and self.index.rescore
+        candidates = np.flatnonzero(best > (min_similarity - RESCORE_MARGIN if rescoring else min_similarity))
+        candidates = candidates[np.argsort(-best[candidates], kind='stable')]
+        if rescoring:
+            # Re-rank the best quantized candidates by the float32 rows of their interviews
+            if limit is not None:
+                candidates = candidates[:limit * RESCORE_MULTIPLIER]
+            query = self.index.normalize_query(query_vector)
+            for position in candidates:
+                start, count = entries[position][1]['start'], entries[position][1]['count']
+                exact = np.asarray(snapshot['matrix'][start:start + count], dtype=np.float32) @ query
+                scores[start:start + count] = exact
+                best[position] = exact.max()
+            candidates = candidates[best[candidates] > min_similarity]
+            candidates = candidates[np.argsort(-best[candidates], kind='stable')]
+        if limit is not None:
+            candidates = candidates[:limit]
+
+        results = []
+        for position in candidates:
+            interview_id, entry = entries[position]
+            start = entry['start']
+            row = start + int(np.argmax(scores[start:start + entry['count']]))
+            results.append({
+                'id': interview_id,
+                'similarity_score': float(best[position]),
+                'unit': snapshot['rows'][row][1]
+            })
+        return results
+
+    @staticmethod
+    def unit_preview(transcript: str, unit: int, window: int = 100) -> Optional[str]:
+        """Preview around a transcript slice unit, or None for metadata units."""
+        if unit < TRANSCRIPT_UNIT:
+            return None
+        offset = (unit - TRANSCRIPT_UNIT) * TRANSCRIPT_SLICE_SIZE
+        preview_start = max(0, offset - window)
+        preview_end = min(len(transcript), offset + TRANSCRIPT_SLICE_SIZE + window)
+        preview = transcript[preview_start:preview_end]
+        if preview_start > 0:
+            preview = '...' + preview
+        if preview_end < len(transcript):
+            preview = preview + '...'
+        return preview
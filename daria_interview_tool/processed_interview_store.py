@@ -1,17 +1,33 @@
 import json
+import logging
 import os
+import threading
 from typing import List, Dict, Optional, Tuple, Set
 from datetime import datetime
 import uuid
-from sentence_transformers import SentenceTransformer, util
-import torch
 import re
 
+from chunk_embedding_index import SEARCH_MODEL_NAME, ChunkEmbeddingIndex, chunk_content
+from embedding_service import get_embedding_service
+from full_text_index import FullTextIndex
+from model_registry import sentence_transformer
+
+logger = logging.getLogger(__name__)
+
+CHUNK_INDEX_DIR = '.chunk_index'
+CHUNK_TEXT_FIELDS = ('content', 'themes', 'insights')
+# How often text search rescans for interviews edited outside save_interview
+TEXT_INDEX_SYNC_SECONDS = 2.0
+
+
 class ProcessedInterviewStore:
     def __init__(self, base_dir: str = "interviews/processed"):
         self.base_dir = base_dir
         self.default_project_name = "Daria Research of Researchers"
-        self.model = SentenceTransformer('multi-qa-MiniLM-L6-cos-v1')
+        self.model = sentence_transformer(SEARCH_MODEL_NAME)
+        self.chunk_index = ChunkEmbeddingIndex(os.path.join(base_dir, CHUNK_INDEX_DIR), self.model.encode)
+        self._index_lock = threading.Lock()
+        self.text_index = FullTextIndex(os.path.join(base_dir, CHUNK_INDEX_DIR, 'text.db'), CHUNK_TEXT_FIELDS)
         self.emotion_mapping = {
             'frustration': {'frustration', 'annoyed', 'irritated', 'angry', 'upset'},
             'positive': {'joy', 'happiness', 'excited', 'satisfied', 'pleased', 'admiration'},
@@ -25,10 +41,64 @@ class ProcessedInterviewStore:
         return os.path.join(self.base_dir, f"{interview_id}.json")
 
     def save_interview(self, interview_id: str, data: Dict) -> None:
-        """Save processed interview data to JSON file."""
+        """Save processed interview data to JSON file and embed its chunks."""
         file_path = self._get_interview_path(interview_id)
         with open(file_path, 'w') as f:
             json.dump(data, f, indent=2)
+        stat = self._file_stat(file_path)
+        self.chunk_index.update({interview_id: (stat, data.get('chunks', []))})
+        self.text_index.update(interview_id, self._text_rows(data), stat)
+
+    def _file_stat(self, file_path: str) -> List[int]:
+        stat = os.stat(file_path)
+        return [stat.st_mtime_ns, stat.st_size]
+
+    def sync_chunk_index(self) -> Dict[str, int]:
+        """Embed interviews that were added or edited outside save_interview.
+
+        Returns:
+            Dict[str, int]: Number of interviews re-embedded and removed
+        """
+        with self._index_lock:
+            stale, removed = self.chunk_index.stale(self.base_dir)
+            changed = {}
+            for interview_id, stat in stale.items():
+                interview_data = self.load_interview(interview_id) or {}
+                changed[interview_id] = (stat, interview_data.get('chunks', []))
+
+            if changed or removed:
+                logger.info(f"Updating chunk index: {len(changed)} changed, {len(removed)} removed interviews")
+                self.chunk_index.update(changed, removed)
+            return {'embedded': len(changed), 'removed': len(removed)}
+
+    def sync_text_index(self, max_age: Optional[float] = None) -> Dict[str, int]:
+        """Re-index the text of interviews added or edited outside save_interview.
+
+        Args:
+            max_age (float, optional): Skip the scan if the last one was less
+                than this many seconds ago (see FullTextIndex.sync)
+        """
+        def load(interview_id):
+            interview_data = self.load_interview(interview_id)
+            return (self._text_rows(interview_data), None) if interview_data else None
+        return self.text_index.sync(self.base_dir, load, max_age=max_age)
+
+    def _text_rows(self, interview_data: Dict) -> List[Dict[str, str]]:
+        """One full-text row per chunk, in chunk order."""
+        rows = []
+        for chunk in interview_data.get('chunks', []):
+            themes, insight_tags = [], []
+            for source in (chunk, chunk.get('analysis') or {}, chunk.get('metadata') or {}):
+                if isinstance(source.get('themes'), list):
+                    themes.extend(theme for theme in source['themes'] if isinstance(theme, str))
+                if isinstance(source.get('insight_tags'), list):
+                    insight_tags.extend(tag for tag in source['insight_tags'] if isinstance(tag, str))
+            rows.append({
+                'content': chunk_content(chunk),
+                'themes': ' | '.join(themes),
+                'insights': ' | '.join(insight_tags)
+            })
+        return rows
 
     def load_interview(self, interview_id: str) -> Optional[Dict]:
         """Load processed interview data from JSON file."""
@@ -76,57 +146,48 @@ class ProcessedInterviewStore:
         return criteria
 
     def semantic_search(self, query: str, k: int = 10) -> List[Dict]:
-        """Enhanced semantic search with emotion and theme filtering."""
-        results = []
+        """Enhanced semantic search with emotion and theme filtering.
+
+        Scores every chunk with one product against the precomputed chunk
+        embedding matrix; only the interviews holding the top k chunks are
+        loaded.
+        """
         search_criteria = self._extract_search_criteria(query)
-        
-        # Encode the search query
-        query_embedding = self.model.encode(query, convert_to_tensor=True)
-        
-        for filename in os.listdir(self.base_dir):
-            if not filename.endswith('.json'):
-                continue
-                
-            interview_id = filename[:-5]
-            interview_data = self.load_interview(interview_id)
-            
-            if not interview_data or 'chunks' not in interview_data:
+        self.sync_chunk_index()
+
+        # Filter, score and resolve rows against one consistent view of the index
+        snapshot = self.chunk_index.snapshot()
+
+        # A chunk emotion passes if its normalized group shares an emotion
+        # with the query's criteria
+        emotion_filter = set()
+        if search_criteria['emotions']:
+            emotion_filter = {
+                emotion for emotion in snapshot['emotion_masks']
+                if self._normalize_emotion(emotion) & search_criteria['emotions']
+            }
+            # Keep the filter active even if no indexed emotion matches
+            emotion_filter = emotion_filter or {None}
+
+        query_embedding = get_embedding_service().embed_one(query, SEARCH_MODEL_NAME, self.model.encode)
+        hits = self.chunk_index.search(query_embedding, emotion_filter, search_criteria['themes'], k,
+                                       snapshot=snapshot)
+
+        results = []
+        interviews = {}
+        for row, similarity in hits:
+            interview_id, chunk_index = snapshot['rows'][row][:2]
+            if interview_id not in interviews:
+                interviews[interview_id] = self.load_interview(interview_id)
+            interview_data = interviews[interview_id]
+            if not interview_data or chunk_index >= len(interview_data.get('chunks', [])):
                 continue
-                
-            for chunk in interview_data['chunks']:
-                content = chunk.get('content') or chunk.get('text') or chunk.get('combined_text', '')
-                if not content:
-                    continue
-
-                # Get chunk embedding
-                chunk_embedding = self.model.encode(content, convert_to_tensor=True)
-                similarity = util.pytorch_cos_sim(query_embedding, chunk_embedding)[0][0].item()
-
-                # Apply filters based on search criteria
-                chunk_emotion = chunk.get('metadata', {}).get('emotion', '').lower()
-                chunk_themes = {theme.lower() for theme in chunk.get('metadata', {}).get('themes', [])}
-                
-                # Check if chunk matches any of the search criteria
-                emotion_match = (
-                    not search_criteria['emotions'] or
-                    any(emotion in self._normalize_emotion(chunk_emotion) 
-                        for emotion in search_criteria['emotions'])
-                )
-                theme_match = (
-                    not search_criteria['themes'] or
-                    any(theme in chunk_themes for theme in search_criteria['themes'])
-                )
-                
-                if similarity > 0.3 and (emotion_match or theme_match):
-                    results.append(self._create_search_result(
-                        interview_data=interview_data,
-                        chunk=chunk,
-                        similarity=similarity
-                    ))
-        
-        # Sort by similarity score
-        results.sort(key=lambda x: x['similarity'], reverse=True)
-        return results[:k]
+            results.append(self._create_search_result(
+                interview_data=interview_data,
+                chunk=interview_data['chunks'][chunk_index],
+                similarity=similarity
+            ))
+        return results
 
     def _normalize_emotion_intensity(self, intensity):
         """Normalize emotion intensity to a value between 0 and 1."""
@@ -365,37 +426,31 @@ class ProcessedInterviewStore:
         return results[:limit]
 
     def text_search(self, query: str, limit: int = 10) -> List[Dict]:
-        """Search through processed interviews using basic text matching."""
+        """Search through processed interviews using the full-text chunk index.
+
+        Supports phrases (``"checkout flow"``), field filters
+        (``themes:trust``) and treats the last word as a prefix. Results are
+        ranked by BM25 and carry a highlighted ``snippet``.
+        """
+        self.sync_text_index(max_age=TEXT_INDEX_SYNC_SECONDS)
+        hits = self.text_index.search(query, limit=limit)
+
         results = []
-        query = query.lower() if query else ''
-        
-        for filename in os.listdir(self.base_dir):
-            if not filename.endswith('.json'):
-                continue
-                
-            interview_id = filename[:-5]  # Remove .json extension
-            interview_data = self.load_interview(interview_id)
-            
-            if not interview_data:
+        interviews = {}
+        for hit in hits:
+            interview_id = hit['source_id']
+            if interview_id not in interviews:
+                interviews[interview_id] = self.load_interview(interview_id)
+            interview_data = interviews[interview_id]
+            if not interview_data or hit['position'] >= len(interview_data.get('chunks', [])):
                 continue
-                
-            for chunk in interview_data.get('chunks', []):
-                # Get text content from various possible locations
-                text = (
-                    chunk.get('content') or 
-                    chunk.get('text') or 
-                    chunk.get('combined_text', '')
-                ).lower()
-                
-                if query in text:
-                    results.append(self._create_search_result(
-                        interview_data=interview_data,
-                        chunk=chunk
-                    ))
-        
-        # Sort by timestamp (most recent first) and limit results
-        results.sort(key=lambda x: x.get('timestamp', ''), reverse=True)
-        return results[:limit]
+            result = self._create_search_result(
+                interview_data=interview_data,
+                chunk=interview_data['chunks'][hit['position']]
+            )
+            result['snippet'] = hit['snippet']
+            results.append(result)
+        return results
 
     def theme_search(self, query: str, limit: int = 10) -> List[Dict]:
         """Search for chunks with matching themes."""
@@ -1,6 +1,3 @@
-from sentence_transformers import SentenceTransformer, util
-from transformers import pipeline
-import torch
 from typing import List, Dict, Any, Optional
 import logging
 from pathlib import Path
@@ -13,6 +10,9 @@ import os
 from dotenv import load_dotenv
 import re
 
+from embedding_service import get_embedding_service
+from model_registry import cross_encoder, sentence_transformer, text_classifier
+
 # Load environment variables
 load_dotenv()
 
@@ -20,6 +20,8 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+SENTENCE_MODEL_NAME = 'sentence-transformers/all-MiniLM-L6-v2'
+
 def split_transcript_safe(transcript, max_length=400):
     """
     Split a transcript into safe-sized chunks that won't exceed model token limits.
@@ -167,33 +169,16 @@ class SemanticAnalyzer:
         """Initialize the semantic analyzer with required models."""
         logger.info("Initializing SemanticAnalyzer...")
         
-        # Initialize sentence transformer
-        try:
-            self.sentence_transformer = SentenceTransformer('sentence-transformers/all-MiniLM-L6-v2')
-            logger.info("Loaded sentence transformer model")
-        except Exception as e:
-            logger.error(f"Failed to load sentence transformer: {str(e)}")
-            raise
-        
-        # Initialize emotion classifier with error handling
-        try:
-            self.emotion_classifier = pipeline(
-                "text-classification",
-                model="j-hartmann/emotion-english-distilroberta-base",
-                return_all_scores=True
-            )
-            logger.info("Loaded emotion model successfully")
-        except Exception as e:
-            logger.error(f"Failed to load emotion model: {str(e)}")
-            # Initialize with a simple fallback
-            self.emotion_classifier = None
-            logger.info("Using fallback emotion analysis")
+        # Shared models from the registry, loaded on first use; a failed
+        # emotion model load is caught by the analysis methods
+        self.sentence_transformer = sentence_transformer(SENTENCE_MODEL_NAME)
+        self.emotion_classifier = text_classifier(return_all_scores=True)
     
     def analyze_text(self, text: str) -> Dict[str, Any]:
         """Analyze text for semantic meaning and emotions."""
         try:
             # Get embeddings
-            embeddings = self.sentence_transformer.encode(text)
+            embeddings = get_embedding_service().embed_one(text, SENTENCE_MODEL_NAME, self.sentence_transformer.encode)
             
             # Get emotions if classifier is available
             emotions = []
@@ -206,7 +191,7 @@ class SemanticAnalyzer:
                     emotions = []
             
             return {
-                "embeddings": embeddings.tolist(),
+                "embeddings": embeddings,
                 "emotions": emotions
             }
         except Exception as e:
@@ -219,17 +204,18 @@ class SemanticAnalyzer:
     def get_similarity(self, text1: str, text2: str) -> float:
         """Calculate semantic similarity between two texts."""
         try:
-            emb1 = self.sentence_transformer.encode(text1)
-            emb2 = self.sentence_transformer.encode(text2)
+            emb1, emb2 = np.asarray(get_embedding_service().embed(
+                [text1, text2], SENTENCE_MODEL_NAME, self.sentence_transformer.encode
+            ))
             return float(np.dot(emb1, emb2) / (np.linalg.norm(emb1) * np.linalg.norm(emb2)))
         except Exception as e:
             logger.error(f"Similarity calculation failed: {str(e)}")
             return 0.0
 
     def get_embeddings(self, text):
-        """Get embeddings for a piece of text."""
+        """Get embeddings for a piece of text (cached by content hash)."""
         try:
-            return self.sentence_transformer.encode(text)
+            return get_embedding_service().embed_one(text, SENTENCE_MODEL_NAME, self.sentence_transformer.encode)
         except Exception as e:
             logger.error(f"Error getting embeddings: {str(e)}")
             return None
@@ -421,16 +407,11 @@ Respond with ONLY this exact JSON structure, no other text:
     def rerank_results(self, query: str, results: List[Dict[str, Any]], k: int = 5) -> List[Dict[str, Any]]:
         """Rerank search results using cross-encoder."""
         try:
-            from sentence_transformers import CrossEncoder
-            
-            # Initialize cross-encoder
-            cross_encoder = CrossEncoder('cross-encoder/ms-marco-MiniLM-L-6-v2')
-            
             # Prepare pairs for reranking
             pairs = [(query, result["text"]) for result in results]
             
-            # Get cross-encoder scores
-            cross_scores = cross_encoder.predict(pairs)
+            # Get cross-encoder scores from the shared model
+            cross_scores = cross_encoder().predict(pairs)
             
             # Combine results with new scores
             for result, cross_score in zip(results, cross_scores):
@@ -1,24 +1,40 @@
 from langchain_community.vectorstores import FAISS
 from openai import OpenAI
 from langchain.text_splitter import RecursiveCharacterTextSplitter
+import hashlib
 import os
 from pathlib import Path
 import json
-from typing import List, Dict, Any, Optional, Union
+from typing import List, Dict, Any, Optional, Tuple, Union
 import traceback
 import numpy as np
 from dotenv import load_dotenv
 import faiss
 import logging
+import threading
 from langchain_openai import OpenAIEmbeddings
 from langchain.docstore.document import Document
 from datetime import datetime
 
+from chunk_index import ChunkIndex, stable_id
+from embedding_service import get_embedding_service
+
 # Load environment variables
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# Chunks scoring below this cosine similarity are not returned by semantic_search
+MIN_SIMILARITY = 0.1
+
+def chunk_vector_id(interview_id: str, chunk: int) -> int:
+    """Stable 64-bit vector ID of an interview's chunk."""
+    return stable_id(f"{interview_id}:{chunk}")
+
+def chunks_hash(chunks: List[str]) -> str:
+    """Hash of an interview's chunk texts, to skip re-embedding unchanged interviews."""
+    return hashlib.sha256("\x1f".join(chunks).encode("utf-8")).hexdigest()
+
 class CustomEmbeddings:
     def __init__(self, api_key: str):
         """Initialize the embeddings class with API key."""
@@ -38,24 +54,19 @@ class CustomEmbeddings:
             logger.error(traceback.format_exc())
             raise
 
+    def _embed_uncached(self, texts: List[str]) -> List[List[float]]:
+        """Call the embeddings API for texts that are not in the embedding cache."""
+        response = self.client.embeddings.create(
+            model=self.model,
+            input=texts
+        )
+        return [item.embedding for item in response.data]
+
     def embed_documents(self, texts: List[str]) -> List[List[float]]:
         """Embed a list of texts."""
         try:
-            # Process texts in batches of 100
-            batch_size = 100
-            all_embeddings = []
-            
-            for i in range(0, len(texts), batch_size):
-                batch = texts[i:i + batch_size]
-                response = self.client.embeddings.create(
-                    model=self.model,
-                    input=batch
-                )
-                
-                batch_embeddings = [item.embedding for item in response.data]
-                all_embeddings.extend(batch_embeddings)
-            
-            return all_embeddings
+            # Only cache misses are sent to the API, in batches of 100
+            return get_embedding_service().embed(texts, self.model, self._embed_uncached, batch_size=100)
         except Exception as e:
             logger.error(f"Error embedding documents: {str(e)}")
             logger.error(traceback.format_exc())
@@ -64,11 +75,7 @@ class CustomEmbeddings:
     def embed_query(self, text: str) -> List[float]:
         """Embed a single piece of text."""
         try:
-            response = self.client.embeddings.create(
-                model=self.model,
-                input=text
-            )
-            return response.data[0].embedding
+            return get_embedding_service().embed_one(text, self.model, self._embed_uncached)
         except Exception as e:
             logger.error(f"Error embedding query: {str(e)}")
             logger.error(traceback.format_exc())
@@ -81,8 +88,14 @@ class CustomEmbeddings:
         return self.embed_documents(texts)
 
 class InterviewVectorStore:
-    def __init__(self, openai_api_key: str, vector_store_path: str = "vector_store"):
-        """Initialize the vector store with OpenAI API key."""
+    def __init__(self, openai_api_key: str, vector_store_path: str = "vector_store",
+                 ann_type: Optional[str] = None, ann_threshold: Optional[int] = None):
+        """Initialize the vector store with OpenAI API key.
+
+        Interviews are split into chunks, and each chunk is stored in a
+        ChunkIndex under a stable ID; above ``ann_threshold`` chunks searches
+        use an approximate (``ann_type``) index.
+        """
         try:
             self.api_key = openai_api_key
             self.vector_store_path = vector_store_path
@@ -93,23 +106,36 @@ class InterviewVectorStore:
                 length_function=len,
                 separators=["\n\n", "\n", " ", ""]  # Better separators for interview content
             )
+            self.ann_type = ann_type
+            self.ann_threshold = ann_threshold
             self.index = None
-            self.interview_ids = []
             self.interview_metadata = {}
+            # interview ID -> vector IDs of its chunks
+            self.interview_chunks = {}
+            # Guards the index and the maps above; embedding happens outside it
+            self._lock = threading.RLock()
+            self._ann_building = False
             
             # Initialize FAISS index if it doesn't exist
-            if not os.path.exists(vector_store_path):
+            if not os.path.exists(vector_store_path) or not self.load_vector_store():
                 dimension = self.embeddings.embedding_dimension
-                self.index = faiss.IndexFlatL2(dimension)
+                self.index = ChunkIndex(dimension, ann_type=ann_type, ann_threshold=ann_threshold)
                 logger.info(f"Created new FAISS index with dimension {dimension}")
-            else:
-                self.load_vector_store()
+            # Searches use the exact index while the approximate one is rebuilt
+            # in the background (see _schedule_ann_build)
+            self.index.lazy_ann = False
+            self._schedule_ann_build()
                 
             logger.info(f"Vector store initialized with path: {self.vector_store_path}")
         except Exception as e:
             logger.error(f"Error initializing vector store: {str(e)}")
             logger.error(traceback.format_exc())
             raise
+
+    @property
+    def interview_ids(self) -> List[str]:
+        """IDs of the interviews in the store."""
+        return list(self.interview_chunks)
     
     def _clean_content(self, content: str) -> str:
         """Clean content by removing Daria's comments and extracting only user responses."""
@@ -191,39 +217,68 @@ Analysis:
             raise
     
     def add_interviews(self, interviews: List[Dict[str, Any]]) -> None:
-        """Add multiple interviews to the vector store."""
+        """Add multiple interviews to the vector store.
+
+        Interviews that are already in the store are replaced; those whose
+        chunks are unchanged are skipped, so re-adding every interview at
+        startup neither re-embeds them nor invalidates the approximate index.
+        """
         try:
             if not interviews:
                 logger.warning("No interviews provided to add")
                 return
 
             texts = []
+            ids = []
+            metadatas = []
+            prepared = {}
             for interview in interviews:
+                interview_id = interview['id']
                 # Prepare the interview text using the helper method
                 prepared_text = self._prepare_interview_text(interview)
-                texts.append(prepared_text)
-                self.interview_ids.append(interview['id'])
-                self.interview_metadata[interview['id']] = {
+                chunks = [chunk for chunk in self.text_splitter.split_text(prepared_text) if chunk.strip()]
+                if not chunks:
+                    continue
+                chunk_ids = [chunk_vector_id(interview_id, i) for i in range(len(chunks))]
+                content_hash = chunks_hash(chunks)
+                with self._lock:
+                    unchanged = (
+                        sorted(self.interview_chunks.get(interview_id, [])) == sorted(chunk_ids)
+                        and self.interview_metadata.get(interview_id, {}).get('content_hash') == content_hash
+                    )
+                if unchanged:
+                    continue
+                texts.extend(chunks)
+                ids.extend(chunk_ids)
+                metadatas.extend({'interview_id': interview_id, 'chunk': i} for i in range(len(chunks)))
+                prepared[interview_id] = (chunk_ids, {
                     'project_name': interview.get('project_name', ''),
                     'interview_type': interview.get('interview_type', ''),
                     'date': interview.get('date', ''),
+                    'content_hash': content_hash,
                     'last_updated': datetime.now().strftime('%Y-%m-%dT%H:%M:%S')
-                }
+                })
 
-            logger.info(f"Processing {len(texts)} interviews for vectorization")
+            if not prepared:
+                logger.info(f"All {len(interviews)} interviews are unchanged in the vector store")
+                return
+            logger.info(f"Processing {len(texts)} chunks of {len(prepared)} interviews for vectorization")
 
-            # Get embeddings for all texts
-            embeddings = self.embeddings.embed_documents(texts)
+            # Get embeddings for all chunks before touching the index, so a
+            # failed or slow embedding call leaves the previous versions searchable
+            embeddings = self.embeddings.embed_documents(texts) if texts else []
             
-            # Add embeddings to the index
+            # Swap the old chunks for the new ones in one step
             if embeddings:
-                if self.index is None:
-                    dimension = len(embeddings[0])
-                    self.index = faiss.IndexFlatL2(dimension)
-                    logger.info(f"Created new FAISS index with dimension {dimension}")
-                
-                self.index.add(np.array(embeddings).astype('float32'))
-                self.save_vector_store()
+                with self._lock:
+                    for interview_id, (chunk_ids, metadata) in prepared.items():
+                        # Drop the previous version's chunks (it may have had more)
+                        self.index.remove(self.interview_chunks.pop(interview_id, []))
+                        self.interview_chunks[interview_id] = chunk_ids
+                        self.interview_metadata[interview_id] = metadata
+                    self.index.upsert(ids, embeddings, metadatas)
+                    self.save_vector_store()
+                self._schedule_ann_build()
                 logger.info("Successfully added interviews to vector store")
             else:
                 logger.warning("No embeddings generated")
@@ -233,18 +288,40 @@ Analysis:
             logger.error(traceback.format_exc())
             raise
     
+    def _schedule_ann_build(self) -> None:
+        """Rebuild a missing or stale approximate index on a background thread."""
+        with self._lock:
+            if self._ann_building or not self.index.needs_ann_build:
+                return
+            self._ann_building = True
+        threading.Thread(target=self._build_ann, name="ann-build", daemon=True).start()
+
+    def _build_ann(self) -> None:
+        try:
+            while True:
+                with self._lock:
+                    if not self.index.needs_ann_build:
+                        return
+                    vectors, ids, version = self.index.ann_snapshot()
+                # The slow part runs without the lock; searches use the exact index meanwhile
+                ann = self.index.build_ann(vectors, ids)
+                with self._lock:
+                    if self.index.install_ann(ann, version):
+                        self.save_vector_store()
+                        return
+        except Exception as e:
+            logger.error(f"Error building approximate index: {str(e)}")
+        finally:
+            with self._lock:
+                self._ann_building = False
+
     def save_vector_store(self) -> None:
-        """Save the vector store to disk."""
+        """Save the index and the interview metadata to disk, in one file."""
         try:
             if self.index is not None:
                 print(f"Saving vector store to {self.vector_store_path}")
-                faiss.write_index(self.index, self.vector_store_path)
-                metadata = {
-                    'interview_ids': self.interview_ids,
-                    'interview_metadata': self.interview_metadata
-                }
-                with open(f"{self.vector_store_path}_metadata.json", 'w') as f:
-                    json.dump(metadata, f)
+                self.index.info = {'interview_metadata': self.interview_metadata}
+                self.index.save(self.vector_store_path)
                 print("Vector store saved successfully")
             else:
                 print("No vector store to save")
@@ -257,19 +334,49 @@ Analysis:
         try:
             if os.path.exists(self.vector_store_path):
                 print(f"Loading vector store from {self.vector_store_path}")
-                self.index = faiss.read_index(self.vector_store_path)
-                metadata_path = f"{self.vector_store_path}_metadata.json"
-                if os.path.exists(metadata_path):
-                    with open(metadata_path, 'r') as f:
-                        metadata = json.load(f)
-                        self.interview_ids = metadata.get('interview_ids', [])
-                        self.interview_metadata = metadata.get('interview_metadata', {})
+                if ChunkIndex.is_index_file(self.vector_store_path):
+                    self.index = ChunkIndex.load(self.vector_store_path)
+                    if self.ann_type is not None:
+                        self.index.ann_type = self.ann_type
+                    if self.ann_threshold is not None:
+                        self.index.ann_threshold = self.ann_threshold
+                    self.interview_metadata = self.index.info.get('interview_metadata', {})
+                else:
+                    self._load_legacy_vector_store()
+                self.interview_chunks = {}
+                for vector_id, metadata in self.index.metadata.items():
+                    self.interview_chunks.setdefault(metadata['interview_id'], []).append(vector_id)
                 print("Vector store loaded successfully")
                 return True
             return False
         except Exception as e:
             print(f"Error loading vector store: {str(e)}")
             return False
+
+    def _load_legacy_vector_store(self) -> None:
+        """Convert a store of one L2 vector per interview (faiss.write_index + _metadata.json)."""
+        legacy_index = faiss.read_index(self.vector_store_path)
+        interview_ids = []
+        metadata_path = f"{self.vector_store_path}_metadata.json"
+        if os.path.exists(metadata_path):
+            with open(metadata_path, 'r') as f:
+                metadata = json.load(f)
+                interview_ids = metadata.get('interview_ids', [])
+                self.interview_metadata = metadata.get('interview_metadata', {})
+
+        self.index = ChunkIndex(legacy_index.d, ann_type=self.ann_type, ann_threshold=self.ann_threshold)
+        # Vectors were stored positionally; the same interview may appear more than once
+        positions = {}
+        for position, interview_id in enumerate(interview_ids[:legacy_index.ntotal]):
+            positions[interview_id] = position
+        if positions:
+            vectors = np.array([legacy_index.reconstruct(position) for position in positions.values()])
+            self.index.upsert(
+                [chunk_vector_id(interview_id, 0) for interview_id in positions],
+                vectors,
+                [{'interview_id': interview_id, 'chunk': 0} for interview_id in positions]
+            )
+        logger.info(f"Converted legacy vector store with {len(positions)} interviews")
     
     def _extract_relevant_content(self, content: str) -> str:
         """Extract only relevant content from the interview text."""
@@ -316,10 +423,26 @@ Analysis:
             print(f"Error extracting relevant content: {str(e)}")
             return content
 
+    def _interview_scores(self, hits: List[Tuple[int, float]], exclude: Optional[str] = None) -> Dict[str, float]:
+        """Best chunk score per interview, best interview first."""
+        scores = {}
+        for vector_id, score in hits:
+            metadata = self.index.metadata.get(vector_id)
+            if metadata is None or metadata['interview_id'] == exclude:
+                continue
+            interview_id = metadata['interview_id']
+            if score > scores.get(interview_id, float('-inf')):
+                scores[interview_id] = score
+        return dict(sorted(scores.items(), key=lambda item: item[1], reverse=True))
+
     def semantic_search(self, query: str, k: int = 5) -> List[Dict[str, Any]]:
-        """Search for similar interviews using semantic search."""
+        """Search for similar interviews using semantic search.
+
+        Chunks are ranked by cosine similarity to the query, and each
+        interview is scored by its best chunk.
+        """
         try:
-            if not self.index or not self.interview_ids:
+            if self.index is None or not self.interview_chunks:
                 logger.warning("No interviews in vector store")
                 return []
 
@@ -331,54 +454,43 @@ Analysis:
             # Get query embedding
             query_embedding = self.embeddings.embed_query(query)
             
-            # Search the index with a larger k to get more potential matches
-            search_k = min(k * 10, len(self.interview_ids))  # Increased from 5x to 10x
-            distances, indices = self.index.search(
-                np.array([query_embedding]).astype('float32'),
-                search_k
-            )
+            # Search the chunks with a larger k, as several may belong to one interview
+            with self._lock:
+                hits = self.index.search([query_embedding], k * 10)[0]
+                interview_scores = self._interview_scores(hits)
             
             # Get unique interview IDs from search results
             unique_interviews = {}
-            for i, idx in enumerate(indices[0]):
-                if idx < len(self.interview_ids):  # Ensure valid index
-                    interview_id = self.interview_ids[idx]
-                    if interview_id not in unique_interviews:
-                        # Load the interview data
-                        interview_file = Path('interviews') / f"{interview_id}.json"
-                        interview_data = {}
-                        if interview_file.exists():
-                            with open(interview_file) as f:
-                                interview_data = json.load(f)
-                        
-                        # Skip interviews with empty transcripts
-                        if not interview_data.get('transcript'):
-                            continue
-                        
-                        # Calculate similarity score using a modified sigmoid function
-                        l2_distance = float(distances[0][i])
-                        similarity_score = 1 / (1 + np.exp(l2_distance / 5))
-                        
-                        # Skip results with very low similarity
-                        if similarity_score < 0.1:
-                            continue
-                        
-                        # Format the result with all necessary fields
-                        unique_interviews[interview_id] = {
-                            'id': interview_id,
-                            'project_name': interview_data.get('project_name', 'Unknown Project'),
-                            'interview_type': interview_data.get('interview_type', 'Unknown Type'),
-                            'date': interview_data.get('date') or datetime.now().isoformat(),
-                            'transcript': interview_data.get('transcript', ''),
-                            'analysis': interview_data.get('analysis', ''),
-                            'score': similarity_score
-                        }
-                        if len(unique_interviews) >= k:
-                            break
+            for interview_id, similarity_score in interview_scores.items():
+                # Skip results with very low similarity
+                if similarity_score < MIN_SIMILARITY:
+                    break
+
+                # Load the interview data
+                interview_file = Path('interviews') / f"{interview_id}.json"
+                interview_data = {}
+                if interview_file.exists():
+                    with open(interview_file) as f:
+                        interview_data = json.load(f)
+                
+                # Skip interviews with empty transcripts
+                if not interview_data.get('transcript'):
+                    continue
+                
+                # Format the result with all necessary fields
+                unique_interviews[interview_id] = {
+                    'id': interview_id,
+                    'project_name': interview_data.get('project_name', 'Unknown Project'),
+                    'interview_type': interview_data.get('interview_type', 'Unknown Type'),
+                    'date': interview_data.get('date') or datetime.now().isoformat(),
+                    'transcript': interview_data.get('transcript', ''),
+                    'analysis': interview_data.get('analysis', ''),
+                    'score': similarity_score
+                }
+                if len(unique_interviews) >= k:
+                    break
             
-            # Convert to list and sort by score
             results = list(unique_interviews.values())
-            results.sort(key=lambda x: x['score'], reverse=True)
             
             logger.info(f"Found {len(results)} unique interviews")
             return results
@@ -389,33 +501,35 @@ Analysis:
             return []
     
     def find_similar_interviews(self, interview_id: str, k: int = 3) -> List[Dict[str, Any]]:
-        """Find interviews similar to a given interview."""
+        """Find interviews similar to a given interview.
+
+        Each of the interview's chunks is searched for, and other interviews
+        are scored by their best matching chunk (cosine similarity).
+        """
         try:
-            if interview_id not in self.interview_ids:
-                return []
+            with self._lock:
+                chunk_ids = self.interview_chunks.get(interview_id)
+                if not chunk_ids:
+                    return []
 
-            # Get the index of the interview
-            idx = self.interview_ids.index(interview_id)
-            
-            # Get the embedding at that index
-            embedding = self.index.reconstruct(idx)
-            
-            # Search for similar interviews
-            distances, indices = self.index.search(
-                np.array([embedding]).astype('float32'), k + 1
-            )
+                # Get the embeddings of the interview's chunks
+                embeddings = np.array([self.index.reconstruct(vector_id) for vector_id in chunk_ids])
+                
+                # Search for similar chunks, leaving room for the interview's own
+                search_k = (k + 1) * 10 + len(chunk_ids)
+                hits = [hit for row in self.index.search(embeddings, search_k) for hit in row]
+                interview_scores = self._interview_scores(hits, exclude=interview_id)
 
             # Get results (excluding the input interview)
             results = []
-            for i, idx in enumerate(indices[0]):
-                if idx < len(self.interview_ids) and idx != self.interview_ids.index(interview_id):
-                    similar_id = self.interview_ids[idx]
-                    metadata = self.interview_metadata.get(similar_id, {})
-                    results.append({
-                        'id': similar_id,
-                        'score': float(distances[0][i]),
-                        'metadata': metadata
-                    })
+            for similar_id, score in interview_scores.items():
+                results.append({
+                    'id': similar_id,
+                    'score': score,
+                    'metadata': self.interview_metadata.get(similar_id, {})
+                })
+                if len(results) >= k:
+                    break
 
             return results
         except Exception as e:
@@ -425,15 +539,16 @@ Analysis:
     def remove_interview(self, interview_id: str):
         """Remove an interview from the vector store."""
         try:
-            if interview_id in self.interview_ids:
-                idx = self.interview_ids.index(interview_id)
-                # Remove the embedding
-                self.index.remove_ids(np.array([idx]))
+            with self._lock:
+                if interview_id not in self.interview_chunks:
+                    return
+                # Remove the embeddings of its chunks by their IDs
+                self.index.remove(self.interview_chunks.pop(interview_id))
                 # Remove from metadata
-                self.interview_ids.pop(idx)
                 self.interview_metadata.pop(interview_id, None)
                 self.save_vector_store()
-                print(f"Successfully removed interview {interview_id}")
+            self._schedule_ann_build()
+            print(f"Successfully removed interview {interview_id}")
         except Exception as e:
             print(f"Error removing interview: {str(e)}")
             raise
@@ -441,9 +556,8 @@ Analysis:
     def calculate_similarity(self, text1: str, text2: str) -> float:
         """Calculate semantic similarity between two texts."""
         try:
-            # Get embeddings for both texts
-            embedding1 = self.embeddings.embed_query(text1)
-            embedding2 = self.embeddings.embed_query(text2)
+            # Get embeddings for both texts in one (cached) call
+            embedding1, embedding2 = self.embeddings.embed_documents([text1, text2])
             
             # Convert to numpy arrays
             vec1 = np.array(embedding1)
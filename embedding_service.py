@@ -0,0 +1,270 @@
+"""
+Shared embedding service with a persistent content-hash cache.
+
+Every embedding call site (OpenAI and sentence-transformers) goes through
+EmbeddingService.embed, which looks texts up by (model, hash of the
+normalized text) and only sends cache misses to the model. Vectors are kept
+as float32 in one append-only binary file per model:
+
+    <cache_dir>/<model>.emb
+        header: b"DEMB", format version (uint16), dimension (uint32)
+        records: sha256 key (32 bytes) + dimension float32 values
+
+Only the key -> offset index is held in memory; vectors are read on demand.
+"""
+
+import hashlib
+import logging
+import os
+import re
+import struct
+import sys
+import threading
+import unicodedata
+from array import array
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_CACHE_DIR_ENV = "DARIA_EMBEDDING_CACHE_DIR"
+DEFAULT_EMBEDDING_CACHE_DIR = os.path.join("data", "embedding_cache")
+
+CACHE_MAGIC = b"DEMB"
+CACHE_FORMAT_VERSION = 1
+_HEADER = struct.Struct("<4sHI")
+KEY_SIZE = 32
+
+
+def normalize_text(text: str) -> str:
+    """Normalize text before hashing so trivial whitespace differences share an entry."""
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFC", text or "")).strip()
+
+
+def text_key(model: str, text: str) -> bytes:
+    """Cache key for a text embedded with a given model."""
+    return hashlib.sha256(f"{model}\x00{normalize_text(text)}".encode("utf-8")).digest()
+
+
+def _to_floats(vector) -> List[float]:
+    if hasattr(vector, "tolist"):
+        vector = vector.tolist()
+    return [float(v) for v in vector]
+
+
+class EmbeddingCache:
+    """Append-only float32 vector file for one embedding model."""
+
+    def __init__(self, cache_dir: str, model: str):
+        self.model = model
+        slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", model)
+        self.path = Path(cache_dir) / f"{slug}.emb"
+        self.dimension = None
+        self._offsets = {}
+        self._indexed_size = 0
+        self._lock = threading.RLock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self._scan()
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    @property
+    def record_size(self) -> int:
+        return KEY_SIZE + 4 * self.dimension
+
+    def get_many(self, keys: Sequence[bytes]) -> Dict[bytes, List[float]]:
+        """Return the cached vectors for the given keys (misses are left out)."""
+        with self._lock:
+            if any(key not in self._offsets for key in keys):
+                # Pick up entries appended by other processes
+                self._scan()
+            offsets = {key: self._offsets[key] for key in keys if key in self._offsets}
+            if not offsets:
+                return {}
+
+            found = {}
+            with open(self.path, "rb") as f:
+                for key, offset in offsets.items():
+                    f.seek(offset + KEY_SIZE)
+                    values = array("f")
+                    values.frombytes(f.read(4 * self.dimension))
+                    if sys.byteorder == "big":
+                        values.byteswap()
+                    found[key] = values.tolist()
+            return found
+
+    def put_many(self, items: Sequence[tuple]) -> None:
+        """Append (key, vector) pairs that are not cached yet."""
+        with self._lock:
+            with open(self.path, "ab") as f:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    self._scan()
+                    if f.tell() == 0 or self.dimension is None:
+                        dimension = len(items[0][1]) if items else 0
+                        if not dimension:
+                            return
+                        f.truncate(0)
+                        f.write(_HEADER.pack(CACHE_MAGIC, CACHE_FORMAT_VERSION, dimension))
+                        self.dimension = dimension
+                        self._indexed_size = _HEADER.size
+                    else:
+                        # Drop a torn record left by a crashed writer so new
+                        # records stay aligned
+                        aligned = self._indexed_size
+                        if f.tell() != aligned:
+                            f.truncate(aligned)
+                    f.seek(0, os.SEEK_END)
+
+                    records = []
+                    offset = f.tell()
+                    for key, vector in items:
+                        if key in self._offsets:
+                            continue
+                        if len(vector) != self.dimension:
+                            logger.warning(f"Not caching {self.model} embedding with dimension "
+                                           f"{len(vector)} (expected {self.dimension})")
+                            continue
+                        values = array("f", vector)
+                        if sys.byteorder == "big":
+                            values.byteswap()
+                        records.append(key + values.tobytes())
+                        self._offsets[key] = offset
+                        offset += self.record_size
+                    if records:
+                        f.write(b"".join(records))
+                        f.flush()
+                    self._indexed_size = offset
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _scan(self) -> None:
+        """Index records appended since the last scan."""
+        try:
+            size = self.path.stat().st_size
+        except FileNotFoundError:
+            return
+        if size <= self._indexed_size:
+            return
+
+        with open(self.path, "rb") as f:
+            if self.dimension is None:
+                header = f.read(_HEADER.size)
+                if len(header) < _HEADER.size:
+                    return
+                magic, version, dimension = _HEADER.unpack(header)
+                if magic != CACHE_MAGIC or version != CACHE_FORMAT_VERSION:
+                    logger.warning(f"Ignoring unrecognized embedding cache file {self.path}")
+                    return
+                self.dimension = dimension
+                self._indexed_size = _HEADER.size
+
+            record_size = self.record_size
+            offset = self._indexed_size
+            f.seek(offset)
+            while offset + record_size <= size:
+                key = f.read(KEY_SIZE)
+                self._offsets[key] = offset
+                offset += record_size
+                f.seek(offset)
+            self._indexed_size = offset
+
+
+class EmbeddingService:
+    """Embeds texts through a persistent cache, calling the model only for misses."""
+
+    def __init__(self, cache_dir: str = None):
+        self.cache_dir = cache_dir or os.environ.get(EMBEDDING_CACHE_DIR_ENV, DEFAULT_EMBEDDING_CACHE_DIR)
+        self._caches = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def cache_for(self, model: str) -> EmbeddingCache:
+        with self._lock:
+            if model not in self._caches:
+                self._caches[model] = EmbeddingCache(self.cache_dir, model)
+                self._stats[model] = {"hits": 0, "misses": 0, "model_calls": 0}
+            return self._caches[model]
+
+    def embed(self, texts: Sequence[str], model: str,
+              embed_fn: Callable[[List[str]], Sequence], batch_size: int = None) -> List[List[float]]:
+        """Embed texts, serving repeats from the cache.
+
+        Args:
+            texts (Sequence[str]): Texts to embed
+            model (str): Model name, part of the cache key
+            embed_fn (Callable): Called with a list of uncached texts, returns
+                one vector per text
+            batch_size (int, optional): Maximum texts per embed_fn call
+
+        Returns:
+            List[List[float]]: One float32-precision vector per input text
+        """
+        texts = list(texts)
+        if not texts:
+            return []
+        cache = self.cache_for(model)
+        keys = [text_key(model, text) for text in texts]
+        vectors = cache.get_many(keys)
+
+        # Unique misses, keeping the first text seen for each key
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in vectors and key not in missing:
+                missing[key] = text
+
+        stats = self._stats[model]
+        with self._lock:
+            stats["hits"] += sum(1 for key in keys if key in vectors)
+            stats["misses"] += sum(1 for key in keys if key not in vectors)
+
+        if missing:
+            missing_keys = list(missing)
+            step = batch_size or len(missing_keys)
+            for start in range(0, len(missing_keys), step):
+                batch_keys = missing_keys[start:start + step]
+                embedded = embed_fn([missing[key] for key in batch_keys])
+                with self._lock:
+                    stats["model_calls"] += 1
+                new_items = [(key, _to_floats(vector)) for key, vector in zip(batch_keys, embedded)]
+                cache.put_many(new_items)
+                for key, vector in new_items:
+                    # Round through float32 so hits and misses return identical values
+                    vectors[key] = array("f", vector).tolist()
+
+        return [vectors[key] for key in keys]
+
+    def embed_one(self, text: str, model: str, embed_fn: Callable[[List[str]], Sequence]) -> List[float]:
+        """Embed a single text (see embed)."""
+        return self.embed([text], model, embed_fn)[0]
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Per-model hit/miss counters, hit rate and cached entry count."""
+        with self._lock:
+            result = {}
+            for model, stats in self._stats.items():
+                lookups = stats["hits"] + stats["misses"]
+                result[model] = dict(stats, hit_rate=stats["hits"] / lookups if lookups else 0.0,
+                                     entries=len(self._caches[model]))
+            return result
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_embedding_service() -> EmbeddingService:
+    """Get the process-wide EmbeddingService."""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = EmbeddingService()
+        return _service
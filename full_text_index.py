@@ -0,0 +1,311 @@
+"""
+Persistent inverted full-text index backed by SQLite FTS5.
+
+FTS5 keeps token postings with positions, so phrase queries, prefix
+(type-ahead) queries, column filters, BM25 ranking and highlighted snippet
+windows are answered from the index without reading the source documents.
+
+Each indexed source file (one ``<id>.json`` document) contributes one or
+more rows; a row has one text column per configured field. The file's
+(mtime, size) and an optional summary are stored alongside, so ``sync`` can
+re-index only files that changed and search results can be served without
+opening the files.
+
+Query syntax accepted by ``build_match_query``:
+
+    checkout flow          both words (the last one as a prefix)
+    "checkout flow"        the exact phrase
+    project:acme           a word restricted to one field
+    themes:"user trust"    a phrase restricted to one field
+"""
+
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import serialization
+
+logger = logging.getLogger(__name__)
+
+HIGHLIGHT_START = "<mark>"
+HIGHLIGHT_END = "</mark>"
+SNIPPET_TOKENS = 24
+
+_FIELD_NAME = re.compile(r"^[a-z_]+$")
+_QUERY_TERM = re.compile(r'(?:(\w+):)?(?:"([^"]*)"?|(\S+))')
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def build_match_query(query: str, fields: Sequence[str], restrict_to: Optional[Iterable[str]] = None,
+                      prefix_last: bool = True) -> Optional[str]:
+    """Translate a search box query into an FTS5 MATCH expression.
+
+    Args:
+        query (str): The user's query (see the module docstring for syntax)
+        fields (Sequence[str]): Indexed field names; ``name:`` prefixes
+            naming other fields are treated as plain text
+        restrict_to (Iterable[str], optional): Only match in these fields
+        prefix_last (bool): Treat the last unquoted word as a prefix so
+            results appear while the user is still typing
+
+    Returns:
+        Optional[str]: The MATCH expression, or None if the query has no words
+    """
+    terms = []
+    for match in _QUERY_TERM.finditer(query or ""):
+        field, phrase, word = match.groups()
+        if field and field not in fields:
+            # Not a field filter, e.g. a time like 10:30
+            word = f"{field}:{phrase if phrase is not None else word}"
+            field, phrase = None, None
+        words = _WORD.findall(phrase if phrase is not None else word or "")
+        if not words:
+            continue
+        terms.append((field, words, phrase is not None))
+
+    if not terms:
+        return None
+
+    expressions = []
+    for i, (field, words, quoted) in enumerate(terms):
+        is_prefix = prefix_last and i == len(terms) - 1 and not quoted and len(words) == 1
+        # Words are \w+ only, so they never contain quotes to escape
+        expression = '"' + " ".join(words) + '"' + ("*" if is_prefix else "")
+        if field:
+            expression = f"{field} : {expression}"
+        expressions.append(expression)
+    expression = " AND ".join(expressions)
+
+    restrict_to = [field for field in (restrict_to or []) if field in fields]
+    if restrict_to:
+        expression = "{" + " ".join(restrict_to) + "} : (" + expression + ")"
+    return expression
+
+
+def _attribute_value(value) -> Optional[str]:
+    return None if value is None else str(value)
+
+
+class FullTextIndex:
+    """Inverted index over the JSON documents of one directory."""
+
+    def __init__(self, db_path: str, fields: Sequence[str], attributes: Sequence[str] = ()):
+        """Open (or create) an index.
+
+        Args:
+            db_path (str): SQLite database file
+            fields (Sequence[str]): Names of the text fields of each row
+            attributes (Sequence[str]): Names of exact-match metadata values
+                stored per row (not tokenized) that ``search`` can filter on
+        """
+        for name in tuple(fields) + tuple(attributes):
+            if not _FIELD_NAME.match(name):
+                raise ValueError(f"Invalid field name: {name}")
+        self.db_path = Path(db_path)
+        self.fields = tuple(fields)
+        self.attributes = tuple(attributes)
+        os.makedirs(self.db_path.parent, exist_ok=True)
+
+        self._synced_at = None
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        with self._lock, self._conn:
+            self._conn.executescript(f"""
+                CREATE TABLE IF NOT EXISTS sources (
+                    source_id TEXT PRIMARY KEY,
+                    mtime_ns INTEGER,
+                    size INTEGER,
+                    summary TEXT
+                );
+                CREATE TABLE IF NOT EXISTS entry_rows (
+                    rowid INTEGER PRIMARY KEY,
+                    source_id TEXT NOT NULL,
+                    position INTEGER NOT NULL{"".join(f", {name} TEXT" for name in self.attributes)}
+                );
+                CREATE INDEX IF NOT EXISTS idx_entry_rows_source ON entry_rows (source_id);
+                {"".join(f"CREATE INDEX IF NOT EXISTS idx_entry_rows_{name} ON entry_rows ({name});"
+                         for name in self.attributes)}
+                CREATE VIRTUAL TABLE IF NOT EXISTS entries USING fts5(
+                    {", ".join(self.fields)},
+                    tokenize = 'unicode61 remove_diacritics 2',
+                    prefix = '2 3'
+                );
+            """)
+
+    def update(self, source_id: str, rows: List[Dict[str, str]], stat: Optional[Tuple[int, int]] = None,
+               summary: Optional[Dict] = None) -> None:
+        """Replace everything indexed for a source.
+
+        Args:
+            source_id (str): The source document ID
+            rows (List[Dict]): One ``{field: text}`` dict per row, which may
+                also hold attribute values; the list position is returned by
+                ``search``
+            stat (Tuple[int, int], optional): (mtime_ns, size) of the source
+                file, used by ``sync``
+            summary (Dict, optional): Stored and returned with search hits
+        """
+        with self._lock, self._conn:
+            self._insert(source_id, rows, stat, summary)
+
+    def update_many(self, sources: Iterable[Tuple[str, List[Dict[str, str]], Optional[Dict]]]) -> None:
+        """Replace several sources in one transaction.
+
+        Args:
+            sources (Iterable): ``(source_id, rows, summary)`` per source (see ``update``)
+        """
+        with self._lock, self._conn:
+            for source_id, rows, summary in sources:
+                self._insert(source_id, rows, None, summary)
+
+    def remove(self, source_id: str) -> None:
+        """Drop a source from the index."""
+        with self._lock, self._conn:
+            self._delete(source_id)
+
+    def remove_many(self, source_ids: Iterable[str]) -> None:
+        """Drop several sources in one transaction."""
+        with self._lock, self._conn:
+            for source_id in source_ids:
+                self._delete(source_id)
+
+    def source_ids(self) -> List[str]:
+        """IDs of all indexed sources."""
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT source_id FROM sources")]
+
+    def sync(self, source_dir: str, load: Callable[[str], Optional[Tuple[List[Dict[str, str]], Optional[Dict]]]],
+             max_age: Optional[float] = None) -> Dict[str, int]:
+        """Re-index the ``<id>.json`` files in a directory that changed since they were indexed.
+
+        Args:
+            source_dir (str): Directory holding the source documents
+            load (Callable): Called with a source ID, returns (rows, summary)
+                or None if the document can't be read
+            max_age (float, optional): Skip the directory scan if the last
+                one was less than this many seconds ago. Writers that call
+                ``update``/``remove`` themselves are indexed immediately;
+                this only delays picking up files edited behind the
+                index's back.
+
+        Returns:
+            Dict[str, int]: Number of sources indexed and removed
+        """
+        now = time.monotonic()
+        if max_age is not None and self._synced_at is not None and now - self._synced_at < max_age:
+            return {"indexed": 0, "removed": 0}
+        self._synced_at = now
+        current = {}
+        for entry in os.scandir(source_dir):
+            if entry.name.endswith(".json") and entry.is_file():
+                stat = entry.stat()
+                current[entry.name[:-5]] = (stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            indexed = {
+                source_id: (mtime_ns, size)
+                for source_id, mtime_ns, size in self._conn.execute("SELECT source_id, mtime_ns, size FROM sources")
+            }
+            removed = set(indexed) - set(current)
+            changed = [source_id for source_id, stat in current.items() if indexed.get(source_id) != stat]
+            for source_id in removed:
+                self.remove(source_id)
+            for source_id in changed:
+                loaded = load(source_id)
+                rows, summary = loaded if loaded is not None else ([], None)
+                self.update(source_id, rows, current[source_id], summary)
+        if changed or removed:
+            logger.info(f"Full-text index {self.db_path}: {len(changed)} indexed, {len(removed)} removed")
+        return {"indexed": len(changed), "removed": len(removed)}
+
+    def search(self, query: str, fields: Optional[Iterable[str]] = None, limit: Optional[int] = None,
+               prefix_last: bool = True, where: Optional[Dict[str, object]] = None) -> List[Dict]:
+        """Find rows matching a query, best BM25 rank first.
+
+        Args:
+            query (str): The user's query (see ``build_match_query``)
+            fields (Iterable[str], optional): Only match in these fields
+            limit (int, optional): Maximum number of rows
+            prefix_last (bool): Treat the last unquoted word as a prefix
+            where (Dict, optional): Attribute values the rows must equal
+
+        Raises:
+            ValueError: If ``where`` names an attribute the index doesn't store
+
+        Returns:
+            List[Dict]: ``{'source_id', 'position', 'snippet', 'score',
+                'summary'}`` per row; ``snippet`` is a window of the best
+                matching field with matches wrapped in <mark> tags
+        """
+        unknown = set(where or {}) - set(self.attributes)
+        if unknown:
+            raise ValueError(f"Cannot filter on {', '.join(sorted(unknown))}")
+        expression = build_match_query(query, self.fields, fields, prefix_last)
+        if expression is None:
+            return []
+        sql = (
+            "SELECT r.source_id, r.position, snippet(entries, -1, ?, ?, '...', ?), bm25(entries), s.summary "
+            "FROM entries "
+            "JOIN entry_rows r ON r.rowid = entries.rowid "
+            "JOIN sources s ON s.source_id = r.source_id "
+            "WHERE entries MATCH ?"
+        )
+        params = [HIGHLIGHT_START, HIGHLIGHT_END, SNIPPET_TOKENS, expression]
+        for name, value in (where or {}).items():
+            sql += f" AND r.{name} = ?"
+            params.append(_attribute_value(value))
+        sql += " ORDER BY rank"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            try:
+                rows = self._conn.execute(sql, params).fetchall()
+            except sqlite3.OperationalError as e:
+                logger.error(f"Error running full-text query {expression!r}: {str(e)}")
+                return []
+        return [{
+            "source_id": source_id,
+            "position": position,
+            "snippet": snippet,
+            # bm25() is lower-is-better; flip it so higher means more relevant
+            "score": -score,
+            "summary": serialization.loads(summary) if summary else None
+        } for source_id, position, snippet, score, summary in rows]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _insert(self, source_id: str, rows: List[Dict[str, str]], stat: Optional[Tuple[int, int]],
+                summary: Optional[Dict]) -> None:
+        mtime_ns, size = stat if stat else (None, None)
+        self._delete(source_id)
+        self._conn.execute(
+            "INSERT INTO sources (source_id, mtime_ns, size, summary) VALUES (?, ?, ?, ?)",
+            (source_id, mtime_ns, size, serialization.dumps(summary) if summary is not None else None)
+        )
+        for position, row in enumerate(rows):
+            cursor = self._conn.execute(
+                f"INSERT INTO entry_rows (source_id, position{''.join(', ' + name for name in self.attributes)}) "
+                f"VALUES (?, ?{', ?' * len(self.attributes)})",
+                [source_id, position] + [_attribute_value(row.get(name)) for name in self.attributes]
+            )
+            self._conn.execute(
+                f"INSERT INTO entries (rowid, {', '.join(self.fields)}) "
+                f"VALUES (?, {', '.join('?' for _ in self.fields)})",
+                [cursor.lastrowid] + [row.get(field) or "" for field in self.fields]
+            )
+
+    def _delete(self, source_id: str) -> None:
+        self._conn.execute(
+            "DELETE FROM entries WHERE rowid IN (SELECT rowid FROM entry_rows WHERE source_id = ?)", (source_id,)
+        )
+        self._conn.execute("DELETE FROM entry_rows WHERE source_id = ?", (source_id,))
+        self._conn.execute("DELETE FROM sources WHERE source_id = ?", (source_id,))
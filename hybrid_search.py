@@ -0,0 +1,176 @@
+"""
+Hybrid lexical + vector retrieval fused with reciprocal-rank fusion.
+
+Pure vector search misses rare proper nouns (product names, acronyms) whose
+embeddings carry little signal, while BM25 misses paraphrases. The
+HybridRetriever runs a BM25 query against a FullTextIndex and a vector
+query against whichever vector store backs the caller concurrently, then
+merges the two rankings with reciprocal-rank fusion (RRF):
+
+    score(d) = sum over rankings of 1 / (RRF_K + rank of d)
+
+RRF only uses ranks, so BM25 scores and cosine distances never need to be
+put on the same scale.
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from full_text_index import FullTextIndex
+
+logger = logging.getLogger(__name__)
+
+SEARCH_MODES = ("hybrid", "vector", "lexical")
+RRF_K = 60
+# Candidates taken from each side before fusion, per requested result
+CANDIDATE_MULTIPLIER = 4
+
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="hybrid-search")
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[str]], k: int = RRF_K) -> List[Tuple[str, float]]:
+    """Fuse ranked ID lists.
+
+    Args:
+        rankings (Sequence[Sequence[str]]): Each list ordered best first
+        k (int): Damping constant; larger values flatten the rank curve
+
+    Returns:
+        List[Tuple[str, float]]: (id, fused score) pairs, best first
+    """
+    scores = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+    # Ties keep the order in which IDs were first seen
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+def chroma_where(filters: Optional[Dict[str, object]]) -> Optional[Dict]:
+    """Build a ChromaDB ``where`` clause from equality filters."""
+    filters = {key: value for key, value in (filters or {}).items() if value is not None}
+    if not filters:
+        return None
+    if len(filters) == 1:
+        return dict(filters)
+    return {"$and": [{key: value} for key, value in filters.items()]}
+
+
+def filters_from_where(where: Optional[Dict]) -> Dict[str, object]:
+    """Turn a ChromaDB ``where`` clause back into equality filters.
+
+    Raises:
+        ValueError: If the clause uses operators other than ``$and``/``$eq``
+    """
+    filters = {}
+    for key, value in (where or {}).items():
+        if key == "$and":
+            for clause in value:
+                filters.update(filters_from_where(clause))
+        elif key.startswith("$"):
+            raise ValueError(f"Unsupported filter operator: {key}")
+        elif isinstance(value, dict):
+            if set(value) != {"$eq"}:
+                raise ValueError(f"Unsupported filter on {key}: {value}")
+            filters[key] = value["$eq"]
+        else:
+            filters[key] = value
+    return filters
+
+
+class HybridRetriever:
+    """Runs lexical and vector retrieval side by side and fuses the results.
+
+    ``vector_search`` is called as ``vector_search(query, n, filters)`` and
+    must return dicts with ``id``, ``content``, ``metadata`` and ``score``
+    (best first). Lexical candidates come from ``lexical_index``, whose
+    source IDs must be the vector store's IDs and whose summaries hold
+    ``{'content', 'metadata'}``.
+    """
+
+    def __init__(self, lexical_index: FullTextIndex,
+                 vector_search: Callable[[str, int, Optional[Dict]], List[Dict]],
+                 filter_fields: Sequence[str] = ("session_id", "speaker", "emotion")):
+        self.lexical_index = lexical_index
+        self.vector_search = vector_search
+        self.filter_fields = tuple(filter_fields)
+
+    def search(self, query: str, k: int = 10, mode: str = "hybrid",
+               filters: Optional[Dict[str, object]] = None) -> List[Dict]:
+        """Retrieve the top k chunks for a query.
+
+        Args:
+            query (str): The search text
+            k (int): Number of results
+            mode (str): ``hybrid``, ``vector`` or ``lexical``
+            filters (Dict, optional): Metadata equality filters
+                (``session_id``, ``speaker``, ``emotion``)
+
+        Returns:
+            List[Dict]: ``{'id', 'content', 'metadata', 'score',
+                'lexical_rank', 'vector_rank', 'snippet'}`` best first;
+                ``score`` is the fused RRF score in hybrid mode and the
+                underlying search score otherwise
+
+        Raises:
+            ValueError: For an unknown mode or filter field
+        """
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Invalid search mode: {mode} (expected one of {', '.join(SEARCH_MODES)})")
+        filters = {key: value for key, value in (filters or {}).items() if value not in (None, "")}
+        unknown = set(filters) - set(self.filter_fields)
+        if unknown:
+            raise ValueError(f"Cannot filter on {', '.join(sorted(unknown))}")
+        if not query or not query.strip():
+            return []
+
+        if mode == "lexical":
+            lexical = self._lexical(query, k, filters)
+            return [dict(hit, lexical_rank=rank, vector_rank=None) for rank, hit in enumerate(lexical, 1)]
+        if mode == "vector":
+            vector = self.vector_search(query, k, filters or None)
+            return [dict(hit, lexical_rank=None, vector_rank=rank, snippet=None) for rank, hit in enumerate(vector, 1)]
+
+        candidates = k * CANDIDATE_MULTIPLIER
+        lexical_future = _executor.submit(self._lexical, query, candidates, filters)
+        vector_future = _executor.submit(self.vector_search, query, candidates, filters or None)
+        lexical = self._result(lexical_future, "lexical")
+        vector = self._result(vector_future, "vector")
+
+        by_id, lexical_ranks, vector_ranks = {}, {}, {}
+        for rank, hit in enumerate(vector, 1):
+            by_id.setdefault(hit["id"], dict(hit, snippet=None))
+            vector_ranks[hit["id"]] = rank
+        for rank, hit in enumerate(lexical, 1):
+            by_id.setdefault(hit["id"], dict(hit))["snippet"] = hit["snippet"]
+            lexical_ranks[hit["id"]] = rank
+
+        fused = reciprocal_rank_fusion([[hit["id"] for hit in lexical], [hit["id"] for hit in vector]])
+        return [
+            dict(by_id[doc_id], score=score, lexical_rank=lexical_ranks.get(doc_id),
+                 vector_rank=vector_ranks.get(doc_id))
+            for doc_id, score in fused[:k]
+        ]
+
+    def _lexical(self, query: str, n: int, filters: Dict[str, object]) -> List[Dict]:
+        hits = self.lexical_index.search(query, limit=n, where=filters)
+        results = []
+        for hit in hits:
+            summary = hit["summary"] or {}
+            results.append({
+                "id": hit["source_id"],
+                "content": summary.get("content", ""),
+                "metadata": summary.get("metadata", {}),
+                "score": hit["score"],
+                "snippet": hit["snippet"]
+            })
+        return results
+
+    def _result(self, future, side: str) -> List[Dict]:
+        try:
+            return future.result()
+        except Exception as e:
+            # One failing side still leaves the other side's results
+            logger.error(f"Error in {side} retrieval: {str(e)}")
+            return []
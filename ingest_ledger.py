@@ -0,0 +1,154 @@
+"""
+Ingestion ledger: which chunks of each session are already in the vector store.
+
+Every ingested chunk is recorded as (session_id, content hash, vector ID),
+where the vector ID is derived from the session and the hash, so ingesting
+the same chunk twice overwrites one vector instead of adding a duplicate.
+Before a session is re-ingested, ``plan`` compares its current chunks with
+the ledger. Only new or edited chunks need to be embedded and tagged, and
+the vectors of chunks that no longer exist are returned for deletion.
+Re-running an unchanged session therefore does no model work, which keeps
+scheduled batch re-ingestion down to the day's changes.
+"""
+
+import datetime
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from embedding_service import normalize_text
+
+logger = logging.getLogger(__name__)
+
+
+def content_hash(text: str) -> str:
+    """Hash of a chunk's normalized text."""
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+def chunk_vector_id(session_id: str, text: str) -> str:
+    """Deterministic vector store ID for a chunk of a session."""
+    return f"{session_id}:{content_hash(text)[:32]}"
+
+
+class IngestLedger:
+    """Per-session and per-chunk content hashes of ingested transcripts, in SQLite."""
+
+    def __init__(self, db_path: str):
+        self.db_path = Path(db_path)
+        os.makedirs(self.db_path.parent, exist_ok=True)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        with self._lock, self._conn:
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS ledger_sessions (
+                    session_id TEXT PRIMARY KEY,
+                    content_hash TEXT NOT NULL,
+                    chunk_count INTEGER NOT NULL,
+                    planned_at TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS ledger_chunks (
+                    session_id TEXT NOT NULL,
+                    content_hash TEXT NOT NULL,
+                    vector_id TEXT NOT NULL,
+                    ingested_at TEXT NOT NULL,
+                    PRIMARY KEY (session_id, content_hash)
+                );
+            """)
+
+    def plan(self, session_id: str, chunks: Sequence[str]) -> Dict:
+        """Work out what re-ingesting a session's current chunks requires.
+
+        Args:
+            session_id (str): The session
+            chunks (Sequence[str]): All of the session's chunks, in order
+
+        Returns:
+            Dict: ``new`` (chunk texts not yet ingested, duplicates removed),
+                ``removed`` (vector IDs of ingested chunks that are gone) and
+                ``unchanged`` (number of chunks already ingested)
+        """
+        current = {}
+        for chunk in chunks:
+            current.setdefault(content_hash(chunk), chunk)
+        session_hash = hashlib.sha256("\n".join(sorted(current)).encode("utf-8")).hexdigest()
+
+        with self._lock, self._conn:
+            ingested = dict(self._conn.execute(
+                "SELECT content_hash, vector_id FROM ledger_chunks WHERE session_id = ?", (session_id,)
+            ).fetchall())
+            self._conn.execute(
+                "INSERT OR REPLACE INTO ledger_sessions (session_id, content_hash, chunk_count, planned_at) "
+                "VALUES (?, ?, ?, ?)",
+                (session_id, session_hash, len(current), datetime.datetime.now().isoformat())
+            )
+        plan = {
+            "new": [chunk for key, chunk in current.items() if key not in ingested],
+            "removed": [vector_id for key, vector_id in ingested.items() if key not in current],
+            "unchanged": len(set(current) & set(ingested))
+        }
+        logger.info(f"Ingestion plan for session {session_id}: {len(plan['new'])} new, "
+                    f"{len(plan['removed'])} removed, {plan['unchanged']} unchanged")
+        return plan
+
+    def record(self, session_id: str, chunks: Iterable[str]) -> List[str]:
+        """Mark chunks as ingested.
+
+        Returns:
+            List[str]: Their vector IDs
+        """
+        now = datetime.datetime.now().isoformat()
+        rows = [(session_id, content_hash(chunk), chunk_vector_id(session_id, chunk), now) for chunk in chunks]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO ledger_chunks (session_id, content_hash, vector_id, ingested_at) "
+                "VALUES (?, ?, ?, ?)", rows
+            )
+        return [row[2] for row in rows]
+
+    def forget(self, session_id: str, vector_ids: Iterable[str]) -> None:
+        """Drop chunks whose vectors were deleted."""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "DELETE FROM ledger_chunks WHERE session_id = ? AND vector_id = ?",
+                [(session_id, vector_id) for vector_id in vector_ids]
+            )
+
+    def vector_ids(self) -> Dict[str, List[str]]:
+        """Vector IDs of all ingested chunks, per session."""
+        sessions = {}
+        with self._lock:
+            for session_id, vector_id in self._conn.execute(
+                "SELECT session_id, vector_id FROM ledger_chunks ORDER BY session_id"
+            ):
+                sessions.setdefault(session_id, []).append(vector_id)
+        return sessions
+
+    def session(self, session_id: str) -> Optional[Dict]:
+        """Last planned content hash and chunk counts of a session."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content_hash, chunk_count, planned_at FROM ledger_sessions WHERE session_id = ?",
+                (session_id,)
+            ).fetchone()
+            ingested = self._conn.execute(
+                "SELECT COUNT(*) FROM ledger_chunks WHERE session_id = ?", (session_id,)
+            ).fetchone()[0]
+        if row is None:
+            return None
+        return {
+            "session_id": session_id,
+            "content_hash": row[0],
+            "chunk_count": row[1],
+            "ingested_chunks": ingested,
+            "planned_at": row[2]
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,385 @@
+"""
+Persistent background job queue for transcript ingestion.
+
+Ingesting a transcript (chunking, embedding, LLM tagging, vector store
+inserts) takes far longer than an HTTP request should, so requests only
+enqueue a job and worker threads do the work. Jobs and their chunks are
+kept in SQLite:
+
+    jobs        one row per transcript: status, transcript, metadata
+    job_chunks  one row per chunk: status (pending/done/failed), attempts,
+                result or error
+
+A job is chunked once, then processed in batches of pending chunks; every
+batch is committed before the next starts. After a restart, ``start``
+re-queues unfinished jobs and they continue with the chunks that are still
+pending. Chunks that fail are kept as failed and can be re-run with
+``retry`` without repeating the chunks that succeeded.
+"""
+
+import datetime
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import serialization
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+
+CHUNK_PENDING = "pending"
+CHUNK_DONE = "done"
+CHUNK_FAILED = "failed"
+
+DEFAULT_WORKERS = 2
+DEFAULT_BATCH_SIZE = 16
+
+
+def _now() -> str:
+    return datetime.datetime.now().isoformat()
+
+
+class IngestJobQueue:
+    """SQLite-backed job queue with worker threads."""
+
+    def __init__(self, db_path: str,
+                 chunk_fn: Callable[[str, Dict], List[str]],
+                 process_fn: Callable[[List[str], Dict], Sequence[Any]],
+                 workers: int = DEFAULT_WORKERS, batch_size: int = DEFAULT_BATCH_SIZE,
+                 on_progress: Optional[Callable[[Dict], None]] = None):
+        """Open (or create) the job table.
+
+        Args:
+            db_path (str): SQLite database file
+            chunk_fn (Callable): Splits ``(transcript, metadata)`` into chunk texts
+            process_fn (Callable): Processes ``(chunks, metadata)`` for a batch
+                of chunks and returns one JSON-serializable result per chunk,
+                or an Exception instance for each chunk that failed; raising
+                fails the whole batch
+            workers (int): Number of worker threads
+            batch_size (int): Chunks per ``process_fn`` call
+            on_progress (Callable, optional): Called with the job (as
+                returned by ``get_job``) whenever its status or progress changes
+        """
+        self.db_path = Path(db_path)
+        self.chunk_fn = chunk_fn
+        self.process_fn = process_fn
+        self.workers = max(1, workers)
+        self.batch_size = max(1, batch_size)
+        self.on_progress = on_progress
+        os.makedirs(self.db_path.parent, exist_ok=True)
+
+        self._queue = queue.Queue()
+        self._queued = set()
+        self._threads = []
+        self._lock = threading.RLock()
+        self._changed = threading.Condition(self._lock)
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        with self._lock, self._conn:
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    job_id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    transcript TEXT NOT NULL,
+                    metadata TEXT,
+                    total_chunks INTEGER,
+                    error TEXT,
+                    created_at TEXT NOT NULL,
+                    updated_at TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status);
+                CREATE TABLE IF NOT EXISTS job_chunks (
+                    job_id TEXT NOT NULL,
+                    chunk_index INTEGER NOT NULL,
+                    content TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    result TEXT,
+                    error TEXT,
+                    PRIMARY KEY (job_id, chunk_index)
+                );
+                CREATE INDEX IF NOT EXISTS idx_job_chunks_status ON job_chunks (job_id, status);
+            """)
+
+    def start(self) -> None:
+        """Start the workers and re-queue jobs left unfinished by a previous run."""
+        with self._lock:
+            if self._threads:
+                return
+            unfinished = [row[0] for row in self._conn.execute(
+                "SELECT job_id FROM jobs WHERE status IN (?, ?) ORDER BY created_at", (JOB_QUEUED, JOB_RUNNING)
+            )]
+            for _ in range(self.workers):
+                thread = threading.Thread(target=self._work, name="ingest-worker", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+        if unfinished:
+            logger.info(f"Resuming {len(unfinished)} unfinished ingestion jobs")
+        for job_id in unfinished:
+            self._put(job_id)
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop the workers once their current job ends; queued jobs resume on the next start."""
+        with self._lock:
+            threads, self._threads = self._threads, []
+        for _ in threads:
+            self._queue.put(None)
+        for thread in threads:
+            thread.join(timeout)
+
+    def close(self) -> None:
+        self.stop()
+        with self._lock:
+            self._conn.close()
+
+    def enqueue(self, transcript: str, metadata: Optional[Dict] = None) -> str:
+        """Add an ingestion job.
+
+        Returns:
+            str: The job ID
+        """
+        job_id = str(uuid.uuid4())
+        now = _now()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO jobs (job_id, status, transcript, metadata, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, JOB_QUEUED, transcript, serialization.dumps(metadata or {}), now, now)
+            )
+        self._notify(job_id)
+        self._put(job_id)
+        return job_id
+
+    def retry(self, job_id: str) -> bool:
+        """Re-run the failed chunks of a finished job (or the whole job if chunking failed).
+
+        Returns:
+            bool: False if the job doesn't exist or is still queued or running
+        """
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT status FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+            if row is None or row[0] in (JOB_QUEUED, JOB_RUNNING):
+                return False
+            self._conn.execute(
+                "UPDATE job_chunks SET status = ?, error = NULL WHERE job_id = ? AND status = ?",
+                (CHUNK_PENDING, job_id, CHUNK_FAILED)
+            )
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, error = NULL, updated_at = ? WHERE job_id = ?",
+                (JOB_QUEUED, _now(), job_id)
+            )
+        self._notify(job_id)
+        self._put(job_id)
+        return True
+
+    def latest_input(self, session_id: str) -> Optional[Tuple[str, Dict]]:
+        """Transcript and metadata of the most recent job for a session.
+
+        Returns:
+            Optional[Tuple[str, Dict]]: ``(transcript, metadata)``, or None if
+                no job carried this ``session_id`` in its metadata
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT transcript, metadata FROM jobs WHERE json_extract(metadata, '$.session_id') = ? "
+                "ORDER BY created_at DESC, rowid DESC LIMIT 1", (session_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return row[0], serialization.loads(row[1]) if row[1] else {}
+
+    def get_job(self, job_id: str, include_chunks: bool = False) -> Optional[Dict]:
+        """Job status and progress.
+
+        Returns:
+            Optional[Dict]: ``{'job_id', 'status', 'metadata', 'total_chunks',
+                'done_chunks', 'failed_chunks', 'progress', 'error',
+                'created_at', 'updated_at'}`` plus ``'chunks'`` (index,
+                status, attempts, result, error per chunk) if requested
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT job_id, status, metadata, total_chunks, error, created_at, updated_at "
+                "FROM jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            counts = dict(self._conn.execute(
+                "SELECT status, COUNT(*) FROM job_chunks WHERE job_id = ? GROUP BY status", (job_id,)
+            ).fetchall())
+            chunks = self._conn.execute(
+                "SELECT chunk_index, status, attempts, result, error FROM job_chunks "
+                "WHERE job_id = ? ORDER BY chunk_index", (job_id,)
+            ).fetchall() if include_chunks else None
+
+        job_id, status, metadata, total, error, created_at, updated_at = row
+        done = counts.get(CHUNK_DONE, 0)
+        job = {
+            "job_id": job_id,
+            "status": status,
+            "metadata": serialization.loads(metadata) if metadata else {},
+            "total_chunks": total,
+            "done_chunks": done,
+            "failed_chunks": counts.get(CHUNK_FAILED, 0),
+            "progress": (done / total if total else 1.0) if total is not None else 0.0,
+            "error": error,
+            "created_at": created_at,
+            "updated_at": updated_at
+        }
+        if chunks is not None:
+            job["chunks"] = [{
+                "index": index,
+                "status": chunk_status,
+                "attempts": attempts,
+                "result": serialization.loads(result) if result else None,
+                "error": chunk_error
+            } for index, chunk_status, attempts, result, chunk_error in chunks]
+        return job
+
+    def list_jobs(self, status: Optional[str] = None, limit: int = 50) -> List[Dict]:
+        """Most recent jobs first, optionally only those with a given status."""
+        with self._lock:
+            if status:
+                rows = self._conn.execute(
+                    "SELECT job_id FROM jobs WHERE status = ? ORDER BY created_at DESC LIMIT ?", (status, limit)
+                ).fetchall()
+            else:
+                rows = self._conn.execute(
+                    "SELECT job_id FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)
+                ).fetchall()
+        return [job for job in (self.get_job(row[0]) for row in rows) if job is not None]
+
+    def wait(self, job_id: str, timeout: Optional[float] = None) -> Optional[Dict]:
+        """Block until a job is completed or failed (or the timeout passes) and return it."""
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        with self._changed:
+            while True:
+                job = self.get_job(job_id)
+                if job is None or job["status"] in (JOB_COMPLETED, JOB_FAILED):
+                    return job
+                remaining = deadline - time.monotonic() if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    return job
+                self._changed.wait(remaining)
+
+    def _put(self, job_id: str) -> None:
+        with self._lock:
+            if job_id in self._queued:
+                return
+            self._queued.add(job_id)
+        self._queue.put(job_id)
+
+    def _work(self) -> None:
+        while True:
+            job_id = self._queue.get()
+            if job_id is None:
+                return
+            with self._lock:
+                self._queued.discard(job_id)
+            try:
+                self._run(job_id)
+            except Exception as e:
+                logger.error(f"Error running ingestion job {job_id}: {str(e)}")
+                self._finish(job_id, JOB_FAILED, str(e))
+
+    def _run(self, job_id: str) -> None:
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT status, transcript, metadata, total_chunks FROM jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+            if row is None or row[0] in (JOB_COMPLETED, JOB_FAILED):
+                return
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, updated_at = ? WHERE job_id = ?", (JOB_RUNNING, _now(), job_id)
+            )
+        _, transcript, metadata, total = row
+        metadata = serialization.loads(metadata) if metadata else {}
+        self._notify(job_id)
+
+        if total is None:
+            try:
+                chunks = list(self.chunk_fn(transcript, metadata))
+            except Exception as e:
+                logger.error(f"Error chunking ingestion job {job_id}: {str(e)}")
+                self._finish(job_id, JOB_FAILED, f"Chunking failed: {str(e)}")
+                return
+            with self._lock, self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO job_chunks (job_id, chunk_index, content, status) VALUES (?, ?, ?, ?)",
+                    [(job_id, i, chunk, CHUNK_PENDING) for i, chunk in enumerate(chunks)]
+                )
+                self._conn.execute(
+                    "UPDATE jobs SET total_chunks = ?, updated_at = ? WHERE job_id = ?", (len(chunks), _now(), job_id)
+                )
+            self._notify(job_id)
+
+        while True:
+            with self._lock:
+                pending = self._conn.execute(
+                    "SELECT chunk_index, content FROM job_chunks WHERE job_id = ? AND status = ? "
+                    "ORDER BY chunk_index LIMIT ?", (job_id, CHUNK_PENDING, self.batch_size)
+                ).fetchall()
+            if not pending:
+                break
+            try:
+                results = list(self.process_fn([content for _, content in pending], metadata))
+                if len(results) != len(pending):
+                    raise ValueError(f"Expected {len(pending)} results, got {len(results)}")
+            except Exception as e:
+                logger.error(f"Error processing chunks of ingestion job {job_id}: {str(e)}")
+                results = [e] * len(pending)
+            with self._lock, self._conn:
+                for (index, _), result in zip(pending, results):
+                    if isinstance(result, Exception):
+                        self._conn.execute(
+                            "UPDATE job_chunks SET status = ?, attempts = attempts + 1, error = ? "
+                            "WHERE job_id = ? AND chunk_index = ?", (CHUNK_FAILED, str(result), job_id, index)
+                        )
+                    else:
+                        self._conn.execute(
+                            "UPDATE job_chunks SET status = ?, attempts = attempts + 1, result = ?, error = NULL "
+                            "WHERE job_id = ? AND chunk_index = ?",
+                            (CHUNK_DONE, serialization.dumps(result), job_id, index)
+                        )
+                self._conn.execute("UPDATE jobs SET updated_at = ? WHERE job_id = ?", (_now(), job_id))
+            self._notify(job_id)
+
+        with self._lock:
+            failed = self._conn.execute(
+                "SELECT COUNT(*) FROM job_chunks WHERE job_id = ? AND status = ?", (job_id, CHUNK_FAILED)
+            ).fetchone()[0]
+        if failed:
+            self._finish(job_id, JOB_FAILED, f"{failed} chunks failed")
+        else:
+            self._finish(job_id, JOB_COMPLETED, None)
+
+    def _finish(self, job_id: str, status: str, error: Optional[str]) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE job_id = ?",
+                (status, error, _now(), job_id)
+            )
+        logger.info(f"Ingestion job {job_id} {status}{': ' + error if error else ''}")
+        self._notify(job_id)
+
+    def _notify(self, job_id: str) -> None:
+        with self._changed:
+            self._changed.notify_all()
+        if self.on_progress:
+            try:
+                job = self.get_job(job_id)
+                if job is not None:
+                    self.on_progress(job)
+            except Exception as e:
+                logger.error(f"Error reporting progress of ingestion job {job_id}: {str(e)}")
@@ -25,8 +25,8 @@ def index():
 def dashboard():
     """Render the dashboard with interview statistics"""
     # Get all interview sessions
-    discussion_service = DiscussionService(data_dir="data/interviews")
-    sessions = discussion_service.get_all_sessions()
+    discussion_service = DiscussionService.get_instance(data_dir="data/interviews")
+    sessions, _ = discussion_service.list_session_summaries()
     
     # Count active, completed, and in-progress interviews
     active_count = sum(1 for session in sessions if session.get('status') == 'active')
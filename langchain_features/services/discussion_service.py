@@ -1,29 +1,111 @@
+import base64
 import json
 import logging
 import os
+import threading
 import uuid
+from collections import OrderedDict
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 
 from ..models import DiscussionGuide, InterviewSession
+from .session_store import SessionStore, create_session_store
 
 logger = logging.getLogger(__name__)
 
+# Number of parsed session documents kept in memory per service
+DEFAULT_SESSION_CACHE_SIZE = 128
+
+# Completed sessions untouched for this many days move to the archive
+SESSION_ARCHIVE_DAYS_ENV = "DARIA_SESSION_ARCHIVE_DAYS"
+DEFAULT_SESSION_ARCHIVE_DAYS = 30
+
+def _copy_session(session_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy a session document deeply enough that callers can mutate it.
+
+    Top-level values, lists and message dicts are copied; datetimes are
+    normalized to ISO strings, matching what the store returns.
+    """
+    copied = {}
+    for key, value in session_data.items():
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        elif isinstance(value, list):
+            value = [dict(item) if isinstance(item, dict) else item for item in value]
+        elif isinstance(value, dict):
+            value = dict(value)
+        copied[key] = value
+    return copied
+
 class DiscussionService:
     """Service for managing discussion guides and sessions"""
     
-    def __init__(self, data_dir: str = None):
+    # Shared instances by resolved data directory, see get_instance()
+    _instances = {}
+    _instances_lock = threading.Lock()
+    
+    def __init__(self, data_dir: str = None, store: SessionStore = None, backend: str = None,
+                 cache_size: int = DEFAULT_SESSION_CACHE_SIZE):
         """Initialize the discussion service.
         
         Args:
             data_dir (str, optional): Directory to store data files
+            store (SessionStore, optional): Storage backend to use
+            backend (str, optional): Backend name ("json" or "sqlite") used when
+                no store is given; defaults to the DARIA_SESSION_BACKEND env var
+            cache_size (int, optional): Maximum number of parsed sessions to keep
+                in the LRU session cache (0 disables caching)
         """
         self.data_dir = Path(data_dir or "data/discussions")
         self.sessions_dir = self.data_dir / "sessions"
         os.makedirs(self.data_dir, exist_ok=True)
         os.makedirs(self.sessions_dir, exist_ok=True)
-        logger.info(f"Initialized DiscussionService with data_dir={self.data_dir}")
+        self.store = store or create_session_store(str(self.data_dir), backend)
+        
+        # LRU cache of session_id -> (store version, session document)
+        self.cache_size = cache_size
+        self._session_cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._cache_hits = 0
+        self._cache_misses = 0
+        
+        logger.info(f"Initialized DiscussionService with data_dir={self.data_dir}, backend={self.store.backend}")
+    
+    @classmethod
+    def get_instance(cls, data_dir: str = "data/interviews") -> "DiscussionService":
+        """Get the process-wide discussion service for a data directory, creating it if needed.
+        
+        Instances constructed directly are never shared, so a throwaway
+        service (tests, scripts) cannot take over the shared session cache.
+        
+        Args:
+            data_dir (str, optional): Directory the service stores data in
+            
+        Returns:
+            DiscussionService: The shared service instance for data_dir
+        """
+        key = str(Path(data_dir).resolve())
+        with cls._instances_lock:
+            if key not in cls._instances:
+                cls._instances[key] = cls(data_dir=data_dir)
+            return cls._instances[key]
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        """Get session cache statistics.
+        
+        Returns:
+            Dict: Hit/miss counters, hit rate and current size
+        """
+        with self._cache_lock:
+            lookups = self._cache_hits + self._cache_misses
+            return {
+                "hits": self._cache_hits,
+                "misses": self._cache_misses,
+                "hit_rate": self._cache_hits / lookups if lookups else 0.0,
+                "size": len(self._session_cache),
+                "max_size": self.cache_size
+            }
     
     # Discussion Guide Methods
     
@@ -96,24 +178,12 @@ class DiscussionService:
         """
         guides = []
         
-        if not self.data_dir.exists():
-            return guides
-        
-        for file_path in self.data_dir.glob("*.json"):
-            if not file_path.is_file() or file_path.name.startswith("."):
-                continue
-            
-            try:
-                with open(file_path, "r") as f:
-                    guide_data = json.load(f)
-                
+        try:
+            for guide_data in self.store.iter_guides():
                 if active_only and guide_data.get("status") != "active":
                     continue
-                    
-                # Ensure essential fields exist
-                if "id" not in guide_data:
-                    guide_data["id"] = file_path.stem
                 
+                # Ensure essential fields exist
                 if "updated_at" not in guide_data:
                     guide_data["updated_at"] = datetime.now().isoformat()
                 
@@ -121,8 +191,8 @@ class DiscussionService:
                     guide_data["created_at"] = datetime.now().isoformat()
                     
                 guides.append(guide_data)
-            except Exception as e:
-                logger.error(f"Error loading guide from {file_path}: {str(e)}")
+        except Exception as e:
+            logger.error(f"Error listing guides: {str(e)}")
         
         return sorted(guides, key=lambda g: g.get("updated_at", ""), reverse=True)
     
@@ -155,8 +225,7 @@ class DiscussionService:
         Returns:
             bool: True if successful
         """
-        guide_path = self.data_dir / f"{guide_id}.json"
-        if not guide_path.exists():
+        if not self.store.guide_exists(guide_id):
             logger.warning(f"Guide not found for deletion: {guide_id}")
             return False
             
@@ -174,9 +243,9 @@ class DiscussionService:
                     self._save_session(session_id, session)
                     logger.info(f"Marked session {session_id} as orphaned")
         
-        # Delete the guide file
+        # Delete the guide
         try:
-            guide_path.unlink()
+            self.store.delete_guide(guide_id)
             logger.info(f"Deleted discussion guide with ID {guide_id}")
             return True
         except Exception as e:
@@ -191,18 +260,15 @@ class DiscussionService:
         """
         all_sessions = []
         
-        # List all session files in the sessions directory
+        # List all sessions in the store
         try:
-            session_files = list(self.sessions_dir.glob("*.json"))
-            
-            for session_file in session_files:
+            for session_id in self.store.list_session_ids():
                 try:
-                    session_id = session_file.stem
                     session = self._load_session(session_id)
                     if session:
                         all_sessions.append(session)
                 except Exception as e:
-                    logger.error(f"Error loading session from {session_file}: {str(e)}")
+                    logger.error(f"Error loading session {session_id}: {str(e)}")
                     continue
                 
             # Sort by last updated time, most recent first
@@ -221,6 +287,47 @@ class DiscussionService:
     
     # Alias list_sessions to get_all_sessions for compatibility with InterviewService
     list_sessions = get_all_sessions
+
+    def list_session_summaries(self, limit: int = None, cursor: str = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """List lightweight session summaries, most recently updated first.
+
+        Summaries come from the store's session manifest and carry no
+        messages or transcript.
+
+        Args:
+            limit (int, optional): Maximum number of rows to return
+            cursor (str, optional): Cursor returned by a previous call
+
+        Returns:
+            Tuple[List[Dict], Optional[str]]: The page of summaries and the
+            cursor for the next page (None when there are no more rows)
+        """
+        def sort_key(summary):
+            return (summary.get("updated_at") or summary.get("created_at") or "", summary.get("id") or "")
+
+        summaries = sorted(self.store.list_session_summaries(), key=sort_key, reverse=True)
+
+        if cursor:
+            after = self._decode_cursor(cursor)
+            summaries = [s for s in summaries if sort_key(s) < after]
+
+        if limit is None or len(summaries) <= limit:
+            return summaries, None
+
+        page = summaries[:limit]
+        return page, self._encode_cursor(sort_key(page[-1]))
+
+    @staticmethod
+    def _encode_cursor(key: Tuple[str, str]) -> str:
+        return base64.urlsafe_b64encode(json.dumps(list(key)).encode()).decode()
+
+    @staticmethod
+    def _decode_cursor(cursor: str) -> Tuple[str, str]:
+        try:
+            updated_at, session_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            return (updated_at, session_id)
+        except Exception:
+            raise ValueError(f"Invalid cursor: {cursor}")
     
     # Session Methods
     
@@ -271,15 +378,21 @@ class DiscussionService:
         if "voice_id" in guide:
             session_data["voice_id"] = guide["voice_id"]
         
-        # Save the session
-        self._save_session(session_id, session_data)
-        
-        # Update the guide with the new session ID
+        # Save the session and link it from the guide in one store transaction
         if "sessions" not in guide:
             guide["sessions"] = []
         guide["sessions"].append(session_id)
         guide["updated_at"] = datetime.now()
-        self._save_guide(guide_id, guide)
+        try:
+            with self.store.transaction():
+                if not self._save_session(session_id, session_data):
+                    raise RuntimeError("session could not be saved")
+                if not self._save_guide(guide_id, guide):
+                    raise RuntimeError("guide could not be updated")
+        except Exception as e:
+            logger.error(f"Error creating session for guide {guide_id}: {str(e)}")
+            self._cache_evict(session_id)
+            return None
         
         logger.info(f"Created session {session_id} for guide {guide_id} with character {session_data.get('character', 'None')}")
         return session_id
@@ -316,6 +429,21 @@ class DiscussionService:
         
         return []
     
+    def get_session_messages(self, session_id: str, limit: int = None) -> List[Dict[str, Any]]:
+        """Get the most recent messages for a session.
+        
+        Args:
+            session_id (str): The session ID
+            limit (int, optional): Only return the last ``limit`` messages
+            
+        Returns:
+            List[Dict]: List of messages or empty list if not found
+        """
+        messages = self.get_messages(session_id)
+        if limit is not None:
+            return messages[-limit:] if limit > 0 else []
+        return messages
+    
     def list_guide_sessions(self, guide_id: str) -> List[Dict[str, Any]]:
         """List all sessions for a discussion guide.
         
@@ -326,17 +454,103 @@ class DiscussionService:
             List[Dict]: List of sessions
         """
         guide = self._load_guide(guide_id)
-        if not guide or "sessions" not in guide:
+        if not guide:
             return []
         
-        sessions = []
-        for session_id in guide["sessions"]:
-            session = self._load_session(session_id)
-            if session:
-                sessions.append(session)
+        # Sessions listed on the guide plus any that point at it through the
+        # reverse index (e.g. when the guide's list was not updated)
+        session_ids = list(dict.fromkeys(guide.get("sessions", []) + self.store.guide_session_ids(guide_id)))
+        sessions = self.get_sessions(session_ids)
         
         return sorted(sessions, key=lambda s: s.get("created_at", ""), reverse=True)
     
+    def get_sessions(self, session_ids: List[str], max_workers: int = None) -> List[Dict[str, Any]]:
+        """Get many sessions at once.
+        
+        Cached sessions are served from the session cache; the rest are loaded
+        from the store in a single batch.
+        
+        Args:
+            session_ids (List[str]): The session IDs
+            max_workers (int, optional): Thread pool size for loading sessions
+                the store reads one by one (JSON backend)
+            
+        Returns:
+            List[Dict]: Sessions that exist, in the order of ``session_ids``
+        """
+        found = {}
+        misses = {}
+        for session_id in dict.fromkeys(session_ids):
+            try:
+                version = self.store.session_version(session_id)
+            except Exception as e:
+                logger.error(f"Error checking session {session_id}: {str(e)}")
+                continue
+            if version is None:
+                continue
+            with self._cache_lock:
+                entry = self._session_cache.get(session_id)
+                if entry is not None and entry[0] == version:
+                    self._session_cache.move_to_end(session_id)
+                    self._cache_hits += 1
+                    found[session_id] = _copy_session(entry[1])
+                    continue
+                self._cache_misses += 1
+            misses[session_id] = version
+        
+        if misses:
+            try:
+                loaded = self.store.load_sessions(list(misses), max_workers=max_workers)
+            except Exception as e:
+                logger.error(f"Error loading sessions: {str(e)}")
+                loaded = {}
+            for session_id, session in loaded.items():
+                if isinstance(session, dict):
+                    self._cache_put(session_id, misses[session_id], session)
+                    found[session_id] = session
+        
+        return [found[session_id] for session_id in dict.fromkeys(session_ids) if session_id in found]
+    
+    def repair_guide_sessions(self, guide_id: str = None) -> Dict[str, Dict[str, List[str]]]:
+        """Reconcile guides' ``sessions`` lists with the guide -> session index.
+        
+        Dangling IDs (sessions that no longer exist or now belong to another
+        guide) are removed and sessions pointing at the guide are added.
+        
+        Args:
+            guide_id (str, optional): Only repair this guide
+            
+        Returns:
+            Dict: guide_id -> {"removed": [...], "added": [...]} for changed guides
+        """
+        guides = [self._load_guide(guide_id)] if guide_id else self.list_guides()
+        changes = {}
+        
+        for guide in guides:
+            if not guide:
+                continue
+            indexed = self.store.guide_session_ids(guide["id"])
+            listed = guide.get("sessions", [])
+            
+            kept = []
+            removed = []
+            for session_id in listed:
+                session = self.store.session_exists(session_id) and self._load_session(session_id)
+                if session and session.get("guide_id") in (None, guide["id"]):
+                    kept.append(session_id)
+                else:
+                    removed.append(session_id)
+            added = [session_id for session_id in indexed if session_id not in kept]
+            
+            if removed or added:
+                guide["sessions"] = kept + added
+                guide["updated_at"] = datetime.now()
+                self._save_guide(guide["id"], guide)
+                changes[guide["id"]] = {"removed": removed, "added": added}
+                logger.info(f"Repaired guide {guide['id']}: removed {len(removed)}, added {len(added)} sessions")
+        
+        return changes
+    
     def update_session(self, session_id: str, data: Dict[str, Any]) -> bool:
         """Update a session.
         
@@ -372,28 +586,23 @@ class DiscussionService:
         Returns:
             bool: True if successful
         """
-        session = self._load_session(session_id)
-        if not session:
-            return False
-        
-        if "messages" not in session:
-            session["messages"] = []
-        
         # Add timestamp if not present
         if "timestamp" not in message:
             message["timestamp"] = datetime.now().isoformat()
         
-        session["messages"].append(message)
-        session["updated_at"] = datetime.now().isoformat()
-        
-        # Update transcript
-        if "transcript" not in session:
-            session["transcript"] = ""
-        
         speaker = "Moderator" if message.get("role") == "assistant" else "Participant"
-        session["transcript"] += f"\n\n{speaker}: {message.get('content', '')}"
+        transcript_line = f"\n\n{speaker}: {message.get('content', '')}"
         
-        self._save_session(session_id, session)
+        try:
+            version_before = self.store.session_version(session_id)
+            if not self.store.append_message(session_id, message, transcript_line):
+                self._cache_evict(session_id)
+                return False
+            self._cache_append(session_id, version_before, message, transcript_line)
+        except Exception as e:
+            logger.error(f"Error adding message to session {session_id}: {str(e)}")
+            self._cache_evict(session_id)
+            return False
         logger.info(f"Added message to session {session_id}")
         
         return True
@@ -441,11 +650,38 @@ class DiscussionService:
         
         session["status"] = "completed"
         session["updated_at"] = datetime.now().isoformat()
+        # Saving the full document also compacts the message journal
         self._save_session(session_id, session)
         
         logger.info(f"Marked session {session_id} as completed")
         return True
     
+    def archive_completed_sessions(self, older_than_days: float = None) -> List[str]:
+        """Move completed sessions that have not changed recently to the archive.
+        
+        Archived sessions are still listed and readable; their documents are
+        decompressed only when requested in full.
+        
+        Args:
+            older_than_days (float, optional): Minimum days since the last write.
+                Defaults to DARIA_SESSION_ARCHIVE_DAYS or 30.
+            
+        Returns:
+            List[str]: IDs of the archived sessions
+        """
+        if older_than_days is None:
+            older_than_days = float(os.environ.get(SESSION_ARCHIVE_DAYS_ENV, DEFAULT_SESSION_ARCHIVE_DAYS))
+        
+        try:
+            archived = self.store.archive_sessions(older_than_days)
+        except Exception as e:
+            logger.error(f"Error archiving sessions: {str(e)}")
+            return []
+        
+        for session_id in archived:
+            self._cache_evict(session_id)
+        return archived
+    
     def analyze_session(self, session_id: str, analysis: Dict[str, Any]) -> bool:
         """Add analysis to a session.
         
@@ -477,27 +713,30 @@ class DiscussionService:
         Returns:
             bool: True if successful
         """
-        session_path = self.sessions_dir / f"{session_id}.json"
-        if not session_path.exists():
+        if not self.store.session_exists(session_id):
             logger.warning(f"Session not found for deletion: {session_id}")
             return False
         
         # Load the session to get guide ID
         session = self._load_session(session_id)
-        if session and session.get("guide_id"):
-            # Remove this session ID from the guide's sessions list
-            guide_id = session.get("guide_id")
-            guide = self._load_guide(guide_id)
-            if guide and "sessions" in guide:
-                if session_id in guide["sessions"]:
-                    guide["sessions"].remove(session_id)
-                    guide["updated_at"] = datetime.now()
-                    self._save_guide(guide_id, guide)
-                    logger.info(f"Removed session {session_id} from guide {guide_id}")
-        
-        # Delete the session file
+        
         try:
-            session_path.unlink()
+            with self.store.transaction():
+                if session and session.get("guide_id"):
+                    # Remove this session ID from the guide's sessions list
+                    guide_id = session.get("guide_id")
+                    guide = self._load_guide(guide_id)
+                    if guide and "sessions" in guide:
+                        if session_id in guide["sessions"]:
+                            guide["sessions"].remove(session_id)
+                            guide["updated_at"] = datetime.now()
+                            if not self._save_guide(guide_id, guide):
+                                raise RuntimeError(f"guide {guide_id} could not be updated")
+                            logger.info(f"Removed session {session_id} from guide {guide_id}")
+                
+                # Delete the session
+                self._cache_evict(session_id)
+                self.store.delete_session(session_id)
             logger.info(f"Deleted session with ID {session_id}")
             return True
         except Exception as e:
@@ -536,7 +775,7 @@ class DiscussionService:
     # Helper methods
     
     def _save_guide(self, guide_id: str, guide_data: Dict[str, Any]) -> bool:
-        """Save a discussion guide to file.
+        """Save a discussion guide to the store.
         
         Args:
             guide_id (str): The guide ID
@@ -546,25 +785,14 @@ class DiscussionService:
             bool: True if successful
         """
         try:
-            # Convert datetime objects to ISO format strings
-            serializable_data = {}
-            for key, value in guide_data.items():
-                if isinstance(value, datetime):
-                    serializable_data[key] = value.isoformat()
-                else:
-                    serializable_data[key] = value
-            
-            file_path = self.data_dir / f"{guide_id}.json"
-            with open(file_path, "w") as f:
-                json.dump(serializable_data, f, indent=2)
-            
+            self.store.save_guide(guide_id, guide_data)
             return True
         except Exception as e:
             logger.error(f"Error saving guide {guide_id}: {str(e)}")
             return False
     
     def _save_session(self, session_id: str, session_data: Dict[str, Any]) -> bool:
-        """Save a session to file.
+        """Save a session to the store.
         
         Args:
             session_id (str): The session ID
@@ -574,25 +802,15 @@ class DiscussionService:
             bool: True if successful
         """
         try:
-            # Convert datetime objects to ISO format strings
-            serializable_data = {}
-            for key, value in session_data.items():
-                if isinstance(value, datetime):
-                    serializable_data[key] = value.isoformat()
-                else:
-                    serializable_data[key] = value
-            
-            file_path = self.sessions_dir / f"{session_id}.json"
-            with open(file_path, "w") as f:
-                json.dump(serializable_data, f, indent=2)
-            
+            self.store.save_session(session_id, session_data)
+            self._cache_put(session_id, self.store.session_version(session_id), session_data)
             return True
         except Exception as e:
             logger.error(f"Error saving session {session_id}: {str(e)}")
             return False
     
     def _load_guide(self, guide_id: str) -> Optional[Dict[str, Any]]:
-        """Load a discussion guide from disk.
+        """Load a discussion guide from the store.
         
         Args:
             guide_id (str): The guide ID
@@ -600,14 +818,11 @@ class DiscussionService:
         Returns:
             Dict or None: The guide data or None if not found
         """
-        guide_path = self.data_dir / f"{guide_id}.json"
-        if not guide_path.exists():
-            logger.warning(f"Guide file not found: {guide_path}")
-            return None
-        
         try:
-            with open(guide_path, "r") as f:
-                guide_data = json.load(f)
+            guide_data = self.store.load_guide(guide_id)
+            if guide_data is None:
+                logger.warning(f"Guide not found: {guide_id}")
+                return None
             
             # Ensure essential fields exist
             if "id" not in guide_data:
@@ -643,7 +858,8 @@ class DiscussionService:
             return None
     
     def _load_session(self, session_id: str) -> Optional[Dict[str, Any]]:
-        """Load a session from file.
+        """Load a session, serving it from the session cache when the stored
+        version is unchanged.
         
         Args:
             session_id (str): The session ID
@@ -652,12 +868,55 @@ class DiscussionService:
             Dict: The session data or None if not found
         """
         try:
-            file_path = self.sessions_dir / f"{session_id}.json"
-            if not file_path.exists():
+            version = self.store.session_version(session_id)
+            if version is None:
+                self._cache_evict(session_id)
                 return None
             
-            with open(file_path, "r") as f:
-                return json.load(f)
+            with self._cache_lock:
+                entry = self._session_cache.get(session_id)
+                if entry is not None and entry[0] == version:
+                    self._session_cache.move_to_end(session_id)
+                    self._cache_hits += 1
+                    return _copy_session(entry[1])
+                self._cache_misses += 1
+            
+            session = self.store.load_session(session_id)
+            if isinstance(session, dict):
+                self._cache_put(session_id, version, session)
+            return session
         except Exception as e:
             logger.error(f"Error loading session {session_id}: {str(e)}")
-            return None 
\ No newline at end of file
+            return None
+    
+    def _cache_put(self, session_id: str, version: Any, session_data: Dict[str, Any]) -> None:
+        """Store a copy of a session document in the LRU cache."""
+        if self.cache_size <= 0 or version is None:
+            return
+        with self._cache_lock:
+            self._session_cache[session_id] = (version, _copy_session(session_data))
+            self._session_cache.move_to_end(session_id)
+            while len(self._session_cache) > self.cache_size:
+                self._session_cache.popitem(last=False)
+    
+    def _cache_evict(self, session_id: str) -> None:
+        with self._cache_lock:
+            self._session_cache.pop(session_id, None)
+    
+    def _cache_append(self, session_id: str, version_before: Any, message: Dict[str, Any], transcript_line: str) -> None:
+        """Apply an appended message to the cached document instead of dropping it."""
+        version_after = self.store.session_version(session_id)
+        with self._cache_lock:
+            entry = self._session_cache.get(session_id)
+            if entry is None:
+                return
+            if entry[0] != version_before or version_after is None:
+                # Someone else changed the session in between; reload next time
+                del self._session_cache[session_id]
+                return
+            session = entry[1]
+            session.setdefault("messages", []).append(dict(message))
+            session["transcript"] = session.get("transcript", "") + transcript_line
+            session["updated_at"] = message.get("timestamp", session.get("updated_at"))
+            self._session_cache[session_id] = (version_after, session)
+            self._session_cache.move_to_end(session_id)
\ No newline at end of file
@@ -5,12 +5,12 @@ Interview Service for managing LangChain interview agents
 import os
 import logging
 from typing import Dict, Any, Optional, List
-import json
 import datetime
 import uuid
 from pathlib import Path
 import re
 
+import serialization
 from .interview_agent import InterviewAgent
 
 # Set up logging
@@ -234,18 +234,8 @@ class InterviewService:
     def _save_interview(self, session_id: str, interview_data: Dict[str, Any]) -> bool:
         """Save interview data to file"""
         try:
-            # Convert datetime objects to ISO format
-            serializable_data = {}
-            for key, value in interview_data.items():
-                if isinstance(value, datetime.datetime):
-                    serializable_data[key] = value.isoformat()
-                else:
-                    serializable_data[key] = value
-            
-            # Save to file
             file_path = self.data_dir / f"{session_id}.json"
-            with open(file_path, 'w') as f:
-                json.dump(serializable_data, f, indent=2)
+            serialization.write_json(file_path, interview_data)
             
             return True
         except Exception as e:
@@ -259,8 +249,7 @@ class InterviewService:
             if not file_path.exists():
                 return None
             
-            with open(file_path, 'r') as f:
-                data = json.load(f)
+            data = serialization.read_json(file_path)
             
             # Convert ISO dates back to datetime
             for key, value in data.items():
@@ -0,0 +1,156 @@
+import gzip
+import hashlib
+import logging
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Any
+
+import serialization
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+ARCHIVE_INDEX_NAME = "index.json"
+
+
+class SessionArchive:
+    """Cold tier for completed sessions.
+
+    Documents are stored as gzip-compressed, content-addressed objects
+    (``<archive_dir>/objects/<aa>/<sha256>.json.gz``). A small index
+    (``<archive_dir>/index.json``) maps each document ID to its object and
+    keeps the document's summary row hot, so listings never touch the
+    compressed objects; an object is only decompressed when the full document
+    is requested.
+    """
+
+    def __init__(self, archive_dir: str, compresslevel: int = 6):
+        self.archive_dir = Path(archive_dir)
+        self.objects_dir = self.archive_dir / "objects"
+        self.index_path = self.archive_dir / ARCHIVE_INDEX_NAME
+        self.compresslevel = compresslevel
+        self._index = None
+        self._index_mtime = None
+        self._lock = threading.RLock()
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._load_index()
+
+    def ids(self) -> List[str]:
+        return list(self._load_index())
+
+    def entry(self, doc_id: str) -> Optional[Dict[str, Any]]:
+        """Return the index entry (hash, sizes, summary) for an archived document."""
+        return self._load_index().get(doc_id)
+
+    def summaries(self) -> Dict[str, Dict[str, Any]]:
+        """Return doc_id -> summary row for every archived document."""
+        return {doc_id: entry["summary"] for doc_id, entry in self._load_index().items()}
+
+    def object_path(self, content_hash: str) -> Path:
+        return self.objects_dir / content_hash[:2] / f"{content_hash}.json.gz"
+
+    def put(self, doc_id: str, data: Dict[str, Any], summary: Dict[str, Any]) -> str:
+        """Archive a document.
+
+        Args:
+            doc_id (str): The document ID
+            data (Dict): The full document
+            summary (Dict): Summary row served while the document is archived
+
+        Returns:
+            str: SHA-256 of the document's serialized form
+        """
+        payload = serialization.dumpb(data)
+        content_hash = hashlib.sha256(payload).hexdigest()
+        object_path = self.object_path(content_hash)
+
+        with self._lock:
+            if not object_path.exists():
+                os.makedirs(object_path.parent, exist_ok=True)
+                tmp_path = object_path.with_name(f".{object_path.name}.tmp")
+                with open(tmp_path, "wb") as f:
+                    f.write(gzip.compress(payload, compresslevel=self.compresslevel))
+                os.replace(tmp_path, object_path)
+
+            index = self._load_index()
+            previous = index.get(doc_id)
+            index[doc_id] = {
+                "hash": content_hash,
+                "archived_at": datetime.now().isoformat(),
+                "size": len(payload),
+                "stored_size": object_path.stat().st_size,
+                "summary": summary
+            }
+            self._flush_index()
+            if previous and previous["hash"] != content_hash:
+                self._drop_object_if_unreferenced(previous["hash"])
+        return content_hash
+
+    def load(self, doc_id: str) -> Optional[Dict[str, Any]]:
+        """Decompress and return an archived document, or None if it is not archived."""
+        entry = self.entry(doc_id)
+        if entry is None:
+            return None
+        try:
+            with open(self.object_path(entry["hash"]), "rb") as f:
+                return serialization.loads(gzip.decompress(f.read()))
+        except FileNotFoundError:
+            logger.error(f"Archive object {entry['hash']} for {doc_id} is missing")
+            return None
+
+    def discard(self, doc_id: str) -> bool:
+        """Remove a document from the archive.
+
+        Args:
+            doc_id (str): The document ID
+
+        Returns:
+            bool: True if the document was archived
+        """
+        with self._lock:
+            entry = self._load_index().pop(doc_id, None)
+            if entry is None:
+                return False
+            self._flush_index()
+            self._drop_object_if_unreferenced(entry["hash"])
+        return True
+
+    def stats(self) -> Dict[str, int]:
+        """Return document count and raw vs stored byte totals."""
+        index = self._load_index()
+        return {
+            "documents": len(index),
+            "objects": len({entry["hash"] for entry in index.values()}),
+            "size": sum(entry["size"] for entry in index.values()),
+            "stored_size": sum(entry["stored_size"] for entry in {e["hash"]: e for e in index.values()}.values())
+        }
+
+    def _drop_object_if_unreferenced(self, content_hash: str) -> None:
+        if any(entry["hash"] == content_hash for entry in self._load_index().values()):
+            return
+        self.object_path(content_hash).unlink(missing_ok=True)
+
+    def _load_index(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            try:
+                mtime = self.index_path.stat().st_mtime_ns
+            except FileNotFoundError:
+                mtime = None
+            # Reload when another process has rewritten the index
+            if self._index is None or mtime != self._index_mtime:
+                self._index = {}
+                if mtime is not None:
+                    try:
+                        self._index = serialization.read_json(self.index_path).get("documents", {})
+                    except Exception as e:
+                        logger.error(f"Error reading archive index {self.index_path}: {str(e)}")
+                self._index_mtime = mtime
+            return self._index
+
+    def _flush_index(self) -> None:
+        os.makedirs(self.archive_dir, exist_ok=True)
+        serialization.write_json(self.index_path, {"version": 1, "documents": self._index}, atomic=True)
+        self._index_mtime = self.index_path.stat().st_mtime_ns
@@ -0,0 +1,969 @@
+import logging
+import os
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Any, Iterator
+
+import serialization
+from .session_archive import SessionArchive
+
+logger = logging.getLogger(__name__)
+
+# Environment variable used to pick the storage backend for DiscussionService
+SESSION_BACKEND_ENV = "DARIA_SESSION_BACKEND"
+SQLITE_DB_NAME = "daria_sessions.db"
+# Journals larger than this are folded back into the session document
+DEFAULT_JOURNAL_MAX_BYTES = 256 * 1024
+# Session fields copied verbatim into manifest summary rows
+SUMMARY_FIELDS = ("guide_id", "title", "project", "topic", "context", "goals", "interview_type",
+                  "status", "character", "interviewee", "created_at", "updated_at")
+
+
+def _message_key(message: Dict[str, Any]) -> tuple:
+    return (message.get("id"), message.get("timestamp"), message.get("role"), message.get("content"))
+
+
+def session_summary(session_id: str, session_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Build the lightweight manifest row for a session document.
+
+    Args:
+        session_id (str): The session ID
+        session_data (Dict): The full session document
+
+    Returns:
+        Dict: Summary row without messages or transcript
+    """
+    data = session_data
+    summary = {"id": data.get("id") or session_id}
+    for field in SUMMARY_FIELDS:
+        summary[field] = serialization.isoformat(data.get(field))
+
+    interviewee = data.get("interviewee") if isinstance(data.get("interviewee"), dict) else {}
+    summary["participant_name"] = data.get("participant_name") or interviewee.get("name")
+    summary["message_count"] = len(data.get("messages") or data.get("conversation_history") or [])
+    return summary
+
+
+class SessionStore:
+    """Base class for discussion guide and session storage backends.
+
+    Stores deal in plain dictionaries. Guide default-filling, timestamps and
+    guide/session bookkeeping stay in DiscussionService.
+    """
+
+    backend = "base"
+
+    # Guides
+
+    def load_guide(self, guide_id: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def save_guide(self, guide_id: str, guide_data: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    def delete_guide(self, guide_id: str) -> bool:
+        raise NotImplementedError
+
+    def guide_exists(self, guide_id: str) -> bool:
+        raise NotImplementedError
+
+    def iter_guides(self) -> Iterator[Dict[str, Any]]:
+        raise NotImplementedError
+
+    # Sessions
+
+    def load_session(self, session_id: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def save_session(self, session_id: str, session_data: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    def delete_session(self, session_id: str) -> bool:
+        raise NotImplementedError
+
+    def session_exists(self, session_id: str) -> bool:
+        raise NotImplementedError
+
+    def list_session_ids(self) -> List[str]:
+        raise NotImplementedError
+
+    def session_version(self, session_id: str) -> Optional[Any]:
+        """Return a cheap token that changes whenever the stored session changes.
+
+        Args:
+            session_id (str): The session ID
+
+        Returns:
+            Any: Comparable version token, or None if the session does not exist
+        """
+        raise NotImplementedError
+
+    def load_sessions(self, session_ids: List[str], max_workers: int = None) -> Dict[str, Dict[str, Any]]:
+        """Load many sessions in one pass.
+
+        Args:
+            session_ids (List[str]): The session IDs
+            max_workers (int, optional): Thread pool size for backends that
+                read sessions independently
+
+        Returns:
+            Dict: session_id -> session data for the sessions that exist
+        """
+        sessions = {}
+        for session_id in session_ids:
+            session_data = self.load_session(session_id)
+            if session_data is not None:
+                sessions[session_id] = session_data
+        return sessions
+
+    def guide_session_ids(self, guide_id: str) -> List[str]:
+        """Return the IDs of all sessions whose guide_id is ``guide_id``.
+
+        Args:
+            guide_id (str): The guide ID
+
+        Returns:
+            List[str]: Session IDs from the guide -> session reverse index
+        """
+        return [s["id"] for s in self.list_session_summaries() if s.get("guide_id") == guide_id]
+
+    @contextmanager
+    def transaction(self):
+        """Group several writes so they are applied together where the backend allows it."""
+        yield
+
+    def append_message(self, session_id: str, message: Dict[str, Any], transcript_line: str) -> bool:
+        """Append a message (and its transcript line) to a stored session.
+
+        The default implementation rewrites the whole session document.
+
+        Args:
+            session_id (str): The session ID
+            message (Dict): The message to append
+            transcript_line (str): Text appended to the session transcript
+
+        Returns:
+            bool: True if the session exists and the message was stored
+        """
+        session = self.load_session(session_id)
+        if session is None:
+            return False
+        session.setdefault("messages", []).append(message)
+        session["transcript"] = session.get("transcript", "") + transcript_line
+        session["updated_at"] = message.get("timestamp", datetime.now().isoformat())
+        self.save_session(session_id, session)
+        return True
+
+    def list_session_summaries(self) -> List[Dict[str, Any]]:
+        """Return a summary row (see session_summary) for every session.
+
+        The default implementation loads every session document.
+
+        Returns:
+            List[Dict]: Unordered summary rows
+        """
+        summaries = []
+        for session_id in self.list_session_ids():
+            try:
+                session_data = self.load_session(session_id)
+            except Exception as e:
+                logger.error(f"Error loading session {session_id}: {str(e)}")
+                continue
+            if isinstance(session_data, dict):
+                summaries.append(session_summary(session_id, session_data))
+        return summaries
+
+    def compact_session(self, session_id: str) -> bool:
+        """Fold any pending appends into the session document.
+
+        Args:
+            session_id (str): The session ID
+
+        Returns:
+            bool: True if anything was compacted
+        """
+        return False
+
+    def archive_sessions(self, older_than_days: float, now: datetime = None) -> List[str]:
+        """Move completed sessions untouched for ``older_than_days`` to cold storage.
+
+        Backends without a cold tier keep every session as is.
+
+        Args:
+            older_than_days (float): Minimum age since the last write
+            now (datetime, optional): Reference time, defaults to now
+
+        Returns:
+            List[str]: IDs of the sessions that were archived
+        """
+        return []
+
+    def close(self) -> None:
+        """Release any resources held by the store."""
+
+
+class JSONSessionStore(SessionStore):
+    """File-per-document store: ``<data_dir>/<guide_id>.json`` and
+    ``<data_dir>/sessions/<session_id>.json``.
+
+    This is the original on-disk layout and doubles as the export format for
+    the other backends. Chat turns are appended to a per-session JSONL journal
+    (``sessions/<session_id>.jsonl``) instead of rewriting the document; the
+    journal is replayed on load and compacted back into the document on the
+    next full save or once it grows past ``journal_max_bytes``.
+
+    Completed sessions can be moved to a compressed archive
+    (``<data_dir>/.archive``, see SessionArchive) by archive_sessions. They
+    stay readable through the store and are restored to a plain document the
+    next time they are written.
+    """
+
+    backend = "json"
+
+    def __init__(self, data_dir: str, pretty: bool = False,
+                 journal_max_bytes: int = DEFAULT_JOURNAL_MAX_BYTES):
+        self.data_dir = Path(data_dir)
+        self.sessions_dir = self.data_dir / "sessions"
+        self.pretty = pretty
+        self.journal_max_bytes = journal_max_bytes
+        self.manifest_path = self.data_dir / ".index" / "session_manifest.json"
+        self.archive = SessionArchive(self.data_dir / ".archive")
+        self._manifest = None
+        self._manifest_dirty = False
+        self._manifest_validated = False
+        # guide_id -> set of session IDs, derived from the manifest rows
+        self._guide_index = {}
+        self._lock = threading.RLock()
+        os.makedirs(self.data_dir, exist_ok=True)
+        os.makedirs(self.sessions_dir, exist_ok=True)
+
+    def guide_path(self, guide_id: str) -> Path:
+        return self.data_dir / f"{guide_id}.json"
+
+    def session_path(self, session_id: str) -> Path:
+        return self.sessions_dir / f"{session_id}.json"
+
+    def journal_path(self, session_id: str) -> Path:
+        return self.sessions_dir / f"{session_id}.jsonl"
+
+    def _read(self, file_path: Path) -> Optional[Dict[str, Any]]:
+        if not file_path.exists():
+            return None
+        return serialization.read_json(file_path)
+
+    def _write(self, file_path: Path, data: Dict[str, Any]) -> None:
+        serialization.write_json(file_path, data, pretty=self.pretty, atomic=True)
+
+    def load_guide(self, guide_id: str) -> Optional[Dict[str, Any]]:
+        return self._read(self.guide_path(guide_id))
+
+    def save_guide(self, guide_id: str, guide_data: Dict[str, Any]) -> None:
+        self._write(self.guide_path(guide_id), guide_data)
+
+    def delete_guide(self, guide_id: str) -> bool:
+        guide_path = self.guide_path(guide_id)
+        if not guide_path.exists():
+            return False
+        guide_path.unlink()
+        return True
+
+    def guide_exists(self, guide_id: str) -> bool:
+        return self.guide_path(guide_id).exists()
+
+    def iter_guides(self) -> Iterator[Dict[str, Any]]:
+        if not self.data_dir.exists():
+            return
+        for file_path in self.data_dir.glob("*.json"):
+            if not file_path.is_file() or file_path.name.startswith("."):
+                continue
+            try:
+                guide_data = self._read(file_path)
+            except Exception as e:
+                logger.error(f"Error loading guide from {file_path}: {str(e)}")
+                continue
+            if guide_data is None:
+                continue
+            guide_data.setdefault("id", file_path.stem)
+            yield guide_data
+
+    def load_session(self, session_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            session_data = self._read(self.session_path(session_id))
+            if session_data is None:
+                # Decompressed only when the full document is needed
+                return self.archive.load(session_id)
+            self._replay_journal(session_id, session_data)
+        return session_data
+
+    def save_session(self, session_id: str, session_data: Dict[str, Any]) -> None:
+        with self._lock:
+            self._write(self.session_path(session_id), session_data)
+            self._trim_journal(session_id, session_data)
+            if isinstance(session_data, dict):
+                self._update_manifest(session_id, session_summary(session_id, session_data))
+            # A written session is hot again
+            if session_id in self.archive:
+                self.archive.discard(session_id)
+
+    def delete_session(self, session_id: str) -> bool:
+        session_path = self.session_path(session_id)
+        with self._lock:
+            self.journal_path(session_id).unlink(missing_ok=True)
+            self._remove_from_manifest(session_id)
+            archived = self.archive.discard(session_id)
+            if not session_path.exists():
+                return archived
+            session_path.unlink()
+        return True
+
+    def session_exists(self, session_id: str) -> bool:
+        return self.session_path(session_id).exists() or session_id in self.archive
+
+    def list_session_ids(self) -> List[str]:
+        hot_ids = [p.stem for p in self.sessions_dir.glob("*.json")]
+        hot = set(hot_ids)
+        return hot_ids + [session_id for session_id in self.archive.ids() if session_id not in hot]
+
+    def session_version(self, session_id: str) -> Optional[Any]:
+        stat_key = self._stat_key(session_id)
+        if stat_key[1]:
+            return tuple(stat_key)
+        entry = self.archive.entry(session_id)
+        return ("archive", entry["hash"]) if entry else None
+
+    def load_sessions(self, session_ids: List[str], max_workers: int = None) -> Dict[str, Dict[str, Any]]:
+        def load(session_id):
+            try:
+                return session_id, self.load_session(session_id)
+            except Exception as e:
+                logger.error(f"Error loading session {session_id}: {str(e)}")
+                return session_id, None
+
+        if max_workers and max_workers > 1 and len(session_ids) > 1:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                results = list(executor.map(load, session_ids))
+        else:
+            results = [load(session_id) for session_id in session_ids]
+        return {session_id: data for session_id, data in results if data is not None}
+
+    def guide_session_ids(self, guide_id: str) -> List[str]:
+        with self._lock:
+            if not self._manifest_validated:
+                # First use: bring the manifest (and the index built from it)
+                # in line with the files on disk
+                self.list_session_summaries()
+            session_ids = set(self._guide_index.get(guide_id, ()))
+        session_ids.update(
+            session_id for session_id, summary in self.archive.summaries().items()
+            if summary.get("guide_id") == guide_id
+        )
+        return sorted(session_ids)
+
+    @contextmanager
+    def transaction(self):
+        # Files cannot be updated atomically together; serialize the writes
+        # within this process instead.
+        with self._lock:
+            yield
+
+    def append_message(self, session_id: str, message: Dict[str, Any], transcript_line: str) -> bool:
+        """Append a message to the session journal in constant time.
+
+        Args:
+            session_id (str): The session ID
+            message (Dict): The message to append
+            transcript_line (str): Text appended to the session transcript
+
+        Returns:
+            bool: True if the session exists and the message was journaled
+        """
+        record = {
+            "message": message,
+            "transcript": transcript_line,
+            "updated_at": message.get("timestamp", datetime.now().isoformat())
+        }
+        with self._lock:
+            if not self.session_path(session_id).exists():
+                if not self._restore_archived(session_id):
+                    return False
+            previous_stat = self._stat_key(session_id)
+            with open(self.journal_path(session_id), "ab") as f:
+                f.write(serialization.dumpb(record) + b"\n")
+                journal_size = f.tell()
+
+            # Keep the manifest row current without re-reading the session
+            entry = self._load_manifest().get(session_id)
+            if entry and entry["stat"] == previous_stat:
+                summary = dict(entry["summary"])
+                summary["message_count"] += 1
+                summary["updated_at"] = record["updated_at"]
+                self._update_manifest(session_id, summary)
+
+            if journal_size >= self.journal_max_bytes:
+                self.compact_session(session_id)
+        return True
+
+    def compact_session(self, session_id: str) -> bool:
+        """Fold the session journal back into the session document.
+
+        Args:
+            session_id (str): The session ID
+
+        Returns:
+            bool: True if a journal was compacted
+        """
+        with self._lock:
+            if not self.journal_path(session_id).exists():
+                return False
+            session_data = self.load_session(session_id)
+            if session_data is None:
+                return False
+            self.save_session(session_id, session_data)
+        logger.info(f"Compacted message journal for session {session_id}")
+        return True
+
+    def list_session_summaries(self) -> List[Dict[str, Any]]:
+        """Serve summary rows from the session manifest.
+
+        Manifest entries are revalidated against the size/mtime of the session
+        file and journal, so only sessions changed behind the store's back
+        (other processes, manual edits) are re-parsed.
+
+        Returns:
+            List[Dict]: Unordered summary rows
+        """
+        with self._lock:
+            manifest = self._load_manifest()
+            session_ids = {p.stem for p in self.sessions_dir.glob("*.json")}
+
+            for session_id in list(manifest):
+                if session_id not in session_ids:
+                    self._remove_from_manifest(session_id)
+
+            summaries = []
+            for session_id in session_ids:
+                entry = manifest.get(session_id)
+                if entry is None or entry["stat"] != self._stat_key(session_id):
+                    try:
+                        session_data = self.load_session(session_id)
+                    except Exception as e:
+                        logger.error(f"Error loading session {session_id}: {str(e)}")
+                        continue
+                    if not isinstance(session_data, dict):
+                        continue
+                    self._update_manifest(session_id, session_summary(session_id, session_data))
+                    entry = manifest[session_id]
+                summaries.append(entry["summary"])
+
+            self._manifest_validated = True
+            self._flush_manifest()
+
+        # Archived sessions are listed from the archive index without
+        # decompressing them
+        for session_id, summary in self.archive.summaries().items():
+            if session_id not in session_ids:
+                summaries.append(summary)
+        return summaries
+
+    def archive_sessions(self, older_than_days: float, now: datetime = None) -> List[str]:
+        """Move completed sessions untouched for ``older_than_days`` into the archive.
+
+        The session document and its journal are folded into one compressed
+        object and removed from ``sessions/``.
+
+        Args:
+            older_than_days (float): Minimum age of the last write (document
+                or journal mtime)
+            now (datetime, optional): Reference time, defaults to now
+
+        Returns:
+            List[str]: IDs of the sessions that were archived
+        """
+        cutoff = (now or datetime.now()).timestamp() - older_than_days * 86400
+        archived = []
+        with self._lock:
+            for summary in self.list_session_summaries():
+                session_id = summary["id"]
+                if summary.get("status") != "completed" or session_id in self.archive:
+                    continue
+                stat_key = self._stat_key(session_id)
+                last_write = max(stat_key[0] / 1e9, self._journal_mtime(session_id))
+                if not stat_key[1] or last_write > cutoff:
+                    continue
+
+                session_data = self.load_session(session_id)
+                if not isinstance(session_data, dict):
+                    continue
+                self.archive.put(session_id, session_data, session_summary(session_id, session_data))
+                self.session_path(session_id).unlink(missing_ok=True)
+                self.journal_path(session_id).unlink(missing_ok=True)
+                self._remove_from_manifest(session_id)
+                archived.append(session_id)
+            self._flush_manifest()
+
+        if archived:
+            logger.info(f"Archived {len(archived)} completed sessions from {self.sessions_dir}")
+        return archived
+
+    def _restore_archived(self, session_id: str) -> bool:
+        """Write an archived session back out as a plain document."""
+        session_data = self.archive.load(session_id)
+        if session_data is None:
+            return False
+        self.save_session(session_id, session_data)
+        logger.info(f"Restored archived session {session_id}")
+        return True
+
+    def _journal_mtime(self, session_id: str) -> float:
+        try:
+            return self.journal_path(session_id).stat().st_mtime
+        except FileNotFoundError:
+            return 0.0
+
+    def _stat_key(self, session_id: str) -> List[int]:
+        """File state a manifest entry was built from: document mtime/size and journal size."""
+        try:
+            doc_stat = self.session_path(session_id).stat()
+        except FileNotFoundError:
+            return [0, 0, 0]
+        try:
+            journal_size = self.journal_path(session_id).stat().st_size
+        except FileNotFoundError:
+            journal_size = 0
+        return [doc_stat.st_mtime_ns, doc_stat.st_size, journal_size]
+
+    def _load_manifest(self) -> Dict[str, Dict[str, Any]]:
+        if self._manifest is None:
+            self._manifest = {}
+            try:
+                if self.manifest_path.exists():
+                    self._manifest = serialization.read_json(self.manifest_path).get("sessions", {})
+            except Exception as e:
+                logger.warning(f"Rebuilding unreadable session manifest {self.manifest_path}: {str(e)}")
+            self._guide_index = {}
+            for session_id, entry in self._manifest.items():
+                self._index_guide(session_id, entry["summary"].get("guide_id"))
+        return self._manifest
+
+    def _update_manifest(self, session_id: str, summary: Dict[str, Any]) -> None:
+        manifest = self._load_manifest()
+        previous = manifest.get(session_id)
+        if previous and previous["summary"].get("guide_id") != summary.get("guide_id"):
+            self._unindex_guide(session_id, previous["summary"].get("guide_id"))
+        manifest[session_id] = {"stat": self._stat_key(session_id), "summary": summary}
+        self._index_guide(session_id, summary.get("guide_id"))
+        self._manifest_dirty = True
+
+    def _remove_from_manifest(self, session_id: str) -> None:
+        entry = self._load_manifest().pop(session_id, None)
+        if entry is not None:
+            self._unindex_guide(session_id, entry["summary"].get("guide_id"))
+            self._manifest_dirty = True
+
+    def _index_guide(self, session_id: str, guide_id: Optional[str]) -> None:
+        if guide_id:
+            self._guide_index.setdefault(guide_id, set()).add(session_id)
+
+    def _unindex_guide(self, session_id: str, guide_id: Optional[str]) -> None:
+        session_ids = self._guide_index.get(guide_id)
+        if session_ids is not None:
+            session_ids.discard(session_id)
+            if not session_ids:
+                del self._guide_index[guide_id]
+
+    def _flush_manifest(self) -> None:
+        """Persist the manifest so restarts skip re-parsing unchanged sessions."""
+        if not self._manifest_dirty:
+            return
+        os.makedirs(self.manifest_path.parent, exist_ok=True)
+        serialization.write_json(self.manifest_path, {"version": 1, "sessions": self._manifest}, atomic=True)
+        self._manifest_dirty = False
+
+    def _replay_journal(self, session_id: str, session_data: Dict[str, Any]) -> None:
+        """Apply journaled messages that are not yet in the session document."""
+        journal_path = self.journal_path(session_id)
+        if not journal_path.exists():
+            return
+
+        with open(journal_path, "rb") as f:
+            lines = f.readlines()
+        if not lines:
+            return
+
+        messages = session_data.setdefault("messages", [])
+        # A crash between writing the document and dropping the journal
+        # leaves records that are already in the document; skip those.
+        seen = {_message_key(m) for m in messages}
+        for line in lines:
+            try:
+                record = serialization.loads(line)
+            except ValueError:
+                # Torn final write; everything before it is intact
+                logger.warning(f"Skipping unreadable journal record for session {session_id}")
+                continue
+            message = record["message"]
+            if _message_key(message) in seen:
+                continue
+            messages.append(message)
+            session_data["transcript"] = session_data.get("transcript", "") + record.get("transcript", "")
+            session_data["updated_at"] = record.get("updated_at", session_data.get("updated_at"))
+
+    def _trim_journal(self, session_id: str, session_data: Dict[str, Any]) -> None:
+        """Drop journal records that are now part of the saved document.
+
+        Documents saved by callers normally come from load_session and so
+        include the whole journal, but a message appended between that load
+        and the save must survive.
+        """
+        journal_path = self.journal_path(session_id)
+        if not journal_path.exists():
+            return
+
+        saved = {_message_key(m) for m in session_data.get("messages") or []}
+        with open(journal_path, "rb") as f:
+            pending = []
+            for line in f:
+                try:
+                    record = serialization.loads(line)
+                except ValueError:
+                    continue
+                if _message_key(record["message"]) not in saved:
+                    pending.append(line)
+
+        if not pending:
+            journal_path.unlink()
+            return
+        tmp_path = journal_path.with_name(f".{journal_path.name}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.writelines(pending)
+        os.replace(tmp_path, journal_path)
+
+
+class SQLiteSessionStore(SessionStore):
+    """Embedded SQLite store (WAL mode) with ``guides``, ``sessions`` and
+    ``messages`` tables.
+
+    Messages are kept one row per message so that appending a chat turn is a
+    single INSERT instead of a rewrite of the whole session document.
+    """
+
+    backend = "sqlite"
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS guides (
+            id TEXT PRIMARY KEY,
+            status TEXT,
+            created_at TEXT,
+            updated_at TEXT,
+            data TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS sessions (
+            id TEXT PRIMARY KEY,
+            guide_id TEXT,
+            status TEXT,
+            created_at TEXT,
+            updated_at TEXT,
+            transcript TEXT NOT NULL DEFAULT '',
+            data TEXT NOT NULL,
+            version INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE INDEX IF NOT EXISTS idx_sessions_guide_id ON sessions(guide_id);
+        CREATE INDEX IF NOT EXISTS idx_sessions_updated_at ON sessions(updated_at);
+        CREATE TABLE IF NOT EXISTS messages (
+            session_id TEXT NOT NULL,
+            seq INTEGER NOT NULL,
+            data TEXT NOT NULL,
+            PRIMARY KEY (session_id, seq)
+        );
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = Path(db_path)
+        os.makedirs(self.db_path.parent, exist_ok=True)
+        self._lock = threading.RLock()
+        self._txn_depth = 0
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self.SCHEMA)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(sessions)")}
+        if "version" not in columns:
+            # Databases created before sessions carried a version counter
+            self._conn.execute("ALTER TABLE sessions ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+        self._conn.commit()
+
+    # Guides
+
+    def load_guide(self, guide_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM guides WHERE id = ?", (guide_id,)).fetchone()
+        return serialization.loads(row[0]) if row else None
+
+    def save_guide(self, guide_id: str, guide_data: Dict[str, Any]) -> None:
+        data = guide_data
+        with self.transaction():
+            self._conn.execute(
+                "INSERT OR REPLACE INTO guides (id, status, created_at, updated_at, data) VALUES (?, ?, ?, ?, ?)",
+                (guide_id, data.get("status"), serialization.isoformat(data.get("created_at")),
+                 serialization.isoformat(data.get("updated_at")), serialization.dumps(data))
+            )
+
+    def delete_guide(self, guide_id: str) -> bool:
+        with self.transaction():
+            cursor = self._conn.execute("DELETE FROM guides WHERE id = ?", (guide_id,))
+        return cursor.rowcount > 0
+
+    def guide_exists(self, guide_id: str) -> bool:
+        with self._lock:
+            row = self._conn.execute("SELECT 1 FROM guides WHERE id = ?", (guide_id,)).fetchone()
+        return row is not None
+
+    def iter_guides(self) -> Iterator[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute("SELECT id, data FROM guides").fetchall()
+        for guide_id, data in rows:
+            guide_data = serialization.loads(data)
+            guide_data.setdefault("id", guide_id)
+            yield guide_data
+
+    # Sessions
+
+    def load_session(self, session_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data, transcript FROM sessions WHERE id = ?", (session_id,)
+            ).fetchone()
+            if not row:
+                return None
+            message_rows = self._conn.execute(
+                "SELECT data FROM messages WHERE session_id = ? ORDER BY seq", (session_id,)
+            ).fetchall()
+
+        session_data = serialization.loads(row[0])
+        session_data["transcript"] = row[1]
+        if message_rows or "conversation_history" not in session_data:
+            session_data["messages"] = [serialization.loads(m[0]) for m in message_rows]
+        return session_data
+
+    def save_session(self, session_id: str, session_data: Dict[str, Any]) -> None:
+        data = dict(session_data)
+        messages = data.pop("messages", None) or []
+        transcript = data.pop("transcript", "") or ""
+        with self.transaction():
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sessions (id, guide_id, status, created_at, updated_at, transcript, data, version) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, (SELECT COALESCE(MAX(version), 0) + 1 FROM sessions WHERE id = ?))",
+                (session_id, data.get("guide_id"), data.get("status"), serialization.isoformat(data.get("created_at")),
+                 serialization.isoformat(data.get("updated_at")), transcript, serialization.dumps(data), session_id)
+            )
+            self._conn.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+            self._conn.executemany(
+                "INSERT INTO messages (session_id, seq, data) VALUES (?, ?, ?)",
+                [(session_id, seq, serialization.dumps(message)) for seq, message in enumerate(messages)]
+            )
+
+    def delete_session(self, session_id: str) -> bool:
+        with self.transaction():
+            cursor = self._conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+            self._conn.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+        return cursor.rowcount > 0
+
+    def session_exists(self, session_id: str) -> bool:
+        with self._lock:
+            row = self._conn.execute("SELECT 1 FROM sessions WHERE id = ?", (session_id,)).fetchone()
+        return row is not None
+
+    def list_session_ids(self) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute("SELECT id FROM sessions").fetchall()
+        return [row[0] for row in rows]
+
+    def session_version(self, session_id: str) -> Optional[Any]:
+        with self._lock:
+            row = self._conn.execute("SELECT version FROM sessions WHERE id = ?", (session_id,)).fetchone()
+        return row[0] if row else None
+
+    def load_sessions(self, session_ids: List[str], max_workers: int = None) -> Dict[str, Dict[str, Any]]:
+        if not session_ids:
+            return {}
+        placeholders = ",".join("?" for _ in session_ids)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT id, data, transcript FROM sessions WHERE id IN ({placeholders})", list(session_ids)
+            ).fetchall()
+            message_rows = self._conn.execute(
+                f"SELECT session_id, data FROM messages WHERE session_id IN ({placeholders}) ORDER BY session_id, seq",
+                list(session_ids)
+            ).fetchall()
+
+        messages = {}
+        for session_id, data in message_rows:
+            messages.setdefault(session_id, []).append(serialization.loads(data))
+
+        sessions = {}
+        for session_id, data, transcript in rows:
+            session_data = serialization.loads(data)
+            session_data["transcript"] = transcript
+            if session_id in messages or "conversation_history" not in session_data:
+                session_data["messages"] = messages.get(session_id, [])
+            sessions[session_id] = session_data
+        return sessions
+
+    def guide_session_ids(self, guide_id: str) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id FROM sessions WHERE guide_id = ? ORDER BY id", (guide_id,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    @contextmanager
+    def transaction(self):
+        """Run the enclosed writes in a single SQLite transaction."""
+        with self._lock:
+            outermost = self._txn_depth == 0
+            self._txn_depth += 1
+            try:
+                if outermost:
+                    with self._conn:
+                        yield
+                else:
+                    yield
+            finally:
+                self._txn_depth -= 1
+
+    def list_session_summaries(self) -> List[Dict[str, Any]]:
+        # Messages and transcripts live outside the data column, so this
+        # never touches message bodies.
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT s.id, s.data, (SELECT COUNT(*) FROM messages m WHERE m.session_id = s.id) "
+                "FROM sessions s"
+            ).fetchall()
+        summaries = []
+        for session_id, data, message_count in rows:
+            summary = session_summary(session_id, serialization.loads(data))
+            if message_count:
+                summary["message_count"] = message_count
+            summaries.append(summary)
+        return summaries
+
+    def append_message(self, session_id: str, message: Dict[str, Any], transcript_line: str) -> bool:
+        updated_at = message.get("timestamp", datetime.now().isoformat())
+        with self.transaction():
+            row = self._conn.execute(
+                "SELECT data FROM sessions WHERE id = ?", (session_id,)
+            ).fetchone()
+            if not row:
+                return False
+            data = serialization.loads(row[0])
+            data["updated_at"] = updated_at
+            self._conn.execute(
+                "UPDATE sessions SET updated_at = ?, transcript = transcript || ?, data = ?, version = version + 1 "
+                "WHERE id = ?",
+                (updated_at, transcript_line, serialization.dumps(data), session_id)
+            )
+            self._conn.execute(
+                "INSERT INTO messages (session_id, seq, data) VALUES "
+                "(?, (SELECT COALESCE(MAX(seq), -1) + 1 FROM messages WHERE session_id = ?), ?)",
+                (session_id, session_id, serialization.dumps(message))
+            )
+        return True
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def create_session_store(data_dir: str, backend: Optional[str] = None) -> SessionStore:
+    """Create the storage backend for a DiscussionService.
+
+    Args:
+        data_dir (str): Directory holding guide/session data
+        backend (str, optional): "json" or "sqlite"; defaults to the
+            DARIA_SESSION_BACKEND environment variable, then "json"
+
+    Returns:
+        SessionStore: The configured store
+    """
+    backend = (backend or os.environ.get(SESSION_BACKEND_ENV) or "json").lower()
+    if backend == "sqlite":
+        return SQLiteSessionStore(os.path.join(data_dir, SQLITE_DB_NAME))
+    if backend != "json":
+        logger.warning(f"Unknown session backend '{backend}', falling back to json")
+    return JSONSessionStore(data_dir)
+
+
+def copy_store(source: SessionStore, target: SessionStore) -> Dict[str, int]:
+    """Copy every guide and session from one store into another.
+
+    Args:
+        source (SessionStore): Store to read from
+        target (SessionStore): Store to write to
+
+    Returns:
+        Dict: Counts of copied guides, sessions and messages
+    """
+    counts = {"guides": 0, "sessions": 0, "messages": 0}
+
+    for guide in source.iter_guides():
+        target.save_guide(guide["id"], guide)
+        counts["guides"] += 1
+
+    for session_id in source.list_session_ids():
+        try:
+            session = source.load_session(session_id)
+        except Exception as e:
+            logger.error(f"Error loading session {session_id} during copy: {str(e)}")
+            continue
+        if session is None:
+            continue
+        target.save_session(session_id, session)
+        counts["sessions"] += 1
+        counts["messages"] += len(session.get("messages") or [])
+
+    return counts
+
+
+def migrate_json_to_sqlite(data_dir: str, db_path: str = None) -> Dict[str, int]:
+    """One-shot migration of the JSON guide/session tree into SQLite.
+
+    Args:
+        data_dir (str): Directory holding the JSON guide/session tree
+        db_path (str, optional): SQLite database path, defaults to
+            ``<data_dir>/daria_sessions.db``
+
+    Returns:
+        Dict: Counts of migrated guides, sessions and messages
+    """
+    source = JSONSessionStore(data_dir)
+    target = SQLiteSessionStore(db_path or os.path.join(data_dir, SQLITE_DB_NAME))
+    try:
+        counts = copy_store(source, target)
+    finally:
+        target.close()
+    logger.info(f"Migrated {counts['guides']} guides, {counts['sessions']} sessions "
+                f"and {counts['messages']} messages from {data_dir} to SQLite")
+    return counts
+
+
+def export_sqlite_to_json(db_path: str, output_dir: str) -> Dict[str, int]:
+    """Export a SQLite session database to the JSON guide/session layout.
+
+    Args:
+        db_path (str): SQLite database path
+        output_dir (str): Directory to write the JSON tree to
+
+    Returns:
+        Dict: Counts of exported guides, sessions and messages
+    """
+    source = SQLiteSessionStore(db_path)
+    try:
+        counts = copy_store(source, JSONSessionStore(output_dir, pretty=True))
+    finally:
+        source.close()
+    logger.info(f"Exported {counts['guides']} guides and {counts['sessions']} sessions to {output_dir}")
+    return counts
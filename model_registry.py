@@ -0,0 +1,264 @@
+"""
+Process-wide registry of lazily loaded ML models.
+
+Loading a SentenceTransformer, a transformers pipeline or a CrossEncoder
+takes seconds and hundreds of megabytes, so each model is loaded once per
+process, on first use, and shared by every caller:
+
+    from model_registry import sentence_transformer
+
+    model = sentence_transformer('all-MiniLM-L6-v2')   # nothing loaded yet
+    vectors = model.encode(texts)                     # loads on first call
+
+Calls into a shared model are serialized by a per-model inference lock, as
+the underlying torch modules are not safe to drive from several request
+threads at once. ``prewarm`` loads registered models on a background thread
+after startup, and ``stats`` reports load time and memory per model.
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+PREWARM_MODELS_ENV = "DARIA_PREWARM_MODELS"
+
+# After a failed load, requests fail fast for this long before the next attempt
+LOAD_RETRY_SECONDS = 60.0
+
+EMOTION_MODEL_NAME = "j-hartmann/emotion-english-distilroberta-base"
+CROSS_ENCODER_MODEL_NAME = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+
+
+def _rss_bytes() -> Optional[int]:
+    """Resident set size of this process, where /proc is available."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _parameter_bytes(model: Any) -> Optional[int]:
+    """Size of a torch model's parameters and buffers (pipelines and CrossEncoders wrap one in ``.model``)."""
+    module = model if hasattr(model, "parameters") else getattr(model, "model", None)
+    if module is None or not hasattr(module, "parameters"):
+        return None
+    try:
+        tensors = list(module.parameters()) + list(module.buffers())
+        return sum(t.numel() * t.element_size() for t in tensors)
+    except Exception:
+        return None
+
+
+class ModelHandle:
+    """A shared model that is loaded on first use."""
+
+    def __init__(self, key: str, loader: Callable[[], Any], retry_seconds: float = LOAD_RETRY_SECONDS):
+        self.key = key
+        self.loader = loader
+        self.retry_seconds = retry_seconds
+        self._model = None
+        self._error = None
+        self._failed_at = None
+        self._load_lock = threading.Lock()
+        self._inference_lock = threading.Lock()
+        self.load_seconds = None
+        self.memory_bytes = None
+        self.calls = 0
+        self.inference_seconds = 0.0
+
+    @property
+    def loaded(self) -> bool:
+        return self._model is not None
+
+    @property
+    def model(self) -> Any:
+        """The underlying model, loaded on first access.
+
+        Raises:
+            RuntimeError: If loading failed within the last ``retry_seconds``
+                (the failure is remembered for that long, so a missing model
+                doesn't cost a load attempt per request)
+        """
+        if self._model is None:
+            with self._load_lock:
+                if self._model is None:
+                    if self._error is not None and time.monotonic() - self._failed_at < self.retry_seconds:
+                        raise RuntimeError(f"Model {self.key} is unavailable: {self._error}")
+                    self._load()
+        return self._model
+
+    def reset(self) -> None:
+        """Forget a failed load so the next access tries again immediately."""
+        with self._load_lock:
+            self._error = None
+            self._failed_at = None
+
+    def encode(self, *args, **kwargs):
+        return self.run(lambda model: model.encode(*args, **kwargs))
+
+    def predict(self, *args, **kwargs):
+        return self.run(lambda model: model.predict(*args, **kwargs))
+
+    def __call__(self, *args, **kwargs):
+        return self.run(lambda model: model(*args, **kwargs))
+
+    def run(self, fn: Callable[[Any], Any]) -> Any:
+        """Call ``fn(model)`` while holding the model's inference lock."""
+        model = self.model
+        with self._inference_lock:
+            start = time.perf_counter()
+            try:
+                return fn(model)
+            finally:
+                self.calls += 1
+                self.inference_seconds += time.perf_counter() - start
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "loaded": self.loaded,
+            "error": self._error,
+            "load_seconds": round(self.load_seconds, 3) if self.load_seconds is not None else None,
+            "memory_mb": round(self.memory_bytes / (1024 * 1024), 1) if self.memory_bytes is not None else None,
+            "calls": self.calls,
+            "inference_seconds": round(self.inference_seconds, 3)
+        }
+
+    def _load(self) -> None:
+        logger.info(f"Loading model {self.key}")
+        rss_before = _rss_bytes()
+        start = time.perf_counter()
+        try:
+            model = self.loader()
+        except Exception as e:
+            self._error = str(e)
+            self._failed_at = time.monotonic()
+            logger.error(f"Failed to load model {self.key}: {str(e)}")
+            raise
+        self.load_seconds = time.perf_counter() - start
+        self.memory_bytes = _parameter_bytes(model)
+        if self.memory_bytes is None and rss_before is not None:
+            rss_after = _rss_bytes()
+            self.memory_bytes = max(rss_after - rss_before, 0) if rss_after is not None else None
+        self._model = model
+        self._error = None
+        self._failed_at = None
+        logger.info(f"Loaded model {self.key} in {self.load_seconds:.2f}s")
+
+
+class ModelRegistry:
+    """Named model handles shared across the process."""
+
+    def __init__(self):
+        self._handles = {}
+        self._lock = threading.Lock()
+
+    def register(self, key: str, loader: Callable[[], Any]) -> ModelHandle:
+        """Return the handle for ``key``, creating it with ``loader`` if it's new."""
+        with self._lock:
+            handle = self._handles.get(key)
+            if handle is None:
+                handle = self._handles[key] = ModelHandle(key, loader)
+            return handle
+
+    def get(self, key: str) -> ModelHandle:
+        with self._lock:
+            return self._handles[key]
+
+    def keys(self):
+        with self._lock:
+            return list(self._handles)
+
+    def prewarm(self, keys: Optional[Iterable[str]] = None, background: bool = True) -> Optional[threading.Thread]:
+        """Load models ahead of their first request.
+
+        Args:
+            keys (Iterable[str], optional): Models to load (default: all registered)
+            background (bool): Load on a daemon thread instead of blocking
+
+        Returns:
+            Optional[threading.Thread]: The loader thread when ``background``
+        """
+        keys = list(keys) if keys is not None else self.keys()
+
+        def load_all():
+            for key in keys:
+                try:
+                    self.get(key).model
+                except Exception as e:
+                    logger.error(f"Error prewarming model {key}: {str(e)}")
+
+        if not background:
+            load_all()
+            return None
+        thread = threading.Thread(target=load_all, name="model-prewarm", daemon=True)
+        thread.start()
+        return thread
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            handles = list(self._handles.values())
+        return {handle.key: handle.stats() for handle in handles}
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_model_registry() -> ModelRegistry:
+    """Get the process-wide model registry."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = ModelRegistry()
+    return _registry
+
+
+def sentence_transformer(model_name: str, device: str = "cpu") -> ModelHandle:
+    """Shared SentenceTransformer; call ``.encode`` on the handle as on the model."""
+    def load():
+        from sentence_transformers import SentenceTransformer
+        return SentenceTransformer(model_name, device=device)
+
+    return get_model_registry().register(f"sentence-transformer:{model_name}", load)
+
+
+def text_classifier(task: str = "text-classification", model_name: str = EMOTION_MODEL_NAME,
+                    **options) -> ModelHandle:
+    """Shared transformers pipeline (the emotion classifier by default); call the handle like the pipeline."""
+    def load():
+        from transformers import pipeline
+        return pipeline(task, model=model_name, device=-1, **options)
+
+    option_key = ",".join(f"{name}={value}" for name, value in sorted(options.items()))
+    return get_model_registry().register(f"pipeline:{task}:{model_name}:{option_key}", load)
+
+
+def cross_encoder(model_name: str = CROSS_ENCODER_MODEL_NAME) -> ModelHandle:
+    """Shared CrossEncoder; call ``.predict`` on the handle as on the model."""
+    def load():
+        from sentence_transformers import CrossEncoder
+        return CrossEncoder(model_name, device="cpu")
+
+    return get_model_registry().register(f"cross-encoder:{model_name}", load)
+
+
+def prewarm_from_env() -> Optional[threading.Thread]:
+    """Prewarm in the background if DARIA_PREWARM_MODELS is set.
+
+    ``1``/``all`` loads every registered model; otherwise the value is a
+    comma-separated list of registry keys.
+    """
+    value = os.environ.get(PREWARM_MODELS_ENV, "").strip()
+    if not value or value.lower() in ("0", "false", "no"):
+        return None
+    registry = get_model_registry()
+    if value.lower() in ("1", "true", "yes", "all"):
+        return registry.prewarm()
+    keys = [key.strip() for key in value.split(",") if key.strip()]
+    return registry.prewarm([key for key in keys if key in registry.keys()])
@@ -1,11 +1,22 @@
 import os
-import json
 import uuid
 import datetime
+import logging
+import sqlite3
+import threading
 from pathlib import Path
 from typing import Dict, Optional, List, Union
 from enum import Enum
 
+import serialization
+
+logger = logging.getLogger(__name__)
+
+ISSUE_DB_NAME = "issues.db"
+
+# Columns mirrored out of the issue document so filters can use an index
+INDEXED_FIELDS = ("status", "issue_type", "creator_id", "assigned_to", "parent_id", "updated_at")
+
 class IssueStatus(str, Enum):
     OPEN = "open"
     IN_PROGRESS = "in_progress"
@@ -228,16 +239,56 @@ class Issue:
             cursor_prompt_template=data.get("cursor_prompt_template")
         )
         issue.history = data.get("history", [])
+        # __init__ recorded a fresh "Issue created" entry; keep the stored timestamp
+        issue.updated_at = data.get("updated_at") or issue.created_at
         return issue
 
 
+def _column_value(value):
+    """Plain value for a SQLite column (enum members are stored by value)."""
+    return value.value if isinstance(value, Enum) else value
+
+
 class IssueManager:
     """
-    Manager class for handling issues storage and retrieval
+    Manager class for handling issues storage and retrieval.
+
+    Issues live in a SQLite database (``<data_dir>/issues.db``) holding the
+    full issue document plus indexed columns for status, type, creator,
+    assignee, parent and updated_at, so filtered lookups don't load every
+    issue. Per-issue JSON files found in ``data_dir`` are imported the first
+    time the database is created.
     """
-    def __init__(self, data_dir="./data/issues"):
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS issues (
+            id TEXT PRIMARY KEY,
+            status TEXT,
+            issue_type TEXT,
+            creator_id TEXT,
+            assigned_to TEXT,
+            parent_id TEXT,
+            created_at TEXT,
+            updated_at TEXT,
+            data TEXT NOT NULL
+        );
+    """ + "".join(
+        f"CREATE INDEX IF NOT EXISTS idx_issues_{field} ON issues ({field});\n" for field in INDEXED_FIELDS
+    )
+
+    def __init__(self, data_dir="./data/issues", db_path=None):
         self.data_dir = Path(data_dir)
         self.data_dir.mkdir(parents=True, exist_ok=True)
+        self.db_path = Path(db_path) if db_path else self.data_dir / ISSUE_DB_NAME
+        is_new = not self.db_path.exists()
+
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        with self._lock, self._conn:
+            self._conn.executescript(self.SCHEMA)
+
+        if is_new:
+            self.import_json_issues()
     
     def create_issue(self, 
                    title: str, 
@@ -274,54 +325,137 @@ class IssueManager:
     
     def get_issue(self, issue_id: str) -> Optional[Issue]:
         """Get an issue by ID"""
-        issue_path = self.data_dir / f"{issue_id}.json"
-        if not issue_path.exists():
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM issues WHERE id = ?", (issue_id,)).fetchone()
+        if not row:
             return None
         
-        with open(issue_path, "r") as f:
-            data = json.load(f)
-        
-        return Issue.from_dict(data)
+        return Issue.from_dict(serialization.loads(row[0]))
     
     def update_issue(self, issue: Issue) -> None:
         """Update an existing issue"""
         self._save_issue(issue)
     
     def _save_issue(self, issue: Issue) -> None:
-        """Save issue to disk"""
-        issue_path = self.data_dir / f"{issue.id}.json"
-        with open(issue_path, "w") as f:
-            json.dump(issue.to_dict(), f, indent=2)
+        """Save issue to the database"""
+        data = issue.to_dict()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO issues "
+                "(id, status, issue_type, creator_id, assigned_to, parent_id, created_at, updated_at, data) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (issue.id, _column_value(issue.status), _column_value(issue.issue_type), issue.creator_id,
+                 issue.assigned_to, issue.parent_id, issue.created_at, issue.updated_at,
+                 serialization.dumps(data))
+            )
     
     def get_issues_by_creator(self, user_id: str) -> List[Issue]:
         """Get all issues created by a specific user"""
-        return self._filter_issues(lambda issue: issue.creator_id == user_id)
+        return self.find_issues(creator_id=user_id)
     
     def get_issues_assigned_to(self, user_id: str) -> List[Issue]:
         """Get all issues assigned to a specific user"""
-        return self._filter_issues(lambda issue: issue.assigned_to == user_id)
+        return self.find_issues(assigned_to=user_id)
     
     def get_open_issues(self) -> List[Issue]:
         """Get all open issues"""
-        return self._filter_issues(lambda issue: issue.status == IssueStatus.OPEN)
+        return self.find_issues(status=IssueStatus.OPEN)
     
     def get_backlog_issues(self) -> List[Issue]:
         """Get all backlog issues"""
-        return self._filter_issues(lambda issue: issue.status == IssueStatus.BACKLOG)
+        return self.find_issues(status=IssueStatus.BACKLOG)
+    
+    def get_child_issues(self, parent_id: str) -> List[Issue]:
+        """Get all issues whose parent is the given issue"""
+        return self.find_issues(parent_id=parent_id)
     
     def get_all_issues(self) -> List[Issue]:
-        """Get all issues"""
-        issues = []
-        for issue_file in self.data_dir.glob("*.json"):
-            with open(issue_file, "r") as f:
-                try:
-                    issue_data = json.load(f)
-                    issues.append(Issue.from_dict(issue_data))
-                except json.JSONDecodeError:
-                    continue  # Skip invalid JSON files
-        return issues
+        """Get all issues, most recently updated first"""
+        return self.find_issues()
+    
+    def find_issues(self, status=None, issue_type=None, creator_id=None, assigned_to=None,
+                    parent_id=None, updated_since: str = None) -> List[Issue]:
+        """
+        Get issues matching all of the given filters using the column indexes
+        
+        Args:
+            status: Only issues with this status
+            issue_type: Only issues of this type
+            creator_id: Only issues created by this user
+            assigned_to: Only issues assigned to this user
+            parent_id: Only children of this issue
+            updated_since: Only issues updated at or after this ISO timestamp
+            
+        Returns:
+            Matching issues, most recently updated first
+        """
+        filters = {
+            "status": status,
+            "issue_type": issue_type,
+            "creator_id": creator_id,
+            "assigned_to": assigned_to,
+            "parent_id": parent_id
+        }
+        clauses = []
+        params = []
+        for column, value in filters.items():
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(_column_value(value))
+        if updated_since is not None:
+            clauses.append("updated_at >= ?")
+            params.append(updated_since)
+        
+        query = "SELECT data FROM issues"
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY updated_at DESC"
+        
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [Issue.from_dict(serialization.loads(row[0])) for row in rows]
+    
+    def import_json_issues(self, json_dir=None) -> int:
+        """
+        Import per-issue JSON files (the previous storage format)
+        
+        Args:
+            json_dir: Directory of ``<issue_id>.json`` files, defaults to data_dir
+            
+        Returns:
+            Number of issues imported
+        """
+        json_dir = Path(json_dir) if json_dir else self.data_dir
+        count = 0
+        for issue_file in json_dir.glob("*.json"):
+            try:
+                issue_data = serialization.read_json(issue_file)
+            except serialization.JSONDecodeError:
+                continue  # Skip invalid JSON files
+            self._save_issue(Issue.from_dict(issue_data))
+            count += 1
+        if count:
+            logger.info(f"Imported {count} issues from {json_dir} into {self.db_path}")
+        return count
+    
+    def export_json_issues(self, output_dir) -> int:
+        """
+        Write every issue back out as a ``<issue_id>.json`` file
+        
+        Args:
+            output_dir: Target directory
+            
+        Returns:
+            Number of issues exported
+        """
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        issues = self.get_all_issues()
+        for issue in issues:
+            serialization.write_json(output_dir / f"{issue.id}.json", issue.to_dict(), pretty=True)
+        return len(issues)
     
-    def _filter_issues(self, filter_func) -> List[Issue]:
-        """Filter issues using the provided function"""
-        all_issues = self.get_all_issues()
-        return [issue for issue in all_issues if filter_func(issue)] 
\ No newline at end of file
+    def close(self) -> None:
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
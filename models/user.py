@@ -1,14 +1,21 @@
 import os
-import json
 import uuid
 import datetime
+import threading
+import time
 from pathlib import Path
 from typing import Dict, Optional, List
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_login import UserMixin
 
+import serialization
+
 VALID_ROLES = ['admin', 'researcher', 'user']
 
+# File timestamps this close to the last scan may hide a later write made
+# within the same clock tick, so they are checked again on the next access
+RACY_WINDOW_NS = 1_000_000_000
+
 class User(UserMixin):
     """User model with authentication capabilities."""
     
@@ -65,37 +72,127 @@ class User(UserMixin):
         )
 
 class UserRepository:
-    """Repository for managing users."""
+    """Repository for managing users.
+    
+    Users are kept in memory with id, username and email indexes. The
+    repository re-checks the user directory on access and re-reads only the
+    files that changed, so edits made by other processes (e.g. manage_users.py)
+    are picked up without re-parsing every user on each request.
+    """
+    
+    _instances = {}
+    _instances_lock = threading.Lock()
     
     def __init__(self, data_dir=None):
         """Initialize the user repository."""
         self.data_dir = data_dir or os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'users')
         self.storage_path = self.data_dir
         Path(self.storage_path).mkdir(parents=True, exist_ok=True)
-        self.users = self._load_users()
+        self._lock = threading.RLock()
+        self._users = {}
+        self._by_username = {}
+        self._by_email = {}
+        self._index_keys = {}
+        # user file name -> (mtime_ns, size) it was last read at
+        self._file_stats = {}
+        self._dir_mtime = None
+        self._scan_time = 0
+        self._load_users()
+    
+    @classmethod
+    def get_instance(cls, data_dir=None) -> 'UserRepository':
+        """Get the process-wide repository for a user directory."""
+        key = os.path.abspath(data_dir or os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'users'))
+        with cls._instances_lock:
+            if key not in cls._instances:
+                cls._instances[key] = cls(data_dir=key)
+            return cls._instances[key]
+    
+    @property
+    def users(self) -> Dict[str, User]:
+        """All users by ID."""
+        self._refresh()
+        return self._users
     
     def _load_users(self) -> Dict[str, User]:
         """Load all users from storage."""
-        users = {}
+        with self._lock:
+            try:
+                self._scan_time = time.time_ns()
+                self._dir_mtime = os.stat(self.storage_path).st_mtime_ns
+                current = {}
+                for entry in os.scandir(self.storage_path):
+                    if entry.name.endswith('.json') and entry.is_file():
+                        stat = entry.stat()
+                        current[entry.name] = (stat.st_mtime_ns, stat.st_size)
+                
+                for name in set(self._file_stats) - set(current):
+                    self._unindex(Path(name).stem)
+                for name, stat_key in current.items():
+                    if self._file_stats.get(name) == stat_key:
+                        continue
+                    try:
+                        user = User.from_dict(serialization.read_json(Path(self.storage_path) / name))
+                    except Exception as e:
+                        print(f"Error loading user {name}: {str(e)}")
+                        continue
+                    self._index(user)
+                # Don't trust stats of files written within the racy window
+                self._file_stats = {
+                    name: stat_key if stat_key[0] < self._scan_time - RACY_WINDOW_NS else None
+                    for name, stat_key in current.items()
+                }
+            except Exception as e:
+                print(f"Error loading users: {str(e)}")
+            return self._users
+    
+    def _refresh(self) -> None:
+        """Reload changed user files if the user directory was modified."""
         try:
-            user_files = Path(self.storage_path).glob('*.json')
-            for user_file in user_files:
-                with open(user_file, 'r') as f:
-                    user_data = json.load(f)
-                    user = User.from_dict(user_data)
-                    users[user.id] = user
-            return users
-        except Exception as e:
-            print(f"Error loading users: {str(e)}")
-            return {}
+            dir_mtime = os.stat(self.storage_path).st_mtime_ns
+        except FileNotFoundError:
+            return
+        if dir_mtime != self._dir_mtime or dir_mtime >= self._scan_time - RACY_WINDOW_NS:
+            self._load_users()
+    
+    def _index(self, user: User) -> None:
+        self._unindex(user.id)
+        username_key = user.username.lower() if user.username else None
+        email_key = user.email.lower() if user.email else None
+        self._users[user.id] = user
+        self._index_keys[user.id] = (username_key, email_key)
+        if username_key:
+            self._by_username[username_key] = user
+        if email_key:
+            self._by_email[email_key] = user
+    
+    def _unindex(self, user_id: str) -> None:
+        # Use the keys recorded at index time: the User object may have been
+        # renamed in place since
+        user = self._users.pop(user_id, None)
+        username_key, email_key = self._index_keys.pop(user_id, (None, None))
+        if username_key and self._by_username.get(username_key) is user:
+            del self._by_username[username_key]
+        if email_key and self._by_email.get(email_key) is user:
+            del self._by_email[email_key]
+    
+    def _record_file(self, user_file: Path) -> None:
+        """Track a file this repository wrote or removed itself."""
+        if user_file.exists():
+            # Just written, so within the racy window: re-read on the next scan
+            self._file_stats[user_file.name] = None
+        else:
+            self._file_stats.pop(user_file.name, None)
     
     def save_user(self, user: User) -> bool:
         """Save a user to storage."""
         try:
-            self.users[user.id] = user
-            user_file = Path(self.storage_path) / f"{user.id}.json"
-            with open(user_file, 'w') as f:
-                json.dump(user.to_dict(), f, indent=2)
+            with self._lock:
+                self._refresh()
+                user_file = Path(self.storage_path) / f"{user.id}.json"
+                serialization.write_json(user_file, user.to_dict(), atomic=True)
+                self._index(user)
+                self._record_file(user_file)
             return True
         except Exception as e:
             print(f"Error saving user: {str(e)}")
@@ -104,20 +201,18 @@ class UserRepository:
     def add_user(self, user: User) -> bool:
         """Add a new user to storage."""
         try:
-            # Check if user with same ID, username, or email already exists
-            if user.id in self.users:
-                return False
-                
-            for existing_user in self.users.values():
-                if (existing_user.username and user.username and 
-                    existing_user.username.lower() == user.username.lower()):
+            with self._lock:
+                self._refresh()
+                # Check if user with same ID, username, or email already exists
+                if user.id in self._users:
+                    return False
+                if user.username and user.username.lower() in self._by_username:
                     return False
-                if (existing_user.email and user.email and 
-                    existing_user.email.lower() == user.email.lower()):
+                if user.email and user.email.lower() in self._by_email:
                     return False
-            
-            # Save the new user
-            return self.save_user(user)
+                
+                # Save the new user
+                return self.save_user(user)
         except Exception as e:
             print(f"Error adding user: {str(e)}")
             return False
@@ -125,12 +220,14 @@ class UserRepository:
     def delete_user(self, user_id: str) -> bool:
         """Delete a user from storage."""
         try:
-            if user_id in self.users:
-                del self.users[user_id]
-            
-            user_file = Path(self.storage_path) / f"{user_id}.json"
-            if user_file.exists():
-                user_file.unlink()
+            with self._lock:
+                self._refresh()
+                self._unindex(user_id)
+                
+                user_file = Path(self.storage_path) / f"{user_id}.json"
+                if user_file.exists():
+                    user_file.unlink()
+                self._record_file(user_file)
             return True
         except Exception as e:
             print(f"Error deleting user: {str(e)}")
@@ -138,22 +235,20 @@ class UserRepository:
     
     def get_user_by_id(self, user_id: str) -> Optional[User]:
         """Get a user by ID."""
-        return self.users.get(user_id)
+        self._refresh()
+        return self._users.get(user_id)
     
     def get_user_by_username(self, username: str) -> Optional[User]:
         """Get a user by username."""
-        for user in self.users.values():
-            if user.username and user.username.lower() == username.lower():
-                return user
-        return None
+        self._refresh()
+        return self._by_username.get(username.lower()) if username else None
     
     def get_user_by_email(self, email: str) -> Optional[User]:
         """Get a user by email."""
-        for user in self.users.values():
-            if user.email and user.email.lower() == email.lower():
-                return user
-        return None
+        self._refresh()
+        return self._by_email.get(email.lower()) if email else None
     
     def get_all_users(self) -> List[User]:
         """Get all users."""
-        return list(self.users.values()) 
\ No newline at end of file
+        self._refresh()
+        return list(self._users.values())
@@ -0,0 +1,362 @@
+"""
+Cached UMAP projections of chunk embeddings.
+
+Fitting UMAP takes seconds of CPU, and the cluster view asks for the same
+projection on every click. A ProjectionCache keeps, per scope (a session ID,
+or CORPUS_SCOPE for the map shared by all sessions) and UMAP parameters:
+
+- the fitted reducer with the IDs and coordinates it was fitted on
+  (``reducers/<key>.pkl``), and
+- finished projections keyed by a hash of the embedding set they were
+  computed from (``projections/<scope key>-<key>.npz``, plus an in-memory
+  LRU). A refit drops the scope's projections, and the directory keeps at
+  most ``max_entries`` files, the oldest going first.
+
+An unchanged embedding set is answered from the cache. When chunks were
+added, the fitted coordinates are reused and only the new chunks are placed
+with ``reducer.transform``; the reducer is refitted once the new chunks
+exceed ``refit_fraction`` of the fitted set. ``refresh_in_background`` fits
+the corpus map off the request path.
+"""
+
+import datetime
+import hashlib
+import logging
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR_ENV = "DARIA_PROJECTION_CACHE_DIR"
+DEFAULT_CACHE_DIR = os.path.join("data", "projections")
+CORPUS_SCOPE = "corpus"
+# New chunks, as a fraction of the fitted set, above which a reducer is refitted
+REFIT_FRACTION = 0.5
+MAX_CACHED_PROJECTIONS = 128
+MIN_FIT_POINTS = 4
+
+
+def embedding_set_hash(ids: Sequence[str], embeddings) -> str:
+    """Order-independent hash of (ID, vector) pairs."""
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    digest = hashlib.sha256()
+    for position in sorted(range(len(ids)), key=lambda i: ids[i]):
+        digest.update(str(ids[position]).encode("utf-8") + b"\0")
+        digest.update(embeddings[position].tobytes())
+    return digest.hexdigest()
+
+
+def umap_reducer(n_neighbors: int, min_dist: float, n_components: int):
+    """An unfitted UMAP reducer (the default ``reducer_factory``)."""
+    import umap
+    return umap.UMAP(n_neighbors=n_neighbors, min_dist=min_dist, n_components=n_components, random_state=42)
+
+
+def _key(*parts) -> str:
+    return hashlib.sha1("|".join(str(part) for part in parts).encode("utf-8")).hexdigest()[:24]
+
+
+class ProjectionCache:
+    """Fitted reducers and finished projections per scope and UMAP parameters."""
+
+    def __init__(self, cache_dir: Optional[str] = None, refit_fraction: float = REFIT_FRACTION,
+                 reducer_factory: Callable = umap_reducer, max_entries: int = MAX_CACHED_PROJECTIONS):
+        self.cache_dir = cache_dir or os.environ.get(CACHE_DIR_ENV, DEFAULT_CACHE_DIR)
+        self.refit_fraction = refit_fraction
+        self.reducer_factory = reducer_factory
+        self.max_entries = max_entries
+        os.makedirs(os.path.join(self.cache_dir, "reducers"), exist_ok=True)
+        os.makedirs(os.path.join(self.cache_dir, "projections"), exist_ok=True)
+        self._fitted = {}
+        self._projections = OrderedDict()
+        self._lock = threading.RLock()
+        self._fit_locks = {}
+        self._building = set()
+        self.stats = {"hits": 0, "transforms": 0, "fits": 0}
+
+    def project(self, scope: str, ids: Sequence[str], embeddings, n_neighbors: int = 10,
+                min_dist: float = 0.1, n_components: int = 2) -> np.ndarray:
+        """Coordinates for a set of chunks, from cache, by transform, or by fitting.
+
+        Args:
+            scope (str): What the reducer is fitted on, e.g. a session ID
+            ids (Sequence[str]): Chunk IDs
+            embeddings: One embedding per ID
+            n_neighbors, min_dist, n_components: UMAP parameters
+
+        Returns:
+            np.ndarray: (len(ids), n_components) coordinates in ``ids`` order
+
+        Raises:
+            ValueError: If there are too few chunks to fit a projection
+        """
+        params = (int(n_neighbors), float(min_dist), int(n_components))
+        ids = [str(chunk_id) for chunk_id in ids]
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        set_hash = embedding_set_hash(ids, embeddings)
+
+        fitted = self._load_fitted(scope, params)
+        if fitted is not None:
+            coords = self._cached(scope, set_hash, params, fitted["hash"], ids)
+            if coords is not None:
+                return coords
+            new = sum(1 for chunk_id in ids if chunk_id not in fitted["rows"])
+            if new <= self.refit_fraction * len(fitted["rows"]) and new < len(ids):
+                coords = self._place(fitted, ids, embeddings)
+                self._store(scope, set_hash, params, fitted["hash"], ids, coords)
+                return coords
+
+        fitted = self.fit(scope, ids, embeddings, *params)
+        coords = fitted["coords"][[fitted["rows"][chunk_id] for chunk_id in ids]]
+        self._store(scope, set_hash, params, fitted["hash"], ids, coords)
+        return coords
+
+    def place(self, scope: str, ids: Sequence[str], embeddings, n_neighbors: int = 10,
+              min_dist: float = 0.1, n_components: int = 2) -> Optional[np.ndarray]:
+        """Coordinates of chunks on an already fitted map (e.g. the corpus map).
+
+        Returns:
+            Optional[np.ndarray]: (len(ids), n_components) coordinates, or
+                None if no reducer has been fitted for the scope yet
+        """
+        params = (int(n_neighbors), float(min_dist), int(n_components))
+        fitted = self._load_fitted(scope, params)
+        if fitted is None:
+            return None
+        ids = [str(chunk_id) for chunk_id in ids]
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        set_hash = embedding_set_hash(ids, embeddings)
+        coords = self._cached(scope, set_hash, params, fitted["hash"], ids)
+        if coords is None:
+            coords = self._place(fitted, ids, embeddings)
+            self._store(scope, set_hash, params, fitted["hash"], ids, coords)
+        return coords
+
+    def fit(self, scope: str, ids: Sequence[str], embeddings, n_neighbors: int = 10,
+            min_dist: float = 0.1, n_components: int = 2) -> Dict:
+        """Fit (and save) the scope's reducer on these chunks."""
+        params = (int(n_neighbors), float(min_dist), int(n_components))
+        ids = [str(chunk_id) for chunk_id in ids]
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        if len(ids) < MIN_FIT_POINTS:
+            raise ValueError(f"At least {MIN_FIT_POINTS} chunks are needed for a projection, got {len(ids)}")
+        with self._fit_lock(scope, params):
+            set_hash = embedding_set_hash(ids, embeddings)
+            current = self._load_fitted(scope, params)
+            if current is not None and current["hash"] == set_hash:
+                return current
+            reducer = self.reducer_factory(min(params[0], len(ids) - 1), params[1], params[2])
+            coords = np.asarray(reducer.fit_transform(embeddings), dtype=np.float32)
+            fitted = {
+                "reducer": reducer,
+                "rows": {chunk_id: row for row, chunk_id in enumerate(ids)},
+                "coords": coords,
+                "hash": set_hash,
+                "fitted_at": datetime.datetime.now().isoformat()
+            }
+            with self._lock:
+                self._fitted[(scope, params)] = fitted
+                self.stats["fits"] += 1
+            self._save_fitted(scope, params, fitted)
+            # Projections of the previous fit can no longer be looked up
+            self._drop_projections(scope, params)
+            logger.info(f"Fitted projection for {scope} on {len(ids)} chunks")
+            return fitted
+
+    def refresh_in_background(self, scope: str, load_fn: Callable[[], Tuple[Sequence[str], object]],
+                              n_neighbors: int = 10, min_dist: float = 0.1,
+                              n_components: int = 2) -> Optional[threading.Thread]:
+        """Refit a scope's reducer on a daemon thread.
+
+        Args:
+            scope (str): The scope to refit (usually CORPUS_SCOPE)
+            load_fn: Returns the (ids, embeddings) to fit on
+
+        Returns:
+            Optional[threading.Thread]: The thread, or None if a refit of the
+                scope is already running
+        """
+        params = (int(n_neighbors), float(min_dist), int(n_components))
+        with self._lock:
+            if (scope, params) in self._building:
+                return None
+            self._building.add((scope, params))
+
+        def run():
+            try:
+                ids, embeddings = load_fn()
+                self.fit(scope, ids, embeddings, *params)
+            except Exception as e:
+                logger.error(f"Error fitting projection for {scope}: {str(e)}")
+            finally:
+                with self._lock:
+                    self._building.discard((scope, params))
+
+        thread = threading.Thread(target=run, name=f"projection-{scope}", daemon=True)
+        thread.start()
+        return thread
+
+    def status(self, scope: str, n_neighbors: int = 10, min_dist: float = 0.1, n_components: int = 2) -> Dict:
+        params = (int(n_neighbors), float(min_dist), int(n_components))
+        fitted = self._load_fitted(scope, params)
+        with self._lock:
+            building = (scope, params) in self._building
+        return {
+            "scope": scope,
+            "ready": fitted is not None,
+            "building": building,
+            "chunks": len(fitted["rows"]) if fitted else 0,
+            "fitted_at": fitted["fitted_at"] if fitted else None
+        }
+
+    def needs_refit(self, scope: str, ids: Sequence[str], n_neighbors: int = 10, min_dist: float = 0.1,
+                    n_components: int = 2) -> bool:
+        """Whether enough of ``ids`` are new to the scope's reducer to refit it."""
+        fitted = self._load_fitted(scope, (int(n_neighbors), float(min_dist), int(n_components)))
+        if fitted is None:
+            return True
+        new = sum(1 for chunk_id in ids if str(chunk_id) not in fitted["rows"])
+        return new > self.refit_fraction * len(fitted["rows"])
+
+    def _place(self, fitted: Dict, ids, embeddings) -> np.ndarray:
+        rows = fitted["rows"]
+        coords = np.empty((len(ids), fitted["coords"].shape[1]), dtype=np.float32)
+        new = []
+        for position, chunk_id in enumerate(ids):
+            row = rows.get(chunk_id)
+            if row is None:
+                new.append(position)
+            else:
+                coords[position] = fitted["coords"][row]
+        if new:
+            coords[new] = fitted["reducer"].transform(embeddings[new])
+            with self._lock:
+                self.stats["transforms"] += 1
+        return coords
+
+    def _fit_lock(self, scope: str, params: Tuple) -> threading.Lock:
+        with self._lock:
+            return self._fit_locks.setdefault((scope, params), threading.Lock())
+
+    def _reducer_path(self, scope: str, params: Tuple) -> str:
+        return os.path.join(self.cache_dir, "reducers", f"{_key(scope, *params)}.pkl")
+
+    def _load_fitted(self, scope: str, params: Tuple) -> Optional[Dict]:
+        with self._lock:
+            fitted = self._fitted.get((scope, params))
+        if fitted is not None:
+            return fitted
+        path = self._reducer_path(scope, params)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "rb") as f:
+                fitted = pickle.load(f)
+        except Exception as e:
+            logger.error(f"Error loading projection reducer {path}: {str(e)}")
+            return None
+        with self._lock:
+            return self._fitted.setdefault((scope, params), fitted)
+
+    def _save_fitted(self, scope: str, params: Tuple, fitted: Dict) -> None:
+        path = self._reducer_path(scope, params)
+        tmp_path = f"{path}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                pickle.dump(fitted, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            # Still usable from memory for this process
+            logger.error(f"Error saving projection reducer {path}: {str(e)}")
+
+    def _projection_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, "projections", f"{key}.npz")
+
+    @staticmethod
+    def _projection_key(scope: str, set_hash: str, params: Tuple, fit_hash: str) -> str:
+        # Prefixed by the scope and parameters so a refit can find the scope's files
+        return f"{_key(scope, *params)}-{_key(set_hash, fit_hash)}"
+
+    def _cached(self, scope: str, set_hash: str, params: Tuple, fit_hash: str, ids) -> Optional[np.ndarray]:
+        key = self._projection_key(scope, set_hash, params, fit_hash)
+        with self._lock:
+            entry = self._projections.get(key)
+            if entry is not None:
+                self._projections.move_to_end(key)
+        if entry is None:
+            path = self._projection_path(key)
+            if not os.path.exists(path):
+                return None
+            try:
+                with np.load(path, allow_pickle=False) as data:
+                    entry = {str(chunk_id): coords for chunk_id, coords in zip(data["ids"], data["coords"])}
+            except Exception as e:
+                logger.error(f"Error loading cached projection {path}: {str(e)}")
+                return None
+            self._remember(key, entry)
+        with self._lock:
+            self.stats["hits"] += 1
+        return np.array([entry[chunk_id] for chunk_id in ids], dtype=np.float32)
+
+    def _store(self, scope: str, set_hash: str, params: Tuple, fit_hash: str, ids, coords: np.ndarray) -> None:
+        key = self._projection_key(scope, set_hash, params, fit_hash)
+        self._remember(key, dict(zip(ids, coords)))
+        path = self._projection_path(key)
+        tmp_path = f"{path}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                np.savez(f, ids=np.array(ids, dtype=str), coords=coords)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.error(f"Error saving projection {path}: {str(e)}")
+            return
+        self._prune_projection_files()
+
+    def _projection_files(self):
+        directory = os.path.join(self.cache_dir, "projections")
+        return [os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(".npz")]
+
+    def _drop_projections(self, scope: str, params: Tuple) -> None:
+        """Forget a scope's projections, in memory and on disk."""
+        prefix = f"{_key(scope, *params)}-"
+        with self._lock:
+            for key in [key for key in self._projections if key.startswith(prefix)]:
+                del self._projections[key]
+        for path in self._projection_files():
+            if os.path.basename(path).startswith(prefix):
+                self._remove_file(path)
+
+    def _prune_projection_files(self) -> None:
+        """Delete the oldest projection files beyond ``max_entries``."""
+        paths = self._projection_files()
+        if len(paths) <= self.max_entries:
+            return
+        modified = {}
+        for path in paths:
+            try:
+                modified[path] = os.path.getmtime(path)
+            except OSError:
+                pass
+        for path in sorted(modified, key=modified.get)[:len(modified) - self.max_entries]:
+            self._remove_file(path)
+
+    @staticmethod
+    def _remove_file(path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.error(f"Error removing cached projection {path}: {str(e)}")
+
+    def _remember(self, key: str, entry: Dict) -> None:
+        with self._lock:
+            self._projections[key] = entry
+            self._projections.move_to_end(key)
+            while len(self._projections) > self.max_entries:
+                self._projections.popitem(last=False)
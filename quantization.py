@@ -0,0 +1,184 @@
+"""
+Reduced-precision storage for L2-normalized embedding matrices.
+
+Vectors can be kept as float32, float16 (half the memory) or int8 (a
+quarter, plus one float32 scale per vector). int8 codes use symmetric
+per-vector scalar quantization:
+
+    scale = max(|v|) / 127,  code = round(v / scale)
+
+so a vector's largest component is represented exactly and every other
+component to within scale / 2. ``similarity`` scores queries against the
+codes a block of rows at a time, without dequantizing the whole matrix.
+
+NumPy has no fast float16 arithmetic, so float16 scans are several times
+slower than float32 ones; int8 saves more memory at float32 speed.
+
+Quantized scores are close to, but not exactly, the float32 cosine
+similarities. Where the float32 vectors are kept on disk, ``rescore``
+recomputes exact scores for the few best candidates of a quantized scan, so
+only those rows are read back at full precision.
+"""
+
+import os
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+PRECISIONS = ("float32", "float16", "int8")
+PRECISION_ENV = "DARIA_VECTOR_PRECISION"
+DEFAULT_PRECISION = "float32"
+# Candidates taken from the quantized scan per requested result before rescoring
+RESCORE_MULTIPLIER = 4
+# Quantized scans keep candidates this far below a similarity cutoff, as
+# their exact score may still clear it
+RESCORE_MARGIN = 0.02
+# Rows dequantized at a time by ``similarity``; small enough for the
+# converted block to stay in cache, which makes int8 scans as fast as float32
+SCORE_BLOCK_ROWS = 1024
+
+_INT8_MAX = 127.0
+
+
+def resolve_precision(precision: Optional[str] = None) -> str:
+    """The given precision, or DARIA_VECTOR_PRECISION, or float32.
+
+    Raises:
+        ValueError: For an unsupported precision
+    """
+    precision = (precision or os.environ.get(PRECISION_ENV, DEFAULT_PRECISION)).lower()
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown vector precision '{precision}' (expected one of {', '.join(PRECISIONS)})")
+    return precision
+
+
+def quantize(vectors, precision: str) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """Encode float vectors.
+
+    Returns:
+        Tuple[np.ndarray, Optional[np.ndarray]]: The codes, and for int8 the
+            per-vector float32 scales (None otherwise)
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if precision == "float32":
+        return np.ascontiguousarray(vectors), None
+    if precision == "float16":
+        return vectors.astype(np.float16), None
+    if precision == "int8":
+        if vectors.ndim == 1:
+            vectors = vectors.reshape(1, -1)
+        scales = np.abs(vectors).max(axis=1) / _INT8_MAX if vectors.shape[1] else np.zeros(len(vectors))
+        scales = np.where(scales == 0, 1.0, scales).astype(np.float32)
+        codes = np.clip(np.rint(vectors / scales[:, None]), -_INT8_MAX, _INT8_MAX).astype(np.int8)
+        return codes, scales
+    raise ValueError(f"Unknown vector precision '{precision}'")
+
+
+def dequantize(codes: np.ndarray, scales: Optional[np.ndarray] = None) -> np.ndarray:
+    """Float32 approximation of quantized vectors."""
+    vectors = np.asarray(codes, dtype=np.float32)
+    if scales is not None:
+        vectors = vectors * np.asarray(scales, dtype=np.float32).reshape(-1, 1)
+    return vectors
+
+
+def similarity(codes: np.ndarray, scales: Optional[np.ndarray], queries) -> np.ndarray:
+    """Inner products of normalized queries with every quantized row.
+
+    Args:
+        codes (np.ndarray): (rows, dimension) codes from ``quantize``
+        scales (np.ndarray, optional): Per-row int8 scales
+        queries: One query vector or a (queries, dimension) array
+
+    Returns:
+        np.ndarray: (rows,) scores for one query vector, else (queries, rows)
+    """
+    single = np.ndim(queries) == 1
+    queries = np.asarray(queries, dtype=np.float32).reshape(-1, codes.shape[1] if codes.ndim == 2 else 0)
+    if codes.dtype == np.float32:
+        scores = queries @ codes.T
+    else:
+        scores = np.empty((len(queries), len(codes)), dtype=np.float32)
+        for start in range(0, len(codes), SCORE_BLOCK_ROWS):
+            block = codes[start:start + SCORE_BLOCK_ROWS].astype(np.float32)
+            scores[:, start:start + len(block)] = queries @ block.T
+        if scales is not None:
+            scores *= np.asarray(scales, dtype=np.float32)
+    return scores[0] if single else scores
+
+
+def rescore(query, candidates: Sequence[int], originals, k: int) -> List[Tuple[int, float]]:
+    """Exact scores for the candidates of a quantized scan.
+
+    Args:
+        query: The normalized query vector
+        candidates (Sequence[int]): Row numbers to rescore
+        originals: Float32 rows indexable by a list of row numbers (an
+            array, a memory-mapped ``.npy`` or a RowFile)
+        k (int): Number of rows to return
+
+    Returns:
+        List[Tuple[int, float]]: (row, exact score) pairs, best first
+    """
+    candidates = np.asarray(candidates, dtype=np.int64)
+    if not len(candidates) or k <= 0:
+        return []
+    order = np.argsort(candidates)
+    # Read rows in file order
+    vectors = np.asarray(originals[candidates[order].tolist()], dtype=np.float32)
+    scores = np.empty(len(candidates), dtype=np.float32)
+    scores[order] = vectors @ np.asarray(query, dtype=np.float32)
+    best = np.argsort(-scores, kind="stable")[:k]
+    return [(int(candidates[i]), float(scores[i])) for i in best]
+
+
+class RowFile:
+    """Float32 rows in a flat file, read back a few at a time.
+
+    Keeps full-precision vectors for ``rescore`` out of memory. Rows are
+    written with plain file I/O rather than through a memory map, so they
+    don't stay resident after ingestion.
+    """
+
+    def __init__(self, path: str, dimension: int):
+        self.path = path
+        self.dimension = dimension
+        self.row_bytes = 4 * dimension
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        self._rows = os.fstat(self._fd).st_size // self.row_bytes if self.row_bytes else 0
+
+    def __len__(self) -> int:
+        return self._rows
+
+    def __getitem__(self, rows) -> np.ndarray:
+        rows = [rows] if isinstance(rows, (int, np.integer)) else list(rows)
+        data = b"".join(os.pread(self._fd, self.row_bytes, int(row) * self.row_bytes) for row in rows)
+        return np.frombuffer(data, dtype=np.float32).reshape(len(rows), self.dimension)
+
+    def append(self, vectors) -> None:
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        os.pwrite(self._fd, vectors.tobytes(), self._rows * self.row_bytes)
+        self._rows += len(vectors)
+
+    def write(self, row: int, vector) -> None:
+        os.pwrite(self._fd, np.ascontiguousarray(vector, dtype=np.float32).tobytes(), row * self.row_bytes)
+
+    def keep(self, mask: np.ndarray) -> None:
+        """Drop the rows where ``mask`` is False, preserving order."""
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "wb") as f:
+            for start in range(0, self._rows, SCORE_BLOCK_ROWS):
+                rows = np.flatnonzero(mask[start:start + SCORE_BLOCK_ROWS]) + start
+                if len(rows):
+                    f.write(self[rows].tobytes())
+        os.close(self._fd)
+        os.replace(tmp_path, self.path)
+        self._fd = os.open(self.path, os.O_RDWR)
+        self._rows = int(np.count_nonzero(mask))
+
+    def flush(self) -> None:
+        os.fsync(self._fd)
+
+    def close(self) -> None:
+        os.close(self._fd)
@@ -81,18 +81,13 @@ def issues_list():
     created_by = request.args.get('created_by')
     issue_type = request.args.get('type')
     
-    # Start with all issues
-    issues = issue_manager.get_all_issues()
-    
-    # Apply filters
-    if status:
-        issues = [i for i in issues if i.status == status]
-    if assigned_to:
-        issues = [i for i in issues if i.assigned_to == assigned_to]
-    if created_by:
-        issues = [i for i in issues if i.creator_id == created_by]
-    if issue_type:
-        issues = [i for i in issues if i.issue_type == issue_type]
+    # Filters are applied by the issue index
+    issues = issue_manager.find_issues(
+        status=status or None,
+        issue_type=issue_type or None,
+        creator_id=created_by or None,
+        assigned_to=assigned_to or None
+    )
     
     return render_template('issues/issues_list.html', issues=issues)
 
@@ -11,6 +11,8 @@ import argparse
 import datetime
 import uuid
 import csv
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import List, Dict, Any, Optional, Tuple
 from flask import Flask, request, jsonify, render_template, redirect, Response, flash, send_file, url_for, session, send_from_directory
@@ -30,17 +32,24 @@ from models.user import User, UserRepository
 import re
 import traceback
 import numpy as np
-import umap
 from transcript_processor import TranscriptProcessor
+import serialization
+from embedding_service import get_embedding_service
+from model_registry import get_model_registry, prewarm_from_env
 
 # Import semantic pipeline
 from semantic_pipeline import chunk_transcript, embed_chunks, tag_chunk
-from vector_store import add_chunks_to_vector_store, semantic_search
+from vector_store import (add_chunks_to_vector_store, delete_chunks_from_vector_store, drop_orphaned_lexical_chunks,
+                          hybrid_search, missing_vector_ids, semantic_search)
+from ingest_queue import IngestJobQueue
+from ingest_ledger import IngestLedger, chunk_vector_id
+from projection_cache import CORPUS_SCOPE, ProjectionCache
+from theme_clusters import get_theme_clusters
 
 # Import user routes
 from user_routes import user_bp
 from auth_routes import auth_bp
-from routes.issue_routes import bp as issues_bp
+from routes.issue_routes import bp as issues_bp, issue_manager
 from langchain_features import langchain_blueprint
 from analysis_routes import analysis_bp
 
@@ -83,7 +92,7 @@ login_manager.login_view = 'auth.login'
 @login_manager.user_loader
 def load_user(user_id):
     """Load a user from the user repository."""
-    repo = UserRepository()
+    repo = UserRepository.get_instance()
     return repo.get_user_by_id(user_id)
 
 # Enable CORS with extended headers support
@@ -121,7 +130,7 @@ observer_service = None
 
 # Always initialize discussion service
 try:
-    discussion_service = DiscussionService(data_dir=str(DATA_DIR))
+    discussion_service = DiscussionService.get_instance(data_dir=str(DATA_DIR))
     logger.info("Discussion service initialized successfully")
 except Exception as e:
     logger.error(f"Error initializing discussion service: {str(e)}")
@@ -147,36 +156,16 @@ if use_langchain:
 else:
     logger.info("Using simple response generation (LangChain disabled)")
 
-# Cache for prompt configs to avoid repeated disk access
-prompt_cache = {}
-
 # ------ Helper Functions ------
 
 def load_all_prompts() -> Dict[str, Dict[str, Any]]:
-    """Load all prompt configurations."""
+    """Load all prompt configurations.
+    
+    Served from PromptManager's prompt cache, which re-reads a prompt file
+    only when it changes on disk.
+    """
     try:
-        agent_names = prompt_mgr.get_available_agents()
-        logger.info(f"Found {len(agent_names)} agent prompts: {agent_names}")
-        
-        prompts = {}
-        for agent_name in agent_names:
-            try:
-                if agent_name in prompt_cache:
-                    logger.debug(f"Using cached prompt for {agent_name}")
-                    prompts[agent_name] = prompt_cache[agent_name]
-                else:
-                    config = prompt_mgr.load_prompt(agent_name)
-                    if config:
-                        # Store in cache
-                        prompt_cache[agent_name] = config
-                        prompts[agent_name] = config
-                        logger.info(f"Loaded prompt config for {agent_name}: {config.get('agent_name')}")
-                    else:
-                        logger.warning(f"Failed to load prompt config for {agent_name}")
-            except Exception as e:
-                logger.error(f"Error loading prompt for {agent_name}: {str(e)}")
-        
-        return prompts
+        return prompt_mgr.load_all_prompts()
     except Exception as e:
         logger.error(f"Error loading prompts: {str(e)}")
         return {}
@@ -184,18 +173,8 @@ def load_all_prompts() -> Dict[str, Dict[str, Any]]:
 def save_interview(session_id: str, interview_data: Dict[str, Any]) -> bool:
     """Save interview data to file."""
     try:
-        # Serialize datetime objects
-        serializable_data = {}
-        for key, value in interview_data.items():
-            if isinstance(value, datetime.datetime):
-                serializable_data[key] = value.isoformat()
-            else:
-                serializable_data[key] = value
-        
-        # Save to file
         file_path = DATA_DIR / f"{session_id}.json"
-        with open(file_path, 'w') as f:
-            json.dump(serializable_data, f, indent=2)
+        serialization.write_json(file_path, interview_data)
         
         return True
     except Exception as e:
@@ -209,8 +188,7 @@ def load_interview(session_id: str) -> Optional[Dict[str, Any]]:
         if not file_path.exists():
             return None
         
-        with open(file_path, 'r') as f:
-            data = json.load(f)
+        data = serialization.read_json(file_path)
         
         # Convert ISO dates back to datetime
         for key, value in data.items():
@@ -228,17 +206,12 @@ def load_interview(session_id: str) -> Optional[Dict[str, Any]]:
 def load_all_interviews() -> Dict[str, Dict[str, Any]]:
     """Load all research sessions from the sessions directory."""
     interviews = {}
-    sessions_dir = SESSIONS_DIR  # data/interviews/sessions
     try:
-        for file_path in sessions_dir.glob("*.json"):
-            try:
-                session_id = file_path.stem
-                with open(file_path, 'r') as f:
-                    interview_data = json.load(f)
-                if interview_data:
-                    interviews[session_id] = interview_data
-            except Exception as e:
-                logger.error(f"Error loading research session {file_path}: {str(e)}")
+        # Go through the discussion service so journaled messages are included
+        for interview_data in discussion_service.get_all_sessions():
+            session_id = interview_data.get('id')
+            if session_id:
+                interviews[session_id] = interview_data
     except Exception as e:
         logger.error(f"Error loading research sessions: {str(e)}")
     return interviews
@@ -301,7 +274,10 @@ def health_check():
             'stt': stt_ok,
             'memory': memory_ok,
             'langchain': langchain_status,
-            'characters': prompts
+            'characters': prompts,
+            'session_cache': discussion_service.cache_stats() if discussion_service else None,
+            'embedding_cache': get_embedding_service().stats(),
+            'models': get_model_registry().stats()
         }
     })
 
@@ -1002,15 +978,7 @@ def get_character(character_name):
     try:
         character_name = character_name.lower()
         
-        # Try to load from cache first
-        config = None
-        if character_name in prompt_cache:
-            config = prompt_cache[character_name]
-        else:
-            # Load from disk
-            config = prompt_mgr.load_prompt(character_name)
-            if config:
-                prompt_cache[character_name] = config
+        config = prompt_mgr.load_prompt(character_name)
         
         if not config:
             return jsonify({
@@ -1438,61 +1406,254 @@ def interview_setup():
         return render_template('langchain/interview_setup.html', characters=[])
 
 # add semantic search routes
+
+# Guards the lazily created shared services below. Reentrant, since creating
+# one service may ask for another (e.g. resumed ingest jobs need the ledger).
+service_init_lock = threading.RLock()
+
+# Transcript processor (persistent Chroma collection, BM25 index, models) shared by all requests
+transcript_processor = None
+
+def get_transcript_processor():
+    global transcript_processor
+    if transcript_processor is None:
+        with service_init_lock:
+            if transcript_processor is None:
+                transcript_processor = TranscriptProcessor()
+    return transcript_processor
+
+# Background ingestion queue for /api/semantic_ingest, created on first use
+ingest_queue = None
+INGEST_DB_PATH = os.environ.get('DARIA_INGEST_DB_PATH', os.path.join('data', 'ingest_jobs.db'))
+INGEST_WORKERS = int(os.environ.get('DARIA_INGEST_WORKERS', '2'))
+# Concurrent GPT tagging calls per batch of chunks
+INGEST_TAGGING_WORKERS = 4
+
+# Ledger of chunks already ingested per session, shared with the job database
+ingest_ledger = None
+
+def get_ingest_ledger():
+    global ingest_ledger
+    if ingest_ledger is None:
+        with service_init_lock:
+            if ingest_ledger is None:
+                ingest_ledger = IngestLedger(INGEST_DB_PATH)
+    return ingest_ledger
+
+def _message_blocks(transcript):
+    """Split a transcript into messages (blank-line separated blocks)."""
+    return [block.strip() for block in re.split(r'\n\s*\n', transcript) if block.strip()]
+
+def _plan_ingest(transcript, metadata):
+    """Chunk a transcript message by message, keeping only chunks not ingested yet.
+    
+    Chunking each message separately keeps an edit to one message from
+    shifting the chunks of the others. For sessions, vectors of chunks that
+    no longer exist are deleted here.
+    """
+    chunks = []
+    for block in _message_blocks(transcript):
+        chunks.extend(chunk_transcript(block))
+    session_id = metadata.get('session_id')
+    if not session_id:
+        return chunks
+    ledger = get_ingest_ledger()
+    plan = ledger.plan(session_id, chunks)
+    if plan['removed']:
+        _delete_chunks(plan['removed'])
+        ledger.forget(session_id, plan['removed'])
+    return plan['new']
+
+def _delete_chunks(ids):
+    """Delete chunks from the vector store, the BM25 index and the theme clusters."""
+    delete_chunks_from_vector_store(ids)
+    get_theme_clusters().remove(ids)
+
+def _ingest_chunks(chunks, metadata):
+    """Embed, tag and store a batch of transcript chunks (one result or exception per chunk)."""
+    embeddings = embed_chunks(chunks)
+    with ThreadPoolExecutor(max_workers=INGEST_TAGGING_WORKERS) as executor:
+        futures = [executor.submit(tag_chunk, chunk, metadata) for chunk in chunks]
+    results = []
+    for future in futures:
+        try:
+            results.append({'tags': future.result()})
+        except Exception as e:
+            results.append(e)
+    tagged = [i for i, result in enumerate(results) if not isinstance(result, Exception)]
+    if tagged:
+        session_id = metadata.get('session_id')
+        tagged_chunks = [chunks[i] for i in tagged]
+        # Session chunks get content-derived ids, so a re-run overwrites instead of duplicating
+        ids = add_chunks_to_vector_store(
+            tagged_chunks, [embeddings[i] for i in tagged], [metadata] * len(tagged),
+            ids=[chunk_vector_id(session_id, chunk) for chunk in tagged_chunks] if session_id else None
+        )
+        if session_id:
+            get_ingest_ledger().record(session_id, tagged_chunks)
+        _update_theme_clusters(ids, [embeddings[i] for i in tagged], tagged_chunks, metadata)
+        for i, vector_id in zip(tagged, ids):
+            results[i]['vector_id'] = vector_id
+    return results
+
+def _update_theme_clusters(ids, embeddings, chunks, metadata):
+    """Place newly stored chunks in the cross-session themes; labels are refreshed off the ingest path."""
+    try:
+        clusters = get_theme_clusters()
+        clusters.update(ids, embeddings, chunks, [metadata] * len(ids))
+        clusters.refresh_labels_in_background()
+    except Exception as e:
+        # The chunks are stored either way; they join the themes at the next recluster
+        logger.error(f"Error updating theme clusters: {str(e)}")
+
+def get_ingest_queue():
+    """Get the ingestion job queue, starting its workers (and resuming unfinished jobs) on first use."""
+    global ingest_queue
+    if ingest_queue is None:
+        with service_init_lock:
+            if ingest_queue is None:
+                queue = IngestJobQueue(
+                    INGEST_DB_PATH,
+                    chunk_fn=_plan_ingest,
+                    process_fn=_ingest_chunks,
+                    workers=INGEST_WORKERS,
+                    on_progress=lambda job: socketio.emit('ingest_progress', job)
+                )
+                queue.start()
+                ingest_queue = queue
+    return ingest_queue
+
+def reconcile_vector_store():
+    """Re-queue sessions whose ledgered chunks have no vector, and drop lexical and theme entries without one.
+    
+    The ledger, the lexical index and the vector store are separate files, so
+    a crash between writes (or a vector store that was reset) leaves the
+    ledger claiming chunks that search can't find. Forgetting the missing
+    chunks and re-running the session's latest job ingests just those again.
+    
+    Chunks ingested without a session get random IDs and no ledger entry, so
+    they are only ever removed here, once their vector is gone.
+    
+    Returns:
+        Dict: ``requeued`` session IDs and the number of ``orphaned`` lexical
+            and theme cluster entries removed
+    """
+    ledger = get_ingest_ledger()
+    queue = get_ingest_queue()
+    requeued = []
+    for session_id, vector_ids in ledger.vector_ids().items():
+        missing = missing_vector_ids(vector_ids)
+        if not missing:
+            continue
+        ledger.forget(session_id, missing)
+        job_input = queue.latest_input(session_id)
+        if job_input is None:
+            logger.warning(f"Session {session_id} is missing {len(missing)} vectors and has no job to re-run")
+            continue
+        queue.enqueue(*job_input)
+        requeued.append(session_id)
+    orphaned = drop_orphaned_lexical_chunks()
+    clusters = get_theme_clusters()
+    orphaned_themes = missing_vector_ids(list(clusters.ids))
+    clusters.remove(orphaned_themes)
+    if requeued or orphaned or orphaned_themes:
+        logger.info(f"Vector store reconciled: {len(requeued)} sessions re-queued, "
+                    f"{len(orphaned)} orphaned lexical and {len(orphaned_themes)} orphaned theme entries removed")
+    return {'requeued': requeued, 'orphaned': len(orphaned) + len(orphaned_themes)}
+
 @app.route('/api/semantic_ingest', methods=['POST'])
 def semantic_ingest():
+    """Queue a transcript (or a list of messages) for chunking, embedding, tagging and indexing.
+    
+    With a session_id in the metadata, only chunks not ingested before are
+    processed and chunks that disappeared are deleted (see IngestLedger).
+    """
     try:
-        data = request.json
-        print("Received data:", data)
-        transcript = data['transcript']
+        data = request.json or {}
+        transcript = data.get('transcript')
+        messages = data.get('messages')
+        if messages:
+            # One block per message; blank lines inside a message would split it
+            contents = [m.get('content', '') if isinstance(m, dict) else str(m) for m in messages]
+            transcript = '\n\n'.join(re.sub(r'\n\s*\n', '\n', content).strip() for content in contents if content.strip())
+        if not transcript:
+            return jsonify({"error": "transcript or messages is required"}), 400
         metadata = data.get('metadata', {})
-        print("About to chunk transcript")
-        chunks = chunk_transcript(transcript)
-        print("Chunks:", chunks)
-        print("About to embed chunks")
-        embeddings = embed_chunks(chunks)
-        print("Embeddings:", embeddings)
-        print("About to tag chunks")
-        tags = [tag_chunk(chunk, metadata) for chunk in chunks]
-        print("Tags:", tags)
-        print("About to add to vector store")
-        add_chunks_to_vector_store(chunks, embeddings, [metadata]*len(chunks))
-        print("semantic_ingest received:", data)
-        return jsonify({"chunks": chunks, "tags": tags})
+        job_id = get_ingest_queue().enqueue(transcript, metadata)
+        logger.info(f"Queued semantic ingest job {job_id} for session {metadata.get('session_id')}")
+        return jsonify({
+            "success": True,
+            "job_id": job_id,
+            "status": "queued",
+            "status_url": f"/api/semantic_ingest/jobs/{job_id}"
+        }), 202
     except Exception as e:
-        import traceback
-        print("Error in semantic_ingest:", e)
-        print(traceback.format_exc())
+        logger.error(f"Error queueing semantic ingest: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/semantic_ingest/jobs', methods=['GET'])
+def list_semantic_ingest_jobs():
+    """Recent ingestion jobs, optionally filtered by ?status=."""
+    limit = request.args.get('limit', 50, type=int)
+    return jsonify({"jobs": get_ingest_queue().list_jobs(request.args.get('status'), limit)})
+
+@app.route('/api/semantic_ingest/jobs/<job_id>', methods=['GET'])
+def get_semantic_ingest_job(job_id):
+    """Status and progress of an ingestion job; ?chunks=1 includes per-chunk results."""
+    job = get_ingest_queue().get_job(job_id, include_chunks=request.args.get('chunks') in ('1', 'true'))
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job)
+
+@app.route('/api/semantic_ingest/sessions/<session_id>', methods=['GET'])
+def get_semantic_ingest_session(session_id):
+    """Ingestion ledger entry of a session: content hash and chunk counts."""
+    session_state = get_ingest_ledger().session(session_id)
+    if session_state is None:
+        return jsonify({"error": "Session has not been ingested"}), 404
+    return jsonify(session_state)
+
+@app.route('/api/semantic_ingest/jobs/<job_id>/retry', methods=['POST'])
+def retry_semantic_ingest_job(job_id):
+    """Re-run the failed chunks of a finished ingestion job."""
+    queue = get_ingest_queue()
+    if queue.get_job(job_id) is None:
+        return jsonify({"error": "Job not found"}), 404
+    if not queue.retry(job_id):
+        return jsonify({"error": "Job is still queued or running"}), 409
+    return jsonify({"success": True, "job": queue.get_job(job_id)}), 202
+
 @app.route('/api/semantic_search', methods=['GET', 'POST'])
 def semantic_search_api():
     try:
         if request.method == 'POST':
-            data = request.json
-            query = data['query']
-            session_id = data.get('session_id')
+            data = request.json or {}
         else:  # GET
-            query = request.args.get('query')
-            session_id = request.args.get('session_id')
+            data = request.args
+        query = data.get('query')
+        mode = data.get('mode', 'hybrid')
+        top_k = int(data.get('top_k', 10))
+        filters = {field: data.get(field) for field in ('session_id', 'speaker', 'emotion') if data.get(field)}
             
         if not query:
             return jsonify({"error": "Query parameter is required"}), 400
             
-        query_embedding = embed_chunks([query])[0]
-        filters = {"session_id": session_id} if session_id else None
-        raw_results = semantic_search(query_embedding, filters=filters)
+        try:
+            results = hybrid_search(query, top_k=top_k, mode=mode, filters=filters)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
         # Format results for frontend
         formatted = []
-        docs = raw_results.get('documents', [[]])[0]
-        metas = raw_results.get('metadatas', [[]])[0]
-        dists = raw_results.get('distances', [[]])[0]
-        for doc, meta, dist in zip(docs, metas, dists):
+        for result in results:
             formatted.append({
-                'content': doc,
-                'metadata': meta,
-                'score': dist
+                'content': result['content'],
+                'metadata': result['metadata'],
+                'score': result['score'],
+                'snippet': result['snippet'],
+                'lexical_rank': result['lexical_rank'],
+                'vector_rank': result['vector_rank']
             })
-        return jsonify({'results': formatted})
+        return jsonify({'results': formatted, 'mode': mode})
     except Exception as e:
         import traceback
         print("Semantic search error:", e)
@@ -1501,8 +1662,7 @@ def semantic_search_api():
     
 @app.route('/api/semantic_health', methods=['GET'])
 def semantic_health():
-    from transcript_processor import TranscriptProcessor
-    processor = TranscriptProcessor()
+    processor = get_transcript_processor()
     collection = processor.collection
     all_metadatas = collection.get(include=['metadatas'])['metadatas']
     session_ids = set()
@@ -1518,22 +1678,14 @@ def semantic_health():
 def interview_archive():
     """Render interview archive page."""
     try:
-        # Load all interviews
-        interviews = load_all_interviews()
+        # The archive only shows summary fields, so serve it from the manifest
+        summaries, _ = discussion_service.list_session_summaries()
         
         # Convert to list for the template
         interview_list = []
-        for session_id, data in interviews.items():
-            # Convert datetime objects to strings if needed
-            serializable_data = {}
-            for key, value in data.items():
-                if isinstance(value, datetime.datetime):
-                    serializable_data[key] = value.isoformat()
-                else:
-                    serializable_data[key] = value
-            
-            # Add session_id to the data
-            serializable_data['session_id'] = session_id
+        for summary in summaries:
+            serializable_data = dict(summary)
+            serializable_data['session_id'] = summary['id']
             interview_list.append(serializable_data)
         
         logger.info(f"Loaded {len(interview_list)} interviews for archive page")
@@ -1585,13 +1737,7 @@ def view_prompt(prompt_id):
         prompt_id = prompt_id.lower()
         
         # Load prompt config
-        config = None
-        if prompt_id in prompt_cache:
-            config = prompt_cache[prompt_id]
-        else:
-            config = prompt_mgr.load_prompt(prompt_id)
-            if config:
-                prompt_cache[prompt_id] = config
+        config = prompt_mgr.load_prompt(prompt_id)
         
         if not config:
             return redirect('/prompts/')
@@ -1615,13 +1761,7 @@ def edit_prompt(prompt_id):
         prompt_id = prompt_id.lower()
         
         # Load prompt config
-        config = None
-        if prompt_id in prompt_cache:
-            config = prompt_cache[prompt_id]
-        else:
-            config = prompt_mgr.load_prompt(prompt_id)
-            if config:
-                prompt_cache[prompt_id] = config
+        config = prompt_mgr.load_prompt(prompt_id)
         
         if not config:
             return redirect('/prompts/')
@@ -1648,7 +1788,7 @@ def monitor_interview():
         
         # Get all active sessions
         try:
-            active_sessions = discussion_service.get_all_sessions()
+            active_sessions, _ = discussion_service.list_session_summaries()
             
             # Sort sessions by last activity (most recent first)
             active_sessions = sorted(
@@ -3221,10 +3361,6 @@ def api_edit_prompt(prompt_id):
             if not success:
                 return jsonify({'success': False, 'error': 'Failed to save prompt'}), 500
             
-            # Clear cache for this prompt
-            if prompt_id in prompt_cache:
-                del prompt_cache[prompt_id]
-                
             return jsonify({'success': True, 'message': f"Prompt {prompt_id} updated successfully"})
         except Exception as e:
             logger.error(f"Error saving prompt {prompt_id}: {str(e)}")
@@ -4136,8 +4272,7 @@ def get_suggested_questions_api(session_id):
 def api_create_issue():
     """API endpoint to create a new issue."""
     try:
-        from models.issue_tracker import IssueManager, IssueType, IssuePriority
-        issue_manager = IssueManager(data_dir=os.path.join(BASE_DIR, 'data', 'issues'))
+        from models.issue_tracker import IssueType, IssuePriority
         
         data = request.json
         if not data:
@@ -4335,46 +4470,57 @@ def save_gallery_analysis():
 
 @app.route('/api/sessions', methods=['GET'])
 def get_all_sessions():
-    """Get all research sessions."""
-    sessions_dir = os.path.join('data', 'interviews', 'sessions')
-    sessions = []
-    if os.path.exists(sessions_dir):
-        for filename in os.listdir(sessions_dir):
-            if filename.endswith('.json'):
-                with open(os.path.join(sessions_dir, filename), 'r') as f:
-                    try:
-                        session_data = json.load(f)
-                        # Filter out sensitive or unnecessary information
-                        filtered_data = {
-                            'id': session_data.get('id'),
-                            'name': session_data.get('title') or f"Session {session_data.get('id', '')[:8]}",
-                            'project': session_data.get('project'),
-                            'topic': session_data.get('topic'),
-                            'context': session_data.get('context'),
-                            'goals': session_data.get('goals'),
-                            'created_at': session_data.get('created_at'),
-                            'updated_at': session_data.get('updated_at'),
-                            'interview_type': session_data.get('interview_type'),
-                            'status': session_data.get('status'),
-                            'participant_name': session_data.get('participant_name'),
-                            'character': session_data.get('character'),
-                            'messages': session_data.get('messages', []),
-                            'transcript': session_data.get('transcript', '')
-                        }
-                        sessions.append(filtered_data)
-                    except Exception as e:
-                        logger.error(f"Error loading session {filename}: {str(e)}")
-                        continue
-    return jsonify(sessions)
+    """Get research session summaries from the session manifest.
+
+    Query parameters:
+        limit: page size (default: all sessions)
+        cursor: value of the X-Next-Cursor header from the previous page
+        include: "messages" to also return each session's messages and transcript
+    """
+    if not discussion_service:
+        return jsonify({'success': False, 'error': 'Discussion service not available'}), 500
+
+    try:
+        limit = request.args.get('limit', type=int)
+        cursor = request.args.get('cursor')
+        include = {part.strip() for part in request.args.get('include', '').split(',') if part.strip()}
+
+        try:
+            summaries, next_cursor = discussion_service.list_session_summaries(limit=limit, cursor=cursor)
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+
+        full_sessions = {}
+        if 'messages' in include:
+            full_sessions = {
+                full_session.get('id'): full_session
+                for full_session in discussion_service.get_sessions([summary['id'] for summary in summaries])
+            }
+
+        sessions = []
+        for summary in summaries:
+            session_data = dict(summary)
+            session_data['name'] = summary.get('title') or f"Session {(summary.get('id') or '')[:8]}"
+            if 'messages' in include:
+                full_session = full_sessions.get(summary['id'], {})
+                session_data['messages'] = full_session.get('messages', [])
+                session_data['transcript'] = full_session.get('transcript', '')
+            sessions.append(session_data)
+
+        response = jsonify(sessions)
+        if next_cursor:
+            response.headers['X-Next-Cursor'] = next_cursor
+        return response
+    except Exception as e:
+        logger.error(f"Error listing sessions: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/research_session/<session_id>', methods=['GET'])
 def get_research_session(session_id):
     """Return the session JSON for the given ID."""
-    session_path = os.path.join('data/interviews/sessions', f'{session_id}.json')
-    if not os.path.exists(session_path):
+    session_data = discussion_service.get_session(session_id)
+    if not session_data:
         return jsonify({'error': 'Session not found'}), 404
-    with open(session_path, 'r') as f:
-        session_data = json.load(f)
     return jsonify({'session': session_data})
 
 @app.route('/api/research_session/<session_id>/analyze', methods=['POST'])
@@ -4382,16 +4528,13 @@ def analyze_research_session(session_id):
     """Analyze a research session focusing on user messages and return structured JSON."""
     try:
         # Load the session data
-        session_path = os.path.join('data/interviews/sessions', f'{session_id}.json')
-        if not os.path.exists(session_path):
+        session_data = discussion_service.get_session(session_id)
+        if not session_data:
             return jsonify({
                 'success': False,
                 'error': f"Session with ID {session_id} not found."
             }), 404
 
-        with open(session_path, 'r') as f:
-            session_data = json.load(f)
-
         # Extract only user messages
         user_messages = []
         if 'messages' in session_data:
@@ -4530,20 +4673,17 @@ def analyze_research_sessions():
         # Collect all user messages from selected sessions
         all_user_messages = []
         for session_id in session_ids:
-            session_path = os.path.join('data/interviews/sessions', f'{session_id}.json')
-            if not os.path.exists(session_path):
+            session_data = discussion_service.get_session(session_id)
+            if not session_data:
                 continue
 
-            with open(session_path, 'r') as f:
-                session_data = json.load(f)
-                if 'messages' in session_data:
-                    for message in session_data['messages']:
-                        if message.get('role') == 'user':
-                            all_user_messages.append({
-                                'session_id': session_id,
-                                'content': message.get('content', ''),
-                                'timestamp': message.get('timestamp', '')
-                            })
+            for message in session_data.get('messages', []):
+                if message.get('role') == 'user':
+                    all_user_messages.append({
+                        'session_id': session_id,
+                        'content': message.get('content', ''),
+                        'timestamp': message.get('timestamp', '')
+                    })
 
         if not all_user_messages:
             return jsonify({
@@ -4675,54 +4815,118 @@ def chunk_messages(messages, max_tokens=3000):
 
     return chunks
 
+# Fitted UMAP reducers and finished projections for the cluster view
+projection_cache = None
+
+def get_projection_cache():
+    global projection_cache
+    if projection_cache is None:
+        with service_init_lock:
+            if projection_cache is None:
+                projection_cache = ProjectionCache()
+    return projection_cache
+
+def _projection_params(data):
+    return {
+        'n_neighbors': int(data.get('n_neighbors', 10)),
+        'min_dist': float(data.get('min_dist', 0.1)),
+        'n_components': int(data.get('n_components', 2))
+    }
+
+def _load_corpus_embeddings():
+    results = get_transcript_processor().collection.get(include=['embeddings'])
+    return results['ids'], np.array(results['embeddings'])
+
+def start_corpus_projection(**params):
+    """Fit the corpus-wide map in the background (no-op if already running)."""
+    return get_projection_cache().refresh_in_background(CORPUS_SCOPE, _load_corpus_embeddings, **params)
+
 @app.route('/api/cluster_transcript', methods=['POST'])
 def cluster_transcript():
-    data = request.json
+    """Project a session's chunks to 2-D/3-D for the cluster view.
+    
+    With scope "session" (the default) the map is fitted on the session's
+    chunks; with scope "corpus" the chunks are placed on the shared map of
+    all sessions, which is built in the background (202 until it is ready).
+    Projections are cached, and chunks added since a map was fitted are
+    placed with the fitted reducer instead of refitting.
+    """
+    data = request.json or {}
     session_id = data.get('session_id')
-    n_neighbors = data.get('n_neighbors', 10)
-    min_dist = data.get('min_dist', 0.1)
-    n_components = data.get('n_components', 2)
+    scope = data.get('scope', 'session')
+    params = _projection_params(data)
 
-    processor = TranscriptProcessor()
     # Query all chunks for this session
-    results = processor.collection.get(where={"session_id": session_id})
+    results = get_transcript_processor().collection.get(
+        where={"session_id": session_id}, include=['embeddings', 'metadatas']
+    )
+    ids, metadatas = results['ids'], results['metadatas']
+    if not ids:
+        return jsonify([])
     embeddings = np.array(results['embeddings'])
-    metadatas = results['metadatas']
 
-    reducer = umap.UMAP(n_neighbors=n_neighbors, min_dist=min_dist, n_components=n_components, random_state=42)
-    coords = reducer.fit_transform(embeddings)
+    cache = get_projection_cache()
+    try:
+        if scope == 'corpus':
+            coords = cache.place(CORPUS_SCOPE, ids, embeddings, **params)
+            if coords is None or cache.needs_refit(CORPUS_SCOPE, ids, **params):
+                start_corpus_projection(**params)
+            if coords is None:
+                return jsonify({"status": "building", **cache.status(CORPUS_SCOPE, **params)}), 202
+        else:
+            coords = cache.project(session_id, ids, embeddings, **params)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
     # Return coordinates and metadata for each chunk
     return jsonify([
         {
+            "id": chunk_id,
             "x": float(coord[0]),
             "y": float(coord[1]),
+            **({"z": float(coord[2])} if len(coord) > 2 else {}),
             "metadata": meta
         }
-        for coord, meta in zip(coords, metadatas)
+        for chunk_id, coord, meta in zip(ids, coords, metadatas)
     ])
 
+@app.route('/api/cluster_corpus', methods=['GET', 'POST'])
+def cluster_corpus():
+    """Status of the corpus-wide map (GET), or start refitting it (POST)."""
+    data = (request.json or {}) if request.method == 'POST' else request.args
+    params = _projection_params(data)
+    if request.method == 'POST':
+        start_corpus_projection(**params)
+    return jsonify(get_projection_cache().status(CORPUS_SCOPE, **params))
+
 #@app.route('/api/semantic_advanced_search', methods=['POST'])
 @app.route('/api/semantic_advanced_search', methods=['GET', 'POST'])
 def semantic_advanced_search():
-    data = request.json
+    data = request.json if request.method == 'POST' else request.args
     query = data.get('query')
     where = data.get('where', {})
-    n_results = data.get('n_results', 5)
-    processor = TranscriptProcessor()
-    results = processor.search_transcript(query, n_results=n_results, where=where)
+    n_results = int(data.get('n_results', 5))
+    mode = data.get('mode', 'hybrid')
+    if isinstance(where, str):
+        where = json.loads(where) if where else {}
+    processor = get_transcript_processor()
+    try:
+        results = processor.hybrid_search(query, n_results=n_results, where=where, mode=mode)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     return jsonify(results)
 
 @app.route('/api/export_clusters', methods=['POST'])
 def export_clusters():
     data = request.json
     session_id = data.get('session_id')
-    processor = TranscriptProcessor()
-    results = processor.collection.get(where={"session_id": session_id})
+    results = get_transcript_processor().collection.get(
+        where={"session_id": session_id}, include=['embeddings', 'metadatas']
+    )
     # You can export as CSV or JSON
     export_data = [
         {
-            "embedding": emb,
+            "embedding": [float(value) for value in emb],
             "metadata": meta
         }
         for emb, meta in zip(results['embeddings'], results['metadatas'])
@@ -4735,7 +4939,7 @@ def save_annotation():
     session_id = data.get('session_id')
     chunk_id = data.get('chunk_id')
     annotation = data.get('annotation')
-    processor = TranscriptProcessor()
+    processor = get_transcript_processor()
     # Update the metadata for the chunk
     results = processor.collection.get(where={"session_id": session_id, "chunk_id": chunk_id})
     if not results['ids']:
@@ -4749,11 +4953,9 @@ def save_annotation():
 def export_session_csv(session_id):
     fields = request.args.get('fields', '')
     fields = [f.strip() for f in fields.split(',')] if fields else []
-    session_path = os.path.join('data/interviews/sessions', f'{session_id}.json')
-    if not os.path.exists(session_path):
+    session_data = discussion_service.get_session(session_id)
+    if not session_data:
         return jsonify({"error": "Session not found"}), 404
-    with open(session_path, 'r') as f:
-        session_data = json.load(f)
     # Flatten and filter for CSV
     rows = []
     for field in fields or session_data.keys():
@@ -4778,11 +4980,9 @@ def export_sessions_csv():
     fields = data.get('fields', [])
     rows = []
     for session_id in session_ids:
-        session_path = os.path.join('data/interviews/sessions', f'{session_id}.json')
-        if not os.path.exists(session_path):
+        session_data = discussion_service.get_session(session_id)
+        if not session_data:
             continue
-        with open(session_path, 'r') as f:
-            session_data = json.load(f)
         row = {field: session_data.get(field, '') for field in fields}
         row['session_id'] = session_id
         rows.append(row)
@@ -4815,6 +5015,16 @@ if __name__ == '__main__':
     print(f"Interview start endpoint: http://127.0.0.1:{port}/api/interview/start")
     print(f"Monitor interviews: http://127.0.0.1:{port}/monitor_interview")
     
+    # Resume ingestion jobs left unfinished by the previous run, and re-ingest
+    # chunks the ledger has but the vector store lost
+    get_ingest_queue()
+    try:
+        reconcile_vector_store()
+    except Exception as e:
+        logger.error(f"Error reconciling the vector store: {str(e)}")
+    # Build the corpus-wide cluster map off the request path
+    start_corpus_projection()
+    
     socketio.run(app, host='0.0.0.0', port=port, debug=debug_mode, allow_unsafe_werkzeug=True) 
 
 
@@ -4926,6 +5136,8 @@ def generate_greeting(character):
 from semantic_search.core.vector_store import InterviewVectorStore
 
 vector_store = InterviewVectorStore()
+# The store's model loads on first search unless DARIA_PREWARM_MODELS is set
+prewarm_from_env()
 
 
 
@@ -0,0 +1,38 @@
+#!/usr/bin/env python
+"""Move completed discussion sessions into the compressed session archive.
+
+Sessions marked completed and untouched for --days days are packed into
+content-addressed gzip objects under <data-dir>/.archive. They stay readable
+through DiscussionService and are restored when written again.
+
+Usage:
+    python scripts/archive_sessions.py [--data-dir data/interviews] [--days 30]
+"""
+import sys
+import os
+import argparse
+import logging
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from langchain_features.services.discussion_service import DiscussionService
+
+def main():
+    parser = argparse.ArgumentParser(description='Archive completed DARIA sessions')
+    parser.add_argument('--data-dir', default=os.path.join('data', 'interviews'),
+                        help='Directory holding the discussion guides and sessions')
+    parser.add_argument('--days', type=float, default=None,
+                        help='Minimum days since the last write (default: DARIA_SESSION_ARCHIVE_DAYS or 30)')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    service = DiscussionService(data_dir=args.data_dir)
+    archived = service.archive_completed_sessions(args.days)
+    print(f"Archived {len(archived)} sessions")
+
+    archive = getattr(service.store, 'archive', None)
+    if archive is not None:
+        stats = archive.stats()
+        print(f"Archive: {stats['documents']} sessions, {stats['size']} bytes stored as {stats['stored_size']} bytes")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+"""Benchmark: exact interview search, substring scan vs the full-text index.
+
+Writes synthetic raw interviews (default 1,000 with ~8,000-character
+transcripts over a Zipf-distributed vocabulary) and times the old approach
+(read and lowercase every file, substring match) against FullTextIndex.sync + search, the work done per
+/api/search/exact request (the directory rescan runs at most every 2 s).
+
+Target: under 10 ms per query at 1,000 interviews.
+
+Usage:
+    python scripts/benchmark_exact_search.py [--interviews 1000] [--queries 50]
+"""
+import sys
+import os
+import argparse
+import json
+import random
+import tempfile
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from full_text_index import FullTextIndex
+
+FIELDS = ('participant', 'project', 'themes', 'insights', 'transcript')
+SYLLABLES = "ba ce di fo gu ka le mi no pu ra se ti vo zu".split()
+
+
+def build_vocabulary(size, rng):
+    """Pseudo-words with Zipf-like weights, so a few words are common and most are rare."""
+    words = set()
+    while len(words) < size:
+        words.add(''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    words = sorted(words)
+    rng.shuffle(words)
+    return words, [1.0 / (rank + 1) for rank in range(size)]
+
+
+def write_interviews(raw_dir, count, transcript_chars, vocabulary, rng):
+    words_list, weights = vocabulary
+    for i in range(count):
+        words = []
+        while sum(len(word) + 1 for word in words) < transcript_chars:
+            words.extend(rng.choices(words_list, weights, k=50))
+        interview = {'transcript_name': f"Participant {i}", 'project_name': f"Project {i % 7}",
+                     'transcript': ' '.join(words)}
+        with open(os.path.join(raw_dir, f"interview-{i}.json"), 'w') as f:
+            json.dump(interview, f)
+
+
+def substring_search(raw_dir, query):
+    matches = []
+    for filename in os.listdir(raw_dir):
+        if not filename.endswith('.json'):
+            continue
+        with open(os.path.join(raw_dir, filename)) as f:
+            interview = json.load(f)
+        if query in interview.get('transcript', '').lower():
+            matches.append(filename)
+    return matches
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark exact interview search')
+    parser.add_argument('--interviews', type=int, default=1000, help='Number of raw interviews')
+    parser.add_argument('--transcript-chars', type=int, default=8000, help='Transcript length per interview')
+    parser.add_argument('--queries', type=int, default=50, help='Number of timed queries')
+    parser.add_argument('--vocabulary', type=int, default=5000, help='Distinct words in the corpus')
+    parser.add_argument('--limit', type=int, default=50, help='Results per query')
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        raw_dir = os.path.join(tmp_dir, 'raw')
+        os.makedirs(raw_dir)
+        vocabulary = build_vocabulary(args.vocabulary, rng)
+        write_interviews(raw_dir, args.interviews, args.transcript_chars, vocabulary, rng)
+
+        def load(interview_id):
+            with open(os.path.join(raw_dir, f"{interview_id}.json")) as f:
+                interview = json.load(f)
+            return ([{'participant': interview['transcript_name'], 'project': interview['project_name'],
+                      'transcript': interview['transcript']}], {'id': interview_id})
+
+        index = FullTextIndex(os.path.join(tmp_dir, 'text.db'), FIELDS)
+        start = time.perf_counter()
+        index.sync(raw_dir, load)
+        build_seconds = time.perf_counter() - start
+
+        # Single words and two-word phrases taken from the transcripts
+        queries = []
+        for i in range(args.queries):
+            with open(os.path.join(raw_dir, f"interview-{rng.randrange(args.interviews)}.json")) as f:
+                words = json.load(f)['transcript'].split()
+            start = rng.randrange(len(words) - 1)
+            queries.append(words[start] if i % 2 else f'"{words[start]} {words[start + 1]}"')
+        scan, indexed = [], []
+        for query in queries:
+            start = time.perf_counter()
+            substring_search(raw_dir, query.strip('"'))
+            scan.append((time.perf_counter() - start) * 1000)
+            start = time.perf_counter()
+            index.sync(raw_dir, load, max_age=2.0)
+            index.search(query, limit=args.limit)
+            indexed.append((time.perf_counter() - start) * 1000)
+
+    print(f"{args.interviews} interviews, {args.queries} word and phrase queries")
+    print(f"  {'index build':<24} {build_seconds:8.2f} s")
+    for label, timings in (("substring scan", scan), ("full-text index", indexed)):
+        timings.sort()
+        print(f"  {label + ' p50':<24} {timings[len(timings) // 2]:8.2f} ms")
+        print(f"  {label + ' p95':<24} {timings[int(len(timings) * 0.95) - 1]:8.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+"""Micro-benchmark: stdlib json (indent=2 + datetime loop) vs the serialization module.
+
+Builds a 500-message session document and times a save/load round trip the
+way the persistence paths did before and after switching to serialization.
+
+Usage:
+    python scripts/benchmark_serialization.py [--messages 500] [--repeat 200]
+"""
+import sys
+import os
+import argparse
+import datetime
+import json
+import tempfile
+import timeit
+import uuid
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import serialization
+
+
+def build_session(message_count):
+    now = datetime.datetime.now()
+    messages = []
+    for i in range(message_count):
+        messages.append({
+            "id": str(uuid.uuid4()),
+            "content": f"Message {i}: " + "Tell me more about how you use the checkout flow. " * 4,
+            "role": "assistant" if i % 2 == 0 else "user",
+            "timestamp": (now + datetime.timedelta(seconds=i)).isoformat()
+        })
+    return {
+        "id": str(uuid.uuid4()),
+        "guide_id": str(uuid.uuid4()),
+        "title": "Checkout study",
+        "status": "active",
+        "created_at": now,
+        "updated_at": now,
+        "messages": messages,
+        "transcript": "\n\n".join(m["content"] for m in messages)
+    }
+
+
+def legacy_save(path, data):
+    serializable_data = {}
+    for key, value in data.items():
+        if isinstance(value, datetime.datetime):
+            serializable_data[key] = value.isoformat()
+        else:
+            serializable_data[key] = value
+    with open(path, 'w') as f:
+        json.dump(serializable_data, f, indent=2)
+
+
+def legacy_load(path):
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark session JSON serialization')
+    parser.add_argument('--messages', type=int, default=500, help='Messages in the session')
+    parser.add_argument('--repeat', type=int, default=200, help='Iterations per measurement')
+    args = parser.parse_args()
+
+    session = build_session(args.messages)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        legacy_path = os.path.join(tmp_dir, 'legacy.json')
+        new_path = os.path.join(tmp_dir, 'new.json')
+
+        results = [
+            ("save (json, indent=2)", timeit.timeit(lambda: legacy_save(legacy_path, session), number=args.repeat)),
+            (f"save ({serialization.BACKEND}, compact)",
+             timeit.timeit(lambda: serialization.write_json(new_path, session), number=args.repeat)),
+            ("load (json)", timeit.timeit(lambda: legacy_load(legacy_path), number=args.repeat)),
+            (f"load ({serialization.BACKEND})",
+             timeit.timeit(lambda: serialization.read_json(new_path), number=args.repeat)),
+        ]
+        legacy_size = os.path.getsize(legacy_path)
+        new_size = os.path.getsize(new_path)
+
+    print(f"Session with {args.messages} messages, {args.repeat} iterations")
+    for label, seconds in results:
+        print(f"  {label:<28} {seconds / args.repeat * 1000:8.3f} ms/op")
+    print(f"  {'file size (json, indent=2)':<28} {legacy_size:8d} bytes")
+    print(f"  {'file size (compact)':<28} {new_size:8d} bytes")
+    print(f"Save speedup: {results[0][1] / results[1][1]:.1f}x, load speedup: {results[2][1] / results[3][1]:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,204 @@
+#!/usr/bin/env python
+"""Benchmark: vector index backends on synthetic interview corpora.
+
+Generates interview-like chunk embeddings (default 384-d, MiniLM-sized):
+sessions of ~50 chunks, each chunk drawn around one of a few hundred theme
+centroids, with session/speaker metadata. Every backend in vector_index is
+then measured at each corpus size:
+
+- ingest throughput (chunks/s, upserts of --batch-size)
+- p50/p99 latency of single-vector queries, unfiltered and filtered by session
+- recall@k against exact brute-force search
+- RSS growth while building the index, size of the vectors held in memory
+  (where the backend reports it), and size on disk after persist
+
+The numpy backend also runs at each of --precisions (see quantization.py),
+with --rescore adding int8/float16 runs that re-rank candidates by their
+exact float32 scores, to measure what reduced precision costs in recall.
+
+Each (backend, size) case runs in a fresh process, so memory figures and
+library caches don't leak between cases.
+
+Usage:
+    python scripts/benchmark_vector_index.py [--backends numpy faiss chroma qdrant]
+        [--sizes 1000 10000 100000] [--dimension 384] [--queries 200]
+        [--precisions float32 float16 int8] [--rescore] [--json results.json]
+"""
+import sys
+import os
+import argparse
+import json
+import multiprocessing
+import tempfile
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+
+from quantization import PRECISIONS
+from vector_index import BACKENDS, create_vector_index
+
+CHUNKS_PER_SESSION = 50
+CHUNKS_PER_THEME = 250
+SPEAKERS = ('participant', 'interviewer')
+
+
+def rss_bytes():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def build_corpus(size, dimension, queries, seed):
+    """Chunk vectors with metadata, and query vectors near the same themes."""
+    rng = np.random.default_rng(seed)
+    themes = rng.normal(size=(max(1, size // CHUNKS_PER_THEME), dimension)).astype('float32')
+    theme_of = rng.integers(len(themes), size=size)
+    vectors = themes[theme_of] + 0.6 * rng.normal(size=(size, dimension)).astype('float32')
+    ids = [f"session-{i // CHUNKS_PER_SESSION}:{i % CHUNKS_PER_SESSION}" for i in range(size)]
+    metadatas = [{'session_id': f"session-{i // CHUNKS_PER_SESSION}", 'speaker': SPEAKERS[i % 2]}
+                 for i in range(size)]
+    query_themes = rng.integers(len(themes), size=queries)
+    query_vectors = themes[query_themes] + 0.6 * rng.normal(size=(queries, dimension)).astype('float32')
+    query_sessions = [f"session-{s}" for s in rng.integers(max(1, size // CHUNKS_PER_SESSION), size=queries)]
+    return ids, vectors, metadatas, query_vectors, query_sessions
+
+
+def exact_neighbors(vectors, queries, k):
+    """Ground-truth top-k row numbers by cosine similarity."""
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    scores = (queries / np.linalg.norm(queries, axis=1, keepdims=True)) @ normalized.T
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    return [set(row) for row in top]
+
+
+def percentile(timings, fraction):
+    timings = sorted(timings)
+    return timings[min(len(timings) - 1, int(len(timings) * fraction))]
+
+
+def case_label(backend, options):
+    if 'precision' not in options:
+        return backend
+    return f"{backend}/{options['precision']}" + ('+rescore' if options.get('rescore') else '')
+
+
+def cases(args):
+    """(backend, index options) pairs to run at each size."""
+    for backend in args.backends:
+        if backend != 'numpy':
+            yield backend, {}
+            continue
+        for precision in args.precisions:
+            yield backend, {'precision': precision}
+            if args.rescore and precision != 'float32':
+                yield backend, {'precision': precision, 'rescore': True}
+
+
+def run_case(backend, options, size, args):
+    ids, vectors, metadatas, queries, query_sessions = build_corpus(size, args.dimension, args.queries, args.seed)
+    truth = exact_neighbors(vectors, queries, args.k)
+    row_of = {vector_id: row for row, vector_id in enumerate(ids)}
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        rss_before = rss_bytes()
+        index = create_vector_index(backend, args.dimension, path=os.path.join(tmp_dir, 'index'), **options)
+        start = time.perf_counter()
+        for begin in range(0, size, args.batch_size):
+            end = begin + args.batch_size
+            index.upsert(ids[begin:end], vectors[begin:end], metadatas[begin:end])
+        ingest_seconds = time.perf_counter() - start
+
+        # The first query may build an approximate index; don't count it as a query
+        index.query(queries[0], k=args.k)
+        latencies, recalls = [], []
+        for query, expected in zip(queries, truth):
+            start = time.perf_counter()
+            hits = index.query(query, k=args.k)[0]
+            latencies.append((time.perf_counter() - start) * 1000)
+            recalls.append(len({row_of[hit['id']] for hit in hits} & expected) / args.k)
+
+        filtered = []
+        for query, session_id in zip(queries, query_sessions):
+            start = time.perf_counter()
+            index.query(query, k=args.k, filters={'session_id': session_id})
+            filtered.append((time.perf_counter() - start) * 1000)
+        rss_after = rss_bytes()
+        memory_bytes = index.memory_bytes()
+
+        index.persist()
+        disk_bytes = index.disk_bytes()
+
+    return {
+        'backend': case_label(backend, options),
+        'chunks': size,
+        'ingest_chunks_per_second': size / ingest_seconds,
+        'query_p50_ms': percentile(latencies, 0.5),
+        'query_p99_ms': percentile(latencies, 0.99),
+        'filtered_p50_ms': percentile(filtered, 0.5),
+        f'recall_at_{args.k}': sum(recalls) / len(recalls),
+        'rss_mb': max(rss_after - rss_before, 0) / (1024 * 1024),
+        'vectors_mb': memory_bytes / (1024 * 1024) if memory_bytes is not None else None,
+        'disk_mb': disk_bytes / (1024 * 1024),
+    }
+
+
+def run_isolated(backend, options, size, args):
+    """Run one case in a fresh process; returns its result or an error entry."""
+    context = multiprocessing.get_context('spawn')
+    with context.Pool(1) as pool:
+        try:
+            return pool.apply(run_case, (backend, options, size, args))
+        except Exception as e:
+            return {'backend': case_label(backend, options), 'chunks': size,
+                    'error': f"{type(e).__name__}: {str(e)}"}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark vector index backends')
+    parser.add_argument('--backends', nargs='+', default=list(BACKENDS), choices=BACKENDS)
+    parser.add_argument('--sizes', nargs='+', type=int, default=[1000, 10000, 100000], help='Corpus sizes in chunks')
+    parser.add_argument('--dimension', type=int, default=384, help='Embedding dimension')
+    parser.add_argument('--queries', type=int, default=200, help='Number of timed queries')
+    parser.add_argument('--k', type=int, default=10, help='Results per query (recall@k)')
+    parser.add_argument('--batch-size', type=int, default=1000, help='Chunks per upsert')
+    parser.add_argument('--precisions', nargs='+', default=['float32'], choices=PRECISIONS,
+                        help='Vector precisions for the numpy backend')
+    parser.add_argument('--rescore', action='store_true', help='Also run reduced precisions with float32 rescoring')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--in-process', action='store_true', help="Don't isolate cases in subprocesses")
+    parser.add_argument('--json', help='Also write the results to this file')
+    args = parser.parse_args()
+
+    results = []
+    header = (f"{'backend':<22} {'chunks':>7} {'ingest/s':>10} {'p50 ms':>8} {'p99 ms':>8} "
+              f"{'filt p50':>8} {'recall':>7} {'RSS MB':>8} {'vec MB':>8} {'disk MB':>8}")
+    print(f"{args.dimension}-d vectors, {args.queries} queries, k={args.k}")
+    print(header)
+    for size in args.sizes:
+        for backend, options in cases(args):
+            if args.in_process:
+                result = run_case(backend, options, size, args)
+            else:
+                result = run_isolated(backend, options, size, args)
+            results.append(result)
+            if 'error' in result:
+                print(f"{result['backend']:<22} {size:>7} failed: {result['error']}")
+                continue
+            vectors_mb = f"{result['vectors_mb']:.1f}" if result['vectors_mb'] is not None else '-'
+            print(f"{result['backend']:<22} {size:>7} {result['ingest_chunks_per_second']:>10.0f} "
+                  f"{result['query_p50_ms']:>8.2f} {result['query_p99_ms']:>8.2f} {result['filtered_p50_ms']:>8.2f} "
+                  f"{result[f'recall_at_{args.k}']:>7.3f} {result['rss_mb']:>8.1f} {vectors_mb:>8} "
+                  f"{result['disk_mb']:>8.1f}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'dimension': args.dimension, 'queries': args.queries, 'k': args.k, 'results': results},
+                      f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
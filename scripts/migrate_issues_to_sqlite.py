@@ -0,0 +1,46 @@
+#!/usr/bin/env python
+"""Move issues between per-issue JSON files and the SQLite issue database.
+
+IssueManager imports the JSON files automatically the first time it creates
+its database; use this script to re-run the import or to export a JSON copy.
+
+Usage:
+    python scripts/migrate_issues_to_sqlite.py migrate [--data-dir data/issues]
+    python scripts/migrate_issues_to_sqlite.py export --output-dir exports/issues
+"""
+import sys
+import os
+import argparse
+import logging
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models.issue_tracker import IssueManager, ISSUE_DB_NAME
+
+def main():
+    parser = argparse.ArgumentParser(description='Migrate DARIA issues between JSON files and SQLite')
+    parser.add_argument('command', choices=['migrate', 'export'],
+                        help='migrate: JSON files -> SQLite, export: SQLite -> JSON files')
+    parser.add_argument('--data-dir', default=os.path.join('data', 'issues'),
+                        help='Directory holding the issue JSON files')
+    parser.add_argument('--db', default=None,
+                        help=f'SQLite database path (default: <data-dir>/{ISSUE_DB_NAME})')
+    parser.add_argument('--output-dir', default=None,
+                        help='Target directory for export')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    manager = IssueManager(data_dir=args.data_dir, db_path=args.db)
+    try:
+        if args.command == 'migrate':
+            count = manager.import_json_issues()
+            print(f"Imported {count} issues into {manager.db_path}")
+        else:
+            if not args.output_dir:
+                parser.error('--output-dir is required for export')
+            count = manager.export_json_issues(args.output_dir)
+            print(f"Exported {count} issues to {args.output_dir}")
+    finally:
+        manager.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+#!/usr/bin/env python
+"""Migrate discussion guides and sessions between the JSON tree and SQLite.
+
+Usage:
+    python scripts/migrate_sessions_to_sqlite.py migrate [--data-dir data/interviews]
+    python scripts/migrate_sessions_to_sqlite.py export --output-dir exports/interviews
+"""
+import sys
+import os
+import argparse
+import logging
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from langchain_features.services.session_store import (
+    SQLITE_DB_NAME, migrate_json_to_sqlite, export_sqlite_to_json
+)
+
+def main():
+    parser = argparse.ArgumentParser(description='Migrate DARIA sessions between JSON files and SQLite')
+    parser.add_argument('command', choices=['migrate', 'export'],
+                        help='migrate: JSON tree -> SQLite, export: SQLite -> JSON tree')
+    parser.add_argument('--data-dir', default=os.path.join('data', 'interviews'),
+                        help='Directory holding the JSON guide/session tree')
+    parser.add_argument('--db', default=None,
+                        help=f'SQLite database path (default: <data-dir>/{SQLITE_DB_NAME})')
+    parser.add_argument('--output-dir', default=None,
+                        help='Target directory for export')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    db_path = args.db or os.path.join(args.data_dir, SQLITE_DB_NAME)
+
+    if args.command == 'migrate':
+        counts = migrate_json_to_sqlite(args.data_dir, db_path)
+        print(f"Migrated {counts['guides']} guides, {counts['sessions']} sessions, "
+              f"{counts['messages']} messages into {db_path}")
+        print("Set DARIA_SESSION_BACKEND=sqlite to serve sessions from the database.")
+    else:
+        if not args.output_dir:
+            parser.error('--output-dir is required for export')
+        counts = export_sqlite_to_json(db_path, args.output_dir)
+        print(f"Exported {counts['guides']} guides, {counts['sessions']} sessions to {args.output_dir}")
+
+if __name__ == '__main__':
+    main()
@@ -5,6 +5,7 @@ from typing import Dict, List, Any
 import sys
 from pathlib import Path
 import re
+import time
 import uuid
 
 # Add parent directory to path so we can import semantic_analysis
@@ -135,10 +136,9 @@ class TranscriptProcessor:
             logger.info(f"Processing transcript from {file_path}...")
             chunks = self.chunk_transcript(transcript)
             
-            # Analyze each chunk
-            analyzed_chunks = []
+            # Collect chunk texts, splitting chunks that are still too long
+            pending = []
             for i, chunk in enumerate(chunks):
-                logger.info(f"Analyzing chunk {i+1} of {len(chunks)}...")
                 combined_text = chunk['combined_text']
                 
                 # Skip empty chunks
@@ -150,36 +150,31 @@ class TranscriptProcessor:
                 token_count = len(combined_text.split())
                 if token_count > 500:
                     logger.warning(f"Chunk {i+1} still has {token_count} tokens, which might be too long. Splitting further.")
-                    # Split further if needed
-                    sub_chunks = split_transcript_safe(combined_text, max_length=250)
-                    for j, sub_text in enumerate(sub_chunks):
-                        try:
-                            logger.info(f"Analyzing sub-chunk {j+1} of {len(sub_chunks)} from chunk {i+1}...")
-                            sub_analysis = self.semantic_analyzer.analyze_chunk(sub_text)
-                            analyzed_chunks.append({
-                                'entries': chunk['entries'],  # Use same entries for all sub-chunks
-                                'combined_text': sub_text,
-                                'analysis': sub_analysis,
-                                'id': str(uuid.uuid4()),  # Generate unique ID
-                                'timestamp': chunk['entries'][0]['timestamp'] if chunk['entries'] else "00:00:00"
-                            })
-                        except Exception as e:
-                            logger.error(f"Error analyzing sub-chunk {j+1} of chunk {i+1}: {str(e)}")
-                            # Continue with next sub-chunk
+                    # Split further if needed; sub-chunks share the chunk's entries
+                    for sub_text in split_transcript_safe(combined_text, max_length=250):
+                        pending.append((chunk, sub_text))
                 else:
-                    # Normal analysis for appropriately sized chunks
-                    try:
-                        analysis = self.semantic_analyzer.analyze_chunk(combined_text)
-                        analyzed_chunks.append({
-                            'entries': chunk['entries'],
-                            'combined_text': combined_text,
-                            'analysis': analysis,
-                            'id': str(uuid.uuid4()),  # Generate unique ID
-                            'timestamp': chunk['entries'][0]['timestamp'] if chunk['entries'] else "00:00:00"
-                        })
-                    except Exception as e:
-                        logger.error(f"Error analyzing chunk {i+1}: {str(e)}")
-                        # Continue with next chunk
+                    pending.append((chunk, combined_text))
+            
+            # Analyze all chunks in one batch (batched emotion model, concurrent theme extraction)
+            logger.info(f"Analyzing {len(pending)} chunks...")
+            start = time.perf_counter()
+            timings = {}
+            analyses = self.semantic_analyzer.analyze_chunks([text for _, text in pending], timings=timings)
+            elapsed = time.perf_counter() - start
+            if pending:
+                logger.info(f"Analyzed {len(pending)} chunks in {elapsed:.2f}s "
+                            f"({len(pending) / elapsed:.1f} chunks/s, {timings.get('theme_seconds', 0.0):.2f}s in theme extraction)")
+            
+            analyzed_chunks = []
+            for (chunk, text), analysis in zip(pending, analyses):
+                analyzed_chunks.append({
+                    'entries': chunk['entries'],
+                    'combined_text': text,
+                    'analysis': analysis,
+                    'id': str(uuid.uuid4()),  # Generate unique ID
+                    'timestamp': chunk['entries'][0]['timestamp'] if chunk['entries'] else "00:00:00"
+                })
             
             # Create processed version
             processed_interview = {
@@ -1,6 +1,3 @@
-from sentence_transformers import SentenceTransformer, util
-from transformers import pipeline
-import torch
 from typing import List, Dict, Any, Optional
 import logging
 from pathlib import Path
@@ -12,6 +9,11 @@ from openai import OpenAI
 import os
 from dotenv import load_dotenv
 import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from embedding_service import get_embedding_service
+from model_registry import cross_encoder, sentence_transformer, text_classifier
 
 # Load environment variables
 load_dotenv()
@@ -20,6 +22,15 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+SENTENCE_MODEL_NAME = 'sentence-transformers/all-MiniLM-L6-v2'
+# Batch sizes for ingestion: texts per encode / emotion call, points per Qdrant upsert
+EMBEDDING_BATCH_SIZE = 64
+EMOTION_BATCH_SIZE = 32
+UPSERT_BATCH_SIZE = 256
+# Concurrent OpenAI theme extraction requests per add_chunks/analyze_chunks call
+THEME_EXTRACTION_WORKERS = 4
+NEUTRAL_EMOTION = {'label': 'neutral', 'score': 0.0}
+
 def split_transcript_safe(transcript, max_length=400):
     """
     Split a transcript into safe-sized chunks that won't exceed model token limits.
@@ -167,27 +178,10 @@ class SemanticAnalyzer:
         """Initialize the semantic analyzer with models."""
         logging.info("Initializing SemanticAnalyzer...")
         
-        # Force CPU usage
-        if torch.cuda.is_available():
-            torch.cuda.empty_cache()
-        device = torch.device('cpu')
-        
         try:
-            # Initialize sentence transformer for embeddings
-            self.sentence_model = SentenceTransformer('sentence-transformers/all-MiniLM-L6-v2', device=device)
-            logging.info("Loaded sentence transformer model")
-            
-            # Initialize emotion classification model
-            try:
-                self.emotion_model = pipeline(
-                    "text-classification",
-                    model="j-hartmann/emotion-english-distilroberta-base",
-                    device=device
-                )
-                logging.info("Loaded emotion classification model")
-            except Exception as e:
-                logging.error(f"Failed to load emotion model: {str(e)}")
-                self.emotion_model = None
+            # Shared CPU models from the registry, loaded on first use
+            self.sentence_model = sentence_transformer(SENTENCE_MODEL_NAME)
+            self.emotion_model = text_classifier()
             
             # Initialize OpenAI client for theme extraction
             self.openai_client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
@@ -212,63 +206,103 @@ class SemanticAnalyzer:
             raise
 
     def get_embeddings(self, text):
-        """Get embeddings for a piece of text."""
+        """Get embeddings for a piece of text (cached by content hash)."""
         try:
-            return self.sentence_model.encode(text)
+            return get_embedding_service().embed_one(text, SENTENCE_MODEL_NAME, self.sentence_model.encode)
         except Exception as e:
             logger.error(f"Error getting embeddings: {str(e)}")
             return None
 
     def analyze_emotions(self, text):
         """Analyze emotions in text."""
-        if not self.emotion_model:
-            logger.warning("Emotion model not available")
-            return {'label': 'neutral', 'score': 0.0}
+        return self.analyze_emotions_batch([text])[0]
+
+    def analyze_emotions_batch(self, texts: List[str], batch_size: int = EMOTION_BATCH_SIZE) -> List[Dict[str, Any]]:
+        """Classify the emotion of many texts with batched model calls.
+        
+        Args:
+            texts (List[str]): Texts to classify
+            batch_size (int): Texts per forward pass
             
+        Returns:
+            List[Dict]: One {'label', 'score'} per text; empty texts and
+                failures are neutral
+        """
+        results = [dict(NEUTRAL_EMOTION) for _ in texts]
         # Handle empty or whitespace-only text
-        if not text or not text.strip():
-            return {'label': 'neutral', 'score': 0.0}
+        positions = [i for i, text in enumerate(texts) if text and text.strip()]
+        if not positions:
+            return results
             
         try:
-            result = self.emotion_model(text)
-            if result and len(result) > 0:
-                # The model returns a list with a single dict containing label and score
-                return result[0]  # Returns {'label': 'emotion', 'score': 0.123}
-            return {'label': 'neutral', 'score': 0.0}
+            predictions = self.emotion_model([texts[i] for i in positions], batch_size=batch_size, truncation=True)
+            for i, prediction in zip(positions, predictions):
+                # The model returns one {'label': 'emotion', 'score': 0.123} per text
+                if prediction:
+                    results[i] = prediction
         except Exception as e:
             logger.error(f"Error analyzing emotions: {str(e)}")
-            return {'label': 'neutral', 'score': 0.0}
+        return results
 
     def analyze_chunk(self, text: str) -> Dict[str, Any]:
         """Analyze a chunk of text for emotions and semantic meaning."""
-        # Initialize default values
-        emotion_result = {'label': 'neutral', 'score': 0.0}
+        return self.analyze_chunks([text], max_workers=1)[0]
+
+    def analyze_chunks(self, texts: List[str], max_workers: int = THEME_EXTRACTION_WORKERS,
+                       timings: Optional[Dict[str, float]] = None) -> List[Dict[str, Any]]:
+        """Analyze many chunks: batched emotion classification, concurrent theme extraction.
+        
+        Args:
+            texts (List[str]): Chunk texts
+            max_workers (int): Maximum concurrent OpenAI theme requests
+            timings (Dict, optional): Filled with 'emotion_seconds' and
+                'theme_seconds'
+            
+        Returns:
+            List[Dict]: One analysis per text, in order
+        """
+        start = time.perf_counter()
+        emotions = self.analyze_emotions_batch([self._emotion_text(text) for text in texts])
+        emotion_seconds = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        if max_workers > 1 and len(texts) > 1:
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(texts))) as executor:
+                themes = list(executor.map(self._extract_themes, texts))
+        else:
+            themes = [self._extract_themes(text) for text in texts]
+        if timings is not None:
+            timings['emotion_seconds'] = emotion_seconds
+            timings['theme_seconds'] = time.perf_counter() - start
+            
+        return [
+            {
+                'text': text,
+                'emotion': emotion_result['label'],
+                'emotion_intensity': analysis.get('emotion_intensity', 3),
+                'themes': analysis.get('themes', []),
+                'insight_tags': analysis.get('insight_tags', []),
+                'sentiment_score': emotion_result['score']
+            }
+            for text, emotion_result, analysis in zip(texts, emotions, themes)
+        ]
+
+    def _emotion_text(self, text: str) -> str:
+        """The part of a chunk to classify: the participant's response if present."""
+        if '[Participant]' in text:
+            parts = text.split('[Participant]')
+            if len(parts) > 1:
+                # Remove any remaining speaker markers
+                return re.sub(r'\[[^\]]+\]', '', parts[1]).strip()
+        return text
+
+    def _extract_themes(self, text: str) -> Dict[str, Any]:
+        """Extract themes and insights using OpenAI (use full text including context)."""
         analysis = {
             "themes": [],
             "insight_tags": [],
             "emotion_intensity": 3
         }
-        
-        try:
-            # Extract participant's response if present
-            if '[Participant]' in text:
-                parts = text.split('[Participant]')
-                if len(parts) > 1:
-                    # Use the participant's response for emotion analysis
-                    participant_text = parts[1]
-                    # Remove any remaining speaker markers
-                    participant_text = re.sub(r'\[[^\]]+\]', '', participant_text).strip()
-                    emotion_result = self.analyze_emotions(participant_text)
-                else:
-                    emotion_result = self.analyze_emotions(text)
-            else:
-                emotion_result = self.analyze_emotions(text)
-                
-        except Exception as e:
-            logger.error(f"Error in emotion analysis: {str(e)}")
-            # Continue with theme analysis even if emotion fails
-            
-        # Extract themes and insights using OpenAI (use full text including context)
         try:
             themes_response = self.openai_client.chat.completions.create(
                 model="gpt-3.5-turbo",
@@ -319,45 +353,77 @@ Respond with ONLY this exact JSON structure, no other text:
         except Exception as e:
             logger.error(f"Error in theme analysis: {str(e)}")
             # Keep default analysis values
-            
-        return {
-            'text': text,
-            'emotion': emotion_result['label'],
-            'emotion_intensity': analysis.get('emotion_intensity', 3),
-            'themes': analysis.get('themes', []),
-            'insight_tags': analysis.get('insight_tags', []),
-            'sentiment_score': emotion_result['score']
-        }
+        return analysis
 
     def add_chunk(self, chunk_id: str, text: str, metadata: Optional[Dict] = None) -> bool:
         """Add a chunk to the vector store."""
-        try:
-            # Analyze chunk
-            analysis = self.analyze_chunk(text)
+        return self.add_chunks([{'id': chunk_id, 'text': text, 'metadata': metadata}])['added'] == 1
+
+    def add_chunks(self, batch: List[Dict[str, Any]], max_workers: int = THEME_EXTRACTION_WORKERS) -> Dict[str, Any]:
+        """Analyze, embed and store many chunks at once.
+        
+        Texts are embedded in batched encode calls (through the embedding
+        cache), emotions are classified in batches, OpenAI theme extraction
+        runs with bounded concurrency and points are upserted to Qdrant in
+        bulk.
+        
+        Args:
+            batch (List[Dict]): Chunks as {'id', 'text', 'metadata'} dicts
+            max_workers (int): Maximum concurrent OpenAI theme requests
             
-            # Combine with additional metadata
-            if metadata:
-                analysis['metadata'] = metadata
+        Returns:
+            Dict: 'added' and 'failed' counts, total 'seconds',
+                'chunks_per_second', and per-stage timings
+        """
+        start = time.perf_counter()
+        stats = {'added': 0, 'failed': 0}
+        if not batch:
+            return dict(stats, seconds=0.0, chunks_per_second=0.0)
+        texts = [chunk['text'] for chunk in batch]
+        try:
+            analyses = self.analyze_chunks(texts, max_workers=max_workers, timings=stats)
             
-            # Add to vector store
-            self.qdrant.upsert(
-                collection_name=self.collection_name,
-                points=[
-                    models.PointStruct(
-                        id=chunk_id,
-                        vector=self.get_embeddings(text),
-                        payload={
-                            "text": text,
-                            "metadata": analysis
-                        }
-                    )
-                ]
+            stage = time.perf_counter()
+            vectors = get_embedding_service().embed(
+                texts, SENTENCE_MODEL_NAME, self.sentence_model.encode, batch_size=EMBEDDING_BATCH_SIZE
             )
-            return True
+            stats['embedding_seconds'] = time.perf_counter() - stage
+            
+            points = []
+            for chunk, vector, analysis in zip(batch, vectors, analyses):
+                # Combine with additional metadata
+                if chunk.get('metadata'):
+                    analysis['metadata'] = chunk['metadata']
+                points.append(models.PointStruct(
+                    id=chunk['id'],
+                    vector=vector,
+                    payload={
+                        "text": chunk['text'],
+                        "metadata": analysis
+                    }
+                ))
+            
+            stage = time.perf_counter()
+            for i in range(0, len(points), UPSERT_BATCH_SIZE):
+                points_batch = points[i:i + UPSERT_BATCH_SIZE]
+                try:
+                    self.qdrant.upsert(collection_name=self.collection_name, points=points_batch)
+                    stats['added'] += len(points_batch)
+                except Exception as e:
+                    logger.error(f"Error upserting {len(points_batch)} chunks: {str(e)}")
+                    stats['failed'] += len(points_batch)
+            stats['upsert_seconds'] = time.perf_counter() - stage
             
         except Exception as e:
-            logger.error(f"Error adding chunk: {str(e)}")
-            return False
+            logger.error(f"Error adding chunks: {str(e)}")
+            stats['failed'] = len(batch) - stats['added']
+            
+        stats['seconds'] = time.perf_counter() - start
+        stats['chunks_per_second'] = len(batch) / stats['seconds'] if stats['seconds'] > 0 else 0.0
+        logger.info(f"Added {stats['added']} of {len(batch)} chunks in {stats['seconds']:.2f}s "
+                    f"({stats['chunks_per_second']:.1f} chunks/s, "
+                    f"{stats.get('theme_seconds', 0.0):.2f}s in theme extraction)")
+        return stats
 
     def search(self, query: str, k: int = 5, emotion_filter: Optional[str] = None) -> List[Dict[str, Any]]:
         """Search for similar chunks with optional emotion filtering."""
@@ -406,16 +472,11 @@ Respond with ONLY this exact JSON structure, no other text:
     def rerank_results(self, query: str, results: List[Dict[str, Any]], k: int = 5) -> List[Dict[str, Any]]:
         """Rerank search results using cross-encoder."""
         try:
-            from sentence_transformers import CrossEncoder
-            
-            # Initialize cross-encoder
-            cross_encoder = CrossEncoder('cross-encoder/ms-marco-MiniLM-L-6-v2')
-            
             # Prepare pairs for reranking
             pairs = [(query, result["text"]) for result in results]
             
-            # Get cross-encoder scores
-            cross_scores = cross_encoder.predict(pairs)
+            # Get cross-encoder scores from the shared model
+            cross_scores = cross_encoder().predict(pairs)
             
             # Combine results with new scores
             for result, cross_score in zip(results, cross_scores):
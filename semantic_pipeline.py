@@ -5,6 +5,10 @@ import chromadb
 import json
 import os
 
+from embedding_service import get_embedding_service
+
+OPENAI_EMBEDDING_MODEL = "text-embedding-3-large"
+
 # Tagging schema for LLM and frontend reference
 TAGGING_SCHEMA = {
     "themes": ["navigation", "workflow", "terminology", "system status", "error handling"],
@@ -45,9 +49,12 @@ def chunk_transcript(transcript, max_tokens=256):
     return chunks
 
 def embed_chunks(chunks):
-    client = openai.OpenAI()  # This uses the OPENAI_API_KEY from your environment
-    response = client.embeddings.create(input=chunks, model="text-embedding-3-large")
-    return [item.embedding for item in response.data]
+    # Previously embedded chunks are served from the shared embedding cache
+    def embed(texts):
+        client = openai.OpenAI()  # This uses the OPENAI_API_KEY from your environment
+        response = client.embeddings.create(input=texts, model=OPENAI_EMBEDDING_MODEL)
+        return [item.embedding for item in response.data]
+    return get_embedding_service().embed(chunks, OPENAI_EMBEDDING_MODEL, embed)
 
 def tag_chunk(chunk, metadata):
     prompt = f"""
@@ -1,5 +1,5 @@
 from typing import List, Dict, Any, Optional
-from transformers import pipeline
+from model_registry import text_classifier
 import json
 from dataclasses import dataclass
 from enum import Enum
@@ -41,10 +41,10 @@ class Insight:
 class UXAnalyzer:
     def __init__(self):
         """Initialize the UX analysis pipeline"""
-        # Load sentiment analysis pipeline
-        self.sentiment_analyzer = pipeline(
+        # Shared sentiment analysis pipeline, loaded on first use
+        self.sentiment_analyzer = text_classifier(
             "sentiment-analysis",
-            model="distilbert-base-uncased-finetuned-sst-2-english"
+            "distilbert-base-uncased-finetuned-sst-2-english"
         )
         
         # Define analysis prompts
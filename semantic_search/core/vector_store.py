@@ -2,10 +2,14 @@ from typing import List, Dict, Any, Optional
 import chromadb
 from chromadb.config import Settings
 import uuid
-from sentence_transformers import SentenceTransformer
 import json
 import os
 
+from embedding_service import get_embedding_service
+from model_registry import sentence_transformer
+
+SENTENCE_MODEL_NAME = 'all-MiniLM-L6-v2'
+
 class InterviewVectorStore:
     def __init__(self, persist_directory: str = "data/vector_store"):
         """Initialize the vector store with ChromaDB backend"""
@@ -24,8 +28,8 @@ class InterviewVectorStore:
             metadata={"hnsw:space": "cosine"}
         )
         
-        # Initialize sentence transformer model
-        self.model = SentenceTransformer('all-MiniLM-L6-v2')
+        # Shared sentence transformer, loaded on first use
+        self.model = sentence_transformer(SENTENCE_MODEL_NAME)
         
     def process_interview(self, interview_data: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Process interview data into chunks with metadata"""
@@ -74,21 +78,22 @@ class InterviewVectorStore:
     def add_interview(self, interview_data: Dict[str, Any]):
         """Add an interview to the vector store"""
         chunks = self.process_interview(interview_data)
+        if not chunks:
+            return
         
-        for chunk in chunks:
-            # Create combined text for embedding
-            combined_text = ' '.join(chunk['messages'])
-            
-            # Generate embedding
-            embedding = self.model.encode(combined_text)
-            
-            # Add to ChromaDB
-            self.interview_collection.add(
-                documents=[combined_text],
-                embeddings=[embedding.tolist()],
-                metadatas=[chunk['metadata']],
-                ids=[str(uuid.uuid4())]
-            )
+        # Create combined text for embedding
+        texts = [' '.join(chunk['messages']) for chunk in chunks]
+        
+        # Generate embeddings in one batch, skipping texts embedded before
+        embeddings = get_embedding_service().embed(texts, SENTENCE_MODEL_NAME, self.model.encode)
+        
+        # Add to ChromaDB
+        self.interview_collection.add(
+            documents=texts,
+            embeddings=embeddings,
+            metadatas=[chunk['metadata'] for chunk in chunks],
+            ids=[str(uuid.uuid4()) for _ in chunks]
+        )
     
     def semantic_search(self, 
                        query: str, 
@@ -106,7 +111,7 @@ class InterviewVectorStore:
             List of matching chunks with scores
         """
         # Generate query embedding
-        query_embedding = self.model.encode(query)
+        query_embedding = get_embedding_service().embed_one(query, SENTENCE_MODEL_NAME, self.model.encode)
         
         # Prepare filter conditions if any
         where = {}
@@ -118,7 +123,7 @@ class InterviewVectorStore:
         
         # Perform search
         results = self.interview_collection.query(
-            query_embeddings=[query_embedding.tolist()],
+            query_embeddings=[query_embedding],
             n_results=limit,
             where=where
         )
@@ -1,5 +1,7 @@
 import json
 import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from core.research_analyzer import ResearchAnalyzer
 
 def load_interview(file_path: str) -> dict:
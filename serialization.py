@@ -0,0 +1,141 @@
+"""
+JSON serialization shared by every persistence path.
+
+Uses orjson when it is installed and falls back to the standard library
+otherwise. Output is compact unless ``pretty=True`` is requested, and
+datetime/date/UUID/Enum values are serialized as strings at any depth, so
+callers no longer need to convert datetimes by hand before saving.
+"""
+
+import datetime
+import enum
+import json
+import os
+import uuid
+from pathlib import Path
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+# orjson.JSONDecodeError subclasses json.JSONDecodeError, so callers can keep
+# catching the stdlib exception regardless of the encoder in use
+JSONDecodeError = json.JSONDecodeError
+
+BACKEND = "orjson" if orjson is not None else "json"
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | getattr(orjson, "OPT_SERIALIZE_NUMPY", 0)
+
+
+def _default(value: Any) -> Any:
+    """Fallback conversion for types the encoder does not handle natively."""
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    if isinstance(value, Path):
+        return str(value)
+    if hasattr(value, "tolist"):
+        # numpy arrays and scalars
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def isoformat(value: Any) -> Any:
+    """Return ``value.isoformat()`` for dates and datetimes, else ``value`` unchanged."""
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    return value
+
+
+def dumpb(data: Any, pretty: bool = False) -> bytes:
+    """Serialize ``data`` to UTF-8 encoded JSON.
+
+    Args:
+        data (Any): The value to serialize
+        pretty (bool): Indent with two spaces instead of compact output
+
+    Returns:
+        bytes: The encoded document
+    """
+    if orjson is not None:
+        options = _ORJSON_OPTIONS | (orjson.OPT_INDENT_2 if pretty else 0)
+        return orjson.dumps(data, default=_default, option=options)
+    return dumps(data, pretty=pretty).encode("utf-8")
+
+
+def dumps(data: Any, pretty: bool = False) -> str:
+    """Serialize ``data`` to a JSON string.
+
+    Args:
+        data (Any): The value to serialize
+        pretty (bool): Indent with two spaces instead of compact output
+
+    Returns:
+        str: The encoded document
+    """
+    if orjson is not None:
+        return dumpb(data, pretty=pretty).decode("utf-8")
+    if pretty:
+        return json.dumps(data, default=_default, ensure_ascii=False, indent=2)
+    return json.dumps(data, default=_default, ensure_ascii=False, separators=(",", ":"))
+
+
+def loads(data: Union[str, bytes, bytearray]) -> Any:
+    """Parse a JSON document.
+
+    Raises:
+        JSONDecodeError: If the document is not valid JSON
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dump(data: Any, fp, pretty: bool = False) -> None:
+    """Write ``data`` to an open file, text or binary."""
+    if "b" in getattr(fp, "mode", ""):
+        fp.write(dumpb(data, pretty=pretty))
+    else:
+        fp.write(dumps(data, pretty=pretty))
+
+
+def load(fp) -> Any:
+    """Parse the JSON document in an open file, text or binary."""
+    return loads(fp.read())
+
+
+def write_json(file_path: Union[str, Path], data: Any, pretty: bool = False, atomic: bool = False) -> None:
+    """Write ``data`` to ``file_path`` as JSON.
+
+    Args:
+        file_path (str | Path): Destination file
+        data (Any): The value to serialize
+        pretty (bool): Indent the output
+        atomic (bool): Write to a temporary file next to the destination and
+            rename it into place, so readers never see a partial document
+    """
+    file_path = Path(file_path)
+    payload = dumpb(data, pretty=pretty)
+    if not atomic:
+        with open(file_path, "wb") as f:
+            f.write(payload)
+        return
+
+    tmp_path = file_path.with_name(f".{file_path.name}.tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(payload)
+    os.replace(tmp_path, file_path)
+
+
+def read_json(file_path: Union[str, Path]) -> Any:
+    """Read and parse the JSON document at ``file_path``."""
+    with open(file_path, "rb") as f:
+        return loads(f.read())
@@ -0,0 +1,108 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("faiss")
+
+from chunk_index import ChunkIndex, stable_id
+
+
+def random_vectors(count, dimension=16, seed=0):
+    return np.random.default_rng(seed).normal(size=(count, dimension)).astype("float32")
+
+
+def test_ids_are_stable_and_deletes_remove_the_right_vectors():
+    index = ChunkIndex(16, ann_type="flat")
+    vectors = random_vectors(4)
+    ids = [stable_id(f"interview-{i}:0") for i in range(4)]
+    assert ids[0] == stable_id("interview-0:0") and 0 <= ids[0] < 2 ** 63
+
+    index.upsert(ids, vectors, [{"interview_id": f"interview-{i}"} for i in range(4)])
+    assert index.remove([ids[1], stable_id("unknown")]) == 1
+
+    # The remaining vectors are still found under their own IDs
+    for i in (0, 2, 3):
+        (best_id, score), = index.search(vectors[i], 1)[0][:1]
+        assert best_id == ids[i] and score == pytest.approx(1.0, abs=1e-5)
+    assert len(index) == 3 and ids[1] not in index
+
+
+def test_upsert_replaces_vectors():
+    index = ChunkIndex(16, ann_type="flat")
+    old, new = random_vectors(2, seed=1)
+    index.upsert([7], [old], [{"version": 1}])
+    index.upsert([7], [new], [{"version": 2}])
+
+    assert len(index) == 1
+    assert index.metadata[7] == {"version": 2}
+    assert np.allclose(index.reconstruct(7), new / np.linalg.norm(new), atol=1e-6)
+    with pytest.raises(ValueError):
+        index.upsert([1, 1], random_vectors(2))
+
+
+@pytest.mark.parametrize("ann_type", ["hnsw", "ivf"])
+def test_ann_index_above_threshold(ann_type):
+    vectors = random_vectors(600, seed=2)
+    index = ChunkIndex(16, ann_type=ann_type, ann_threshold=500)
+    index.upsert(range(1000, 1600), vectors)
+    assert index.uses_ann
+
+    exact = ChunkIndex(16, ann_type="flat")
+    exact.upsert(range(1000, 1600), vectors)
+    queries = random_vectors(20, seed=3)
+    expected = [{vector_id for vector_id, _ in hits} for hits in exact.search(queries, 10)]
+    found = [{vector_id for vector_id, _ in hits} for hits in index.search(queries, 10)]
+    recall = sum(len(e & f) for e, f in zip(expected, found)) / (10 * len(queries))
+    assert recall >= 0.8
+
+    # Deleted vectors never come back from the approximate index
+    index.remove([1000 + i for i in range(0, 600, 2)])
+    assert not any(vector_id % 2 == 0 for hits in index.search(queries, 10) for vector_id, _ in hits)
+
+
+def test_ivf_deletes_apply_in_place():
+    vectors = random_vectors(600, seed=5)
+    index = ChunkIndex(16, ann_type="ivf", ann_threshold=500)
+    index.upsert(range(600), vectors)
+    index.search(vectors[:1], 1)
+
+    index.remove([0])
+    index.upsert([1], vectors[2:3])
+    assert not index.needs_ann_build
+    assert index.search(vectors[0], 1)[0][0][0] != 0
+    assert {vector_id for vector_id, _ in index.search(vectors[2], 2)[0]} == {1, 2}
+
+
+def test_deferred_ann_builds_skip_outdated_snapshots():
+    vectors = random_vectors(600, seed=6)
+    index = ChunkIndex(16, ann_type="hnsw", ann_threshold=500)
+    index.lazy_ann = False
+    index.upsert(range(600), vectors)
+
+    # Searches stay exact until a rebuilt index is installed
+    assert index.needs_ann_build
+    assert index.search(vectors[3], 1)[0][0][0] == 3 and index.needs_ann_build
+
+    snapshot = index.ann_snapshot()
+    ann = index.build_ann(*snapshot[:2])
+    index.remove([3])
+    assert not index.install_ann(ann, snapshot[2])
+
+    vectors_now, ids, version = index.ann_snapshot()
+    assert index.install_ann(index.build_ann(vectors_now, ids), version)
+    assert not index.needs_ann_build
+    assert index.search(vectors[3], 1)[0][0][0] != 3
+
+
+def test_save_and_load_round_trip(tmp_path):
+    path = str(tmp_path / "store" / "vector_store")
+    index = ChunkIndex(16, ann_type="hnsw", ann_threshold=10)
+    vectors = random_vectors(20, seed=4)
+    index.upsert(range(20), vectors, [{"interview_id": f"i{n % 5}", "chunk": n} for n in range(20)])
+    index.info = {"interview_metadata": {"i0": {"project_name": "Checkout"}}}
+    index.search(vectors[:1], 3)
+    index.save(path)
+
+    assert ChunkIndex.is_index_file(path)
+    loaded = ChunkIndex.load(path)
+    assert len(loaded) == 20 and loaded.metadata == index.metadata and loaded.info == index.info
+    assert loaded.search(vectors[5], 1)[0][0][0] == 5
@@ -0,0 +1,51 @@
+from embedding_service import EmbeddingService, text_key
+
+
+def fake_model(calls):
+    def embed(texts):
+        calls.append(list(texts))
+        return [[float(len(text)), 0.5, -1.0] for text in texts]
+    return embed
+
+
+def test_only_misses_reach_the_model(tmp_path):
+    calls = []
+    service = EmbeddingService(cache_dir=str(tmp_path))
+
+    first = service.embed(["alpha", "beta", "alpha"], "test-model", fake_model(calls))
+    second = service.embed(["beta", "  alpha ", "gamma"], "test-model", fake_model(calls))
+
+    assert calls == [["alpha", "beta"], ["gamma"]]
+    assert first == [[5.0, 0.5, -1.0], [4.0, 0.5, -1.0], [5.0, 0.5, -1.0]]
+    assert second[:2] == [first[1], first[0]]
+    stats = service.stats()["test-model"]
+    assert (stats["hits"], stats["misses"], stats["model_calls"], stats["entries"]) == (2, 4, 2, 3)
+
+
+def test_cache_persists_across_processes(tmp_path):
+    calls = []
+    EmbeddingService(cache_dir=str(tmp_path)).embed(["alpha", "beta"], "test-model", fake_model(calls))
+
+    reopened = EmbeddingService(cache_dir=str(tmp_path))
+    assert reopened.embed(["beta", "alpha"], "test-model", fake_model(calls)) == [[4.0, 0.5, -1.0], [5.0, 0.5, -1.0]]
+    assert len(calls) == 1
+
+    # Another model never shares entries
+    reopened.embed(["alpha"], "other-model", fake_model(calls))
+    assert len(calls) == 2
+
+
+def test_torn_record_is_dropped_before_appending(tmp_path):
+    calls = []
+    service = EmbeddingService(cache_dir=str(tmp_path))
+    service.embed(["alpha"], "test-model", fake_model(calls))
+    cache_file = service.cache_for("test-model").path
+    with open(cache_file, "ab") as f:
+        f.write(text_key("test-model", "beta")[:10])
+
+    reopened = EmbeddingService(cache_dir=str(tmp_path))
+    reopened.embed(["beta"], "test-model", fake_model(calls))
+
+    assert EmbeddingService(cache_dir=str(tmp_path)).embed(["alpha", "beta"], "test-model", fake_model(calls)) == \
+        [[5.0, 0.5, -1.0], [4.0, 0.5, -1.0]]
+    assert len(calls) == 2
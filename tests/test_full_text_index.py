@@ -0,0 +1,107 @@
+import json
+import os
+
+import pytest
+
+from full_text_index import FullTextIndex, build_match_query
+
+FIELDS = ("participant", "project", "themes", "transcript")
+
+
+def make_index(tmp_path):
+    index = FullTextIndex(str(tmp_path / "text.db"), FIELDS)
+    index.update("a", [{"participant": "Alice", "project": "Acme",
+                        "transcript": "The checkout flow breaks on mobile. Billing works."}],
+                 summary={"id": "a"})
+    index.update("b", [{"participant": "Bob", "project": "Globex", "themes": "checkout speed",
+                        "transcript": "Flow of checkout is fast"}],
+                 summary={"id": "b"})
+    return index
+
+
+def test_build_match_query():
+    assert build_match_query('  ', FIELDS) is None
+    assert build_match_query('check', FIELDS) == '"check"*'
+    assert build_match_query('"checkout flow" mob', FIELDS) == '"checkout flow" AND "mob"*'
+    assert build_match_query('project:acme at 10:30', FIELDS) == 'project : "acme" AND "at" AND "10 30"'
+    assert build_match_query('flow', FIELDS, restrict_to=["transcript", "bogus"], prefix_last=False) == \
+        '{transcript} : ("flow")'
+
+
+def test_prefix_phrase_and_field_queries(tmp_path):
+    index = make_index(tmp_path)
+
+    assert {hit["source_id"] for hit in index.search("chec")} == {"a", "b"}
+    assert [hit["source_id"] for hit in index.search('"checkout flow"')] == ["a"]
+    assert [hit["source_id"] for hit in index.search("themes:checkout")] == ["b"]
+    assert [hit["source_id"] for hit in index.search("glob", fields=["project"])] == ["b"]
+    assert index.search("glob", fields=["transcript"]) == []
+
+
+def test_snippets_highlight_matches_and_carry_summaries(tmp_path):
+    hit = make_index(tmp_path).search('"checkout flow"')[0]
+
+    assert hit["snippet"] == "The <mark>checkout flow</mark> breaks on mobile. Billing works."
+    assert hit["summary"] == {"id": "a"}
+    assert hit["position"] == 0
+
+
+def test_update_and_remove_replace_postings(tmp_path):
+    index = make_index(tmp_path)
+    index.update("a", [{"transcript": "onboarding"}, {"transcript": "billing again"}])
+    index.remove("b")
+
+    assert index.search("checkout") == []
+    assert [(hit["source_id"], hit["position"]) for hit in index.search("billing")] == [("a", 1)]
+    assert index.source_ids() == ["a"]
+
+
+def test_bulk_update_and_remove(tmp_path):
+    index = make_index(tmp_path)
+    index.update_many([
+        ("c", [{"transcript": "export is slow"}], {"id": "c"}),
+        ("a", [{"transcript": "export works"}], {"id": "a"}),
+    ])
+    assert sorted(hit["source_id"] for hit in index.search("export")) == ["a", "c"]
+    assert index.search("billing") == []
+
+    index.remove_many(["a", "b", "missing"])
+    assert index.source_ids() == ["c"]
+    assert index.search("export")[0]["summary"] == {"id": "c"}
+
+
+def test_sync_indexes_changed_files_only(tmp_path):
+    source_dir = tmp_path / "docs"
+    source_dir.mkdir()
+    for doc_id, text in (("a", "checkout"), ("b", "billing")):
+        with open(source_dir / f"{doc_id}.json", "w") as f:
+            json.dump({"text": text}, f)
+    loads = []
+
+    def load(doc_id):
+        loads.append(doc_id)
+        with open(source_dir / f"{doc_id}.json") as f:
+            return [{"transcript": json.load(f)["text"]}], {"id": doc_id}
+
+    index = FullTextIndex(str(tmp_path / "text.db"), FIELDS)
+    assert index.sync(str(source_dir), load) == {"indexed": 2, "removed": 0}
+    assert index.sync(str(source_dir), load) == {"indexed": 0, "removed": 0}
+
+    with open(source_dir / "a.json", "w") as f:
+        json.dump({"text": "onboarding flow"}, f)
+    os.remove(source_dir / "b.json")
+    assert index.sync(str(source_dir), load) == {"indexed": 1, "removed": 1}
+    assert sorted(loads) == ["a", "a", "b"]
+    assert [hit["summary"] for hit in index.search("onboarding")] == [{"id": "a"}]
+    assert index.search("billing") == []
+
+
+def test_attribute_filters(tmp_path):
+    index = FullTextIndex(str(tmp_path / "text.db"), ("content",), attributes=("session_id", "speaker"))
+    index.update("a", [{"content": "pricing is confusing", "session_id": "s1", "speaker": "Ana"}])
+    index.update("b", [{"content": "pricing is fine", "session_id": "s2", "speaker": "Ben"}])
+
+    assert [hit["source_id"] for hit in index.search("pricing", where={"session_id": "s2"})] == ["b"]
+    assert index.search("pricing", where={"session_id": "s1", "speaker": "Ben"}) == []
+    with pytest.raises(ValueError):
+        index.search("pricing", where={"emotion": "joy"})
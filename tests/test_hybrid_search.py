@@ -0,0 +1,73 @@
+import pytest
+
+from full_text_index import FullTextIndex
+from hybrid_search import HybridRetriever, chroma_where, filters_from_where, reciprocal_rank_fusion
+
+CHUNKS = {
+    "c1": ("We moved everything to Zorblax last spring", {"session_id": "s1", "speaker": "Ana", "emotion": "joy"}),
+    "c2": ("Our new tool made onboarding much easier", {"session_id": "s1", "speaker": "Ben", "emotion": "joy"}),
+    "c3": ("Switching software was painful for the team", {"session_id": "s2", "speaker": "Ana", "emotion": "anger"}),
+}
+
+
+def fake_vector_search(query, n, filters):
+    """Ranks by a fixed "semantic" order that never surfaces the rare name first."""
+    hits = []
+    for chunk_id in ("c2", "c3", "c1"):
+        content, metadata = CHUNKS[chunk_id]
+        if all(metadata.get(key) == value for key, value in (filters or {}).items()):
+            hits.append({"id": chunk_id, "content": content, "metadata": metadata, "score": 0.1 * len(hits)})
+    return hits[:n]
+
+
+@pytest.fixture
+def retriever(tmp_path):
+    index = FullTextIndex(str(tmp_path / "chunks.db"), ("content",), attributes=("session_id", "speaker", "emotion"))
+    for chunk_id, (content, metadata) in CHUNKS.items():
+        index.update(chunk_id, [dict(metadata, content=content)], summary={"content": content, "metadata": metadata})
+    return HybridRetriever(index, fake_vector_search)
+
+
+def test_reciprocal_rank_fusion():
+    fused = reciprocal_rank_fusion([["a", "b"], ["b", "c"]], k=60)
+
+    assert [doc_id for doc_id, _ in fused] == ["b", "a", "c"]
+    assert fused[0][1] == pytest.approx(1 / 62 + 1 / 61)
+
+
+def test_where_round_trip():
+    assert chroma_where({"session_id": "s1", "speaker": None}) == {"session_id": "s1"}
+    where = chroma_where({"session_id": "s1", "emotion": "joy"})
+    assert where == {"$and": [{"session_id": "s1"}, {"emotion": "joy"}]}
+    assert filters_from_where(where) == {"session_id": "s1", "emotion": "joy"}
+    assert filters_from_where({"speaker": {"$eq": "Ana"}}) == {"speaker": "Ana"}
+    with pytest.raises(ValueError):
+        filters_from_where({"$or": [{"speaker": "Ana"}]})
+
+
+def test_hybrid_surfaces_rare_proper_nouns(retriever):
+    results = retriever.search("zorblax", k=2)
+
+    assert results[0]["id"] == "c1"
+    assert results[0]["lexical_rank"] == 1
+    assert "<mark>Zorblax</mark>" in results[0]["snippet"]
+    assert [hit["id"] for hit in retriever.search("zorblax", k=2, mode="vector")] == ["c2", "c3"]
+
+
+def test_filters_apply_to_both_sides(retriever):
+    results = retriever.search("team", k=5, filters={"session_id": "s2"})
+    assert [hit["id"] for hit in results] == ["c3"]
+
+    assert [hit["id"] for hit in retriever.search("onboarding", mode="lexical", filters={"speaker": "Ben"})] == ["c2"]
+    with pytest.raises(ValueError):
+        retriever.search("team", filters={"project": "x"})
+    with pytest.raises(ValueError):
+        retriever.search("team", mode="keyword")
+
+
+def test_failing_vector_side_falls_back_to_lexical(retriever):
+    def broken(query, n, filters):
+        raise RuntimeError("vector store unavailable")
+
+    retriever.vector_search = broken
+    assert [hit["id"] for hit in retriever.search("zorblax")] == ["c1"]
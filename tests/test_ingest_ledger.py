@@ -0,0 +1,49 @@
+from ingest_ledger import IngestLedger, chunk_vector_id, content_hash
+
+
+def ingest(ledger, session_id, chunks):
+    """Apply a plan the way the ingest job does; returns (embedded, deleted)."""
+    plan = ledger.plan(session_id, chunks)
+    ledger.forget(session_id, plan["removed"])
+    ledger.record(session_id, plan["new"])
+    return plan["new"], plan["removed"]
+
+
+def test_rerunning_a_session_only_ingests_deltas(tmp_path):
+    ledger = IngestLedger(str(tmp_path / "ledger.db"))
+
+    assert ingest(ledger, "s1", ["Hello there.", "I like the dashboard.", "Hello there."]) == \
+        (["Hello there.", "I like the dashboard."], [])
+    assert ingest(ledger, "s1", ["Hello  there.", "I like the dashboard."]) == ([], [])
+
+    new, removed = ingest(ledger, "s1", ["Hello there.", "I love the dashboard.", "Export is slow."])
+    assert new == ["I love the dashboard.", "Export is slow."]
+    assert removed == [chunk_vector_id("s1", "I like the dashboard.")]
+
+    session = ledger.session("s1")
+    assert (session["chunk_count"], session["ingested_chunks"]) == (3, 3)
+    assert ledger.session("unknown") is None
+
+
+def test_sessions_are_independent_and_ids_are_stable(tmp_path):
+    ledger = IngestLedger(str(tmp_path / "ledger.db"))
+    ingest(ledger, "s1", ["Shared text."])
+
+    assert ingest(ledger, "s2", ["Shared text."]) == (["Shared text."], [])
+    assert chunk_vector_id("s1", "Shared text.") != chunk_vector_id("s2", "Shared text.")
+    assert chunk_vector_id("s1", "Shared text.") == f"s1:{content_hash('Shared  text. ')[:32]}"
+
+    # Unrecorded chunks (e.g. a failed batch) are planned again on the next run
+    ledger.plan("s1", ["Shared text.", "Pending."])
+    assert ledger.plan("s1", ["Shared text.", "Pending."])["new"] == ["Pending."]
+
+
+def test_vector_ids_per_session(tmp_path):
+    ledger = IngestLedger(str(tmp_path / "ledger.db"))
+    ingest(ledger, "s1", ["One.", "Two."])
+    ingest(ledger, "s2", ["Three."])
+
+    assert {session_id: sorted(ids) for session_id, ids in ledger.vector_ids().items()} == {
+        "s1": sorted([chunk_vector_id("s1", "One."), chunk_vector_id("s1", "Two.")]),
+        "s2": [chunk_vector_id("s2", "Three.")]
+    }
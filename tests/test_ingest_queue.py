@@ -0,0 +1,113 @@
+import sqlite3
+
+import pytest
+
+from ingest_queue import IngestJobQueue
+
+
+def split(transcript, metadata):
+    return transcript.split("|")
+
+
+class Processor:
+    def __init__(self, fail=()):
+        self.fail = set(fail)
+        self.seen = []
+
+    def __call__(self, chunks, metadata):
+        self.seen.extend(chunks)
+        return [ValueError(f"bad {chunk}") if chunk in self.fail else {"chunk": chunk.upper()} for chunk in chunks]
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "jobs.db")
+
+
+def test_jobs_run_in_the_background_and_report_progress(db_path):
+    events = []
+    queue = IngestJobQueue(db_path, split, Processor(), batch_size=2, on_progress=events.append)
+    queue.start()
+
+    job_id = queue.enqueue("a|b|c", {"session_id": "s1"})
+    job = queue.wait(job_id, timeout=5)
+    queue.close()
+
+    assert job["status"] == "completed"
+    assert (job["total_chunks"], job["done_chunks"], job["progress"]) == (3, 3, 1.0)
+    assert job["metadata"] == {"session_id": "s1"}
+    assert [event["status"] for event in events][0] == "queued"
+    assert [event["done_chunks"] for event in events if event["status"] == "running"][-2:] == [2, 3]
+
+
+def test_failed_chunks_are_retried_individually(db_path):
+    processor = Processor(fail={"b"})
+    queue = IngestJobQueue(db_path, split, processor)
+    queue.start()
+    job_id = queue.enqueue("a|b|c")
+
+    job = queue.wait(job_id, timeout=5)
+    assert (job["status"], job["failed_chunks"], job["error"]) == ("failed", 1, "1 chunks failed")
+
+    processor.fail.clear()
+    assert queue.retry(job_id)
+    job = queue.wait(job_id, timeout=5)
+    chunks = queue.get_job(job_id, include_chunks=True)["chunks"]
+    queue.close()
+
+    assert job["status"] == "completed"
+    assert processor.seen == ["a", "b", "c", "b"]
+    assert [chunk["attempts"] for chunk in chunks] == [1, 2, 1]
+
+
+def test_unfinished_jobs_resume_after_restart(db_path):
+    queue = IngestJobQueue(db_path, split, Processor(fail={"c"}))
+    queue.start()
+    job_id = queue.enqueue("a|b|c")
+    queue.wait(job_id, timeout=5)
+    queue.stop()
+    queued_id = queue.enqueue("d|e")
+    queue.close()
+
+    # Simulate a crash part way through the first job
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("UPDATE jobs SET status = 'running' WHERE job_id = ?", (job_id,))
+        conn.execute("UPDATE job_chunks SET status = 'pending' WHERE job_id = ? AND chunk_index = 2", (job_id,))
+
+    processor = Processor()
+    queue = IngestJobQueue(db_path, split, processor)
+    queue.start()
+    first = queue.wait(job_id, timeout=5)
+    second = queue.wait(queued_id, timeout=5)
+    chunks = queue.get_job(job_id, include_chunks=True)["chunks"]
+    queue.close()
+
+    assert (first["status"], second["status"]) == ("completed", "completed")
+    assert sorted(processor.seen) == ["c", "d", "e"]
+    assert [chunk["result"] for chunk in chunks] == [{"chunk": "A"}, {"chunk": "B"}, {"chunk": "C"}]
+    assert chunks[2]["attempts"] == 2
+
+
+def test_latest_input_per_session(db_path):
+    queue = IngestJobQueue(db_path, split, Processor())
+    queue.enqueue("a|b", {"session_id": "s1"})
+    queue.enqueue("c", {"session_id": "s2"})
+    queue.enqueue("a|b|d", {"session_id": "s1", "project": "alpha"})
+
+    assert queue.latest_input("s1") == ("a|b|d", {"session_id": "s1", "project": "alpha"})
+    assert queue.latest_input("s3") is None
+    queue.close()
+
+
+def test_chunking_errors_fail_the_job(db_path):
+    def broken(transcript, metadata):
+        raise RuntimeError("tokenizer missing")
+
+    queue = IngestJobQueue(db_path, broken, Processor())
+    queue.start()
+    job = queue.wait(queue.enqueue("a"), timeout=5)
+    queue.close()
+
+    assert job["status"] == "failed"
+    assert job["error"] == "Chunking failed: tokenizer missing"
+    assert job["total_chunks"] is None
@@ -0,0 +1,92 @@
+import json
+import os
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("sentence_transformers")
+
+import embedding_service
+from daria_interview_tool import interview_search_index
+from daria_interview_tool.interview_search_index import FuzzyInterviewIndex
+
+VOCABULARY = ["checkout", "billing", "onboarding", "alice", "acme", "trust"]
+
+
+def encode(texts):
+    return np.array([[float(word in text.lower()) for word in VOCABULARY] + [0.05] for text in texts])
+
+
+def write(raw_dir, interview_id, **interview):
+    with open(os.path.join(raw_dir, f"{interview_id}.json"), "w") as f:
+        json.dump(interview, f)
+
+
+@pytest.fixture
+def raw_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(embedding_service, "_service", embedding_service.EmbeddingService(str(tmp_path / "cache")))
+    path = tmp_path / "raw"
+    path.mkdir()
+    return str(path)
+
+
+def test_interviews_rank_by_best_unit(raw_dir, monkeypatch):
+    monkeypatch.setattr(interview_search_index, "TRANSCRIPT_SLICE_SIZE", 20)
+    write(raw_dir, "a", transcript_name="Alice", project_name="Acme", transcript="x" * 40 + " checkout billing")
+    write(raw_dir, "b", transcript_name="Bob", transcript="onboarding went fine",
+          chunks=[{"metadata": {"themes": ["Trust"], "insight_tags": ["billing"]}}])
+    index = FuzzyInterviewIndex(raw_dir, encode, "test-model")
+
+    assert sorted(index.pending()[0]) == ["a", "b"]
+    assert list(index.catch_up(batch_size=1)) == [1, 0]
+    assert index.pending() == ([], [])
+
+    hits = index.search(encode(["checkout billing"])[0])
+    assert [hit["id"] for hit in hits] == ["a", "b"]
+    # The transcript slice holding "checkout billing" is unit 2 + 40 // 20
+    assert hits[0]["unit"] == 4
+    assert index.search(encode(["alice acme"])[0])[0] == {"id": "a", "similarity_score": pytest.approx(1.0, abs=1e-3),
+                                                          "unit": 0}
+
+
+def test_refresh_tracks_saves_and_deletes(raw_dir):
+    write(raw_dir, "a", transcript="checkout")
+    index = FuzzyInterviewIndex(raw_dir, encode, "test-model")
+    index.refresh(["a"])
+
+    write(raw_dir, "a", transcript="onboarding")
+    write(raw_dir, "b", transcript="checkout")
+    index.refresh(["a", "b"])
+    assert [hit["id"] for hit in index.search(encode(["checkout"])[0])] == ["b"]
+
+    os.remove(os.path.join(raw_dir, "b.json"))
+    index.refresh(["b"])
+    assert index.search(encode(["checkout"])[0]) == []
+    assert index.pending() == ([], [])
+
+
+def test_quantized_index_rescores_to_float32_scores(raw_dir, monkeypatch):
+    indexes = {}
+    for precision in ("float32", "int8"):
+        directory = os.path.join(raw_dir, precision)
+        os.mkdir(directory)
+        for n, words in enumerate(["checkout billing", "billing trust", "onboarding", "checkout", "acme trust"]):
+            write(directory, f"i{n}", transcript_name=f"P{n}", transcript=words)
+        monkeypatch.setenv("DARIA_VECTOR_PRECISION", precision)
+        indexes[precision] = FuzzyInterviewIndex(directory, encode, "test-model")
+        list(indexes[precision].catch_up())
+    assert indexes["int8"].index.codes is not None
+
+    query = encode(["checkout billing trust"])[0]
+    exact, quantized = indexes["float32"].search(query, limit=3), indexes["int8"].search(query, limit=3)
+    assert [hit["id"] for hit in quantized] == [hit["id"] for hit in exact]
+    assert [hit["similarity_score"] for hit in quantized] == pytest.approx(
+        [hit["similarity_score"] for hit in exact], abs=1e-6)
+
+
+def test_unit_preview_windows_the_matching_slice():
+    transcript = "a" * 2500
+    assert FuzzyInterviewIndex.unit_preview(transcript, 0) is None
+    preview = FuzzyInterviewIndex.unit_preview(transcript, 3)
+    assert preview.startswith("...") and preview.endswith("...")
+    assert len(preview) == 1000 + 200 + 6
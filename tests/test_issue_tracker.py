@@ -0,0 +1,70 @@
+import pytest
+
+from models.issue_tracker import INDEXED_FIELDS, IssueManager, IssueStatus, IssueType
+import serialization
+
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = IssueManager(data_dir=str(tmp_path))
+    yield manager
+    manager.close()
+
+
+def test_filtered_queries_use_columns(manager):
+    bug = manager.create_issue("Crash", "App crashes", "alice")
+    feature = manager.create_issue("Export", "CSV export", "bob", issue_type=IssueType.FEATURE)
+    feature.move_to_backlog("bob")
+    feature.assign_to("alice", "bob")
+    manager.update_issue(feature)
+    story = manager.create_issue("Story", "As a user", "bob", issue_type=IssueType.USER_STORY, parent_id=feature.id)
+
+    assert [i.id for i in manager.get_open_issues()] == [story.id, bug.id]
+    assert [i.id for i in manager.get_backlog_issues()] == [feature.id]
+    assert sorted(i.id for i in manager.get_issues_by_creator("bob")) == sorted([feature.id, story.id])
+    assert [i.id for i in manager.get_issues_assigned_to("alice")] == [feature.id]
+    assert [i.id for i in manager.get_child_issues(feature.id)] == [story.id]
+    assert [i.id for i in manager.find_issues(status="open", issue_type="bug")] == [bug.id]
+
+
+def test_every_indexed_field_has_an_index(manager):
+    indexed = {row[2] for name, in manager._conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")
+               for row in manager._conn.execute(f"PRAGMA index_info({name})")}
+    assert indexed >= set(INDEXED_FIELDS)
+
+
+def test_update_moves_issue_between_filters(manager):
+    issue = manager.create_issue("Crash", "App crashes", "alice")
+    issue.update_status(IssueStatus.IN_PROGRESS, "alice")
+    manager.update_issue(issue)
+
+    assert manager.get_open_issues() == []
+    assert manager.get_issue(issue.id).status == IssueStatus.IN_PROGRESS
+    assert len(manager.get_issue(issue.id).history) == 2
+
+
+def test_json_issues_are_imported_on_first_open(tmp_path):
+    issue = IssueManager(data_dir=str(tmp_path / "seed")).create_issue("Old", "From JSON", "carol")
+    (tmp_path / "legacy").mkdir()
+    serialization.write_json(tmp_path / "legacy" / f"{issue.id}.json", issue.to_dict())
+    (tmp_path / "legacy" / "broken.json").write_text("{not json")
+
+    manager = IssueManager(data_dir=str(tmp_path / "legacy"))
+
+    assert [i.title for i in manager.get_open_issues()] == ["Old"]
+    assert manager.export_json_issues(tmp_path / "export") == 1
+    assert serialization.read_json(tmp_path / "export" / f"{issue.id}.json")["title"] == "Old"
+
+
+def test_imported_issues_keep_their_updated_at(tmp_path):
+    issue = IssueManager(data_dir=str(tmp_path / "seed")).create_issue("Old", "From JSON", "carol")
+    document = issue.to_dict()
+    document["created_at"] = document["updated_at"] = "2020-03-01T12:00:00"
+    (tmp_path / "legacy").mkdir()
+    serialization.write_json(tmp_path / "legacy" / f"{issue.id}.json", document)
+
+    manager = IssueManager(data_dir=str(tmp_path / "legacy"))
+
+    assert manager.get_issue(issue.id).updated_at == "2020-03-01T12:00:00"
+    assert manager.find_issues(updated_since="2021-01-01") == []
+    assert [i.id for i in manager.find_issues(updated_since="2020-01-01")] == [issue.id]
@@ -0,0 +1,96 @@
+import threading
+import time
+
+import pytest
+
+from model_registry import ModelRegistry
+
+
+class SlowModel:
+    def __init__(self):
+        time.sleep(0.05)
+        self.active = 0
+        self.overlapped = False
+
+    def encode(self, texts):
+        self.active += 1
+        self.overlapped |= self.active > 1
+        time.sleep(0.01)
+        self.active -= 1
+        return [len(text) for text in texts]
+
+
+def test_models_load_lazily_and_once():
+    registry = ModelRegistry()
+    loads = []
+    handle = registry.register("slow", lambda: loads.append(1) or SlowModel())
+
+    assert loads == [] and not handle.loaded
+    assert registry.register("slow", lambda: pytest.fail("loader replaced")) is handle
+
+    threads = [threading.Thread(target=handle.encode, args=(["a", "bb"],)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert loads == [1]
+    assert handle.encode(["abc"]) == [3]
+    # The inference lock keeps calls from overlapping
+    assert not handle.model.overlapped
+    stats = registry.stats()["slow"]
+    assert stats["loaded"] and stats["calls"] == 9
+    assert stats["load_seconds"] >= 0.05
+
+
+def test_failed_loads_are_remembered():
+    registry = ModelRegistry()
+    attempts = []
+
+    def broken():
+        attempts.append(1)
+        raise OSError("no such model")
+
+    handle = registry.register("broken", broken)
+    with pytest.raises(OSError):
+        handle.model
+    with pytest.raises(RuntimeError, match="no such model"):
+        handle(["text"])
+    assert attempts == [1]
+    assert registry.stats()["broken"]["error"] == "no such model"
+
+
+def test_failed_loads_are_retried():
+    registry = ModelRegistry()
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise OSError("not downloaded yet")
+        return SlowModel()
+
+    handle = registry.register("flaky", flaky)
+    with pytest.raises(OSError):
+        handle.model
+    handle.reset()
+    assert handle.encode(["ab"]) == [2]
+
+    # Once the retry window has passed, the next access loads again
+    broken = registry.register("broken", lambda: attempts.append(1) or 1 / 0)
+    broken.retry_seconds = 0
+    for _ in range(2):
+        with pytest.raises(ZeroDivisionError):
+            broken.model
+    assert len(attempts) == 4
+
+
+def test_prewarm_in_background():
+    registry = ModelRegistry()
+    handle = registry.register("slow", SlowModel)
+    registry.register("broken", lambda: 1 / 0)
+
+    registry.prewarm().join()
+
+    assert handle.loaded
+    assert registry.stats()["broken"]["loaded"] is False
@@ -0,0 +1,152 @@
+import json
+import os
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import embedding_service
+import model_registry
+from src import processed_interview_store
+
+VOCABULARY = ["login", "password", "team", "meeting", "dashboard", "export"]
+
+
+class FakeModel:
+    """Bag-of-words encoder over a fixed vocabulary."""
+
+    def __init__(self, name):
+        self.calls = []
+
+    def encode(self, texts):
+        self.calls.append(list(texts))
+        return np.array([[float(word in text.lower()) for word in VOCABULARY] + [0.1] for text in texts])
+
+
+def chunk(text, emotion="neutral", themes=()):
+    return {"content": text, "metadata": {"emotion": emotion, "themes": list(themes)}}
+
+
+@pytest.fixture
+def embedding_cache(tmp_path, monkeypatch):
+    """Keep the shared embedding service's cache files out of data/."""
+    monkeypatch.setattr(embedding_service, "_service",
+                        embedding_service.EmbeddingService(cache_dir=str(tmp_path / "cache")))
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch, embedding_cache):
+    registry = model_registry.ModelRegistry()
+    registry.register(f"sentence-transformer:{processed_interview_store.SEARCH_MODEL_NAME}",
+                      lambda: FakeModel(processed_interview_store.SEARCH_MODEL_NAME))
+    monkeypatch.setattr(model_registry, "_registry", registry)
+    return processed_interview_store.ProcessedInterviewStore(base_dir=str(tmp_path / "processed"))
+
+
+def test_chunks_are_embedded_once_at_save_time(store):
+    store.save_interview("a", {"chunks": [chunk("Login keeps failing", "frustration"), chunk("")]})
+    store.save_interview("b", {"chunks": [chunk("Team meeting notes", themes=["Team Dynamics"])]})
+    calls = len(store.model.model.calls)
+
+    results = store.semantic_search("login", k=5)
+    results_again = store.semantic_search("login", k=5)
+
+    # Only the query is encoded, and only once thanks to the embedding cache
+    assert len(store.model.model.calls) == calls + 1
+    assert [r["content"] for r in results] == ["Login keeps failing"]
+    assert [(r["content"], r["similarity"]) for r in results_again] == [(r["content"], r["similarity"]) for r in results]
+    assert store.chunk_index.rows == [["a", 0, "frustration", []], ["b", 0, "neutral", ["team dynamics"]]]
+
+
+def test_resaving_an_interview_replaces_its_rows(store):
+    store.save_interview("a", {"chunks": [chunk("login"), chunk("password")]})
+    store.save_interview("b", {"chunks": [chunk("dashboard")]})
+    store.save_interview("a", {"chunks": [chunk("export")]})
+
+    assert [row[:2] for row in store.chunk_index.rows] == [["b", 0], ["a", 0]]
+    assert store.chunk_index.matrix.shape == (2, len(VOCABULARY) + 1)
+    assert [r["content"] for r in store.semantic_search("export", k=5)] == ["export"]
+
+
+def test_emotion_and_theme_filters_use_masks(store):
+    store.save_interview("a", {"chunks": [
+        chunk("login password", "frustration"),
+        chunk("login dashboard", "joy"),
+        chunk("login team", "neutral", themes=["innovation"]),
+    ]})
+
+    # Emotion and theme criteria together: a chunk passes if it matches either
+    results = store.semantic_search("frustrated innovation login", k=5)
+    assert sorted(r["content"] for r in results) == ["login password", "login team"]
+    assert len(store.semantic_search("login", k=2)) == 2
+
+
+def test_interviews_written_outside_the_store_are_indexed(store):
+    store.save_interview("a", {"chunks": [chunk("login")]})
+    with open(os.path.join(store.base_dir, "b.json"), "w") as f:
+        json.dump({"chunks": [chunk("dashboard export")]}, f)
+    os.remove(os.path.join(store.base_dir, "a.json"))
+
+    assert store.sync_chunk_index() == {"embedded": 1, "removed": 1}
+    assert [r["content"] for r in store.semantic_search("dashboard", k=5)] == ["dashboard export"]
+    assert store.sync_chunk_index() == {"embedded": 0, "removed": 0}
+
+
+def test_text_search_uses_the_full_text_index(store):
+    store.save_interview("a", {"chunks": [
+        chunk("The checkout flow is slow", themes=["Speed"]),
+        chunk("Billing was fine"),
+    ]})
+    with open(os.path.join(store.base_dir, "b.json"), "w") as f:
+        json.dump({"chunks": [chunk("Checkout felt fast")]}, f)
+
+    results = store.text_search('"checkout flow"')
+    assert [r["content"] for r in results] == ["The checkout flow is slow"]
+    assert results[0]["snippet"] == "The <mark>checkout flow</mark> is slow"
+    assert sorted(r["content"] for r in store.text_search("chec")) == ["Checkout felt fast", "The checkout flow is slow"]
+    assert [r["content"] for r in store.text_search("themes:speed")] == ["The checkout flow is slow"]
+
+
+def test_text_search_rescans_the_directory_at_most_every_few_seconds(store, monkeypatch):
+    monkeypatch.setattr(processed_interview_store, "TEXT_INDEX_SYNC_SECONDS", 60)
+    store.save_interview("a", {"chunks": [chunk("Checkout felt fast")]})
+    assert len(store.text_search("checkout")) == 1
+
+    with open(os.path.join(store.base_dir, "b.json"), "w") as f:
+        json.dump({"chunks": [chunk("Checkout edited elsewhere")]}, f)
+    store.save_interview("c", {"chunks": [chunk("Checkout saved here")]})
+    assert sorted(r["content"] for r in store.text_search("checkout")) == ["Checkout felt fast", "Checkout saved here"]
+    assert store.sync_text_index() == {"indexed": 1, "removed": 0}
+
+
+def test_int8_chunk_index_rescores_to_float32_results(tmp_path, embedding_cache):
+    model = FakeModel(processed_interview_store.SEARCH_MODEL_NAME)
+    texts = ["login password", "team meeting", "dashboard export", "login"]
+    changed = {"a": ([1, 1], [chunk(text) for text in texts])}
+    indexes = {}
+    for precision in ("float32", "int8"):
+        index = processed_interview_store.ChunkEmbeddingIndex(str(tmp_path / precision), model.encode,
+                                                              precision=precision)
+        index.update(changed)
+        indexes[precision] = index
+
+    reopened = processed_interview_store.ChunkEmbeddingIndex(str(tmp_path / "int8"), model.encode, precision="int8")
+    reopened.load()
+    assert reopened.codes.dtype == np.int8 and reopened.codes.shape == reopened.matrix.shape
+    query = model.encode(["login"])[0]
+    assert reopened.search(query, set(), set(), 2) == indexes["float32"].search(query, set(), set(), 2)
+
+
+def test_chunk_index_search_uses_one_snapshot(tmp_path, embedding_cache):
+    model = FakeModel(processed_interview_store.SEARCH_MODEL_NAME)
+    index = processed_interview_store.ChunkEmbeddingIndex(str(tmp_path / "index"), model.encode)
+    index.update({"a": ([1, 1], [chunk("login", "frustration"), chunk("team meeting")])})
+    snapshot = index.snapshot()
+
+    # A writer swaps in more rows between taking the snapshot and searching
+    index.update({"b": ([2, 2], [chunk("login again", "frustration"), chunk("export"), chunk("login")])})
+
+    query = model.encode(["login"])[0]
+    hits = index.search(query, {"frustration"}, set(), 5, snapshot=snapshot)
+    assert [snapshot["rows"][row][:2] for row, _ in hits] == [["a", 0]]
+    assert len(index.search(query, {"frustration"}, set(), 5)) == 3
@@ -0,0 +1,105 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from projection_cache import CORPUS_SCOPE, ProjectionCache, embedding_set_hash
+
+
+class LinearReducer:
+    """Stands in for UMAP: projects onto the first n_components axes."""
+
+    def __init__(self, n_neighbors, min_dist, n_components):
+        self.n_components = n_components
+        self.transformed = 0
+
+    def fit_transform(self, embeddings):
+        return np.asarray(embeddings)[:, :self.n_components] * 2
+
+    def transform(self, embeddings):
+        self.transformed += len(embeddings)
+        return np.asarray(embeddings)[:, :self.n_components] * 2
+
+
+def corpus(count, seed=0):
+    return [f"c{i}" for i in range(count)], np.random.default_rng(seed).normal(size=(count, 8)).astype("float32")
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ProjectionCache(str(tmp_path), reducer_factory=LinearReducer)
+
+
+def test_set_hash_ignores_order():
+    ids, vectors = corpus(5)
+    assert embedding_set_hash(ids, vectors) == embedding_set_hash(ids[::-1], vectors[::-1])
+    assert embedding_set_hash(ids, vectors) != embedding_set_hash(ids, vectors + 1)
+
+
+def test_repeat_requests_hit_the_cache(cache):
+    ids, vectors = corpus(20)
+    coords = cache.project("s1", ids, vectors)
+    assert np.allclose(coords, vectors[:, :2] * 2)
+    assert np.allclose(cache.project("s1", ids[::-1], vectors[::-1]), coords[::-1])
+    assert cache.stats == {"hits": 1, "transforms": 0, "fits": 1}
+
+    cache.project("s1", ids, vectors, n_components=3)
+    assert cache.stats["fits"] == 2
+
+
+def test_new_chunks_are_transformed_until_refit(cache):
+    ids, vectors = corpus(30)
+    cache.project("s1", ids[:20], vectors[:20])
+    coords = cache.project("s1", ids[:25], vectors[:25])
+    assert np.allclose(coords, vectors[:25, :2] * 2)
+    assert cache.stats["fits"] == 1 and cache.stats["transforms"] == 1
+
+    ids, vectors = corpus(60)
+    cache.project("s1", ids, vectors)
+    assert cache.stats["fits"] == 2
+
+
+def test_reducers_and_projections_persist(cache, tmp_path):
+    ids, vectors = corpus(20)
+    cache.project("s1", ids, vectors)
+    reloaded = ProjectionCache(str(tmp_path), reducer_factory=LinearReducer)
+    assert np.allclose(reloaded.project("s1", ids, vectors), vectors[:, :2] * 2)
+    assert reloaded.stats == {"hits": 1, "transforms": 0, "fits": 0}
+
+
+def test_refits_and_the_size_bound_remove_projection_files(tmp_path):
+    cache = ProjectionCache(str(tmp_path), reducer_factory=LinearReducer, max_entries=3)
+    projections = tmp_path / "projections"
+    ids, vectors = corpus(60)
+    cache.project("s1", ids[:20], vectors[:20])
+    cache.project("s1", ids[:25], vectors[:25])
+    cache.project("s2", ids[:20], vectors[:20])
+    assert len(list(projections.iterdir())) == 3
+
+    # The refit drops both projections of the first s1 fit
+    cache.project("s1", ids, vectors)
+    assert len(list(projections.iterdir())) == 2
+
+    for count in range(21, 25):
+        cache.project("s2", ids[:count], vectors[:count])
+    assert len(list(projections.iterdir())) == 3
+    assert np.allclose(cache.project("s2", ids[:24], vectors[:24]), vectors[:24, :2] * 2)
+
+
+def test_corpus_map_is_built_in_the_background(cache):
+    ids, vectors = corpus(40)
+    assert cache.place(CORPUS_SCOPE, ids[:10], vectors[:10]) is None
+    assert not cache.status(CORPUS_SCOPE)["ready"]
+
+    cache.refresh_in_background(CORPUS_SCOPE, lambda: (ids[:30], vectors[:30])).join()
+    status = cache.status(CORPUS_SCOPE)
+    assert status["ready"] and status["chunks"] == 30 and not status["building"]
+
+    coords = cache.place(CORPUS_SCOPE, ids[25:], vectors[25:])
+    assert np.allclose(coords, vectors[25:, :2] * 2)
+    assert cache.stats["transforms"] == 1 and not cache.needs_refit(CORPUS_SCOPE, ids[25:])
+
+
+def test_too_few_chunks(cache):
+    ids, vectors = corpus(3)
+    with pytest.raises(ValueError):
+        cache.project("s1", ids, vectors)
@@ -0,0 +1,41 @@
+import os
+
+import pytest
+
+pytest.importorskip("flask")
+
+from tools.prompt_manager.prompt_manager import PromptManager
+
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = PromptManager(prompt_dir=str(tmp_path))
+    manager.save_prompt("daria", {"version": "v1.0", "role": "Interviewer"}, create_version=False)
+    return manager
+
+
+def test_load_prompt_is_cached_and_returns_copies(manager):
+    config = manager.load_prompt("daria")
+    config["role"] = "changed"
+
+    assert manager.load_prompt("Daria")["role"] == "Interviewer"
+    assert list(manager.load_all_prompts()) == ["daria"]
+
+
+def test_save_prompt_updates_cache(manager):
+    manager.save_prompt("daria", {"version": "v1.1", "role": "Researcher"}, create_version=False)
+
+    assert manager.load_prompt("daria")["role"] == "Researcher"
+
+
+def test_edits_on_disk_are_picked_up(tmp_path, manager):
+    manager.load_prompt("daria")
+    prompt_file = tmp_path / "daria.yml"
+    prompt_file.write_text("agent_name: daria\nversion: v2.0\nrole: Edited by hand\n")
+    os.utime(prompt_file, ns=(1, 1))
+
+    assert manager.load_prompt("daria")["role"] == "Edited by hand"
+
+    prompt_file.unlink()
+    with pytest.raises(FileNotFoundError):
+        manager.load_prompt("daria")
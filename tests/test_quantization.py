@@ -0,0 +1,56 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from quantization import RowFile, dequantize, quantize, rescore, resolve_precision, similarity
+
+
+def unit_vectors(count, dimension=64, seed=0):
+    vectors = np.random.default_rng(seed).normal(size=(count, dimension)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+@pytest.mark.parametrize("precision,dtype,tolerance", [
+    ("float32", np.float32, 1e-6), ("float16", np.float16, 2e-3), ("int8", np.int8, 2e-2)
+])
+def test_quantized_scores_track_exact_scores(precision, dtype, tolerance):
+    vectors, queries = unit_vectors(500), unit_vectors(5, seed=1)
+    codes, scales = quantize(vectors, precision)
+    assert codes.dtype == dtype
+    assert (scales is not None) == (precision == "int8")
+
+    exact = queries @ vectors.T
+    assert np.abs(similarity(codes, scales, queries) - exact).max() < tolerance
+    assert np.allclose(similarity(codes, scales, queries[0]), similarity(codes, scales, queries)[0], atol=1e-6)
+    assert np.abs(dequantize(codes, scales) - vectors).max() < tolerance
+
+
+def test_int8_memory_and_zero_vectors():
+    codes, scales = quantize(np.vstack([unit_vectors(1000, 384), np.zeros((1, 384))]), "int8")
+    assert codes.nbytes + scales.nbytes < unit_vectors(1001, 384).nbytes / 3.5
+    assert not codes[-1].any() and scales[-1] == 1.0
+
+
+def test_rescore_reads_exact_scores_from_a_row_file(tmp_path):
+    vectors, query = unit_vectors(100), unit_vectors(1, seed=2)[0]
+    rows = RowFile(str(tmp_path / "vectors.float32"), 64)
+    rows.append(vectors[:60])
+    rows.append(vectors[60:])
+    assert len(rows) == 100 and np.array_equal(rows[[3, 70]], vectors[[3, 70]])
+
+    hits = rescore(query, [90, 5, 42, 17], rows, 2)
+    expected = sorted(((row, float(vectors[row] @ query)) for row in (90, 5, 42, 17)), key=lambda hit: -hit[1])[:2]
+    assert [row for row, _ in hits] == [row for row, _ in expected]
+    assert [score for _, score in hits] == pytest.approx([score for _, score in expected], abs=1e-6)
+
+    rows.write(5, vectors[6])
+    rows.keep(np.arange(100) % 2 == 1)
+    assert len(rows) == 50 and np.array_equal(rows[[0, 2]], vectors[[1, 6]])
+
+
+def test_precision_from_environment(monkeypatch):
+    monkeypatch.setenv("DARIA_VECTOR_PRECISION", "INT8")
+    assert resolve_precision() == "int8"
+    assert resolve_precision("float16") == "float16"
+    with pytest.raises(ValueError):
+        resolve_precision("int4")
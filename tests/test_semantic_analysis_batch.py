@@ -0,0 +1,93 @@
+import json
+import threading
+import time
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("qdrant_client")
+pytest.importorskip("openai")
+pytest.importorskip("dotenv")
+
+import embedding_service
+import semantic_analysis
+
+
+class FakeEncoder:
+    def __init__(self):
+        self.calls = []
+
+    def encode(self, texts):
+        self.calls.append(list(texts))
+        return [[float(len(text)), 1.0] + [0.0] * 382 for text in texts]
+
+
+class FakeEmotions:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, texts, **kwargs):
+        self.calls.append(list(texts))
+        return [{"label": "joy" if "great" in text else "anger", "score": 0.9} for text in texts]
+
+
+class FakeOpenAI:
+    """Chat completions stub that records how many requests overlap."""
+
+    def __init__(self):
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **kwargs):
+        with self.lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(0.02)
+        with self.lock:
+            self.active -= 1
+        content = json.dumps({"themes": ["onboarding"], "insight_tags": ["setup"], "emotion_intensity": 4})
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+@pytest.fixture
+def analyzer(tmp_path, monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setattr(embedding_service, "_service",
+                        embedding_service.EmbeddingService(cache_dir=str(tmp_path / "cache")))
+    analyzer = semantic_analysis.SemanticAnalyzer()
+    analyzer.sentence_model = FakeEncoder()
+    analyzer.emotion_model = FakeEmotions()
+    analyzer.openai_client = FakeOpenAI()
+    return analyzer
+
+
+def test_add_chunks_batches_every_stage(analyzer):
+    batch = [{"id": str(uuid.uuid4()), "text": f"[Participant] setup was great {i}", "metadata": {"n": i}}
+             for i in range(10)]
+
+    stats = analyzer.add_chunks(batch, max_workers=4)
+
+    assert stats["added"] == 10 and stats["failed"] == 0
+    assert stats["chunks_per_second"] > 0
+    assert len(analyzer.sentence_model.calls) == 1
+    assert len(analyzer.emotion_model.calls) == 1
+    assert 1 < analyzer.openai_client.max_active <= 4
+    point = analyzer.qdrant.retrieve(analyzer.collection_name, [batch[3]["id"]], with_payload=True)[0]
+    assert point.payload["metadata"]["emotion"] == "joy"
+    assert point.payload["metadata"]["themes"] == ["onboarding"]
+    assert point.payload["metadata"]["metadata"] == {"n": 3}
+
+
+def test_analyze_chunk_matches_batched_analysis(analyzer):
+    single = analyzer.analyze_chunk("[Interviewer] How was it? [Participant] it was great")
+    batched = analyzer.analyze_chunks(["[Interviewer] How was it? [Participant] it was great", "   "])
+
+    assert batched[0] == single
+    assert single["emotion"] == "joy" and single["emotion_intensity"] == 4
+    # Emotions are classified on the participant's words only; blank text stays neutral
+    assert analyzer.emotion_model.calls[0] == ["it was great"]
+    assert batched[1]["emotion"] == "neutral"
@@ -0,0 +1,42 @@
+import datetime
+import json
+import uuid
+
+import pytest
+
+import serialization
+
+
+def test_datetimes_are_serialized_at_any_depth():
+    now = datetime.datetime(2025, 5, 6, 10, 30, 15, 123456)
+    data = {"created_at": now, "messages": [{"timestamp": now, "id": uuid.UUID(int=1)}], "tags": {"a"}}
+
+    decoded = json.loads(serialization.dumps(data))
+
+    assert decoded["created_at"] == now.isoformat()
+    assert decoded["messages"][0] == {"timestamp": now.isoformat(), "id": str(uuid.UUID(int=1))}
+    assert decoded["tags"] == ["a"]
+
+
+def test_compact_by_default_and_pretty_on_request():
+    data = {"title": "Guide", "sessions": ["a", "b"]}
+
+    assert "\n" not in serialization.dumps(data)
+    assert serialization.dumps(data, pretty=True).startswith('{\n  "title"')
+    assert serialization.loads(serialization.dumps(data, pretty=True)) == data
+
+
+def test_write_and_read_json(tmp_path):
+    path = tmp_path / "session.json"
+    data = {"content": "Café ☕", "count": 3}
+
+    serialization.write_json(path, data, atomic=True)
+
+    assert serialization.read_json(path) == data
+    assert json.loads(path.read_text(encoding="utf-8")) == data
+    assert [p.name for p in tmp_path.iterdir()] == ["session.json"]
+
+
+def test_invalid_json_raises_stdlib_error():
+    with pytest.raises(json.JSONDecodeError):
+        serialization.loads("{not json")
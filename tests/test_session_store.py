@@ -0,0 +1,312 @@
+import json
+import os
+
+import pytest
+
+from langchain_features.services.discussion_service import DiscussionService
+from langchain_features.services.session_store import (
+    JSONSessionStore, SQLiteSessionStore, migrate_json_to_sqlite, export_sqlite_to_json
+)
+
+
+@pytest.fixture(params=["json", "sqlite"])
+def service(request, tmp_path):
+    """DiscussionService backed by each storage backend."""
+    return DiscussionService(data_dir=str(tmp_path), backend=request.param)
+
+
+def test_session_roundtrip(service):
+    guide_id = service.create_guide({"title": "Checkout study", "project": "Payments"})
+    session_id = service.create_session(guide_id, {"name": "Pat"})
+
+    service.add_message_to_session(session_id, "Hello", "assistant")
+    service.add_message_to_session(session_id, "Hi there", "user")
+
+    session = service.get_session(session_id)
+    assert session["title"] == "Checkout study"
+    assert [m["content"] for m in session["messages"]] == ["Hello", "Hi there"]
+    assert session["transcript"] == "\n\nModerator: Hello\n\nParticipant: Hi there"
+    assert service.get_guide(guide_id)["sessions"] == [session_id]
+    assert [s["id"] for s in service.get_all_sessions()] == [session_id]
+
+
+def test_add_message_to_missing_session(service):
+    assert service.add_message("missing", {"content": "x", "role": "user"}) is False
+
+
+def test_delete_session_updates_guide(service):
+    guide_id = service.create_guide({"title": "Guide"})
+    session_id = service.create_session(guide_id)
+
+    assert service.delete_session(session_id)
+    assert service.get_session(session_id) is None
+    assert service.get_guide(guide_id)["sessions"] == []
+
+
+def test_migrate_and_export(tmp_path):
+    json_dir = tmp_path / "json"
+    source = DiscussionService(data_dir=str(json_dir), backend="json")
+    guide_id = source.create_guide({"title": "Guide"})
+    session_id = source.create_session(guide_id)
+    source.add_message_to_session(session_id, "First answer", "user")
+
+    db_path = tmp_path / "sessions.db"
+    counts = migrate_json_to_sqlite(str(json_dir), str(db_path))
+    assert counts == {"guides": 1, "sessions": 1, "messages": 1}
+
+    migrated = DiscussionService(data_dir=str(json_dir), store=SQLiteSessionStore(str(db_path)))
+    assert migrated.get_messages(session_id)[0]["content"] == "First answer"
+
+    export_dir = tmp_path / "export"
+    export_sqlite_to_json(str(db_path), str(export_dir))
+    with open(export_dir / "sessions" / f"{session_id}.json") as f:
+        exported = json.load(f)
+    assert exported == JSONSessionStore(str(json_dir)).load_session(session_id)
+
+
+def test_json_messages_are_journaled_until_complete(tmp_path):
+    service = DiscussionService(data_dir=str(tmp_path), backend="json")
+    guide_id = service.create_guide({"title": "Guide"})
+    session_id = service.create_session(guide_id)
+    store = service.store
+
+    service.add_message_to_session(session_id, "Question", "assistant")
+    service.add_message_to_session(session_id, "Answer", "user")
+
+    assert store.journal_path(session_id).exists()
+    with open(store.session_path(session_id)) as f:
+        assert json.load(f)["messages"] == []
+    assert [m["content"] for m in service.get_messages(session_id)] == ["Question", "Answer"]
+
+    service.complete_session(session_id)
+
+    assert not store.journal_path(session_id).exists()
+    with open(store.session_path(session_id)) as f:
+        document = json.load(f)
+    assert document["status"] == "completed"
+    assert [m["content"] for m in document["messages"]] == ["Question", "Answer"]
+    assert document["transcript"] == "\n\nModerator: Question\n\nParticipant: Answer"
+
+
+def test_json_journal_compacts_at_threshold(tmp_path):
+    store = JSONSessionStore(str(tmp_path), journal_max_bytes=200)
+    service = DiscussionService(data_dir=str(tmp_path), store=store)
+    guide_id = service.create_guide({"title": "Guide"})
+    session_id = service.create_session(guide_id)
+
+    for i in range(5):
+        service.add_message_to_session(session_id, f"Message {i}", "user")
+
+    with open(store.session_path(session_id)) as f:
+        assert len(json.load(f)["messages"]) >= 2
+    assert len(service.get_messages(session_id)) == 5
+
+
+def test_json_journal_replay_skips_compacted_records(tmp_path):
+    store = JSONSessionStore(str(tmp_path))
+    service = DiscussionService(data_dir=str(tmp_path), store=store)
+    guide_id = service.create_guide({"title": "Guide"})
+    session_id = service.create_session(guide_id)
+    service.add_message_to_session(session_id, "Answer", "user")
+
+    # Simulate a crash after the document was written but before the
+    # journal was trimmed
+    journal = store.journal_path(session_id).read_text()
+    store.compact_session(session_id)
+    store.journal_path(session_id).write_text(journal)
+
+    assert len(service.get_messages(session_id)) == 1
+
+
+def test_session_summaries_track_appends(service):
+    guide_id = service.create_guide({"title": "Guide", "project": "Payments"})
+    session_id = service.create_session(guide_id, {"name": "Pat"})
+    service.add_message_to_session(session_id, "Hello", "assistant")
+    service.add_message_to_session(session_id, "Hi", "user")
+
+    summaries, next_cursor = service.list_session_summaries()
+
+    assert next_cursor is None
+    assert len(summaries) == 1
+    summary = summaries[0]
+    assert summary["id"] == session_id
+    assert summary["project"] == "Payments"
+    assert summary["participant_name"] == "Pat"
+    assert summary["message_count"] == 2
+    assert "messages" not in summary and "transcript" not in summary
+
+
+def test_session_summaries_cursor_pagination(service):
+    guide_id = service.create_guide({"title": "Guide"})
+    session_ids = [service.create_session(guide_id) for _ in range(5)]
+
+    seen = []
+    cursor = None
+    while True:
+        page, cursor = service.list_session_summaries(limit=2, cursor=cursor)
+        seen.extend(s["id"] for s in page)
+        if cursor is None:
+            break
+
+    assert sorted(seen) == sorted(session_ids)
+    assert len(seen) == len(set(seen))
+
+
+def test_json_manifest_picks_up_external_edits(tmp_path):
+    service = DiscussionService(data_dir=str(tmp_path), backend="json")
+    guide_id = service.create_guide({"title": "Guide"})
+    session_id = service.create_session(guide_id)
+    service.list_session_summaries()
+
+    # Another process rewrites the session file directly
+    path = service.store.session_path(session_id)
+    with open(path) as f:
+        document = json.load(f)
+    document["status"] = "completed"
+    document["title"] = "Edited elsewhere"
+    with open(path, "w") as f:
+        json.dump(document, f)
+
+    fresh = DiscussionService(data_dir=str(tmp_path), backend="json")
+    summary = fresh.list_session_summaries()[0][0]
+    assert summary["status"] == "completed"
+    assert summary["title"] == "Edited elsewhere"
+
+
+def test_session_cache_hits_and_write_through(service):
+    guide_id = service.create_guide({"title": "Guide"})
+    session_id = service.create_session(guide_id)
+
+    service.get_session(session_id)
+    service.get_session(session_id)
+    service.add_message_to_session(session_id, "Hello", "user")
+    messages = service.get_messages(session_id)
+
+    stats = service.cache_stats()
+    assert [m["content"] for m in messages] == ["Hello"]
+    assert stats["misses"] == 0
+    assert stats["hits"] == 3
+
+
+def test_session_cache_returns_copies(service):
+    guide_id = service.create_guide({"title": "Guide"})
+    session_id = service.create_session(guide_id)
+
+    session = service.get_session(session_id)
+    session["messages"].append({"content": "not saved"})
+    session["status"] = "mutated"
+
+    fresh = service.get_session(session_id)
+    assert fresh["messages"] == []
+    assert fresh["status"] == "active"
+
+
+def test_session_cache_sees_external_writes(tmp_path):
+    service = DiscussionService(data_dir=str(tmp_path), backend="json")
+    other = DiscussionService(data_dir=str(tmp_path), backend="json")
+    guide_id = service.create_guide({"title": "Guide"})
+    session_id = service.create_session(guide_id)
+    service.get_session(session_id)
+
+    other.update_session(session_id, {"status": "completed", "notes": "edited in another process"})
+
+    assert service.get_session(session_id)["notes"] == "edited in another process"
+
+
+def test_session_cache_is_bounded(tmp_path):
+    service = DiscussionService(data_dir=str(tmp_path), backend="json", cache_size=2)
+    guide_id = service.create_guide({"title": "Guide"})
+    for _ in range(4):
+        service.get_session(service.create_session(guide_id))
+
+    assert service.cache_stats()["size"] == 2
+
+
+def test_shared_instance_per_data_dir(tmp_path):
+    throwaway = DiscussionService(data_dir=str(tmp_path / "scratch"))
+    shared = DiscussionService.get_instance(data_dir=str(tmp_path / "interviews"))
+
+    assert shared is not throwaway
+    assert DiscussionService.get_instance(data_dir=str(tmp_path / "interviews" / ".")) is shared
+    assert DiscussionService.get_instance(data_dir=str(tmp_path / "other")) is not shared
+
+
+def test_get_sessions_batches_and_keeps_order(service):
+    guide_id = service.create_guide({"title": "Guide"})
+    session_ids = [service.create_session(guide_id) for _ in range(3)]
+    service._session_cache.clear()
+
+    sessions = service.get_sessions([session_ids[2], "missing", session_ids[0]])
+
+    assert [s["id"] for s in sessions] == [session_ids[2], session_ids[0]]
+    assert service.cache_stats()["size"] == 2
+
+
+def test_guide_sessions_use_reverse_index(service):
+    guide_id = service.create_guide({"title": "Guide"})
+    other_id = service.create_guide({"title": "Other"})
+    listed = service.create_session(guide_id)
+    unlisted = service.create_session(guide_id)
+    service.create_session(other_id)
+
+    # Drop one session from the guide's list, as older tools sometimes did
+    guide = service.get_guide(guide_id)
+    guide["sessions"] = [listed, "deleted-session"]
+    service._save_guide(guide_id, guide)
+
+    assert sorted(s["id"] for s in service.list_guide_sessions(guide_id)) == sorted([listed, unlisted])
+    assert sorted(service.store.guide_session_ids(guide_id)) == sorted([listed, unlisted])
+
+    changes = service.repair_guide_sessions(guide_id)
+
+    assert changes == {guide_id: {"removed": ["deleted-session"], "added": [unlisted]}}
+    assert service.get_guide(guide_id)["sessions"] == [listed, unlisted]
+    assert service.repair_guide_sessions() == {}
+
+
+def _complete_and_age(service, session_id, days):
+    service.complete_session(session_id)
+    store = service.store
+    mtime = store.session_path(session_id).stat().st_mtime - days * 86400
+    os.utime(store.session_path(session_id), (mtime, mtime))
+
+
+def test_archive_completed_sessions(tmp_path):
+    service = DiscussionService(data_dir=str(tmp_path), backend="json")
+    guide_id = service.create_guide({"title": "Guide"})
+    old_id = service.create_session(guide_id)
+    service.add_message_to_session(old_id, "Answer", "user")
+    recent_id = service.create_session(guide_id)
+    active_id = service.create_session(guide_id)
+    _complete_and_age(service, old_id, 40)
+    _complete_and_age(service, recent_id, 2)
+
+    assert service.archive_completed_sessions(30) == [old_id]
+
+    store = service.store
+    assert not store.session_path(old_id).exists()
+    assert store.session_path(recent_id).exists() and store.session_path(active_id).exists()
+    summaries = {s["id"]: s for s in service.list_session_summaries()[0]}
+    assert summaries[old_id]["status"] == "completed"
+    assert summaries[old_id]["message_count"] == 1
+    assert sorted(store.guide_session_ids(guide_id)) == sorted([old_id, recent_id, active_id])
+    assert [m["content"] for m in service.get_messages(old_id)] == ["Answer"]
+
+
+def test_archived_session_is_restored_on_write(tmp_path):
+    service = DiscussionService(data_dir=str(tmp_path), backend="json")
+    guide_id = service.create_guide({"title": "Guide"})
+    session_id = service.create_session(guide_id)
+    _complete_and_age(service, session_id, 40)
+    service.archive_completed_sessions(30)
+
+    service.add_message_to_session(session_id, "Follow-up", "user")
+
+    store = service.store
+    assert store.session_path(session_id).exists()
+    assert session_id not in store.archive
+    assert store.archive.stats()["objects"] == 0
+    assert [m["content"] for m in service.get_messages(session_id)] == ["Follow-up"]
+
+    assert service.delete_session(session_id)
+    assert not store.session_exists(session_id)
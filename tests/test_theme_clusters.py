@@ -0,0 +1,153 @@
+import threading
+import time
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from theme_clusters import ThemeClusters, silhouette, spherical_kmeans
+
+
+def themed_chunks(themes, per_theme, start=0, seed=0, dimension=16):
+    """Chunks around well separated theme directions; IDs encode the theme."""
+    rng = np.random.default_rng(seed)
+    axes = np.eye(dimension, dtype=np.float32)
+    ids, vectors, texts, metadatas = [], [], [], []
+    for theme in range(themes):
+        for n in range(start, start + per_theme):
+            ids.append(f"t{theme}:{n}")
+            vectors.append(axes[theme] + 0.1 * rng.normal(size=dimension))
+            texts.append(f"theme {theme} excerpt {n}")
+            metadatas.append({"session_id": f"s{n % 3}", "project": "alpha" if theme else "beta"})
+    return ids, np.array(vectors, dtype=np.float32), texts, metadatas
+
+
+class Labeller:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, texts):
+        self.calls.append(texts)
+        return texts[0].rsplit(" excerpt", 1)[0].title()
+
+
+def update(clusters, *chunks):
+    """Update and wait for any recluster it started."""
+    thread = clusters.update(*chunks)
+    if thread is not None:
+        thread.join()
+
+
+def theme_of(clusters, chunk_id):
+    return clusters.assignments[clusters.ids.index(chunk_id)]
+
+
+def test_kmeans_finds_separated_themes():
+    _, vectors, _, _ = themed_chunks(3, 20)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    assignments, centroids = spherical_kmeans(vectors, 3)
+    assert len(set(assignments[:20])) == len(set(assignments[20:40])) == 1
+    assert len(set(assignments)) == 3 and np.allclose(np.linalg.norm(centroids, axis=1), 1)
+    assert silhouette(vectors, assignments) > 0.8
+    assert silhouette(vectors, spherical_kmeans(vectors, 2)[0]) < silhouette(vectors, assignments)
+
+
+def test_clusters_with_automatic_k_and_cached_labels(tmp_path):
+    labeller = Labeller()
+    clusters = ThemeClusters(str(tmp_path / "clusters.npz"), label_fn=labeller)
+    update(clusters, *themed_chunks(3, 20))
+    assert len(clusters.cluster_ids) == 3
+    assert clusters.refresh_labels() == 3 and len(labeller.calls) == 3
+    assert clusters.refresh_labels() == 0
+
+    diagram = clusters.affinity_diagram(max_items=2)
+    assert sorted(theme["name"] for theme in diagram["children"]) == ["Theme 0", "Theme 1", "Theme 2"]
+    theme = diagram["children"][0]
+    assert theme["size"] == 20 and theme["sessions"] == 3 and not theme["label_pending"]
+    assert len(theme["children"]) == 2 and theme["children"][0]["similarity"] > 0.9
+
+    beta = clusters.affinity_diagram({"project": "beta"})
+    assert [theme["name"] for theme in beta["children"]] == ["Theme 0"]
+
+
+def test_ingest_metadata_filters_by_project(tmp_path):
+    clusters = ThemeClusters(str(tmp_path / "clusters.npz"), label_fn=Labeller())
+    ids, vectors, texts, _ = themed_chunks(2, 10)
+    # One session's metadata for all of its chunks, as the ingest job passes it
+    session = {"session_id": "abc", "project": "Checkout", "title": "Interview 1", "status": "completed"}
+    update(clusters, ids, vectors, texts, [session] * len(ids))
+
+    diagram = clusters.affinity_diagram({"project": "Checkout", "session_id": None})
+    assert sum(theme["size"] for theme in diagram["children"]) == 20
+    assert clusters.affinity_diagram({"project": "Other"})["children"] == []
+
+
+def test_new_chunks_join_clusters_and_relabel_only_on_material_change(tmp_path):
+    labeller = Labeller()
+    clusters = ThemeClusters(str(tmp_path / "clusters.npz"), label_fn=labeller)
+    update(clusters, *themed_chunks(3, 20))
+    clusters.refresh_labels()
+    before = {chunk_id: theme_of(clusters, chunk_id) for chunk_id in ("t0:0", "t1:0", "t2:0")}
+
+    # A few chunks per theme: assigned to existing clusters, no recluster or relabel
+    update(clusters, *themed_chunks(3, 2, start=20, seed=1))
+    assert theme_of(clusters, "t1:20") == before["t1:0"]
+    assert clusters.changed_since_fit == 6 and clusters.stale_labels() == []
+
+    # Doubling one theme changes its membership materially
+    ids, vectors, texts, metadatas = themed_chunks(1, 20, start=22, seed=2)
+    update(clusters, ids, vectors, texts, metadatas)
+    assert clusters.stale_labels() == [before["t0:0"]]
+    clusters.refresh_labels()
+    assert len(labeller.calls) == 4
+
+    clusters.remove([f"t2:{n}" for n in range(22)])
+    assert before["t2:0"] not in clusters.cluster_ids and before["t2:0"] not in clusters.labels
+
+
+def test_outliers_trigger_a_recluster_that_keeps_cluster_ids(tmp_path):
+    clusters = ThemeClusters(str(tmp_path / "clusters.npz"), label_fn=Labeller())
+    update(clusters, *themed_chunks(2, 20))
+    kept = theme_of(clusters, "t0:0")
+
+    ids, vectors, texts, metadatas = themed_chunks(3, 20, seed=3)
+    update(clusters, ids[40:], vectors[40:], texts[40:], metadatas[40:])
+    assert len(clusters.cluster_ids) == 3 and clusters.changed_since_fit == 0
+    assert theme_of(clusters, "t0:0") == kept and theme_of(clusters, "t2:0") not in (-1, kept)
+
+
+def test_recluster_runs_in_the_background_and_saves_are_batched(tmp_path):
+    path = tmp_path / "clusters.npz"
+    clusters = ThemeClusters(str(path), label_fn=Labeller())
+    release = threading.Event()
+    fit = clusters._fit
+    clusters._fit = lambda vectors: release.wait(5) and fit(vectors)
+
+    thread = clusters.update(*themed_chunks(2, 20))
+    assert thread is not None and clusters.cluster_ids == []
+    # Labels asked for during the recluster are refreshed once it finishes
+    assert clusters.refresh_labels_in_background() is None
+    release.set()
+    thread.join()
+    deadline = time.monotonic() + 5
+    while len(clusters.labels) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert len(clusters.labels) == 2
+
+    update(clusters, *themed_chunks(2, 1, start=20, seed=1))
+    assert not path.exists()
+    clusters.flush()
+    assert ThemeClusters(str(path)).ids == clusters.ids
+
+
+def test_state_persists(tmp_path):
+    path = str(tmp_path / "clusters.npz")
+    clusters = ThemeClusters(path, label_fn=Labeller())
+    update(clusters, *themed_chunks(2, 10))
+    clusters.refresh_labels()
+    clusters.flush()
+
+    reloaded = ThemeClusters(path, label_fn=Labeller())
+    assert reloaded.cluster_ids == clusters.cluster_ids and reloaded.labels == clusters.labels
+    assert reloaded.stale_labels() == []
+    assert reloaded.affinity_diagram() == clusters.affinity_diagram()
@@ -0,0 +1,124 @@
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("chromadb")
+pytest.importorskip("langchain")
+pytest.importorskip("langchain_openai")
+
+import transcript_processor
+from transcript_processor import TranscriptProcessor, chunk_document_id
+
+
+class FakeEmbeddingFunction:
+    def __call__(self, input):
+        return [[float(len(text)), 1.0, 0.0] for text in input]
+
+    def embed_query(self, input):
+        return self(input)
+
+    def name(self):
+        return "fake"
+
+
+class FakeLLM:
+    """Async LLM stub that sleeps per call and records the peak concurrency."""
+
+    def __init__(self, delay=0.05, fail_first=0):
+        self.delay = delay
+        self.fail_first = fail_first
+        self.calls = 0
+        self.active = 0
+        self.max_active = 0
+
+    async def ainvoke(self, messages):
+        self.calls += 1
+        if self.calls <= self.fail_first:
+            raise type("RateLimitError", (Exception,), {})("slow down")
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await asyncio.sleep(self.delay)
+        self.active -= 1
+        return SimpleNamespace(content=json.dumps({"themes": ["pricing"], "sentiment": "negative"}))
+
+
+class FakeSplitter:
+    def split_text(self, text):
+        return [line for line in text.split("\n") if line]
+
+
+@pytest.fixture
+def processor(tmp_path, monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    processor = TranscriptProcessor(persist_directory=str(tmp_path / "chroma"), tagging_concurrency=8)
+    processor.collection = processor.client.get_or_create_collection(
+        "test_transcripts", embedding_function=FakeEmbeddingFunction(), metadata={"hnsw:space": "cosine"}
+    )
+    processor.text_splitter = FakeSplitter()
+    processor.llm = FakeLLM()
+    return processor
+
+
+def transcript(session_id, lines):
+    return [{"session_id": session_id, "content": line} for line in lines]
+
+
+def test_chunks_are_tagged_concurrently(processor):
+    lines = [f"Pricing complaint number {i}" for i in range(40)]
+    start = time.perf_counter()
+    asyncio.run(processor.process_transcript(transcript("s1", lines)))
+    elapsed = time.perf_counter() - start
+
+    assert processor.llm.max_active == 8
+    # 40 calls of 50 ms, 8 at a time, take about 5 rounds rather than 2 s
+    assert elapsed < 1.0
+    stored = processor.collection.get(where={"session_id": "s1"})
+    assert sorted(stored["ids"]) == sorted(chunk_document_id("s1", i, line) for i, line in enumerate(lines))
+    assert {meta["sentiment"] for meta in stored["metadatas"]} == {"negative"}
+
+
+def test_reprocessing_upserts_and_drops_stale_chunks(processor):
+    asyncio.run(processor.process_transcript(transcript("s1", ["first", "second", "third"])))
+    asyncio.run(processor.process_transcript(transcript("s2", ["first"])))
+    asyncio.run(processor.process_transcript(transcript("s1", ["first", "second changed"])))
+
+    stored = processor.collection.get(where={"session_id": "s1"})
+    assert sorted(stored["documents"]) == ["first", "second changed"]
+    assert processor.collection.count() == 3
+    assert processor.lexical_index.search("third") == []
+
+
+def test_transcripts_without_session_id_keep_each_others_chunks(processor):
+    asyncio.run(processor.process_transcript([{"content": "first upload"}]))
+    asyncio.run(processor.process_transcript([{"content": "second upload"}]))
+    # A chunk with this session's metadata that it did not generate
+    processor.collection.add(ids=["imported-1"], documents=["imported"], metadatas=[{"session_id": "s1"}])
+    asyncio.run(processor.process_transcript(transcript("s1", ["first"])))
+
+    assert sorted(processor.collection.get(where={"session_id": "unknown"})["documents"]) == [
+        "first upload", "second upload"
+    ]
+    assert processor.collection.get(ids=["imported-1"])["ids"] == ["imported-1"]
+
+
+def test_vector_scores_are_similarities(processor):
+    asyncio.run(processor.process_transcript(transcript("s1", ["short", "a much longer answer"])))
+
+    hits = processor.hybrid_search("short", n_results=2, where={"session_id": "s1"}, mode="vector")
+
+    assert [hit["text"] for hit in hits] == ["short", "a much longer answer"]
+    assert all(hit["score"] == pytest.approx(1.0 - hit["distance"]) for hit in hits)
+    assert hits[0]["score"] > hits[1]["score"]
+
+
+def test_rate_limited_calls_are_retried(processor, monkeypatch):
+    monkeypatch.setattr(transcript_processor, "TAGGING_RETRY_DELAY", 0.01)
+    processor.llm = FakeLLM(delay=0, fail_first=2)
+
+    asyncio.run(processor.process_transcript(transcript("s1", ["pricing is confusing"])))
+
+    assert processor.llm.calls == 3
+    assert processor.collection.get()["metadatas"][0]["themes"] == "pricing"
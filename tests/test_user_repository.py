@@ -0,0 +1,50 @@
+import pytest
+
+pytest.importorskip("flask_login")
+
+from models.user import User, UserRepository
+import serialization
+
+
+@pytest.fixture
+def repo(tmp_path):
+    return UserRepository(data_dir=str(tmp_path))
+
+
+def test_lookups_use_indexes(repo):
+    user = User(username="Pat", email="Pat@Example.com")
+    assert repo.add_user(user)
+    assert not repo.add_user(User(username="pat"))
+
+    assert repo.get_user_by_id(user.id).username == "Pat"
+    assert repo.get_user_by_username("PAT").id == user.id
+    assert repo.get_user_by_email("pat@example.com").id == user.id
+
+    user.username = "Sam"
+    repo.save_user(user)
+    assert repo.get_user_by_username("pat") is None
+    assert repo.get_user_by_username("sam").id == user.id
+
+    assert repo.delete_user(user.id)
+    assert repo.get_user_by_email("pat@example.com") is None
+    assert repo.users == {}
+
+
+def test_reloads_files_changed_by_other_processes(tmp_path, repo):
+    other = UserRepository(data_dir=str(tmp_path))
+    user = User(username="pat", role="user")
+    other.add_user(user)
+    assert repo.get_user_by_username("pat").role == "user"
+
+    user.role = "admin"
+    other.save_user(user)
+    assert repo.get_user_by_id(user.id).role == "admin"
+
+    other.delete_user(user.id)
+    assert repo.get_user_by_id(user.id) is None
+
+
+def test_get_instance_is_shared_per_directory(tmp_path):
+    first = UserRepository.get_instance(str(tmp_path))
+    assert UserRepository.get_instance(str(tmp_path)) is first
+    assert UserRepository.get_instance(str(tmp_path / "other")) is not first
@@ -0,0 +1,103 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from vector_index import BACKENDS, create_vector_index
+
+BACKEND_MODULES = {"numpy": "numpy", "faiss": "faiss", "chroma": "chromadb", "qdrant": "qdrant_client"}
+
+
+@pytest.fixture(params=BACKENDS)
+def index(request):
+    pytest.importorskip(BACKEND_MODULES[request.param])
+    return create_vector_index(request.param, 8)
+
+
+def vectors(count, seed=0):
+    return np.random.default_rng(seed).normal(size=(count, 8)).astype("float32")
+
+
+def test_upsert_query_and_delete(index):
+    data = vectors(20)
+    ids = [f"s{i % 2}:{i}" for i in range(20)]
+    index.upsert(ids, data, [{"session_id": f"s{i % 2}", "chunk": i} for i in range(20)])
+    assert len(index) == 20
+
+    best = index.query(data[3], k=3)[0]
+    assert best[0]["id"] == "s1:3" and best[0]["score"] == pytest.approx(1.0, abs=1e-4)
+    assert best[0]["metadata"] == {"session_id": "s1", "chunk": 3}
+    assert [hit["score"] for hit in best] == sorted((hit["score"] for hit in best), reverse=True)
+
+    # Replacing a vector moves its ID; deleting removes it
+    index.upsert(["s1:3"], [data[4]], [{"session_id": "s1", "chunk": 3}])
+    index.delete(["s0:4", "missing"])
+    assert len(index) == 19
+    assert index.query(data[4], k=1)[0][0]["id"] == "s1:3"
+
+
+def test_filters(index):
+    data = vectors(30, seed=1)
+    index.upsert([str(i) for i in range(30)], data,
+                 [{"session_id": f"s{i % 3}", "speaker": "participant" if i % 2 else "interviewer"} for i in range(30)])
+
+    hits = index.query(data[:2], k=5, filters={"session_id": "s2", "speaker": "interviewer", "emotion": None})
+    for row in hits:
+        assert row and all(int(hit["id"]) % 6 == 2 for hit in row)
+    assert hits[1][0]["id"] != "1"
+
+
+def test_results_match_exact_baseline(index):
+    data = vectors(200, seed=2)
+    ids = [str(i) for i in range(200)]
+    exact = create_vector_index("numpy", 8)
+    for target in (index, exact):
+        target.upsert(ids, data)
+
+    queries = vectors(5, seed=3)
+    for found, expected in zip(index.query(queries, k=5), exact.query(queries, k=5)):
+        assert [hit["id"] for hit in found][:3] == [hit["id"] for hit in expected][:3]
+        assert found[0]["score"] == pytest.approx(expected[0]["score"], abs=1e-4)
+
+
+@pytest.mark.parametrize("backend", ["numpy", "faiss"])
+def test_persist_round_trip(tmp_path, backend):
+    pytest.importorskip(BACKEND_MODULES[backend])
+    path = str(tmp_path / "index")
+    index = create_vector_index(backend, 8, path=path)
+    data = vectors(10, seed=4)
+    index.upsert([str(i) for i in range(10)], data, [{"n": i} for i in range(10)])
+    index.persist()
+    assert index.disk_bytes() > 0
+
+    loaded = create_vector_index(backend, 8, path=path)
+    assert len(loaded) == 10
+    assert loaded.query(data[7], k=1)[0][0] == {"id": "7", "score": pytest.approx(1.0, abs=1e-4), "metadata": {"n": 7}}
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        create_vector_index("annoy", 8)
+
+
+@pytest.mark.parametrize("precision,rescore", [("float16", False), ("int8", False), ("int8", True)])
+def test_quantized_numpy_index(tmp_path, precision, rescore):
+    path = str(tmp_path / "index")
+    data = vectors(300, seed=5)
+    index = create_vector_index("numpy", 8, path=path, precision=precision, rescore=rescore)
+    exact = create_vector_index("numpy", 8)
+    for target in (index, exact):
+        target.upsert([str(i) for i in range(300)], data)
+    assert index.memory_bytes() < exact.memory_bytes() / (1.9 if precision == "float16" else 2.5)
+
+    queries = vectors(10, seed=6)
+    found, expected = index.query(queries, k=5), exact.query(queries, k=5)
+    overlap = sum(len({hit["id"] for hit in f} & {hit["id"] for hit in e}) for f, e in zip(found, expected))
+    assert overlap >= 45
+    if rescore:
+        assert found[0][0]["score"] == pytest.approx(expected[0][0]["score"], abs=1e-6)
+
+    index.delete(["0", "1"])
+    index.persist()
+    loaded = create_vector_index("numpy", 8, path=path, rescore=rescore)
+    assert loaded.precision == precision and len(loaded) == 298
+    assert loaded.query(data[2], k=1)[0][0]["id"] == "2"
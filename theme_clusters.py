@@ -0,0 +1,602 @@
+"""
+Cross-session theme clusters over the embeddings of ingested chunks.
+
+Chunks from every session are grouped with spherical k-means (cosine
+similarity), with k chosen automatically by the silhouette score of a
+sample. Clustering is incremental:
+
+- New chunks join the cluster with the most similar centroid, whose running
+  mean is updated; chunks not similar enough to any centroid stay
+  unclustered until the next full pass.
+- The corpus is reclustered once the chunks added or left unclustered since
+  the last pass exceed ``recluster_fraction`` of it. New clusters keep the
+  ID (and label) of the old cluster they mostly overlap, so a recluster does
+  not relabel everything. The expensive part (choosing k and running
+  k-means) runs on a background thread over a copy of the vectors; only
+  reassigning the current chunks to the new centroids holds the lock.
+
+Each cluster is labelled once from its most central chunks, and the label
+is cached with the membership it was generated for. ``refresh_labels``
+calls the labeller again only for clusters whose membership has since
+changed materially (Jaccard similarity below ``1 - relabel_threshold``), so
+``affinity_diagram`` serves precomputed clusters without any LLM call.
+
+Changes are written to disk at most every ``save_interval`` seconds (and by
+``flush``, which runs at exit), not once per ingested batch.
+"""
+
+import atexit
+import io
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from serialization import dumpb, loads
+
+logger = logging.getLogger(__name__)
+
+CLUSTERS_PATH_ENV = "DARIA_THEME_CLUSTERS_PATH"
+DEFAULT_CLUSTERS_PATH = os.path.join("data", "themes", "clusters.npz")
+# Chunk metadata kept for filtering the diagram
+METADATA_FIELDS = ("session_id", "project", "speaker")
+# Chunks less similar than this to every centroid stay unclustered
+MIN_SIMILARITY = 0.3
+# Added or unclustered chunks, as a fraction of the corpus, that trigger a recluster
+RECLUSTER_FRACTION = 0.25
+# Membership change (1 - Jaccard similarity) that makes a label stale
+RELABEL_THRESHOLD = 0.3
+MAX_CLUSTERS = 30
+# Seconds between writes of a changed state
+SAVE_INTERVAL = 30.0
+# Points used to choose k
+SAMPLE_SIZE = 2000
+# Below this best silhouette score the corpus is treated as one theme
+MIN_SILHOUETTE = 0.05
+KMEANS_ITERATIONS = 50
+EXEMPLARS = 5
+LABEL_PROMPT = (
+    "These excerpts from user research interviews were grouped together as one theme. "
+    "Reply with a short name for the theme (2-6 words) and nothing else."
+)
+
+
+def openai_label(texts: List[str]) -> str:
+    """Name a theme from its most central excerpts with the OpenAI API (the default labeller)."""
+    import openai
+    client = openai.OpenAI()
+    response = client.chat.completions.create(
+        model="gpt-4",
+        messages=[
+            {"role": "system", "content": LABEL_PROMPT},
+            {"role": "user", "content": "\n\n".join(f"- {text}" for text in texts)}
+        ],
+        temperature=0,
+        max_tokens=20
+    )
+    return response.choices[0].message.content.strip().strip('"')
+
+
+def _normalize(vectors) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        vectors = vectors.reshape(1, -1)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1.0, norms)
+
+
+def _jaccard(a, b) -> float:
+    a, b = set(a), set(b)
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+
+def spherical_kmeans(vectors: np.ndarray, k: int, seed: int = 42, init: Optional[np.ndarray] = None):
+    """k-means on normalized vectors by cosine similarity.
+
+    Args:
+        vectors (np.ndarray): (n, dimension) normalized vectors
+        k (int): Number of clusters
+        seed (int): Seed for the k-means++ initialization
+        init (np.ndarray, optional): Initial centroids instead of k-means++
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: (n,) cluster numbers and (k, dimension)
+            normalized centroids
+    """
+    rng = np.random.default_rng(seed)
+    if init is None:
+        centroids = [vectors[rng.integers(len(vectors))]]
+        distance = 1.0 - vectors @ centroids[0]
+        for _ in range(1, k):
+            weights = np.clip(distance, 0, None) ** 2
+            total = weights.sum()
+            row = rng.choice(len(vectors), p=weights / total) if total > 0 else rng.integers(len(vectors))
+            centroids.append(vectors[row])
+            distance = np.minimum(distance, 1.0 - vectors @ vectors[row])
+        centroids = np.array(centroids)
+    else:
+        centroids = np.array(init, dtype=np.float32)
+
+    assignments = None
+    for _ in range(KMEANS_ITERATIONS):
+        new_assignments = np.argmax(vectors @ centroids.T, axis=1)
+        if assignments is not None and np.array_equal(new_assignments, assignments):
+            break
+        assignments = new_assignments
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, vectors)
+        # An emptied cluster keeps its previous centroid
+        empty = ~sums.any(axis=1)
+        sums[empty] = centroids[empty]
+        centroids = _normalize(sums)
+    return assignments, centroids
+
+
+def silhouette(vectors: np.ndarray, assignments: np.ndarray) -> float:
+    """Mean silhouette score of a clustering, by cosine distance."""
+    clusters = np.unique(assignments)
+    if len(clusters) < 2:
+        return -1.0
+    distances = 1.0 - vectors @ vectors.T
+    one_hot = (assignments[:, None] == clusters[None, :]).astype(np.float32)
+    counts = one_hot.sum(axis=0)
+    sums = distances @ one_hot
+    own = np.searchsorted(clusters, assignments)
+    rows = np.arange(len(vectors))
+    own_counts = counts[own] - 1
+    a = np.where(own_counts > 0, sums[rows, own] / np.maximum(own_counts, 1), 0.0)
+    means = sums / counts
+    means[rows, own] = np.inf
+    b = means.min(axis=1)
+    scores = np.where(own_counts > 0, (b - a) / np.maximum(np.maximum(a, b), 1e-12), 0.0)
+    return float(scores.mean())
+
+
+class ThemeClusters:
+    """Incrementally maintained theme clusters with cached labels."""
+
+    def __init__(self, path: Optional[str] = None, label_fn: Callable[[List[str]], str] = openai_label,
+                 min_similarity: float = MIN_SIMILARITY, recluster_fraction: float = RECLUSTER_FRACTION,
+                 relabel_threshold: float = RELABEL_THRESHOLD, max_clusters: int = MAX_CLUSTERS,
+                 save_interval: float = SAVE_INTERVAL):
+        self.path = path
+        self.label_fn = label_fn
+        self.min_similarity = min_similarity
+        self.recluster_fraction = recluster_fraction
+        self.relabel_threshold = relabel_threshold
+        self.max_clusters = max_clusters
+        self.save_interval = save_interval
+        self.ids: List[str] = []
+        self.vectors = np.zeros((0, 0), dtype=np.float32)
+        self.assignments = np.zeros(0, dtype=np.int64)
+        # chunk ID -> {"text": ..., plus METADATA_FIELDS}
+        self.chunks: Dict[str, Dict] = {}
+        # cluster ID -> {"label": ..., "members": IDs the label was generated for}
+        self.labels: Dict[int, Dict] = {}
+        self.changed_since_fit = 0
+        self._row_of: Dict[str, int] = {}
+        self._sums: Dict[int, np.ndarray] = {}
+        self._next_cluster = 0
+        self._lock = threading.RLock()
+        # Serializes writers, so an older state never replaces a newer one
+        self._save_lock = threading.Lock()
+        self._save_timer = None
+        self._dirty = False
+        self._labelling = False
+        self._reclustering = False
+        # A label refresh asked for while a recluster was running
+        self._labels_requested = False
+        if path and os.path.exists(path):
+            self._load(path)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def cluster_ids(self) -> List[int]:
+        return sorted(self._sums)
+
+    def update(self, ids: Sequence[str], embeddings, texts: Sequence[str],
+               metadatas: Optional[Sequence[Dict]] = None) -> Optional[threading.Thread]:
+        """Add (or replace) chunks and schedule a save.
+
+        Returns:
+            Optional[threading.Thread]: The background recluster started
+                because enough has changed, if any
+        """
+        with self._lock:
+            self.add(ids, embeddings, texts, metadatas)
+            self._schedule_save()
+            if self.needs_recluster():
+                return self.recluster_in_background()
+        return None
+
+    def add(self, ids: Sequence[str], embeddings, texts: Sequence[str],
+            metadatas: Optional[Sequence[Dict]] = None) -> None:
+        """Assign chunks to the nearest existing clusters."""
+        vectors = _normalize(embeddings)
+        metadatas = metadatas or [{}] * len(ids)
+        with self._lock:
+            if not self.ids:
+                self.vectors = np.zeros((0, vectors.shape[1]), dtype=np.float32)
+            new_rows = []
+            for chunk_id, vector, text, metadata in zip(ids, vectors, texts, metadatas):
+                chunk_id = str(chunk_id)
+                self.chunks[chunk_id] = {"text": text, **{field: metadata.get(field) for field in METADATA_FIELDS}}
+                row = self._row_of.get(chunk_id)
+                if row is None:
+                    self._row_of[chunk_id] = len(self.ids) + len(new_rows)
+                    new_rows.append((chunk_id, vector))
+                    continue
+                self._leave(row)
+                self.vectors[row] = vector
+                self._join(row, self._nearest(vector))
+            if new_rows:
+                start = len(self.ids)
+                self.ids.extend(chunk_id for chunk_id, _ in new_rows)
+                self.vectors = np.vstack([self.vectors, np.array([vector for _, vector in new_rows])])
+                self.assignments = np.concatenate([self.assignments, np.full(len(new_rows), -1)])
+                for row in range(start, len(self.ids)):
+                    self._join(row, self._nearest(self.vectors[row]))
+            self.changed_since_fit += len(ids)
+
+    def remove(self, ids: Sequence[str]) -> None:
+        """Drop chunks; clusters left empty are dropped with their labels."""
+        with self._lock:
+            rows = [self._row_of[str(chunk_id)] for chunk_id in ids if str(chunk_id) in self._row_of]
+            if not rows:
+                return
+            for row in rows:
+                self._leave(row)
+            keep = np.ones(len(self.ids), dtype=bool)
+            keep[rows] = False
+            self.ids = [chunk_id for chunk_id, kept in zip(self.ids, keep) if kept]
+            self.vectors = self.vectors[keep]
+            self.assignments = self.assignments[keep]
+            self._row_of = {chunk_id: row for row, chunk_id in enumerate(self.ids)}
+            for chunk_id in ids:
+                self.chunks.pop(str(chunk_id), None)
+            self.changed_since_fit += len(rows)
+            self._schedule_save()
+
+    def needs_recluster(self) -> bool:
+        if not self.ids:
+            return False
+        if not self._sums:
+            return True
+        unclustered = int(np.count_nonzero(self.assignments < 0))
+        return max(self.changed_since_fit, unclustered) > self.recluster_fraction * len(self.ids)
+
+    def recluster(self) -> None:
+        """Recluster every chunk, keeping the IDs of clusters that survive."""
+        with self._lock:
+            if not self.ids:
+                return
+            vectors = self.vectors.copy()
+            changed = self.changed_since_fit
+        self._apply_fit(self._fit(vectors), changed)
+
+    def recluster_in_background(self) -> Optional[threading.Thread]:
+        """Run ``recluster`` on a daemon thread, unless one is already running."""
+        with self._lock:
+            if self._reclustering:
+                return None
+            self._reclustering = True
+
+        def run():
+            try:
+                self.recluster()
+            except Exception as e:
+                logger.error(f"Error reclustering themes: {str(e)}")
+            finally:
+                with self._lock:
+                    self._reclustering = False
+                    relabel, self._labels_requested = self._labels_requested, False
+            if relabel:
+                self.refresh_labels_in_background()
+
+        thread = threading.Thread(target=run, name="theme-recluster", daemon=True)
+        thread.start()
+        return thread
+
+    def _fit(self, vectors: np.ndarray) -> np.ndarray:
+        """Centroids of a new clustering of ``vectors`` (no lock needed)."""
+        k, init = self._choose_k(vectors)
+        if k == 1:
+            return _normalize(vectors.sum(axis=0))
+        return spherical_kmeans(vectors, k, init=init)[1]
+
+    def _apply_fit(self, centroids: np.ndarray, changed: int) -> None:
+        """Assign the current chunks to new centroids, keeping the IDs of clusters that survive.
+
+        Chunks added while the centroids were computed are assigned like the
+        rest, but still count as changed since the fit.
+        """
+        with self._lock:
+            if not self.ids:
+                return
+            similarities = self.vectors @ centroids.T
+            assignments = np.argmax(similarities, axis=1)
+            best = similarities[np.arange(len(self.ids)), assignments]
+            assignments = np.where(best >= self.min_similarity, assignments, -1)
+
+            previous = {cluster_id: set(np.flatnonzero(self.assignments == cluster_id)) for cluster_id in self._sums}
+            renamed = np.full(len(self.ids), -1, dtype=np.int64)
+            taken = set()
+            for cluster in np.unique(assignments[assignments >= 0]):
+                members = set(np.flatnonzero(assignments == cluster))
+                overlaps = [(_jaccard(members, rows), cluster_id) for cluster_id, rows in previous.items()
+                            if cluster_id not in taken]
+                best_overlap = max(overlaps, default=(0.0, None))
+                if best_overlap[0] >= 0.5:
+                    cluster_id = best_overlap[1]
+                else:
+                    cluster_id = self._next_cluster
+                    self._next_cluster += 1
+                taken.add(cluster_id)
+                renamed[list(members)] = cluster_id
+
+            self.assignments = renamed
+            self._rebuild_sums()
+            self.labels = {cluster_id: label for cluster_id, label in self.labels.items() if cluster_id in self._sums}
+            self.changed_since_fit = max(self.changed_since_fit - changed, 0)
+            self._schedule_save()
+            logger.info(f"Reclustered {len(self.ids)} chunks into {len(self._sums)} themes")
+
+    def members(self, cluster_id: int) -> List[str]:
+        return [self.ids[row] for row in np.flatnonzero(self.assignments == cluster_id)]
+
+    def stale_labels(self) -> List[int]:
+        """Clusters without a label, or whose membership changed materially since labelling."""
+        with self._lock:
+            return [
+                cluster_id for cluster_id in self.cluster_ids
+                if cluster_id not in self.labels
+                or _jaccard(self.members(cluster_id), self.labels[cluster_id]["members"]) < 1 - self.relabel_threshold
+            ]
+
+    def refresh_labels(self) -> int:
+        """Label the clusters with stale labels; returns the number relabelled."""
+        with self._lock:
+            pending = [(cluster_id, self.members(cluster_id), self.exemplars(cluster_id))
+                       for cluster_id in self.stale_labels()]
+        labelled = 0
+        for cluster_id, members, exemplars in pending:
+            try:
+                label = self.label_fn([self.chunks[chunk_id]["text"] for chunk_id, _ in exemplars])
+            except Exception as e:
+                logger.error(f"Error labelling theme {cluster_id}: {str(e)}")
+                continue
+            with self._lock:
+                if cluster_id in self._sums:
+                    self.labels[cluster_id] = {"label": label, "members": members}
+                    labelled += 1
+        if labelled:
+            with self._lock:
+                self._schedule_save()
+        return labelled
+
+    def refresh_labels_in_background(self) -> Optional[threading.Thread]:
+        """Run ``refresh_labels`` on a daemon thread, unless one is already running.
+
+        While a recluster is running, the refresh is deferred until it ends.
+        """
+        with self._lock:
+            if self._reclustering:
+                self._labels_requested = True
+                return None
+            if self._labelling or not self.stale_labels():
+                return None
+            self._labelling = True
+
+        def run():
+            try:
+                self.refresh_labels()
+            finally:
+                with self._lock:
+                    self._labelling = False
+
+        thread = threading.Thread(target=run, name="theme-labels", daemon=True)
+        thread.start()
+        return thread
+
+    def exemplars(self, cluster_id: int, count: int = EXEMPLARS, rows: Optional[np.ndarray] = None):
+        """The (chunk ID, similarity) pairs closest to the cluster centroid."""
+        if rows is None:
+            rows = np.flatnonzero(self.assignments == cluster_id)
+        if not len(rows):
+            return []
+        similarities = self.vectors[rows] @ _normalize(self._sums[cluster_id])[0]
+        best = np.argsort(-similarities, kind="stable")[:count]
+        return [(self.ids[rows[i]], float(similarities[i])) for i in best]
+
+    def affinity_diagram(self, filters: Optional[Dict] = None, max_items: int = 10) -> Dict:
+        """Precomputed themes in the affinity diagram format of UXAnalyzer.
+
+        Args:
+            filters (dict, optional): Chunk metadata to match, e.g.
+                {"project": ...}; None values are ignored
+            max_items (int): Most central chunks listed per theme
+
+        Returns:
+            dict: {"name", "children": [theme, ...]}, largest themes first; a
+                theme without a label yet has "label_pending": True
+        """
+        filters = {field: value for field, value in (filters or {}).items() if value is not None}
+        with self._lock:
+            matching = np.array([
+                all(self.chunks[chunk_id].get(field) == value for field, value in filters.items())
+                for chunk_id in self.ids
+            ], dtype=bool)
+            stale = set(self.stale_labels())
+            themes = []
+            for cluster_id in self.cluster_ids:
+                rows = np.flatnonzero((self.assignments == cluster_id) & matching)
+                if not len(rows):
+                    continue
+                label = self.labels.get(cluster_id)
+                sessions = {self.chunks[self.ids[row]].get("session_id") for row in rows}
+                themes.append({
+                    "id": cluster_id,
+                    "name": label["label"] if label else f"Theme {cluster_id}",
+                    "label_pending": cluster_id in stale,
+                    "size": int(len(rows)),
+                    "sessions": len(sessions - {None}),
+                    "children": [
+                        {
+                            "id": chunk_id,
+                            "name": self.chunks[chunk_id]["text"],
+                            "session_id": self.chunks[chunk_id].get("session_id"),
+                            "similarity": similarity
+                        }
+                        for chunk_id, similarity in self.exemplars(cluster_id, max_items, rows)
+                    ]
+                })
+            unclustered = int(np.count_nonzero((self.assignments < 0) & matching))
+        themes.sort(key=lambda theme: -theme["size"])
+        return {"name": "Research Themes", "children": themes, "unclustered": unclustered}
+
+    def save(self, path: Optional[str] = None) -> None:
+        """Write the chunks, assignments and labels to one file, replacing it atomically."""
+        path = path or self.path
+        if not path:
+            return
+        with self._save_lock:
+            # Copy the state under the lock; the slow write happens outside it
+            with self._lock:
+                if path == self.path:
+                    self._dirty = False
+                payload = {
+                    "vectors": self.vectors.copy(),
+                    "assignments": self.assignments.copy(),
+                    "meta": np.frombuffer(dumpb({
+                        "ids": self.ids,
+                        "chunks": self.chunks,
+                        "labels": [[cluster_id, label] for cluster_id, label in self.labels.items()],
+                        "next_cluster": self._next_cluster,
+                        "changed_since_fit": self.changed_since_fit
+                    }), dtype="uint8")
+                }
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+                tmp_path = f"{path}.tmp"
+                with open(tmp_path, "wb") as f:
+                    np.savez(f, **payload)
+                os.replace(tmp_path, path)
+            except Exception:
+                if path == self.path:
+                    with self._lock:
+                        self._dirty = True
+                raise
+
+    def flush(self) -> None:
+        """Save now if anything changed since the last save."""
+        with self._lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+                self._save_timer = None
+            if not self._dirty:
+                return
+        self.save()
+
+    def _schedule_save(self) -> None:
+        """Mark the state changed and save it within ``save_interval`` seconds (call with the lock held)."""
+        self._dirty = True
+        if not self.path or self._save_timer is not None:
+            return
+        self._save_timer = threading.Timer(self.save_interval, self._save_on_timer)
+        self._save_timer.daemon = True
+        self._save_timer.start()
+
+    def _save_on_timer(self) -> None:
+        with self._lock:
+            self._save_timer = None
+            if not self._dirty:
+                return
+        try:
+            self.save()
+        except Exception as e:
+            logger.error(f"Error saving theme clusters: {str(e)}")
+
+    def _load(self, path: str) -> None:
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            with np.load(io.BytesIO(data), allow_pickle=False) as bundle:
+                meta = loads(bundle["meta"].tobytes())
+                self.vectors = bundle["vectors"].astype(np.float32)
+                self.assignments = bundle["assignments"].astype(np.int64)
+        except Exception as e:
+            logger.error(f"Error loading theme clusters from {path}: {str(e)}")
+            return
+        self.ids = meta["ids"]
+        self.chunks = meta["chunks"]
+        self.labels = {int(cluster_id): label for cluster_id, label in meta["labels"]}
+        self._next_cluster = meta["next_cluster"]
+        self.changed_since_fit = meta["changed_since_fit"]
+        self._row_of = {chunk_id: row for row, chunk_id in enumerate(self.ids)}
+        self._rebuild_sums()
+
+    def _choose_k(self, vectors: np.ndarray):
+        """k with the best silhouette on a sample, and centroids to start from."""
+        count = len(vectors)
+        max_k = min(self.max_clusters, int(np.sqrt(count)), count - 1)
+        if max_k < 2:
+            return 1, None
+        rng = np.random.default_rng(42)
+        sample = vectors[rng.choice(count, size=SAMPLE_SIZE, replace=False)] if count > SAMPLE_SIZE else vectors
+        best = (MIN_SILHOUETTE, 1, None)
+        for k in range(2, max_k + 1):
+            assignments, centroids = spherical_kmeans(sample, k)
+            score = silhouette(sample, assignments)
+            if score > best[0]:
+                best = (score, k, centroids)
+        return best[1], best[2]
+
+    def _nearest(self, vector: np.ndarray) -> int:
+        if not self._sums:
+            return -1
+        cluster_ids = self.cluster_ids
+        similarities = _normalize(np.array([self._sums[cluster_id] for cluster_id in cluster_ids])) @ vector
+        best = int(np.argmax(similarities))
+        return cluster_ids[best] if similarities[best] >= self.min_similarity else -1
+
+    def _join(self, row: int, cluster_id: int) -> None:
+        self.assignments[row] = cluster_id
+        if cluster_id >= 0:
+            self._sums[cluster_id] = self._sums[cluster_id] + self.vectors[row]
+
+    def _leave(self, row: int) -> None:
+        cluster_id = int(self.assignments[row])
+        self.assignments[row] = -1
+        if cluster_id < 0:
+            return
+        if not np.any(self.assignments == cluster_id):
+            del self._sums[cluster_id]
+            self.labels.pop(cluster_id, None)
+        else:
+            self._sums[cluster_id] = self._sums[cluster_id] - self.vectors[row]
+
+    def _rebuild_sums(self) -> None:
+        self._sums = {}
+        for cluster_id in np.unique(self.assignments[self.assignments >= 0]):
+            self._sums[int(cluster_id)] = self.vectors[self.assignments == cluster_id].sum(axis=0)
+        if self._sums:
+            self._next_cluster = max(self._next_cluster, max(self._sums) + 1)
+
+
+_theme_clusters = None
+_lock = threading.Lock()
+
+
+def get_theme_clusters() -> ThemeClusters:
+    """The theme clusters of all ingested chunks, loaded on first use."""
+    global _theme_clusters
+    with _lock:
+        if _theme_clusters is None:
+            _theme_clusters = ThemeClusters(os.environ.get(CLUSTERS_PATH_ENV, DEFAULT_CLUSTERS_PATH))
+            atexit.register(_theme_clusters.flush)
+        return _theme_clusters
@@ -1,12 +1,15 @@
 import os
+import copy
 import yaml
-import json
 import shutil
+import threading
 from datetime import datetime
 from pathlib import Path
 import logging
 from typing import Dict, List, Optional, Any, Union
 
+import serialization
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -27,6 +30,11 @@ class PromptManager:
     - Creating and versioning prompt templates
     - Evaluating prompt performance
     - Tracking prompt usage and feedback
+    
+    Parsed prompt configs and compiled LangChain templates are cached in
+    memory. Each lookup stats the prompt file and re-parses it only if its
+    mtime or size changed, so edits made on disk (or by another PromptManager)
+    show up without a restart, and save_prompt refreshes the cache directly.
     """
     
     def __init__(self, prompt_dir: str = None, history_dir: str = None):
@@ -48,14 +56,17 @@ class PromptManager:
         # Track feedback for prompts
         self.feedback_file = self.prompt_dir / "feedback.json"
         self._load_feedback()
+        
+        # agent name -> {'stat', 'config', 'templates'}; templates are keyed by version
+        self._prompt_cache = {}
+        self._cache_lock = threading.RLock()
     
     def _load_feedback(self):
         """Load feedback data from JSON file"""
         if self.feedback_file.exists():
             try:
-                with open(self.feedback_file, 'r') as f:
-                    self.feedback = json.load(f)
-            except json.JSONDecodeError:
+                self.feedback = serialization.read_json(self.feedback_file)
+            except serialization.JSONDecodeError:
                 logger.warning(f"Error loading feedback file. Creating new feedback tracking.")
                 self.feedback = []
         else:
@@ -63,8 +74,7 @@ class PromptManager:
     
     def _save_feedback(self):
         """Save feedback data to JSON file"""
-        with open(self.feedback_file, 'w') as f:
-            json.dump(self.feedback, f, indent=2)
+        serialization.write_json(self.feedback_file, self.feedback, atomic=True)
     
     def get_available_agents(self) -> List[str]:
         """
@@ -89,15 +99,66 @@ class PromptManager:
         Raises:
             FileNotFoundError: If the prompt file doesn't exist
         """
-        prompt_file = self.prompt_dir / f"{agent_name.lower()}.yml"
+        return copy.deepcopy(self._cached_prompt(agent_name)['config'])
+    
+    def load_all_prompts(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Load the prompt configurations of all available agents
         
-        if not prompt_file.exists():
+        Returns:
+            Dictionary mapping agent names to their prompt configurations
+        """
+        prompts = {}
+        for agent_name in self.get_available_agents():
+            try:
+                config = self.load_prompt(agent_name)
+            except Exception as e:
+                logger.error(f"Error loading prompt for {agent_name}: {str(e)}")
+                continue
+            if config:
+                prompts[agent_name] = config
+        return prompts
+    
+    def _cached_prompt(self, agent_name: str) -> Dict[str, Any]:
+        """
+        Get the cache entry for an agent, re-parsing the YAML file if it changed
+        
+        Raises:
+            FileNotFoundError: If the prompt file doesn't exist
+        """
+        key = agent_name.lower()
+        prompt_file = self.prompt_dir / f"{key}.yml"
+        
+        try:
+            stat = prompt_file.stat()
+        except FileNotFoundError:
+            with self._cache_lock:
+                self._prompt_cache.pop(key, None)
             raise FileNotFoundError(f"Prompt file not found: {prompt_file}")
+        stat_key = (stat.st_mtime_ns, stat.st_size)
         
-        with open(prompt_file, 'r') as f:
-            config = yaml.safe_load(f)
+        with self._cache_lock:
+            entry = self._prompt_cache.get(key)
+            if entry is None or entry['stat'] != stat_key:
+                with open(prompt_file, 'r') as f:
+                    config = yaml.safe_load(f)
+                entry = {'stat': stat_key, 'config': config, 'templates': {}}
+                self._prompt_cache[key] = entry
+                logger.debug(f"Loaded prompt config for {agent_name} from {prompt_file}")
+            return entry
+    
+    def invalidate_cache(self, agent_name: str = None) -> None:
+        """
+        Drop cached prompt configs and templates
         
-        return config
+        Args:
+            agent_name: Only drop this agent (if None, all agents)
+        """
+        with self._cache_lock:
+            if agent_name is None:
+                self._prompt_cache.clear()
+            else:
+                self._prompt_cache.pop(agent_name.lower(), None)
     
     def save_prompt(self, agent_name: str, config: Dict[str, Any], create_version: bool = True) -> str:
         """
@@ -142,6 +203,15 @@ class PromptManager:
         with open(prompt_file, 'w') as f:
             yaml.dump(config, f, sort_keys=False, default_flow_style=False)
         
+        # Update the cache right away instead of waiting for the mtime check
+        stat = prompt_file.stat()
+        with self._cache_lock:
+            self._prompt_cache[agent_name.lower()] = {
+                'stat': (stat.st_mtime_ns, stat.st_size),
+                'config': copy.deepcopy(config),
+                'templates': {}
+            }
+        
         return str(prompt_file)
     
     def _create_version_backup(self, agent_name: str) -> str:
@@ -457,6 +527,8 @@ class PromptManager:
         """
         Get a LangChain prompt template from the agent configuration
         
+        Compiled templates are cached per agent and prompt version.
+        
         Args:
             agent_name: Name of the agent
             
@@ -469,13 +541,20 @@ class PromptManager:
         except ImportError:
             raise ImportError("LangChain is not installed. Please install it using `pip install langchain`")
         
-        config = self.load_prompt(agent_name)
-        system_message = config.get('dynamic_prompt_prefix', '')
+        with self._cache_lock:
+            entry = self._cached_prompt(agent_name)
+            config = entry['config']
+            version = config.get('version', 'unknown')
+            template = entry['templates'].get(version)
+            if template is None:
+                system_message = config.get('dynamic_prompt_prefix', '')
+                template = ChatPromptTemplate.from_messages([
+                    ("system", system_message),
+                    ("human", "{input}")
+                ])
+                entry['templates'][version] = template
         
-        return ChatPromptTemplate.from_messages([
-            ("system", system_message),
-            ("human", "{input}")
-        ])
+        return template
 
 
 def get_prompt_manager(prompt_dir: str = None, history_dir: str = None) -> PromptManager:
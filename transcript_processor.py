@@ -1,6 +1,9 @@
 import os
 import json
+import asyncio
+import hashlib
 import logging
+import time
 import traceback
 from typing import List, Dict, Any, Optional
 import chromadb
@@ -10,14 +13,68 @@ from langchain_openai import OpenAIEmbeddings
 from langchain_openai import ChatOpenAI
 from langchain.prompts import ChatPromptTemplate
 
+from full_text_index import FullTextIndex
+from hybrid_search import HybridRetriever, chroma_where, filters_from_where
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Chunk metadata hybrid and lexical searches can filter on
+LEXICAL_FILTER_FIELDS = ("session_id", "sentiment", "speaker")
+
+# Concurrent LLM tagging calls per transcript
+TAGGING_CONCURRENCY = int(os.getenv("DARIA_TAGGING_CONCURRENCY", "8"))
+# Optional cap on tagging request starts per minute (0 = no cap)
+TAGGING_REQUESTS_PER_MINUTE = int(os.getenv("DARIA_TAGGING_REQUESTS_PER_MINUTE", "0"))
+# Retries with exponential backoff when the LLM API reports a rate limit
+TAGGING_MAX_RETRIES = 4
+TAGGING_RETRY_DELAY = 2.0
+
+def chunk_document_id(session_id: str, chunk_index: int, content: str) -> str:
+    """Deterministic chunk ID, so re-processing a transcript overwrites its chunks."""
+    content_hash = hashlib.sha256(content.encode("utf-8")).hexdigest()[:16]
+    return f"{session_id}:{chunk_index}:{content_hash}"
+
+def _is_rate_limit_error(error: Exception) -> bool:
+    return getattr(error, "status_code", None) == 429 or "RateLimit" in type(error).__name__
+
+class _RequestPacer:
+    """Spaces out request starts to stay under a requests-per-minute budget."""
+    
+    def __init__(self, requests_per_minute: int):
+        self.interval = 60.0 / requests_per_minute if requests_per_minute > 0 else 0.0
+        self._next_start = 0.0
+        self._lock = asyncio.Lock()
+    
+    async def wait(self) -> None:
+        if not self.interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next_start - now
+            self._next_start = max(now, self._next_start) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
 class TranscriptProcessor:
-    def __init__(self, persist_directory: str = "chroma_db"):
-        """Initialize the transcript processor with ChromaDB and embeddings."""
+    def __init__(
+        self,
+        persist_directory: str = "chroma_db",
+        tagging_concurrency: int = TAGGING_CONCURRENCY,
+        requests_per_minute: int = TAGGING_REQUESTS_PER_MINUTE
+    ):
+        """Initialize the transcript processor with ChromaDB and embeddings.
+        
+        Args:
+            persist_directory (str): ChromaDB storage directory
+            tagging_concurrency (int): Maximum LLM tagging calls in flight
+            requests_per_minute (int): Cap on tagging request starts per
+                minute; 0 for no cap
+        """
         self.persist_directory = persist_directory
+        self.tagging_concurrency = max(1, tagging_concurrency)
+        self.requests_per_minute = requests_per_minute
         
         # Initialize ChromaDB client
         self.client = chromadb.PersistentClient(
@@ -33,6 +90,12 @@ class TranscriptProcessor:
             metadata={"hnsw:space": "cosine"}
         )
         
+        # BM25 index over the same chunks (keyed by the ChromaDB IDs) for hybrid search
+        self.lexical_index = FullTextIndex(
+            os.path.join(persist_directory, "lexical.db"), ("text",), attributes=LEXICAL_FILTER_FIELDS
+        )
+        self.retriever = HybridRetriever(self.lexical_index, self._vector_search, LEXICAL_FILTER_FIELDS)
+        
         # Initialize embeddings
         self.embeddings = OpenAIEmbeddings()
         
@@ -57,13 +120,24 @@ class TranscriptProcessor:
             ("human", "{chunk}")
         ])
     
-    async def _generate_tags(self, chunk: str) -> dict:
+    async def _generate_tags(self, chunk: str, pacer: Optional[_RequestPacer] = None) -> dict:
         """Generate tags and insights for a chunk using LLM."""
         try:
             logger.info(f"Calling LLM with chunk: {chunk!r}")
-            response = await self.llm.ainvoke(
-                self.tagging_prompt.format_messages(chunk=chunk)
-            )
+            for attempt in range(TAGGING_MAX_RETRIES + 1):
+                if pacer:
+                    await pacer.wait()
+                try:
+                    response = await self.llm.ainvoke(
+                        self.tagging_prompt.format_messages(chunk=chunk)
+                    )
+                    break
+                except Exception as e:
+                    if attempt == TAGGING_MAX_RETRIES or not _is_rate_limit_error(e):
+                        raise
+                    delay = TAGGING_RETRY_DELAY * 2 ** attempt
+                    logger.warning(f"LLM rate limited, retrying in {delay:.0f}s: {str(e)}")
+                    await asyncio.sleep(delay)
             logger.info(f"LLM full response object: {response!r}")
             logger.info(f"LLM raw response content: {getattr(response, 'content', None)!r}")
             
@@ -95,30 +169,71 @@ class TranscriptProcessor:
             }
     
     async def process_transcript(self, transcript: List[Dict[str, Any]]) -> None:
-        """Process a transcript and store it in ChromaDB with tags."""
+        """Process a transcript and store it in ChromaDB with tags.
+        
+        Chunks are tagged concurrently (at most ``tagging_concurrency`` LLM
+        calls in flight) and written with one upsert. Chunk IDs are derived
+        from the session ID, chunk index and content, so re-processing a
+        transcript replaces its chunks instead of duplicating them.
+        """
         try:
             # Extract messages from transcript
             messages = [msg["content"] for msg in transcript if "content" in msg]
             text = "\n".join(messages)
+            has_session_id = bool(transcript and transcript[0].get("session_id"))
+            session_id = transcript[0]["session_id"] if has_session_id else "unknown"
             
             # Split text into chunks
             chunks = self.text_splitter.split_text(text)
             
-            # Process each chunk
-            for i, chunk in enumerate(chunks):
-                # Generate tags for the chunk
-                tags = await self._generate_tags(chunk)
-                
-                # Add chunk to ChromaDB with metadata
-                self.collection.add(
-                    documents=[chunk],
-                    metadatas=[{
-                        "chunk_id": i,
-                        "session_id": transcript[0].get("session_id", "unknown"),
-                        **tags
-                    }],
-                    ids=[f"chunk_{i}"]
+            # Generate tags for all chunks with bounded concurrency
+            start = time.perf_counter()
+            semaphore = asyncio.Semaphore(self.tagging_concurrency)
+            pacer = _RequestPacer(self.requests_per_minute)
+            
+            async def tag(chunk: str) -> dict:
+                async with semaphore:
+                    return await self._generate_tags(chunk, pacer)
+            
+            tags = await asyncio.gather(*(tag(chunk) for chunk in chunks))
+            logger.info(f"Tagged {len(chunks)} chunks in {time.perf_counter() - start:.2f}s")
+            
+            ids = [chunk_document_id(session_id, i, chunk) for i, chunk in enumerate(chunks)]
+            metadatas = [
+                {
+                    "chunk_id": i,
+                    "session_id": session_id,
+                    **chunk_tags
+                }
+                for i, chunk_tags in enumerate(tags)
+            ]
+            
+            # Drop chunks from an earlier run of this session that no longer exist.
+            # Transcripts without a session ID share the "unknown" fallback, so
+            # nothing is deleted for them, and only IDs this session generated
+            # (see chunk_document_id) are ever considered stale.
+            stale = []
+            if has_session_id:
+                prefix = f"{session_id}:"
+                existing = self.collection.get(where={"session_id": session_id}, include=[])["ids"]
+                stale = sorted(chunk_id for chunk_id in set(existing) - set(ids) if chunk_id.startswith(prefix))
+            if stale:
+                self.collection.delete(ids=stale)
+                self.lexical_index.remove_many(stale)
+            
+            # Add chunks to ChromaDB with metadata
+            if chunks:
+                self.collection.upsert(
+                    documents=chunks,
+                    metadatas=metadatas,
+                    ids=ids
                 )
+            self.lexical_index.update_many(
+                (chunk_id,
+                 [{"text": chunk, **{field: metadata.get(field) for field in LEXICAL_FILTER_FIELDS}}],
+                 {"content": chunk, "metadata": metadata})
+                for chunk_id, chunk, metadata in zip(ids, chunks, metadatas)
+            )
             
             logger.info(f"Successfully processed transcript with {len(chunks)} chunks")
             
@@ -155,6 +270,64 @@ class TranscriptProcessor:
         except Exception as e:
             logger.error(f"Error searching transcript: {str(e)}")
             return []
+    
+    def hybrid_search(
+        self,
+        query: str,
+        n_results: int = 5,
+        where: Optional[Dict[str, Any]] = None,
+        mode: str = "hybrid"
+    ) -> List[Dict[str, Any]]:
+        """Search the transcript collection with BM25, vectors or both fused.
+        
+        Args:
+            query (str): The search text
+            n_results (int): Number of results
+            where (Dict, optional): ChromaDB-style equality filter on
+                session_id, sentiment or speaker
+            mode (str): ``hybrid``, ``vector`` or ``lexical``
+            
+        Returns:
+            List[Dict]: ``{'id', 'text', 'metadata', 'distance', 'score',
+                'snippet', 'lexical_rank', 'vector_rank'}`` per chunk, best
+                first; ``score`` is higher-is-better in every mode, and
+                ``distance`` is the cosine distance of vector hits
+            
+        Raises:
+            ValueError: For an unknown mode or an unsupported filter
+        """
+        if mode == "vector" and where:
+            # ChromaDB evaluates any where clause itself
+            hits = [dict(hit, lexical_rank=None, vector_rank=rank, snippet=None)
+                    for rank, hit in enumerate(self._vector_search(query, n_results, where), 1)]
+        else:
+            hits = self.retriever.search(query, k=n_results, mode=mode, filters=filters_from_where(where))
+        return [{
+            "id": hit["id"],
+            "text": hit["content"],
+            "metadata": hit["metadata"],
+            "distance": hit.get("distance"),
+            "score": hit["score"],
+            "snippet": hit["snippet"],
+            "lexical_rank": hit["lexical_rank"],
+            "vector_rank": hit["vector_rank"]
+        } for hit in hits]
+    
+    def _vector_search(self, query: str, n_results: int, where: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        if where and not any(key.startswith("$") for key in where):
+            where = chroma_where(where)
+        results = self.collection.query(query_texts=[query], n_results=n_results, where=where or None)
+        distances = results.get("distances") or [[None] * len(results["ids"][0])]
+        return [{
+            "id": chunk_id,
+            "content": document,
+            "metadata": metadata,
+            # Higher is better, like the lexical and fused scores
+            "score": 1.0 - distance if distance is not None else None,
+            "distance": distance
+        } for chunk_id, document, metadata, distance in zip(
+            results["ids"][0], results["documents"][0], results["metadatas"][0], distances[0]
+        )]
 
 async def main():
     # Example usage
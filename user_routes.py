@@ -36,7 +36,7 @@ def change_password():
         return redirect(url_for('user.profile'))
     
     # Update password
-    repo = UserRepository()
+    repo = UserRepository.get_instance()
     user = repo.get_user_by_id(current_user.id)
     
     if not user:
@@ -61,7 +61,7 @@ def admin_users():
         flash('Access denied. Admin privileges required.', 'danger')
         return redirect(url_for('dashboard'))
     
-    repo = UserRepository()
+    repo = UserRepository.get_instance()
     users = list(repo.users.values())
     
     return render_template('admin/users.html', users=users)
@@ -89,7 +89,7 @@ def add_user():
         return redirect(url_for('user.admin_users'))
     
     # Check if user already exists
-    repo = UserRepository()
+    repo = UserRepository.get_instance()
     if repo.get_user_by_username(username):
         flash(f'Username "{username}" is already taken', 'danger')
         return redirect(url_for('user.admin_users'))
@@ -141,7 +141,7 @@ def reset_user_password():
         return redirect(url_for('user.admin_users'))
     
     # Get user and update password
-    repo = UserRepository()
+    repo = UserRepository.get_instance()
     user = repo.get_user_by_username(username)
     
     if not user:
@@ -178,7 +178,7 @@ def delete_user():
         return redirect(url_for('user.admin_users'))
     
     # Delete user
-    repo = UserRepository()
+    repo = UserRepository.get_instance()
     user = repo.get_user_by_username(username)
     
     if not user:
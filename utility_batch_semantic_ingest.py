@@ -1,32 +1,59 @@
+import sys
+import time
+
 import requests
 import json
 from pathlib import Path
 
-def ingest_transcript(transcript, session_id):
-    url = "http://127.0.0.1:5025/api/semantic_ingest"
+API_URL = "http://127.0.0.1:5025"
+
+def ingest_transcript(transcript, session_id, messages=None):
+    """Queue a session for ingestion and wait for the job; True if it completed.
+
+    Sessions are identified by session_id, so re-running only ingests new or
+    edited messages and removes deleted ones.
+    """
+    url = f"{API_URL}/api/semantic_ingest"
     payload = {
-        "transcript": transcript,
         "metadata": {"session_id": session_id}
     }
+    if messages:
+        payload["messages"] = messages
+    else:
+        payload["transcript"] = transcript
     print(f"Ingesting session {session_id}...")
     response = requests.post(url, json=payload)
-    print(f"Session {session_id}: {response.status_code} {response.text}")
-    print(f"Finished session {session_id}")
+    if not response.ok:
+        print(f"Session {session_id}: {response.status_code} {response.text}")
+        return False
+    job_id = response.json()["job_id"]
+    while True:
+        job = requests.get(f"{API_URL}/api/semantic_ingest/jobs/{job_id}").json()
+        if job["status"] in ("completed", "failed"):
+            break
+        time.sleep(2)
+    print(f"Finished session {session_id}: {job['status']}, {job['total_chunks']} new chunks"
+          f"{', ' + job['error'] if job.get('error') else ''}")
+    return job["status"] == "completed"
 
 if __name__ == "__main__":
     SESSIONS_DIR = Path("data/interviews/sessions")
+    failures = 0
     for session_file in SESSIONS_DIR.glob("*.json"):
         session_id = session_file.stem
         with open(session_file) as f:
             session_data = json.load(f)
             # Adjust this line if your transcript is stored differently
             transcript = session_data.get("transcript")
-            if not transcript:
-                # If transcript is a list of messages, join them
-                messages = session_data.get("messages")
-                if messages and isinstance(messages, list):
-                    transcript = " ".join(m.get("content", "") for m in messages)
-            if transcript:
-                ingest_transcript(transcript, session_id)
+            messages = session_data.get("messages")
+            if messages and isinstance(messages, list):
+                messages = [m.get("content", "") for m in messages if m.get("content")]
+            else:
+                messages = None
+            if transcript or messages:
+                if not ingest_transcript(transcript, session_id, messages):
+                    failures += 1
             else:
-                print(f"Session {session_id} has no transcript or messages.")
\ No newline at end of file
+                print(f"Session {session_id} has no transcript or messages.")
+    # Non-zero exit status when any session failed, for cron
+    sys.exit(1 if failures else 0)
@@ -1,28 +1,47 @@
+import sys
+import time
+
 import requests
 
 API_URL = "http://127.0.0.1:5025"
 
 def get_sessions():
-    resp = requests.get(f"{API_URL}/api/sessions")
+    resp = requests.get(f"{API_URL}/api/sessions", params={"include": "messages"})
     resp.raise_for_status()
     return resp.json()
 
 def ingest_session(session):
+    """Queue a session for ingestion and wait for it; returns the finished job or None."""
     transcript = session.get("transcript", "")
-    if not transcript.strip():
+    messages = [m.get("content", "") for m in session.get("messages") or [] if m.get("content")]
+    if not transcript.strip() and not messages:
         print(f"Skipping session {session['id']} (no transcript)")
-        return False
+        return None
     metadata = {k: v for k, v in session.items() if k not in ("transcript", "messages") and v is not None}
-    resp = requests.post(f"{API_URL}/api/semantic_ingest", json={
-        "transcript": transcript,
-        "metadata": metadata
-    })
+    # The session id lets the server skip chunks it has already ingested
+    metadata["session_id"] = session["id"]
+    payload = {"messages": messages} if messages else {"transcript": transcript}
+    resp = requests.post(f"{API_URL}/api/semantic_ingest", json=dict(payload, metadata=metadata))
     if resp.ok:
-        print(f"Semantic ingest OK for {session['id']}")
-        return True
+        # Ingestion runs in the background; wait for it before analyzing
+        job = wait_for_ingest_job(resp.json()["job_id"])
+        if job.get("status") != "completed":
+            print(f"Semantic ingest {job.get('status')} for {session['id']}: {job.get('error')}")
+            return None
+        print(f"Semantic ingest OK for {session['id']} ({job.get('total_chunks')} new chunks)")
+        return job
     else:
         print(f"Semantic ingest FAILED for {session['id']}: {resp.text}")
-        return False
+        return None
+
+def wait_for_ingest_job(job_id, poll_seconds=2):
+    while True:
+        resp = requests.get(f"{API_URL}/api/semantic_ingest/jobs/{job_id}")
+        resp.raise_for_status()
+        job = resp.json()
+        if job["status"] in ("completed", "failed"):
+            return job
+        time.sleep(poll_seconds)
 
 def analyze_session(session_id):
     # Try both endpoints, depending on your API
@@ -44,12 +63,19 @@ def analyze_session(session_id):
 def main():
     sessions = get_sessions()
     print(f"Found {len(sessions)} sessions")
+    failures = 0
     for session in sessions:
         sid = session.get("id")
         print(f"\nProcessing session: {sid}")
-        ingested = ingest_session(session)
-        if ingested:
+        job = ingest_session(session)
+        if job is None:
+            failures += 1
+        elif job.get("total_chunks"):
             analyze_session(sid)
+        else:
+            print(f"No new chunks for {sid}, skipping analysis")
+    return failures
 
 if __name__ == "__main__":
-    main()
+    # Non-zero exit status when any session failed, for cron
+    sys.exit(1 if main() else 0)
@@ -0,0 +1,512 @@
+"""
+One interface over the vector stores used across the app.
+
+Chunk vectors are kept in ChromaDB (vector_store.py, transcript_processor.py,
+semantic_search), Qdrant (semantic_analysis.py) and FAISS
+(src/vector_store.py), each with its own ID types, filter syntax and score
+direction. A VectorIndex hides those differences:
+
+- IDs are strings, and upserting an existing ID replaces its vector
+- ``query`` returns ``{'id', 'score', 'metadata'}`` dicts, best first, where
+  ``score`` is the cosine similarity (higher is better) for every backend
+- ``filters`` is a dict of metadata equality conditions, all of which must
+  hold (``None`` values are ignored, as in ``hybrid_search.chroma_where``)
+- ``persist`` writes the index to its ``path``, when it has one
+
+``create_vector_index`` builds one by backend name. NumpyIndex is an exact
+brute-force baseline, which scripts/benchmark_vector_index.py uses as the
+ground truth when measuring the other backends' recall; it can also hold
+float16 or int8 vectors to measure what quantization costs.
+"""
+
+import io
+import logging
+import os
+import uuid
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from hybrid_search import chroma_where
+from quantization import RESCORE_MULTIPLIER, RowFile, dequantize, quantize, rescore, resolve_precision, similarity
+from serialization import dumpb, loads
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("numpy", "faiss", "chroma", "qdrant")
+# With filters, backends that can't filter inside the index fetch this many
+# candidates per requested result before filtering
+FILTER_CANDIDATE_MULTIPLIER = 10
+
+
+def _normalized(vectors: Any) -> np.ndarray:
+    array = np.array(vectors, dtype="float32", ndmin=2)
+    norms = np.linalg.norm(array, axis=1, keepdims=True)
+    return array / np.where(norms == 0, 1.0, norms)
+
+
+def _matches(metadata: Optional[Dict[str, Any]], filters: Dict[str, Any]) -> bool:
+    metadata = metadata or {}
+    return all(metadata.get(field) == value for field, value in filters.items())
+
+
+def _active_filters(filters: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    return {field: value for field, value in (filters or {}).items() if value is not None}
+
+
+def path_size(path: Optional[str]) -> int:
+    """Bytes on disk under a file or directory path (0 if there is none)."""
+    if not path or not os.path.exists(path):
+        return 0
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    total = 0
+    for root, _, files in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(root, name)) for name in files)
+    return total
+
+
+class VectorIndex:
+    """Cosine-similarity vector index with string IDs and metadata filters."""
+
+    backend = None
+
+    def __init__(self, dimension: int, path: Optional[str] = None):
+        self.dimension = dimension
+        self.path = path
+
+    def upsert(self, ids: Sequence[str], vectors: Any,
+               metadatas: Optional[Sequence[Optional[Dict[str, Any]]]] = None) -> None:
+        """Store vectors under ``ids``, replacing any already stored under them."""
+        raise NotImplementedError
+
+    def delete(self, ids: Iterable[str]) -> None:
+        """Remove vectors by ID; unknown IDs are ignored."""
+        raise NotImplementedError
+
+    def query(self, vectors: Any, k: int = 10,
+              filters: Optional[Dict[str, Any]] = None) -> List[List[Dict[str, Any]]]:
+        """Nearest neighbours of each query vector.
+
+        Args:
+            vectors: One query vector or a sequence of them
+            k (int): Results per query
+            filters (Dict[str, Any], optional): Metadata equality conditions
+
+        Returns:
+            List[List[Dict[str, Any]]]: Per query, ``{'id', 'score',
+                'metadata'}`` dicts ordered by descending cosine similarity
+        """
+        raise NotImplementedError
+
+    def persist(self) -> None:
+        """Write the index to ``path`` (a no-op for backends that write through)."""
+
+    def count(self) -> int:
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        return self.count()
+
+    def disk_bytes(self) -> int:
+        return path_size(self.path)
+
+    def memory_bytes(self) -> Optional[int]:
+        """Bytes of vector data held in memory, for backends that can tell."""
+        return None
+
+    def _check(self, ids: Sequence[str], vectors: Any, metadatas) -> tuple:
+        ids = [str(vector_id) for vector_id in ids]
+        vectors = np.array(vectors, dtype="float32", ndmin=2)
+        if len(ids) and vectors.shape != (len(ids), self.dimension):
+            raise ValueError(f"Expected {len(ids)} vectors of dimension {self.dimension}, got {vectors.shape}")
+        if len(set(ids)) != len(ids):
+            raise ValueError("Duplicate IDs in one upsert")
+        if metadatas is None:
+            metadatas = [None] * len(ids)
+        elif len(metadatas) != len(ids):
+            raise ValueError(f"Expected {len(ids)} metadata entries, got {len(metadatas)}")
+        return ids, vectors, [dict(metadata or {}) for metadata in metadatas]
+
+
+class NumpyIndex(VectorIndex):
+    """Brute-force search over an in-memory matrix of normalized vectors.
+
+    With ``precision`` float16 or int8 the matrix holds quantized codes (see
+    quantization.py) and scores are approximate. ``rescore`` also keeps the
+    float32 vectors, in a RowFile at ``<path>.float32``, and re-ranks each
+    query's best candidates by their exact scores. An index loaded from
+    ``path`` keeps the precision it was written with.
+    """
+
+    backend = "numpy"
+
+    def __init__(self, dimension: int, path: Optional[str] = None, precision: Optional[str] = None,
+                 rescore: bool = False):
+        super().__init__(dimension, path)
+        self.precision = resolve_precision(precision)
+        # Rows beyond count() are spare capacity, so appends don't copy the matrix each time
+        self._codes = np.zeros((0, dimension), dtype=self.precision)
+        self._scales = np.zeros(0, dtype=np.float32)
+        self._ids: List[str] = []
+        self._metadatas: List[Dict[str, Any]] = []
+        self._rows: Dict[str, int] = {}
+        if path and os.path.exists(path):
+            self._load()
+        self.rescore = rescore and self.precision != "float32"
+        self._originals = None
+        if self.rescore:
+            if not path:
+                raise ValueError("Rescoring keeps the float32 vectors on disk and needs a path")
+            self._originals = RowFile(f"{path}.float32", dimension)
+            if len(self._originals) != self.count():
+                logger.warning(f"Rescoring file {self._originals.path} is out of step, rebuilding it from the codes")
+                self._originals.keep(np.zeros(len(self._originals), dtype=bool))
+                self._originals.append(_normalized(self._dequantized()))
+
+    def count(self) -> int:
+        return len(self._ids)
+
+    def memory_bytes(self) -> int:
+        count = self.count()
+        return self._codes[:count].nbytes + (self._scales[:count].nbytes if self.precision == "int8" else 0)
+
+    def disk_bytes(self) -> int:
+        return super().disk_bytes() + (path_size(self._originals.path) if self._originals is not None else 0)
+
+    def _matrix(self, rows=None) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        count = self.count()
+        codes, scales = self._codes[:count], self._scales[:count] if self.precision == "int8" else None
+        if rows is not None:
+            codes, scales = codes[rows], scales[rows] if scales is not None else None
+        return codes, scales
+
+    def _dequantized(self) -> np.ndarray:
+        return dequantize(*self._matrix())
+
+    def upsert(self, ids, vectors, metadatas=None) -> None:
+        ids, vectors, metadatas = self._check(ids, vectors, metadatas)
+        if not ids:
+            return
+        vectors = _normalized(vectors)
+        codes, scales = quantize(vectors, self.precision)
+        appended = []
+        for i, (vector_id, metadata) in enumerate(zip(ids, metadatas)):
+            row = self._rows.get(vector_id)
+            if row is None:
+                appended.append(i)
+                continue
+            self._codes[row] = codes[i]
+            if scales is not None:
+                self._scales[row] = scales[i]
+            self._metadatas[row] = metadata
+            if self._originals is not None:
+                self._originals.write(row, vectors[i])
+        if appended:
+            start = len(self._ids)
+            end = start + len(appended)
+            if end > len(self._codes):
+                capacity = max(end, 2 * len(self._codes))
+                grown = np.zeros((capacity, self.dimension), dtype=self._codes.dtype)
+                grown[:start] = self._codes[:start]
+                grown_scales = np.zeros(capacity, dtype=np.float32)
+                grown_scales[:start] = self._scales[:start]
+                self._codes, self._scales = grown, grown_scales
+            self._codes[start:end] = codes[appended]
+            if scales is not None:
+                self._scales[start:end] = scales[appended]
+            if self._originals is not None:
+                self._originals.append(vectors[appended])
+            for offset, i in enumerate(appended):
+                self._rows[ids[i]] = start + offset
+                self._ids.append(ids[i])
+                self._metadatas.append(metadatas[i])
+
+    def delete(self, ids) -> None:
+        rows = sorted({self._rows[vector_id] for vector_id in map(str, ids) if vector_id in self._rows})
+        if not rows:
+            return
+        keep = np.ones(len(self._ids), dtype=bool)
+        keep[rows] = False
+        count = self.count()
+        self._codes = self._codes[:count][keep]
+        self._scales = self._scales[:count][keep]
+        if self._originals is not None:
+            self._originals.keep(keep)
+        self._ids = [vector_id for vector_id, kept in zip(self._ids, keep) if kept]
+        self._metadatas = [metadata for metadata, kept in zip(self._metadatas, keep) if kept]
+        self._rows = {vector_id: row for row, vector_id in enumerate(self._ids)}
+
+    def query(self, vectors, k=10, filters=None):
+        queries = _normalized(vectors)
+        filters = _active_filters(filters)
+        if filters:
+            candidates = np.array([row for row, metadata in enumerate(self._metadatas) if _matches(metadata, filters)],
+                                  dtype="int64")
+            codes, scales = self._matrix(candidates)
+        else:
+            candidates = np.arange(len(self._ids))
+            codes, scales = self._matrix()
+        k = min(k, len(candidates))
+        if k <= 0:
+            return [[] for _ in range(len(queries))]
+
+        scores = similarity(codes, scales, queries)
+        fetch = min(k * RESCORE_MULTIPLIER, len(candidates)) if self.rescore else k
+        results = []
+        for query, row_scores in zip(queries, scores):
+            top = np.argpartition(-row_scores, fetch - 1)[:fetch]
+            if self.rescore:
+                hits = rescore(query, candidates[top], self._originals, k)
+            else:
+                top = top[np.argsort(-row_scores[top])]
+                hits = [(candidates[i], float(row_scores[i])) for i in top]
+            results.append([
+                {"id": self._ids[row], "score": score, "metadata": self._metadatas[row]}
+                for row, score in hits
+            ])
+        return results
+
+    def persist(self) -> None:
+        if not self.path:
+            return
+        if self._originals is not None:
+            self._originals.flush()
+        codes, scales = self._matrix()
+        arrays = {"vectors": codes}
+        if scales is not None:
+            arrays["scales"] = scales
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, **arrays, meta=np.frombuffer(dumpb({
+                "precision": self.precision, "ids": self._ids, "metadatas": self._metadatas
+            }), dtype="uint8"))
+        os.replace(tmp_path, self.path)
+
+    def _load(self) -> None:
+        with open(self.path, "rb") as f:
+            data = f.read()
+        with np.load(io.BytesIO(data), allow_pickle=False) as bundle:
+            meta = loads(bundle["meta"].tobytes())
+            self._codes = bundle["vectors"]
+            self._scales = bundle["scales"] if "scales" in bundle.files else np.zeros(len(self._codes), np.float32)
+        self.precision = meta.get("precision", "float32")
+        self._ids = meta["ids"]
+        self._metadatas = meta["metadatas"]
+        self._rows = {vector_id: row for row, vector_id in enumerate(self._ids)}
+
+
+class FaissIndex(VectorIndex):
+    """chunk_index.ChunkIndex (flat, or HNSW/IVF above its threshold); filters are applied to over-fetched results."""
+
+    backend = "faiss"
+
+    def __init__(self, dimension: int, path: Optional[str] = None, ann_type: Optional[str] = None,
+                 ann_threshold: Optional[int] = None):
+        from chunk_index import ChunkIndex
+
+        super().__init__(dimension, path)
+        if path and ChunkIndex.is_index_file(path):
+            self.index = ChunkIndex.load(path)
+        else:
+            self.index = ChunkIndex(dimension, ann_type=ann_type, ann_threshold=ann_threshold)
+
+    def count(self) -> int:
+        return len(self.index)
+
+    def upsert(self, ids, vectors, metadatas=None) -> None:
+        from chunk_index import stable_id
+
+        ids, vectors, metadatas = self._check(ids, vectors, metadatas)
+        self.index.upsert([stable_id(vector_id) for vector_id in ids], vectors,
+                          [{"id": vector_id, "metadata": metadata} for vector_id, metadata in zip(ids, metadatas)])
+
+    def delete(self, ids) -> None:
+        from chunk_index import stable_id
+
+        self.index.remove(stable_id(str(vector_id)) for vector_id in ids)
+
+    def query(self, vectors, k=10, filters=None):
+        queries = np.array(vectors, dtype="float32", ndmin=2)
+        filters = _active_filters(filters)
+        fetch = k * FILTER_CANDIDATE_MULTIPLIER if filters else k
+        results = [None] * len(queries)
+        pending = list(range(len(queries)))
+        while pending:
+            hits = self.index.search(queries[pending], fetch)
+            retry = []
+            for position, row in zip(pending, hits):
+                matched = []
+                for vector_id, score in row:
+                    entry = self.index.metadata[vector_id]
+                    if _matches(entry["metadata"], filters):
+                        matched.append({"id": entry["id"], "score": score, "metadata": entry["metadata"]})
+                results[position] = matched[:k]
+                # Too few matches among the candidates: widen the search
+                if len(matched) < k and len(row) == fetch and fetch < len(self.index):
+                    retry.append(position)
+            pending = retry
+            fetch = min(fetch * 4, len(self.index))
+        return results
+
+    def persist(self) -> None:
+        if self.path:
+            self.index.save(self.path)
+
+
+class ChromaIndex(VectorIndex):
+    """ChromaDB collection with cosine distance; persistent when given a path."""
+
+    backend = "chroma"
+
+    def __init__(self, dimension: int, path: Optional[str] = None, collection: Optional[str] = None):
+        import chromadb
+        from chromadb.config import Settings
+
+        super().__init__(dimension, path)
+        settings = Settings(anonymized_telemetry=False)
+        if path:
+            self.client = chromadb.PersistentClient(path=path, settings=settings)
+        else:
+            # In-memory clients share state within a process, so default to a fresh collection
+            self.client = chromadb.EphemeralClient(settings=settings)
+        self.collection = self.client.get_or_create_collection(
+            name=collection or f"vectors-{uuid.uuid4().hex}",
+            metadata={"hnsw:space": "cosine"}
+        )
+        self.batch_size = self.client.get_max_batch_size()
+
+    def count(self) -> int:
+        return self.collection.count()
+
+    def upsert(self, ids, vectors, metadatas=None) -> None:
+        ids, vectors, metadatas = self._check(ids, vectors, metadatas)
+        for start in range(0, len(ids), self.batch_size):
+            end = start + self.batch_size
+            self.collection.upsert(
+                ids=ids[start:end],
+                embeddings=vectors[start:end],
+                metadatas=[metadata or None for metadata in metadatas[start:end]]
+            )
+
+    def delete(self, ids) -> None:
+        ids = [str(vector_id) for vector_id in ids]
+        if ids:
+            self.collection.delete(ids=ids)
+
+    def query(self, vectors, k=10, filters=None):
+        queries = np.array(vectors, dtype="float32", ndmin=2)
+        k = min(k, self.count())
+        if k <= 0:
+            return [[] for _ in range(len(queries))]
+        results = self.collection.query(
+            query_embeddings=queries,
+            n_results=k,
+            where=chroma_where(filters),
+            include=["metadatas", "distances"]
+        )
+        return [
+            [{"id": vector_id, "score": 1.0 - float(distance), "metadata": metadata or {}}
+             for vector_id, distance, metadata in zip(ids, distances, metadatas)]
+            for ids, distances, metadatas in zip(results["ids"], results["distances"], results["metadatas"])
+        ]
+
+
+class QdrantIndex(VectorIndex):
+    """Qdrant collection with cosine distance (local mode); persistent when given a path.
+
+    Qdrant point IDs must be integers or UUIDs, so each string ID is mapped to
+    a UUID5 and kept in the payload next to the metadata.
+    """
+
+    backend = "qdrant"
+
+    UPSERT_BATCH_SIZE = 256
+
+    def __init__(self, dimension: int, path: Optional[str] = None, collection: str = "vectors"):
+        from qdrant_client import QdrantClient
+        from qdrant_client.http import models
+
+        super().__init__(dimension, path)
+        self.models = models
+        self.client = QdrantClient(path=path) if path else QdrantClient(":memory:")
+        self.collection = collection
+        if not self.client.collection_exists(collection):
+            self.client.create_collection(
+                collection_name=collection,
+                vectors_config=models.VectorParams(size=dimension, distance=models.Distance.COSINE)
+            )
+
+    @staticmethod
+    def point_id(vector_id: str) -> str:
+        return str(uuid.uuid5(uuid.NAMESPACE_URL, vector_id))
+
+    def count(self) -> int:
+        return self.client.count(collection_name=self.collection, exact=True).count
+
+    def upsert(self, ids, vectors, metadatas=None) -> None:
+        ids, vectors, metadatas = self._check(ids, vectors, metadatas)
+        points = [
+            self.models.PointStruct(id=self.point_id(vector_id), vector=vector.tolist(),
+                                    payload={"id": vector_id, "metadata": metadata})
+            for vector_id, vector, metadata in zip(ids, vectors, metadatas)
+        ]
+        for start in range(0, len(points), self.UPSERT_BATCH_SIZE):
+            self.client.upsert(collection_name=self.collection, points=points[start:start + self.UPSERT_BATCH_SIZE])
+
+    def delete(self, ids) -> None:
+        point_ids = [self.point_id(str(vector_id)) for vector_id in ids]
+        if point_ids:
+            self.client.delete(collection_name=self.collection,
+                               points_selector=self.models.PointIdsList(points=point_ids))
+
+    def query(self, vectors, k=10, filters=None):
+        queries = np.array(vectors, dtype="float32", ndmin=2)
+        filters = _active_filters(filters)
+        query_filter = None
+        if filters:
+            query_filter = self.models.Filter(must=[
+                self.models.FieldCondition(key=f"metadata.{field}", match=self.models.MatchValue(value=value))
+                for field, value in filters.items()
+            ])
+        results = []
+        for query in queries:
+            hits = self.client.query_points(
+                collection_name=self.collection,
+                query=query.tolist(),
+                limit=k,
+                query_filter=query_filter,
+                with_payload=True
+            ).points
+            results.append([
+                {"id": hit.payload["id"], "score": float(hit.score), "metadata": hit.payload.get("metadata") or {}}
+                for hit in hits
+            ])
+        return results
+
+
+_BACKEND_CLASSES = {
+    "numpy": NumpyIndex,
+    "faiss": FaissIndex,
+    "chroma": ChromaIndex,
+    "qdrant": QdrantIndex,
+}
+
+
+def create_vector_index(backend: str, dimension: int, path: Optional[str] = None, **options) -> VectorIndex:
+    """Build a VectorIndex.
+
+    Args:
+        backend (str): One of BACKENDS
+        dimension (int): Vector dimension
+        path (str, optional): Where to persist the index (in memory if omitted)
+        **options: Backend-specific options (e.g. ``ann_type`` for faiss,
+            ``collection`` for chroma and qdrant)
+
+    Raises:
+        ValueError: For an unknown backend
+    """
+    if backend not in _BACKEND_CLASSES:
+        raise ValueError(f"Unknown vector index backend '{backend}' (expected one of {', '.join(BACKENDS)})")
+    return _BACKEND_CLASSES[backend](dimension, path=path, **options)
@@ -1,18 +1,91 @@
 import chromadb
+import os
+import threading
 import uuid
 
-client = chromadb.Client()
-collection = client.get_or_create_collection("daria_transcripts")
-
-def add_chunks_to_vector_store(chunks, embeddings, metadatas):
-    for chunk, embedding, metadata in zip(chunks, embeddings, metadatas):
-        collection.add(
-            documents=[chunk],
-            embeddings=[embedding],
-            metadatas=[metadata],
-            ids=[str(uuid.uuid4())]
-        )
+from full_text_index import FullTextIndex
+from hybrid_search import HybridRetriever, chroma_where
+
+VECTOR_STORE_PATH_ENV = "DARIA_VECTOR_STORE_PATH"
+DEFAULT_VECTOR_STORE_PATH = os.path.join("data", "search", "chroma")
+LEXICAL_INDEX_PATH_ENV = "DARIA_LEXICAL_INDEX_PATH"
+DEFAULT_LEXICAL_INDEX_PATH = os.path.join("data", "search", "semantic_chunks.db")
+# IDs per collection.get call when checking which vectors exist
+ID_CHECK_BATCH_SIZE = 500
+
+# Persisted next to the lexical index and the ingest ledger, so all three
+# describe the same chunks after a restart
+client = chromadb.PersistentClient(path=os.environ.get(VECTOR_STORE_PATH_ENV, DEFAULT_VECTOR_STORE_PATH))
+collection = client.get_or_create_collection("daria_transcripts", metadata={"hnsw:space": "cosine"})
+# Chunk metadata the search endpoints can filter on
+FILTER_FIELDS = ("session_id", "speaker", "emotion")
+
+_lexical_index = None
+_retriever = None
+_lock = threading.Lock()
+
+def get_lexical_index():
+    """BM25 index over the chunks added with add_chunks_to_vector_store, keyed by the same IDs."""
+    global _lexical_index
+    with _lock:
+        if _lexical_index is None:
+            path = os.environ.get(LEXICAL_INDEX_PATH_ENV, DEFAULT_LEXICAL_INDEX_PATH)
+            _lexical_index = FullTextIndex(path, ("content",), attributes=FILTER_FIELDS)
+        return _lexical_index
+
+def get_retriever():
+    """Hybrid (BM25 + vector) retriever over the transcript chunks."""
+    global _retriever
+    if _retriever is None:
+        _retriever = HybridRetriever(get_lexical_index(), vector_search, FILTER_FIELDS)
+    return _retriever
+
+def add_chunks_to_vector_store(chunks, embeddings, metadatas, ids=None):
+    """Store chunks; with explicit ids, existing chunks with those ids are overwritten."""
+    if ids is None:
+        ids = [str(uuid.uuid4()) for _ in chunks]
+    ids = list(ids)
+    if not ids:
+        return ids
+    collection.upsert(
+        documents=list(chunks),
+        embeddings=list(embeddings),
+        metadatas=list(metadatas),
+        ids=ids
+    )
+    get_lexical_index().update_many(
+        (chunk_id, [{"content": chunk, **{field: metadata.get(field) for field in FILTER_FIELDS}}],
+         {"content": chunk, "metadata": metadata})
+        for chunk_id, chunk, metadata in zip(ids, chunks, metadatas)
+    )
     #client.persist()
+    return ids
+
+def delete_chunks_from_vector_store(ids):
+    ids = list(ids)
+    if not ids:
+        return
+    collection.delete(ids=ids)
+    get_lexical_index().remove_many(ids)
+
+def missing_vector_ids(ids):
+    """The given IDs that have no vector in the collection."""
+    ids = list(ids)
+    found = set()
+    for start in range(0, len(ids), ID_CHECK_BATCH_SIZE):
+        found.update(collection.get(ids=ids[start:start + ID_CHECK_BATCH_SIZE], include=[])["ids"])
+    return [chunk_id for chunk_id in ids if chunk_id not in found]
+
+def drop_orphaned_lexical_chunks():
+    """Remove lexical index entries whose vector is gone, so hybrid search only fuses chunks both sides know.
+
+    Returns:
+        list: The removed chunk IDs
+    """
+    lexical_index = get_lexical_index()
+    orphaned = missing_vector_ids(lexical_index.source_ids())
+    lexical_index.remove_many(orphaned)
+    return orphaned
 
 def semantic_search(query_embedding, top_k=10, filters=None):
     query_args = {
@@ -20,7 +93,28 @@ def semantic_search(query_embedding, top_k=10, filters=None):
         "n_results": top_k,
     }
     if filters and isinstance(filters, dict) and len(filters) > 0:
-        query_args["where"] = filters
+        query_args["where"] = chroma_where(filters) if not any(key.startswith("$") for key in filters) else filters
 
     results = collection.query(**query_args)
     return results
+
+def vector_search(query, top_k=10, filters=None):
+    """Embed a query and return the nearest chunks as result dicts (best first)."""
+    from semantic_pipeline import embed_chunks
+
+    results = semantic_search(embed_chunks([query])[0], top_k=top_k, filters=filters)
+    ids = results.get('ids', [[]])[0]
+    docs = results.get('documents', [[]])[0]
+    metas = results.get('metadatas', [[]])[0]
+    dists = results.get('distances', [[]])[0]
+    # Chroma returns cosine distances; score is a similarity (higher is better),
+    # like the lexical and fused scores
+    return [
+        {'id': chunk_id, 'content': doc, 'metadata': meta,
+         'score': 1.0 - dist if dist is not None else None, 'distance': dist}
+        for chunk_id, doc, meta, dist in zip(ids, docs, metas, dists)
+    ]
+
+def hybrid_search(query, top_k=10, mode="hybrid", filters=None):
+    """Search the transcript chunks (see HybridRetriever.search)."""
+    return get_retriever().search(query, k=top_k, mode=mode, filters=filters)